@@ -0,0 +1,334 @@
+"""
+Arduino (step motor + röle + buton) seri portu için asyncio sürücüsü.
+
+Eski düzende komutlar bir thread kuyruğuna konup sabit 100 ms uyunuyor, cevap
+event loop üzerinde bloklayan `queue.get()` ile alınıyordu; eşzamanlı
+çağıranlar birbirinin cevabını alabiliyordu. Burada:
+
+- Her komutun kendi future'ı ve zaman aşımı vardır; cevap, komutun bitiş
+  satırı (ör. "Yeni Pozisyon") geldiği anda döner.
+- Aynı anahtara (motor id) giden komutlar sırayla, farklı motorlara gidenler
+  `max_inflight` kadar üst üste (pipelined) gönderilebilir.
+- Tek bir okuyucu görevi portu sürekli okur; hiçbir komuta ait olmayan
+  satırları (açılış banner'ı, mekanik buton olayları) sınıflandırıp
+  `on_unsolicited` geri çağrısına verir.
+- Zaman aşımına uğrayan gönderilmiş komut "bayat" olarak bekletilir: geç
+  gelen bitiş satırı sonraki komuta eşlenmez, o gelene (veya bayat komut
+  atılana) kadar porta yeni komut yazılmaz.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ARDUINO_COMMAND_TIMEOUT = 2.0   # Hareket süresine eklenen pay; bitiş satırı gelmezse komut başarısız (sn)
+ARDUINO_STALE_MARGIN = 0.5     # Zaman aşımına uğrayan komutun geç cevabı, kendi süresi + bu pay kadar beklenir (sn)
+# v2a.ino: açı başına adım (202.8 adım/tur) ve adım süresi (2 x 5000 µs + her 10 adımda 100 µs)
+ARDUINO_STEPS_PER_DEGREE = 202.8 / 360.0
+ARDUINO_STEP_SECONDS = 0.01001
+ARDUINO_MAX_MOVE_DEGREES = 3455.0   # MAX_ANGLE - MIN_ANGLE
+ARDUINO_MOVE_MARGIN = 1.5           # Hareket süresi tahmini için güvenlik çarpanı
+ARDUINO_MAX_INFLIGHT = 1        # Farklı motorlara aynı anda yazılabilecek komut sayısı
+ARDUINO_POLL_ACTIVE = 0.001     # Cevap beklenirken okuma aralığı (sn)
+ARDUINO_POLL_IDLE = 0.02        # Boştayken okuma aralığı (sn)
+RX_BUFFER_LIMIT = 65536
+
+# Komutun tamamlandığını gösteren satırlar
+TERMINAL_OK = ("Yeni Pozisyon", "Motor dönüş tamamlandı", "Solenoid durumu güncellendi")
+TERMINAL_ERROR = ("Hata", "Geçersiz", "Error", "Invalid")
+
+# Kendiliğinden gelen satır türleri
+LINE_BOOT = "boot"
+LINE_BUTTON = "button"
+LINE_INFO = "info"
+BOOT_PATTERN = re.compile(r"===.*Başladı.*===|Kontrol Sistemi Başladı", re.IGNORECASE)
+BUTTON_PATTERN = re.compile(r"^Buton \d+ basıldı|^Mekanik buton kontrolü", re.IGNORECASE)
+
+
+def move_timeout(command: str, base: float = ARDUINO_COMMAND_TIMEOUT) -> float:
+    """`motor:açı` komutunun bitiş satırı için zaman aşımı: `base` + tahmini hareket süresi"""
+    try:
+        degrees = min(abs(float(command.split(":", 1)[1])), ARDUINO_MAX_MOVE_DEGREES)
+    except (IndexError, ValueError):
+        return base
+    return base + degrees * ARDUINO_STEPS_PER_DEGREE * ARDUINO_STEP_SECONDS * ARDUINO_MOVE_MARGIN
+
+
+def classify_line(line: str) -> str:
+    """Komuta ait olmayan bir satırın türü: boot, button veya info"""
+    if BOOT_PATTERN.search(line):
+        return LINE_BOOT
+    if BUTTON_PATTERN.search(line):
+        return LINE_BUTTON
+    return LINE_INFO
+
+
+@dataclass
+class ArduinoReply:
+    command: str
+    ok: bool
+    lines: List[str] = field(default_factory=list)
+    rtt: Optional[float] = None
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.lines)
+
+
+class _PendingCommand:
+    __slots__ = ("command", "key", "payload", "future", "lines", "queued_at", "sent_at", "stale_since",
+                 "stale_until")
+
+    def __init__(self, command: str, key: Optional[Any], future: asyncio.Future):
+        self.command = command
+        self.key = key
+        self.payload = (command + "\n").encode()
+        self.future = future
+        self.lines: List[str] = []
+        self.queued_at = time.monotonic()
+        self.sent_at: Optional[float] = None
+        # Zaman aşımına uğradı ama bitiş satırı henüz gelmedi (geç cevap bekleniyor)
+        self.stale_since: Optional[float] = None
+        self.stale_until = 0.0
+
+
+class ArduinoChannel:
+    """Arduino portunun tek sahibi: komut kuyruğu, cevap eşleme ve sürekli okuma"""
+
+    def __init__(self, port_getter: Callable[[], Any], timeout: float = ARDUINO_COMMAND_TIMEOUT,
+                 max_inflight: int = ARDUINO_MAX_INFLIGHT,
+                 on_unsolicited: Optional[Callable[[str, str], None]] = None,
+                 on_port_error: Optional[Callable[[Exception], None]] = None,
+                 stale_margin: float = ARDUINO_STALE_MARGIN):
+        self.port_getter = port_getter
+        self.timeout = timeout
+        self.stale_margin = stale_margin
+        self.max_inflight = max(1, max_inflight)
+        self.on_unsolicited = on_unsolicited
+        # Okuma/yazma hatasında çağrılır (port koptu); yeniden bağlanma çağıranın işidir
+        self.on_port_error = on_port_error
+        self._queue: Deque[_PendingCommand] = deque()
+        self._inflight: Deque[_PendingCommand] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._rx = bytearray()
+        self.sent = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.late_replies = 0
+        self.stale_discarded = 0
+        self.unsolicited: Dict[str, int] = {LINE_BOOT: 0, LINE_BUTTON: 0, LINE_INFO: 0}
+
+    def _port(self):
+        port = self.port_getter()
+        if port is None or not getattr(port, "is_open", True):
+            return None
+        return port
+
+    @property
+    def connected(self) -> bool:
+        return self._port() is not None
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    async def send(self, command: str, key: Optional[Any] = None,
+                   timeout: Optional[float] = None) -> ArduinoReply:
+        """Komutu gönderir ve bitiş satırını bekler.
+
+        `key` (ör. motor id) verilirse farklı anahtarlı komutlar üst üste
+        gönderilebilir; anahtarsız komutlar öncekilerin bitmesini bekler.
+        `timeout` verilmezse hareket açısına göre hesaplanır (`move_timeout`).
+        Bağlantı yoksa ConnectionError fırlatır.
+        """
+        if self._port() is None:
+            raise ConnectionError("Arduino bağlantısı yok")
+        item = _PendingCommand(command.strip(), key, asyncio.get_running_loop().create_future())
+        self._queue.append(item)
+        self._event().set()
+        timeout = move_timeout(item.command, self.timeout) if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(item.future), timeout)
+        except asyncio.TimeoutError:
+            item.future.cancel()
+            self.timeouts += 1
+            if item in self._queue:
+                self._queue.remove(item)
+            if item in self._inflight:
+                # Cihaz hâlâ çalışıyor olabilir: bitiş satırı gelene kadar yer tutar,
+                # yoksa geç cevabı sıradaki komutun cevabı sanılırdı. Bekleme komutun kendi
+                # süresine göre: kısa hareket kanalı uzun hareket kadar bekletmez
+                item.stale_since = time.monotonic()
+                item.stale_until = (item.sent_at or item.stale_since) + timeout + self.stale_margin
+            return ArduinoReply(item.command, False, item.lines or ["Zaman aşımı"], None)
+
+    def _dispatch(self):
+        """Gönderilebilir komutları sırayı bozmadan yazar"""
+        if not self._queue:
+            return
+        if self._has_stale():
+            return
+        busy = {p.key for p in self._inflight}
+        barrier = None in busy
+        blocked = set()
+        for item in list(self._queue):
+            if len(self._inflight) >= self.max_inflight or barrier:
+                break
+            if item.future.done():
+                self._queue.remove(item)
+                continue
+            if item.key is None:
+                # Anahtarsız komut: önünde ne varsa bitmeli
+                if self._inflight or blocked:
+                    break
+            elif item.key in busy or item.key in blocked:
+                blocked.add(item.key)
+                continue
+            self._queue.remove(item)
+            if not self._write(item):
+                continue
+            busy.add(item.key)
+            barrier = item.key is None
+
+    def _has_stale(self) -> bool:
+        """Geç cevabı beklenen komut var mı; bekleme süresi (`stale_until`) dolanlar atılır"""
+        now = time.monotonic()
+        stale = False
+        for item in list(self._inflight):
+            if item.stale_since is None:
+                continue
+            if now > item.stale_until:
+                self._inflight.remove(item)
+                self.stale_discarded += 1
+                logger.warning(f"Arduino: '{item.command}' komutunun cevabı gelmedi, bekleme bırakıldı")
+            else:
+                stale = True
+        return stale
+
+    def _write(self, item: _PendingCommand) -> bool:
+        port = self._port()
+        if port is None:
+            item.future.set_exception(ConnectionError("Arduino bağlantısı yok"))
+            return False
+        try:
+            port.write(item.payload)
+        except Exception as e:
+            self.failed += 1
+            item.future.set_exception(e)
+            return False
+        item.sent_at = time.monotonic()
+        self.sent += 1
+        self._inflight.append(item)
+        return True
+
+    async def run(self):
+        """Okuyucu/yazıcı görevi: kuyruğu boşaltır ve portu sürekli okur"""
+        wakeup = self._event()
+        while True:
+            wakeup.clear()
+            try:
+                self._dispatch()
+                for line in self._read_lines():
+                    self._handle_line(line)
+                self._dispatch()
+            except Exception as e:
+                logger.exception("Arduino okuma/yazma hatası")
+                self.reset("Arduino port hatası")
+                if self.on_port_error is not None:
+                    self.on_port_error(e)
+            interval = ARDUINO_POLL_ACTIVE if self._inflight else ARDUINO_POLL_IDLE
+            try:
+                await asyncio.wait_for(wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _read_lines(self) -> List[str]:
+        port = self._port()
+        if port is None:
+            return []
+        waiting = port.in_waiting
+        if not waiting:
+            return []
+        self._rx += port.read(waiting)
+        if b"\n" not in self._rx:
+            if len(self._rx) > RX_BUFFER_LIMIT:
+                self._rx.clear()
+            return []
+        *chunks, rest = self._rx.split(b"\n")
+        self._rx = bytearray(rest)
+        return [line for line in (c.decode(errors="ignore").strip() for c in chunks) if line]
+
+    def _match(self, line: str) -> Optional[_PendingCommand]:
+        if not self._inflight:
+            return None
+        if len(self._inflight) > 1:
+            # Cevapta komutun kendisi veya motor numarası geçiyorsa o komuta, yoksa en eskiye
+            for item in self._inflight:
+                if item.command in line:
+                    return item
+            for item in self._inflight:
+                if item.key is not None and re.search(rf"motor\s*{re.escape(str(item.key))}\b", line, re.IGNORECASE):
+                    return item
+        return self._inflight[0]
+
+    def _handle_line(self, line: str):
+        kind = classify_line(line)
+        item = self._match(line) if kind == LINE_INFO else None
+        if item is None:
+            self.unsolicited[kind] += 1
+            if self.on_unsolicited is not None:
+                self.on_unsolicited(kind, line)
+            else:
+                logger.info(f"Arduino ({kind}): {line}")
+            return
+        item.lines.append(line)
+        if any(marker in line for marker in TERMINAL_OK):
+            ok = True
+        elif any(marker in line for marker in TERMINAL_ERROR):
+            ok = False
+        else:
+            return  # ara satır ("Gelen komut", "Dönüyor"); bitiş satırını bekle
+        self._inflight.remove(item)
+        if item.stale_since is not None:
+            # Zaman aşımından sonra gelen cevap: çağıran çoktan döndü, sıradaki komutlar artık yazılabilir
+            self.late_replies += 1
+            logger.info(f"Arduino geç cevap ({item.command}): {line}")
+            return
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        if not item.future.done():
+            item.future.set_result(ArduinoReply(item.command, ok, item.lines, time.monotonic() - item.sent_at))
+
+    def reset(self, reason: str = "Arduino bağlantısı koptu"):
+        """Port kapandığında bekleyen tüm komutları hatayla sonlandırır"""
+        for lane in (self._queue, self._inflight):
+            while lane:
+                item = lane.popleft()
+                if not item.future.done():
+                    item.future.set_exception(ConnectionError(reason))
+        self._rx.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "queued": len(self._queue),
+            "inflight": len(self._inflight),
+            "stale": sum(item.stale_since is not None for item in self._inflight),
+            "max_inflight": self.max_inflight,
+            "sent": self.sent,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "late_replies": self.late_replies,
+            "stale_discarded": self.stale_discarded,
+            "unsolicited": dict(self.unsolicited),
+        }
@@ -0,0 +1,336 @@
+"""
+Sıcak yollar için benchmark paketi ve makine etiketli baseline karşılaştırması.
+
+Ölçülen yollar (gerçekçi boyutlarda; 10 kHz'de 1 dk = 600k satır):
+parse_stm32_data, append_sensor_to_buffer, save_sensor_buffer, backup_buffer,
+BROADCAST_CLIENTS sahte istemciye broadcast_telemetry, snapshot kodlama, get_parquet_data,
+merge_backup_files ve simülatörün blok halinde STM32 satırı üretmesi.
+
+Her benchmark önce tracemalloc kapalıyken `REPEATS` kez çalışır (en iyi süre
+alınır), sonra bir kez tracemalloc ile en yüksek Python/NumPy bellek kullanımı
+ölçülür (pyarrow'un kendi bellek havuzu bu ölçüme girmez). Sonuçlar
+`benchmark_baseline.json` içindeki bu makinenin (ve modun) baseline'ı ile
+karşılaştırılır; hız `tolerance`, bellek `memory_tolerance` oranından fazla
+kötüleşirse çıkış kodu 1 olur. Baseline depoyla gelmez: her makinede (hedef
+Pi, CI) bir kez `--update` ile kaydedilir.
+
+Kullanım:
+    python benchmarks.py                 # karşılaştır (baseline yoksa yalnızca raporla)
+    python benchmarks.py --update        # bu makinenin baseline'ını yaz
+    python benchmarks.py --quick         # küçük boyutlar (ayrı baseline)
+    python benchmarks.py --only parse_stm32_data,save_sensor_buffer
+    python benchmarks.py --tolerance 0.3 --memory-tolerance 0.25 --repeats 7
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+REPEATS = 5                      # En iyi süre alınır; paylaşımlı makinede gürültüyü azaltır
+DEFAULT_TOLERANCE = 0.25         # Hız bu orandan fazla düşerse gerileme
+DEFAULT_MEMORY_TOLERANCE = 0.20  # Bellek tepe değeri bu orandan fazla artarsa gerileme
+MEMORY_SLACK_MB = 1.0            # Küçük tepe değerlerinde gürültü payı
+BROADCAST_CLIENTS = 16           # broadcast_telemetry benchmark'ındaki sahte istemci sayısı
+
+
+@dataclass
+class Benchmark:
+    name: str
+    unit: str                       # ops_per_s birimi (satır, kare, ...)
+    size: int                       # Tam boyut (iş birimi sayısı)
+    quick_size: int
+    setup: Callable[[int], Any]     # Her tekrardan önce, ölçülmez
+    run: Callable[[Any], Any]       # Ölçülen kısım
+    teardown: Optional[Callable[[Any], None]] = None
+
+
+def machine_tag() -> str:
+    """Baseline anahtarı: mimari, çekirdek sayısı, Python sürümü ve CPU modeli özeti"""
+    override = os.environ.get("ROCKET_BENCH_MACHINE")
+    if override:
+        return override
+    cpu = platform.processor() or ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.lower().startswith(("model name", "hardware", "cpu model")):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    digest = hashlib.sha1(cpu.encode()).hexdigest()[:8]
+    return f"{platform.machine()}-{os.cpu_count()}cpu-py{sys.version_info[0]}.{sys.version_info[1]}-{digest}"
+
+
+def run_benchmark(bench: Benchmark, size: int, repeats: int = REPEATS) -> Dict[str, Any]:
+    best = float("inf")
+    for _ in range(repeats):
+        state = bench.setup(size)
+        try:
+            started = time.perf_counter()
+            bench.run(state)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            if bench.teardown is not None:
+                bench.teardown(state)
+    state = bench.setup(size)
+    tracemalloc.start()
+    try:
+        bench.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if bench.teardown is not None:
+            bench.teardown(state)
+    return {
+        "size": size,
+        "unit": bench.unit,
+        "seconds": round(best, 6),
+        "ops_per_s": round(size / best, 1),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float = DEFAULT_TOLERANCE,
+            memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE) -> List[str]:
+    """Gerilemelerin açıklamalarını döndürür (boşsa geçti)"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or base.get("size") != current["size"]:
+            continue  # yeni benchmark veya farklı boyut: karşılaştırılamaz
+        if current["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {current['ops_per_s']:.0f} {current['unit']}/sn, baseline {base['ops_per_s']:.0f} "
+                f"(%{(1 - current['ops_per_s'] / base['ops_per_s']) * 100:.0f} yavaş)")
+        if current["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance) + MEMORY_SLACK_MB:
+            regressions.append(
+                f"{name}: bellek tepe {current['peak_mb']:.1f} MB, baseline {base['peak_mb']:.1f} MB")
+    return regressions
+
+
+def load_baselines(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"machines": {}}
+
+
+def save_baseline(results: Dict[str, Dict[str, Any]], mode: str, tag: str, path: str = BASELINE_PATH):
+    data = load_baselines(path)
+    machine = data.setdefault("machines", {}).setdefault(tag, {})
+    entry = machine.setdefault(mode, {"results": {}})
+    # --only ile çalıştırıldıysa diğer benchmark'ların baseline'ı (ve kayıt zamanı) korunur;
+    # zaman ve Python sürümü her sonuçta ayrı tutulur
+    stamp = {"recorded_at": datetime.utcnow().isoformat(timespec="seconds"), "python": platform.python_version()}
+    for name, result in results.items():
+        entry["results"][name] = {**result, **stamp}
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+# --- Backend sıcak yolları ---
+
+TELEMETRY_TEMPLATE = (
+    "P1: {0:.2f} | P2: {1:.2f} | P3: 3.03 | P4: 4.04 | P5: 5.05 | P6: 6.06 | P7: 7.07 | P8: 8.08 | "
+    "T1: 21.1 | T2: 22.2 | T3: 23.3 | T4: 24.4 | T5: 25.5 | T6: 26.6 | Tbogaz1: 301.5 | THRUST: {2:.1f} | "
+    "ISP: 210.4 | Tbogaz2: 305.2 | D1: 0.41 | D2: 0.22 | IMPULSE: 830.1 | VELOCITY: 2010.7"
+)
+
+
+def backend_benchmarks() -> List[Benchmark]:
+    """raspberry_pi_backend'i içe aktarır; loglar kapatılır, dosyalar geçici dizine yazılır"""
+    import numpy as np
+    import pandas as pd
+
+    import raspberry_pi_backend as backend
+    from connection_manager import ClientConnection, ConnectionManager, Subscription
+    from simulation import STM32Simulator
+
+    logging.disable(logging.WARNING)
+    # Zamanlı kayıt/yedek görevleri ölçüme karışmasın
+    backend.BACKUP_INTERVAL = backend.AUTO_SAVE_INTERVAL = 10**12
+
+    def fill_buffer(rows: int):
+        rng = np.random.default_rng(0)
+        backend.timestamp_buffer[:rows] = time.time() + np.arange(rows) / 10_000
+        backend.sensor_buffer[:rows] = rng.normal(size=(rows, backend.sensor_buffer.shape[1])).astype(np.float32)
+        backend.buffer_index = rows
+
+    def combined(rows: int):
+        rng = np.random.default_rng(1)
+        data = rng.normal(size=(rows, len(backend.SENSOR_COLUMNS)))
+        data[:, 0] = time.time() + np.arange(rows) / 10_000
+        return data
+
+    def remove(pattern: str):
+        import glob
+        for path in glob.glob(pattern):
+            os.remove(path)
+
+    def parse_setup(n):
+        return [TELEMETRY_TEMPLATE.format(i % 97 * 0.1, i % 89 * 0.2, 1500 + i % 50) for i in range(n)]
+
+    def parse_run(lines):
+        parse = backend.parse_stm32_data
+        for line in lines:
+            parse(line)
+
+    def append_setup(n):
+        backend.buffer_index = 0
+        return n, backend.parse_stm32_data(TELEMETRY_TEMPLATE.format(1.0, 2.0, 1500.0))
+
+    def append_run(state):
+        n, sample = state
+        append = backend.append_sensor_to_buffer
+        for _ in range(n):
+            append(sample)
+
+    def save_setup(rows):
+        fill_buffer(rows)
+        return "sensor_log_bench_save.parquet"
+
+    def backup_setup(rows):
+        fill_buffer(rows)
+
+    def broadcast_setup(n):
+        backend.sensor_data.update(backend.parse_stm32_data(TELEMETRY_TEMPLATE.format(1.0, 2.0, 1500.0)))
+        return n
+
+    def fanout_setup(n):
+        broadcast_setup(n)
+        # Gönderici görevi olmayan sahte istemciler: ölçüm paketleme + kuyruklama yolunu kapsar.
+        # Kuyruk dolunca politika eskiyi atar; yavaş istemci sayılıp kopmasınlar.
+        manager = ConnectionManager(max_queue=backend.WS_SEND_QUEUE_SIZE, policy=backend.WS_QUEUE_POLICY,
+                                    slow_client_timeout=float("inf"), send_timeout=backend.WS_SEND_TIMEOUT)
+        for _ in range(BROADCAST_CLIENTS):
+            websocket = object()
+            manager.clients[websocket] = ClientConnection(websocket, manager.max_queue, manager.policy,
+                                                          manager.slow_client_timeout, manager.send_timeout)
+        return n, manager
+
+    def fanout_run(state):
+        n, manager = state
+        encode = backend.encode_snapshot_frame
+        subscription = Subscription()
+
+        async def ticks():
+            for _ in range(n):
+                # Yayın görevi gibi: tick başına bir snapshot, gruptaki tüm istemcilere
+                await manager.broadcast_telemetry({subscription: encode()})
+
+        asyncio.run(ticks())
+
+    def snapshot_run(n):
+        encode = backend.encode_snapshot_frame
+        for _ in range(n):
+            encode()
+
+    def parquet_setup(rows):
+        name = f"sensor_log_bench_{rows}.parquet"
+        if not os.path.exists(name):
+            pd.DataFrame(combined(rows), columns=pd.Index(backend.SENSOR_COLUMNS)).to_parquet(
+                name, index=False, compression="snappy")
+        return name
+
+    def merge_setup(rows):
+        np.save("buffer_backup_20000101_000000.npy", combined(rows))
+        backend.buffer_index = 0
+
+    def simulator_setup(n):
+        return n, STM32Simulator(seed=0)
+
+    def simulator_run(state):
+        n, sim = state
+        sim.generate_block(n, t0=0.0, encoded=True)
+
+    return [
+        Benchmark("parse_stm32_data", "satır", 50_000, 5_000, parse_setup, parse_run),
+        Benchmark("append_sensor_to_buffer", "örnek", 100_000, 10_000, append_setup, append_run),
+        Benchmark("save_sensor_buffer", "satır", 600_000, 60_000, save_setup,
+                  lambda name: backend.save_sensor_buffer(name),
+                  lambda name: remove("sensor_log_bench_save.parquet")),
+        Benchmark("backup_buffer", "satır", 600_000, 60_000, backup_setup,
+                  lambda _: asyncio.run(backend.backup_buffer()),
+                  lambda _: remove("buffer_backup_*.npy")),
+        Benchmark("broadcast_telemetry", "kare", 30_000, 3_000, fanout_setup, fanout_run),
+        Benchmark("snapshot_encode", "kare", 30_000, 3_000, broadcast_setup, snapshot_run),
+        Benchmark("get_parquet_data", "satır", 600_000, 60_000, parquet_setup,
+                  lambda name: asyncio.run(backend.get_parquet_data(name))),
+        Benchmark("merge_backup_files", "satır", 600_000, 60_000, merge_setup,
+                  lambda _: backend.merge_backup_files(),
+                  lambda _: remove("buffer_backup_*.npy")),
+        Benchmark("simulator_block", "satır", 100_000, 10_000, simulator_setup, simulator_run),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sıcak yol benchmark'ları ve baseline karşılaştırması")
+    parser.add_argument("--quick", action="store_true", help="küçük boyutlar (ayrı baseline)")
+    parser.add_argument("--only", help="virgülle ayrılmış benchmark adları")
+    parser.add_argument("--update", action="store_true", help="bu makinenin baseline'ını yaz")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    mode = "quick" if args.quick else "full"
+    tag = machine_tag()
+    benches = backend_benchmarks()
+    if args.only:
+        wanted = set(args.only.split(","))
+        benches = [b for b in benches if b.name in wanted]
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="rocket_bench_") as workdir:
+        # Kayıt/yedek fonksiyonları çalışma dizinine yazar
+        os.chdir(workdir)
+        try:
+            for bench in benches:
+                result = run_benchmark(bench, bench.quick_size if args.quick else bench.size, args.repeats)
+                results[bench.name] = result
+                print(f"{bench.name:>24}: {result['ops_per_s']:>12.0f} {bench.unit}/sn "
+                      f"({result['size']} {bench.unit}, {result['seconds'] * 1000:.1f} ms, "
+                      f"tepe {result['peak_mb']:.1f} MB)")
+        finally:
+            os.chdir(cwd)
+
+    if args.update:
+        save_baseline(results, mode, tag, args.baseline)
+        print(f"Baseline yazıldı: {tag} / {mode} -> {args.baseline}")
+        return 0
+    baseline = load_baselines(args.baseline).get("machines", {}).get(tag, {}).get(mode)
+    if baseline is None:
+        print(f"{tag} / {mode} için baseline yok; kaydetmek için --update")
+        return 0
+    regressions = compare(results, baseline["results"], args.tolerance, args.memory_tolerance)
+    if regressions:
+        print("❌ Gerileme:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    recorded = sorted(result.get("recorded_at", "?") for result in baseline["results"].values())
+    print(f"✅ Baseline ile uyumlu ({tag} / {mode}, {recorded[0]} - {recorded[-1]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
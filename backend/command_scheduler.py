@@ -0,0 +1,134 @@
+"""
+Cihaz komutları için birleştirici (coalescing) zamanlayıcı.
+
+Arayüzde hızlı vana/motor tıklamaları ardışık onlarca `Valves:...` veya
+step motor komutu üretir; oysa yalnızca son durum önemlidir. Her hedef
+(ör. "stm32", "arduino:motor1") için sıralı bir kuyruk tutulur:
+
+- `key` verilen komutlar (ör. "valves") latest-wins birleştirilir: kuyrukta
+  henüz gönderilmemiş aynı anahtarlı komut varsa yenisi onun yerini alır,
+  her iki çağıran da gönderilen son komutun sonucunu alır.
+- `key=None` komutlar (senaryo, mod) sıra komutlarıdır: birleştirilmez ve
+  birleştirme bunların üzerinden atlamaz; önce istenen önce gönderilir.
+- Aynı hedefe ardışık iki gönderim arasında en az `min_interval` geçer
+  (firmware'in komut işleme hızı); bu arada gelenler birleşir.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CommandCancelled(Exception):
+    """Kuyruktaki komut gönderilmeden iptal edildi (ör. emergency)"""
+
+
+class _Entry:
+    __slots__ = ("key", "command", "future", "merged")
+
+    def __init__(self, key: Optional[str], command: str, future: asyncio.Future):
+        self.key = key
+        self.command = command
+        self.future = future
+        self.merged = 1
+
+
+class _Target:
+    def __init__(self, name: str, send: Callable[[str], Awaitable[Any]], min_interval: float):
+        self.name = name
+        self.send = send
+        self.min_interval = min_interval
+        self.entries: Deque[_Entry] = deque()
+        self.event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.last_issue = 0.0
+        self.submitted = 0
+        self.issued = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+
+class CommandScheduler:
+    """Hedef başına sıralı, anahtar başına latest-wins komut kuyruğu"""
+
+    def __init__(self):
+        self.targets: Dict[str, _Target] = {}
+
+    def add_target(self, name: str, send: Callable[[str], Awaitable[Any]], min_interval: float = 0.0):
+        """Hedef tanımlar (zaten varsa dokunmaz); `send` komutu cihaza iletip sonucunu döndürür"""
+        if name not in self.targets:
+            self.targets[name] = _Target(name, send, min_interval)
+        return self.targets[name]
+
+    async def submit(self, target: str, command: str, key: Optional[str] = None) -> Any:
+        """Komutu sıraya koyar, gönderilen (birleşmişse son) komutun sonucunu döndürür"""
+        t = self.targets[target]
+        t.submitted += 1
+        if key is not None:
+            for entry in reversed(t.entries):
+                if entry.key is None:
+                    break  # sıra komutunun önüne geçilmez
+                if entry.key == key:
+                    entry.command = command
+                    entry.merged += 1
+                    t.coalesced += 1
+                    return await asyncio.shield(entry.future)
+        entry = _Entry(key, command, asyncio.get_running_loop().create_future())
+        t.entries.append(entry)
+        t.event.set()
+        if t.task is None or t.task.done():
+            t.task = asyncio.create_task(self._run(t))
+        return await asyncio.shield(entry.future)
+
+    async def _run(self, t: _Target):
+        while True:
+            if not t.entries:
+                t.event.clear()
+                await t.event.wait()
+                continue
+            wait = t.last_issue + t.min_interval - time.monotonic()
+            if wait > 0:
+                # Bekleme sırasında gelen aynı anahtarlı komutlar baştaki girdiye birleşir
+                await asyncio.sleep(wait)
+                continue
+            entry = t.entries.popleft()
+            t.issued += 1
+            t.last_issue = time.monotonic()
+            try:
+                result = await t.send(entry.command)
+            except Exception as e:
+                if not entry.future.done():
+                    entry.future.set_exception(e)
+                continue
+            if not entry.future.done():
+                entry.future.set_result(result)
+
+    def cancel(self, target: str, reason: str) -> int:
+        """Hedefin henüz gönderilmemiş tüm komutlarını iptal eder"""
+        t = self.targets.get(target)
+        if t is None:
+            return 0
+        cancelled = 0
+        while t.entries:
+            entry = t.entries.popleft()
+            if not entry.future.done():
+                entry.future.set_exception(CommandCancelled(reason))
+                cancelled += entry.merged
+        t.cancelled += cancelled
+        return cancelled
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "submitted": t.submitted,
+                "issued": t.issued,
+                "coalesced": t.coalesced,
+                "cancelled": t.cancelled,
+                "pending": len(t.entries),
+                "min_interval_ms": round(t.min_interval * 1000, 1),
+            }
+            for name, t in self.targets.items()
+        }
@@ -0,0 +1,659 @@
+"""
+WebSocket bağlantı yönetimi.
+
+Her istemcinin kendi sınırlı gönderim kuyruğu ve gönderici görevi vardır;
+böylece yavaş bir istemci (ör. zayıf Wi-Fi'daki dizüstü) STM32 okuma
+döngüsünü veya diğer istemcileri bekletmez.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import WebSocket
+
+from telemetry import (
+    DECIMATION_LAST,
+    DEFAULT_TELEMETRY_FORMAT,
+    TELEMETRY_FORMATS,
+    Subscription,
+    SubscriptionGroup,
+    encode_history_frame,
+    parse_subscription,
+)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Kuyruk dolduğunda uygulanacak politikalar
+QUEUE_POLICY_DROP_OLDEST = "drop_oldest"  # En eski mesajı at, yenisini ekle
+QUEUE_POLICY_LATEST = "latest"            # Bekleyen telemetriyi en son snapshot ile değiştir
+QUEUE_POLICIES = (QUEUE_POLICY_DROP_OLDEST, QUEUE_POLICY_LATEST)
+
+# Telemetri mesajlarının birleştirme (coalesce) anahtarı
+TELEMETRY_KEY = "telemetry"
+# Delta kareleri zincirdir: tek tek atılmaz / birleştirilmez (bkz. ClientConnection._drop_delta_chain)
+DELTA_KEY = "delta"
+DELTA_KEYFRAME_KEY = "delta_keyframe"
+DELTA_KEYS = (DELTA_KEY, DELTA_KEYFRAME_KEY)
+KEYFRAME_RESYNC_INTERVAL = 1.0  # İstemci başına kendi keyframe'i en sık bu aralıkla (sn)
+
+# Mesaj öncelikleri: gönderici her zaman en yüksek öncelikli dolu kuyruktan alır
+PRIORITY_CRITICAL = 0   # Acil durum geri bildirimi, vana durumu, alarmlar, vana komut onayı
+PRIORITY_CONTROL = 1    # Diğer komut yanıtları ve kontrol mesajları
+PRIORITY_TELEMETRY = 2  # Yüksek hacimli sensör kareleri
+PRIORITY_NAMES = ("critical", "control", "telemetry")
+CRITICAL_MESSAGE_TYPES = {"emergency", "alarm", "valve_state", "valve_response"}
+LATENCY_WINDOW = 1024   # Öncelik başına saklanan son gecikme örneği
+
+
+def message_priority(data: Dict[str, Any]) -> int:
+    """Mesaj tipine göre öncelik sınıfı"""
+    return PRIORITY_CRITICAL if data.get("type") in CRITICAL_MESSAGE_TYPES else PRIORITY_CONTROL
+
+
+def _latency_summary(samples, count: int, worst: float) -> Dict[str, Any]:
+    if not samples:
+        return {"count": count, "p50": 0.0, "p99": 0.0, "max": round(worst * 1000, 3)}
+    p50, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 99])
+    return {"count": count, "p50": round(p50 * 1000, 3), "p99": round(p99 * 1000, 3),
+            "max": round(worst * 1000, 3)}
+
+
+class ClientConnection:
+    """Tek bir WebSocket istemcisi: öncelik sınıfı başına kuyruk, gönderici görev ve sayaçlar.
+
+    Kritik mesajlar (vana durumu, acil durum) bekleyen telemetrinin önüne geçer
+    ve kuyruk dolduğunda atılmaz. Delta kareleri atılması gerektiğinde bir
+    sonraki keyframe'e kadar birlikte atılır; keyframe yoksa istemci keyframe
+    bekler (`needs_keyframe`) ve o zamana kadar gelen deltalar kuyruğa girmez.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int, policy: str,
+                 slow_client_timeout: float, send_timeout: float):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.slow_client_timeout = slow_client_timeout
+        self.send_timeout = send_timeout
+        # Öncelik başına (coalesce anahtarı, is_binary, payload, kuyruğa girme zamanı)
+        self.queues: List[Deque[Tuple[Optional[str], bool, Any, float]]] = [deque() for _ in PRIORITY_NAMES]
+        self.wakeup = asyncio.Event()
+        self.sender_task: Optional[asyncio.Task] = None
+        self.connected_at = time.monotonic()
+        # İstemcinin telemetri aboneliği (format, kanallar, hız, seyreltme)
+        self.subscription = Subscription()
+        # telemetry_format / subscribe ile görünüm seçilince bir sonraki tick'te geçmiş gönderilir
+        # (hiç seçmeyen eski snapshot istemcileri sensor_history almaz)
+        self.backfill_pending = False
+        self.backfill_seconds: Optional[float] = None  # None = TelemetryFanout varsayılanı
+        # Delta zinciri: ilk kare ve her kopukluktan sonra istemciye kendi keyframe'i gider
+        self.needs_keyframe = True
+        self.last_resync = float("-inf")
+        self.resyncs = 0
+        self.closed = False
+        self.close_reason = ""
+        # Sayaçlar
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.bytes_sent = 0
+        self.last_send_duration = 0.0
+        # Öncelik başına kuyruğa girme -> gönderim tamamlanma gecikmesi
+        self.latency_samples: List[Deque[float]] = [deque(maxlen=LATENCY_WINDOW) for _ in PRIORITY_NAMES]
+        self.latency_count = [0] * len(PRIORITY_NAMES)
+        self.latency_max = [0.0] * len(PRIORITY_NAMES)
+
+    @property
+    def telemetry_format(self) -> str:
+        return self.subscription.format
+
+    def queue_length(self) -> int:
+        return sum(len(lane) for lane in self.queues)
+
+    def queued_bytes(self) -> int:
+        """Kuyrukta bekleyen mesajların toplam boyutu"""
+        return sum(len(item[2]) for lane in self.queues for item in lane)
+
+    def lag(self) -> float:
+        """Kuyruktaki en eski mesajın bekleme süresi (saniye)"""
+        oldest = [lane[0][3] for lane in self.queues if lane]
+        if not oldest:
+            return 0.0
+        return time.monotonic() - min(oldest)
+
+    def enqueue(self, payload: Any, is_binary: bool, key: Optional[str] = None,
+                priority: Optional[int] = None) -> bool:
+        """Mesajı kuyruğa ekler; istemci kapatılmalıysa False döner.
+
+        Öncelik verilmezse anahtarlı (telemetri) mesajlar PRIORITY_TELEMETRY,
+        diğerleri PRIORITY_CONTROL olur.
+        """
+        if self.closed:
+            return False
+        if priority is None:
+            priority = PRIORITY_TELEMETRY if key is not None else PRIORITY_CONTROL
+        lane = self.queues[priority]
+        now = time.monotonic()
+        if key is not None and key not in DELTA_KEYS and self.policy == QUEUE_POLICY_LATEST:
+            # Aynı anahtarlı bekleyen mesaj varsa yerinde güncelle (sıra korunur)
+            for i, item in enumerate(lane):
+                if item[0] == key:
+                    lane[i] = (key, is_binary, payload, item[3])
+                    self.coalesced += 1
+                    self.enqueued += 1
+                    return True
+        if key == DELTA_KEY and self.needs_keyframe:
+            # Zincir kopuk: keyframe gelene kadar delta çözülemez
+            self.dropped += 1
+            return True
+        if self.queue_length() >= self.max_queue:
+            if self.lag() > self.slow_client_timeout:
+                self.close_reason = f"yavaş istemci (gecikme {self.lag():.1f} sn)"
+                return False
+            if not self._drop_one(priority):
+                if priority != PRIORITY_CRITICAL:
+                    # Kuyruk yalnızca kendisinden önemli mesajlarla dolu: yeni mesajı at
+                    self.dropped += 1
+                    if key in DELTA_KEYS:
+                        self.needs_keyframe = True
+                    return True
+            if key == DELTA_KEY and self.needs_keyframe:
+                # Yer açmak için bekleyen delta zinciri atıldı; bu kare de ona bağlı
+                self.dropped += 1
+                return True
+        if key == DELTA_KEYFRAME_KEY:
+            self.needs_keyframe = False
+        lane.append((key, is_binary, payload, now))
+        self.enqueued += 1
+        self.wakeup.set()
+        return True
+
+    def _drop_one(self, priority: int) -> bool:
+        """Yeni mesajdan önemsiz veya eşit öncelikli en eski mesajı atar; kritikler atılmaz"""
+        for level in range(len(self.queues) - 1, max(priority, PRIORITY_CRITICAL + 1) - 1, -1):
+            lane = self.queues[level]
+            if not lane:
+                continue
+            # Önce birleştirilebilir (telemetri) mesajları at, kontrol mesajlarını koru
+            for i, item in enumerate(lane):
+                if item[0] in DELTA_KEYS:
+                    self._drop_delta_chain(lane, i)
+                    break
+                if item[0] is not None:
+                    del lane[i]
+                    self.dropped += 1
+                    break
+            else:
+                lane.popleft()
+                self.dropped += 1
+            return True
+        return False
+
+    def _drop_delta_chain(self, lane: Deque, start: int):
+        """`start`'taki deltayı ve ona bağlı deltaları bir sonraki keyframe'e kadar atar.
+
+        Kuyrukta keyframe kalmazsa istemci keyframe bekler; tek bir delta
+        atılıp zincir bozulmaz (istemcide CRC hatası / senkron kaybı olmaz).
+        """
+        items = list(lane)
+        tail = []
+        dropped = 0
+        resynced = False
+        for n, item in enumerate(items[start:]):
+            if item[0] == DELTA_KEYFRAME_KEY and dropped:
+                tail.extend(items[start + n:])
+                resynced = True
+                break
+            if item[0] in DELTA_KEYS:
+                dropped += 1
+            else:
+                tail.append(item)
+        lane.clear()
+        lane.extend(items[:start] + tail)
+        self.dropped += dropped
+        if not resynced:
+            self.needs_keyframe = True
+
+    def _next_message(self):
+        for priority, lane in enumerate(self.queues):
+            if lane:
+                return priority, lane.popleft()
+        return None, None
+
+    async def run_sender(self, manager: "ConnectionManager"):
+        """Kuyruktaki mesajları sırayla bu istemciye gönderir"""
+        try:
+            while not self.closed:
+                priority, item = self._next_message()
+                if item is None:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                _, is_binary, payload, queued_at = item
+                start = time.perf_counter()
+                if is_binary:
+                    await asyncio.wait_for(self.websocket.send_bytes(payload), self.send_timeout)
+                else:
+                    await asyncio.wait_for(self.websocket.send_text(payload), self.send_timeout)
+                self.last_send_duration = time.perf_counter() - start
+                self.sent += 1
+                self.bytes_sent += len(payload)
+                self._record_latency(priority, time.monotonic() - queued_at)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.close_reason = f"gönderim zaman aşımı ({self.send_timeout} sn)"
+            await manager.drop_client(self)
+        except Exception as e:
+            self.close_reason = f"gönderim hatası: {e}"
+            await manager.drop_client(self)
+
+    def _record_latency(self, priority: int, latency: float):
+        self.latency_samples[priority].append(latency)
+        self.latency_count[priority] += 1
+        if latency > self.latency_max[priority]:
+            self.latency_max[priority] = latency
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Öncelik sınıfı başına kuyruğa girme -> gönderim gecikmesi (ms)"""
+        return {
+            name: _latency_summary(self.latency_samples[p], self.latency_count[p], self.latency_max[p])
+            for p, name in enumerate(PRIORITY_NAMES)
+        }
+
+    @property
+    def address(self) -> str:
+        client = getattr(self.websocket, "client", None)
+        return f"{client.host}:{client.port}" if client else "unknown"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "client": self.address,
+            "connected_for": round(time.monotonic() - self.connected_at, 1),
+            "subscription": self.subscription.to_dict(),
+            "queue_length": self.queue_length(),
+            "queue_by_priority": {name: len(self.queues[p]) for p, name in enumerate(PRIORITY_NAMES)},
+            "queue_max": self.max_queue,
+            "queued_bytes": self.queued_bytes(),
+            "lag_seconds": round(self.lag(), 4),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "keyframe_resyncs": self.resyncs,
+            "bytes_sent": self.bytes_sent,
+            "last_send_ms": round(self.last_send_duration * 1000, 3),
+            "latency_ms": self.latency_stats(),
+        }
+
+
+# WebSocket bağlantıları için manager
+class ConnectionManager:
+    def __init__(self, max_queue: int = 64, policy: str = QUEUE_POLICY_DROP_OLDEST,
+                 slow_client_timeout: float = 5.0, send_timeout: float = 2.0):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Geçersiz kuyruk politikası: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.slow_client_timeout = slow_client_timeout
+        self.send_timeout = send_timeout
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.disconnected_slow = 0
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        client = ClientConnection(websocket, self.max_queue, self.policy,
+                                  self.slow_client_timeout, self.send_timeout)
+        client.sender_task = asyncio.create_task(client.run_sender(self))
+        self.clients[websocket] = client
+        logger.info(f"WebSocket bağlantısı eklendi. Toplam: {len(self.clients)}")
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client is not None:
+            client.closed = True
+            if client.sender_task and client.sender_task is not asyncio.current_task():
+                client.sender_task.cancel()
+            logger.info(f"WebSocket bağlantısı kaldırıldı. Toplam: {len(self.clients)}")
+
+    async def drop_client(self, client: ClientConnection):
+        """Yavaş/hatalı istemciyi kapatır"""
+        if client.closed:
+            return
+        logger.warning(f"WebSocket istemcisi düşürüldü: {client.close_reason} | {client.stats()}")
+        self.disconnected_slow += 1
+        self.disconnect(client.websocket)
+        try:
+            await client.websocket.close(code=1013)  # Try Again Later
+        except Exception:
+            pass
+
+    def _enqueue(self, client: ClientConnection, payload: Any, is_binary: bool, key: Optional[str] = None,
+                 priority: Optional[int] = None):
+        if not client.enqueue(payload, is_binary, key, priority):
+            asyncio.create_task(self.drop_client(client))
+
+    def _enqueue_all(self, payload: Any, is_binary: bool, key: Optional[str] = None,
+                     priority: Optional[int] = None):
+        for client in list(self.clients.values()):
+            self._enqueue(client, payload, is_binary, key, priority)
+
+    def send_to_client(self, client: ClientConnection, payload: Any, is_binary: bool, key: Optional[str] = None,
+                       priority: Optional[int] = None):
+        """Önceden paketlenmiş yükü tek istemcinin kuyruğuna koyar (aynı kare birkaç istemciye bir kez paketlenir)"""
+        self._enqueue(client, payload, is_binary, key, priority)
+
+    async def send_personal_message(self, message: str, websocket: WebSocket, priority: int = PRIORITY_CONTROL):
+        client = self.clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, message, False, priority=priority)
+
+    async def send_personal_data(self, data: Dict[str, Any], websocket: WebSocket, priority: Optional[int] = None):
+        """Tek istemciye msgpack (yoksa JSON) olarak veri gönderir; öncelik verilmezse tipe göre seçilir"""
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        payload, is_binary = self.pack(data)
+        self._enqueue(client, payload, is_binary, priority=message_priority(data) if priority is None else priority)
+
+    async def broadcast(self, message: str, priority: int = PRIORITY_CONTROL):
+        self._enqueue_all(message, False, priority=priority)
+
+    async def broadcast_data(self, data: Dict[str, Any], priority: Optional[int] = None):
+        """Tüm istemcilere bir kez paketlenmiş veri gönderir; öncelik verilmezse tipe göre seçilir"""
+        if self.clients:
+            payload, is_binary = self.pack(data)
+            self._enqueue_all(payload, is_binary, priority=message_priority(data) if priority is None else priority)
+
+    def to_native(self, obj):
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, (np.floating,)):
+            return float(obj)
+        if isinstance(obj, (np.integer,)):
+            return int(obj)
+        if isinstance(obj, dict):
+            return {k: self.to_native(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.to_native(x) for x in obj]
+        return obj
+
+    def pack(self, data: Dict[str, Any]) -> Tuple[Any, bool]:
+        """Veriyi bir kez paketler: (payload, is_binary)"""
+        if MSGPACK_AVAILABLE:
+            try:
+                packed_data = msgpack.packb(self.to_native(data), use_bin_type=True)
+                if packed_data is not None:
+                    return packed_data, True
+            except Exception as e:
+                logger.exception(f"msgpack paketleme hatası: {e}, veri: {data}")
+        # Fallback: JSON kullan
+        return json.dumps(self.to_native(data)), False
+
+    async def broadcast_binary(self, data: Dict[str, Any]):
+        """msgpack ile binary format kullanarak veri gönderir (ağ beklemeden kuyruğa ekler)"""
+        if self.clients:
+            payload, is_binary = self.pack(data)
+            self._enqueue_all(payload, is_binary, TELEMETRY_KEY)
+
+    def set_telemetry_format(self, websocket: WebSocket, telemetry_format: str) -> bool:
+        """Yalnızca formatı değiştirir (tüm kanallar, tam hız)"""
+        if telemetry_format not in TELEMETRY_FORMATS:
+            return False
+        return self.set_subscription(websocket, Subscription(format=telemetry_format))
+
+    def set_subscription(self, websocket: WebSocket, subscription: Subscription,
+                         backfill_seconds: Optional[float] = None) -> bool:
+        client = self.clients.get(websocket)
+        if client is None:
+            return False
+        client.subscription = subscription
+        # Yeni görünüm için geçmiş, canlı akışın başladığı örneğe kadar yeniden gönderilir
+        client.backfill_pending = True
+        # Yeni gruptaki delta zincirine istemcinin kendi keyframe'iyle hemen katılır
+        client.needs_keyframe = True
+        client.last_resync = float("-inf")
+        if backfill_seconds is not None:
+            client.backfill_seconds = backfill_seconds
+        logger.info(f"WebSocket istemcisi aboneliği: {subscription.to_dict()}")
+        return True
+
+    def request_keyframe(self, websocket: WebSocket) -> bool:
+        """İstemci senkron kaybı bildirdi: yalnızca ona keyframe gönderilir (grubun diğer üyeleri etkilenmez).
+
+        Kendi keyframe'i en sık KEYFRAME_RESYNC_INTERVAL'da bir gider; sık istekler birleşir.
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            return False
+        client.needs_keyframe = True
+        return True
+
+    def get_subscription(self, websocket: WebSocket) -> Optional[Subscription]:
+        client = self.clients.get(websocket)
+        return client.subscription if client is not None else None
+
+    def subscription_groups(self) -> Dict[Subscription, int]:
+        """Farklı abonelikler ve her birindeki istemci sayısı"""
+        groups: Dict[Subscription, int] = {}
+        for client in self.clients.values():
+            groups[client.subscription] = groups.get(client.subscription, 0) + 1
+        return groups
+
+    def pending_backfills(self) -> Dict[Subscription, List[ClientConnection]]:
+        """Geçmiş bekleyen istemciler, abonelik grubuna göre"""
+        groups: Dict[Subscription, List[ClientConnection]] = {}
+        for client in self.clients.values():
+            if client.backfill_pending:
+                groups.setdefault(client.subscription, []).append(client)
+        return groups
+
+    async def broadcast_telemetry(self, frames: Dict[Subscription, Any],
+                                  keyframes: Optional[Dict[Subscription, Callable[[], Any]]] = None):
+        """Her abonelik grubu için kareyi bir kez paketler ve o gruptaki istemcilere kuyruklar.
+
+        Önceden kodlanmış (bytes) kareler olduğu gibi binary gönderilir; aynı
+        nesne birden fazla gruba verilmişse (ör. snapshot) yalnızca bir kez paketlenir.
+        `keyframes` delta grupları için bu tick'in keyframe halini döndürür;
+        senkronu kaybolan istemciler grubun deltası yerine onu alır.
+        """
+        packed_by_id: Dict[int, Tuple[Any, bool]] = {}
+        packed: Dict[Subscription, Tuple[Any, bool]] = {}
+        for subscription, frame in frames.items():
+            if id(frame) not in packed_by_id:
+                packed_by_id[id(frame)] = (frame, True) if isinstance(frame, (bytes, bytearray)) else self.pack(frame)
+            packed[subscription] = packed_by_id[id(frame)]
+        keyframes = keyframes or {}
+        packed_keyframes: Dict[Subscription, Tuple[Any, bool]] = {}
+        now = time.monotonic()
+        for client in list(self.clients.values()):
+            subscription = client.subscription
+            if subscription not in packed:
+                continue
+            payload, is_binary = packed[subscription]
+            if subscription not in keyframes:
+                self._enqueue(client, payload, is_binary, TELEMETRY_KEY)
+                continue
+            frame = frames[subscription]
+            if frame.get("key"):
+                self._enqueue(client, payload, is_binary, DELTA_KEYFRAME_KEY)
+            elif not client.needs_keyframe:
+                self._enqueue(client, payload, is_binary, DELTA_KEY)
+            elif now - client.last_resync >= KEYFRAME_RESYNC_INTERVAL:
+                if subscription not in packed_keyframes:
+                    packed_keyframes[subscription] = self.pack(keyframes[subscription]())
+                client.last_resync = now
+                client.resyncs += 1
+                self._enqueue(client, *packed_keyframes[subscription], DELTA_KEYFRAME_KEY)
+            else:
+                # Keyframe hızı sınırlı: bu delta çözülemez, istemciye hiç gönderilmez
+                client.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "max_queue": self.max_queue,
+            "slow_client_timeout": self.slow_client_timeout,
+            "disconnected_slow": self.disconnected_slow,
+            "subscription_groups": len(self.subscription_groups()),
+            "latency_ms": self.latency_stats(),
+            "clients": [client.stats() for client in self.clients.values()],
+        }
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Tüm istemciler üzerinden öncelik sınıfı başına gönderim gecikmesi (ms)"""
+        result = {}
+        for p, name in enumerate(PRIORITY_NAMES):
+            samples = [x for client in self.clients.values() for x in client.latency_samples[p]]
+            count = sum(client.latency_count[p] for client in self.clients.values())
+            worst = max((client.latency_max[p] for client in self.clients.values()), default=0.0)
+            result[name] = _latency_summary(samples, count, worst)
+        return result
+
+
+class TelemetryFanout:
+    """Abonelik gruplarını tutar; her tick'te grup başına tek kare üretip manager'a verir.
+
+    Hem ingest sürecindeki yayın görevi hem de fan-out worker'lar kullanır.
+    `history_source(end_seq, seconds) -> (start_seq, timestamps, rows)` verilirse
+    görünüm seçen istemcilere canlı akıştan hemen önce seyreltilmiş geçmiş gönderilir
+    (okuma disk erişimi içerebileceğinden event loop dışında yapılır).
+    """
+
+    def __init__(self, manager: ConnectionManager, channels: List[str], keyframe_interval: int = 30,
+                 history_source: Optional[Callable[[int, float], Tuple[int, np.ndarray, np.ndarray]]] = None,
+                 history_seconds: float = 10.0, history_rate: float = 50.0, history_max_seconds: float = 60.0):
+        self.manager = manager
+        self.channels = list(channels)
+        self.keyframe_interval = keyframe_interval
+        self.groups: Dict[Subscription, SubscriptionGroup] = {}
+        self.history_source = history_source
+        self.history_seconds = history_seconds
+        self.history_rate = history_rate
+        self.history_max_seconds = history_max_seconds
+        self.backfills_sent = 0
+        self.last_data = time.monotonic()
+
+    def idle_flush_due(self, now: float) -> bool:
+        """Veri kesildi ve bir grubun yarım kalmış seyreltme aralığı gönderilmeli (yayın görevi boş tick'te sorar)"""
+        idle = now - self.last_data
+        return any(group.idle_flush_due(idle) for group in self.groups.values())
+
+    async def publish(self, seq: int, timestamps: np.ndarray, rows: np.ndarray,
+                      snapshot_frame: Callable[[], Any], dropped: int = 0, new_data: bool = True):
+        """Bir tick: bekleyen geçmişleri, ardından (yeni veri varsa) canlı kareleri kuyruklar.
+
+        `seq` bu tick'teki ilk örneğin sıra numarasıdır (örnek yoksa bir sonraki).
+        """
+        subscriptions = self.manager.subscription_groups()
+        # İstemcisi kalmayan grupları bırak (delta durumu da sıfırlanır)
+        for subscription in list(self.groups):
+            if subscription not in subscriptions:
+                del self.groups[subscription]
+        if not subscriptions:
+            return
+        backfills = self.manager.pending_backfills()
+        now = time.monotonic()
+        if new_data:
+            self.last_data = now
+        idle = now - self.last_data
+        snapshot_cache = []
+
+        def cached_snapshot():
+            # Snapshot grupları yalnızca hızda ayrışır; tick başına bir kez kodlanır
+            if not snapshot_cache:
+                snapshot_cache.append(snapshot_frame())
+            return snapshot_cache[0]
+
+        frames = {}
+        keyframes = {}
+        for subscription in subscriptions:
+            group = self.groups.get(subscription)
+            if group is None:
+                group = SubscriptionGroup(subscription, self.channels, self.keyframe_interval)
+                self.groups[subscription] = group
+            if subscription in backfills:
+                # Geçmiş, grubun henüz göndermediği ilk örnekte biter: canlı kareler oradan devam eder
+                end_seq = group.pending_seq if len(group.pending_ts) else seq
+                await self._send_backfill(group, end_seq, backfills[subscription])
+            if new_data:
+                group.feed(seq, timestamps, rows)
+            elif not group.idle_flush_due(idle):
+                continue
+            frame = group.build_frame(now, cached_snapshot, dropped, flush=not new_data)
+            if frame is not None:
+                frames[subscription] = frame
+                if group.delta is not None:
+                    keyframes[subscription] = group.keyframe
+        if frames:
+            await self.manager.broadcast_telemetry(frames, keyframes)
+
+    async def _send_backfill(self, group: SubscriptionGroup, end_seq: int, clients: List[ClientConnection]):
+        by_seconds: Dict[float, List[ClientConnection]] = {}
+        for client in clients:
+            client.backfill_pending = False
+            seconds = self.history_seconds if client.backfill_seconds is None else client.backfill_seconds
+            if seconds > 0 and self.history_source is not None:
+                by_seconds.setdefault(seconds, []).append(client)
+        subscription = group.subscription
+        rate = subscription.rate or self.history_rate
+        method = subscription.decimation if subscription.rate else DECIMATION_LAST
+        for seconds, members in by_seconds.items():
+            try:
+                start_seq, timestamps, rows = await asyncio.to_thread(self.history_source, end_seq, seconds)
+            except Exception:
+                logger.exception("Geçmiş okunamadı")
+                continue
+            if len(timestamps) == 0:
+                continue
+            frame = encode_history_frame(start_seq, end_seq, timestamps, rows, group.channels,
+                                         rate, method, group.indices, requested_seconds=seconds)
+            payload, is_binary = self.manager.pack(frame)
+            for client in members:
+                # Anahtarsız: latest politikasında canlı kare ile birleştirilmez, ondan önce gider
+                self.manager.send_to_client(client, payload, is_binary, priority=PRIORITY_TELEMETRY)
+            self.backfills_sent += len(members)
+
+    async def handle_message(self, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+        """Telemetri abonelik mesajlarını işler; mesaj bu türlerden değilse False döner"""
+        message_type = message.get("type")
+        if message_type == "telemetry_format":
+            # İstemci tek örnekli snapshot yerine sütunlu batch / delta kareleri isteyebilir
+            telemetry_format = message.get("format", DEFAULT_TELEMETRY_FORMAT)
+            if not self.manager.set_telemetry_format(websocket, telemetry_format):
+                await self.manager.send_personal_data(
+                    {"type": "error", "data": f"Geçersiz telemetri formatı: {telemetry_format}"}, websocket)
+        elif message_type == "subscribe":
+            # Kanal seçimi, hedef hız ve seyreltme yöntemi (last / mean / minmax)
+            try:
+                subscription = parse_subscription(message, self.channels)
+                backfill = message.get("backfill")
+                if backfill is not None:
+                    backfill = min(max(float(backfill), 0.0), self.history_max_seconds)
+            except (TypeError, ValueError) as e:
+                await self.manager.send_personal_data(
+                    {"type": "subscribe_response", "success": False, "error": str(e)}, websocket)
+            else:
+                self.manager.set_subscription(websocket, subscription, backfill)
+                await self.manager.send_personal_data(
+                    {"type": "subscribe_response", "success": True, "subscription": subscription.to_dict()}, websocket)
+        elif message_type == "request_keyframe":
+            # Delta çözücü CRC hatası verdiğinde veya senkron kaybolduğunda (yalnızca bu istemci)
+            self.manager.request_keyframe(websocket)
+        else:
+            return False
+        return True
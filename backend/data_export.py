@@ -0,0 +1,237 @@
+"""
+Büyük zaman aralıkları için parça parça (chunked) veri dışa aktarma yardımcıları.
+
+Parquet log dosyaları ve RAM buffer'ı sabit boyutlu RecordBatch'ler halinde
+okunur, istenen formata (csv / parquet / arrow) çevrilip bayt parçaları
+olarak üretilir. Bellek kullanımı toplam veri boyutundan bağımsızdır,
+yalnızca `chunk_rows` ile sınırlıdır.
+"""
+import io
+import logging
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Tek seferde bellekte tutulacak maksimum satır sayısı (~25 sütun * 8 bayt * 50k = ~10 MB)
+EXPORT_CHUNK_ROWS = 50_000
+
+# format -> (media type, dosya uzantısı)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+
+# RAM buffer okuyucusu: (timestamp dizisi, sensör matrisi) parçaları üretir
+BufferChunkReader = Callable[[int], Iterable[Tuple[np.ndarray, np.ndarray]]]
+
+
+def build_export_schema(channels: List[str]) -> pa.Schema:
+    """timestamp (float64) + seçili kanallar (float32) şeması oluşturur"""
+    fields = [pa.field("timestamp", pa.float64())]
+    fields += [pa.field(name, pa.float32()) for name in channels]
+    return pa.schema(fields)
+
+
+def _timestamp_to_epoch(column: pa.Array) -> pa.Array:
+    """Parquet'teki timestamp sütununu epoch saniyeye (float64) çevirir"""
+    if pa.types.is_timestamp(column.type):
+        micros = column.cast(pa.timestamp("us")).cast(pa.int64()).to_numpy(zero_copy_only=False)
+        return pa.array(micros / 1_000_000.0, type=pa.float64())
+    return column.cast(pa.float64())
+
+
+def _filter_time_range(batch: pa.RecordBatch, start: Optional[float], end: Optional[float]) -> pa.RecordBatch:
+    if start is None and end is None:
+        return batch
+    ts = batch.column(0).to_numpy(zero_copy_only=False)
+    mask = np.ones(len(ts), dtype=bool)
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts <= end
+    if mask.all():
+        return batch
+    return batch.filter(pa.array(mask))
+
+
+def _row_group_in_range(metadata: pq.FileMetaData, rg: int, ts_index: int,
+                        start: Optional[float], end: Optional[float]) -> bool:
+    """Row group istatistiklerine göre zaman aralığıyla kesişip kesişmediğini döner"""
+    if start is None and end is None:
+        return True
+    stats = metadata.row_group(rg).column(ts_index).statistics
+    if stats is None or not stats.has_min_max:
+        return True
+    lo, hi = stats.min, stats.max
+    if hasattr(lo, "timestamp"):
+        lo, hi = lo.timestamp(), hi.timestamp()
+    if start is not None and hi < start:
+        return False
+    if end is not None and lo > end:
+        return False
+    return True
+
+
+def iter_parquet_batches(filename: str, schema: pa.Schema, start: Optional[float], end: Optional[float],
+                         chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[pa.RecordBatch]:
+    """Tek bir parquet dosyasını şemaya uygun batch'ler halinde okur"""
+    pf = pq.ParquetFile(filename)
+    file_columns = pf.schema_arrow.names
+    if "timestamp" not in file_columns:
+        logger.warning(f"Dışa aktarma: timestamp sütunu yok, dosya atlandı: {filename}")
+        return
+    ts_index = file_columns.index("timestamp")
+    row_groups = [rg for rg in range(pf.num_row_groups)
+                  if _row_group_in_range(pf.metadata, rg, ts_index, start, end)]
+    if not row_groups:
+        return
+    wanted = [name for name in schema.names if name in file_columns]
+    for raw in pf.iter_batches(batch_size=chunk_rows, row_groups=row_groups, columns=wanted):
+        arrays = []
+        for field in schema:
+            if field.name not in file_columns:
+                # Eski formatlı dosyalarda olmayan kanallar boş (null) gönderilir
+                arrays.append(pa.nulls(raw.num_rows, type=field.type))
+            elif field.name == "timestamp":
+                arrays.append(_timestamp_to_epoch(raw.column(field.name)))
+            else:
+                arrays.append(raw.column(field.name).cast(field.type))
+        batch = _filter_time_range(pa.RecordBatch.from_arrays(arrays, schema=schema), start, end)
+        if batch.num_rows:
+            yield batch
+
+
+def iter_buffer_batches(read_chunks: BufferChunkReader, column_indices: List[int], schema: pa.Schema,
+                        start: Optional[float], end: Optional[float],
+                        chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[pa.RecordBatch]:
+    """RAM buffer'dan gelen (timestamp, sensör) parçalarını batch'e çevirir"""
+    for timestamps, sensors in read_chunks(chunk_rows):
+        arrays = [pa.array(timestamps, type=pa.float64())]
+        arrays += [pa.array(sensors[:, idx], type=pa.float32()) for idx in column_indices]
+        batch = _filter_time_range(pa.RecordBatch.from_arrays(arrays, schema=schema), start, end)
+        if batch.num_rows:
+            yield batch
+
+
+def iter_saved_rows(filename: str, start: int, stop: int,
+                    chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Buffer'dan kaydedilmiş parquet dosyasının [start, stop) satırlarını RAM buffer
+    parçalarıyla aynı biçimde (timestamp float64, sensörler float32) üretir"""
+    offset = 0
+    for raw in pq.ParquetFile(filename).iter_batches(batch_size=chunk_rows):
+        lo, hi = max(start - offset, 0), min(stop - offset, raw.num_rows)
+        offset += raw.num_rows
+        if lo < hi:
+            batch = raw.slice(lo, hi - lo)
+            timestamps = _timestamp_to_epoch(batch.column(0)).to_numpy(zero_copy_only=False)
+            sensors = np.column_stack([batch.column(i).to_numpy(zero_copy_only=False)
+                                       for i in range(1, batch.num_columns)]).astype(np.float32)
+            yield timestamps, sensors
+        if offset >= stop:
+            return
+
+
+def skip_rows(batches: Iterable[pa.RecordBatch], row_offset: int) -> Iterator[pa.RecordBatch]:
+    """İlk `row_offset` satırı atlar (satır bazlı devam ettirme için)"""
+    remaining = row_offset
+    for batch in batches:
+        if remaining >= batch.num_rows:
+            remaining -= batch.num_rows
+            continue
+        if remaining:
+            batch = batch.slice(remaining)
+            remaining = 0
+        yield batch
+
+
+class _ChunkSink(io.RawIOBase):
+    """Yazılan baytları biriktiren, `drain()` ile boşaltılan seek edilemez hedef.
+
+    Parquet/Arrow yazıcıları dosya ofsetlerini `tell()` ile takip ettiğinden
+    boşaltmadan sonra da toplam pozisyon korunur.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def write(self, data):
+        chunk = bytes(data)
+        self._parts.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _iter_encoded(batches: Iterable[pa.RecordBatch], schema: pa.Schema, fmt: str) -> Iterator[bytes]:
+    if fmt == "csv":
+        header = True
+        for batch in batches:
+            out = io.BytesIO()
+            pa_csv.write_csv(batch, out, write_options=pa_csv.WriteOptions(include_header=header))
+            header = False
+            yield out.getvalue()
+        if header:
+            # Hiç veri yoksa yine de başlık satırı gönderilir
+            yield (",".join(schema.names) + "\n").encode()
+        return
+
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+        write = writer.write_batch
+    elif fmt == "arrow":
+        writer = pa_ipc.new_stream(sink, schema)
+        write = writer.write_batch
+    else:
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
+    try:
+        for batch in batches:
+            write(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def iter_export_bytes(batches: Iterable[pa.RecordBatch], schema: pa.Schema, fmt: str,
+                      byte_offset: int = 0) -> Iterator[bytes]:
+    """Batch'leri formatlayıp bayt parçaları üretir; ilk `byte_offset` baytı atlar.
+
+    Aynı parametrelerle üretilen çıktı deterministik olduğundan yarıda kalan
+    bir indirme, alınan bayt sayısı verilerek kaldığı yerden devam ettirilebilir.
+    """
+    remaining = byte_offset
+    for chunk in _iter_encoded(batches, schema, fmt):
+        if remaining >= len(chunk):
+            remaining -= len(chunk)
+            continue
+        if remaining:
+            chunk = chunk[remaining:]
+            remaining = 0
+        yield chunk
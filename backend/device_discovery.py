@@ -0,0 +1,193 @@
+"""
+Seri port cihaz keşfi (STM32 ve Arduino).
+
+Eski yöntem `comports()` içindeki her portu sırayla 115200'de açıp 0.5 sn
+uyuyor, sonra doğru baud ile yeniden açıyordu. Burada:
+
+1. Önbellek: son bulunan cihazın USB seri numarası / VID:PID'i diskte tutulur;
+   port adı değişse bile (ttyACM0 -> ttyACM1) aynı cihaz hemen bulunur.
+2. USB kimliği: bilinen VID:PID çiftleri portu açmadan tanır.
+3. Ad/açıklama: eski kurallar (ttyACM -> STM32, ttyUSB/CH340 -> Arduino).
+4. Yoklama: hâlâ eksik rol varsa kalan portlar aynı anda (thread havuzu)
+   açılıp ilk satırlarına bakılır; toplam süre en yavaş port kadardır.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import serial
+import serial.tools.list_ports
+
+logger = logging.getLogger(__name__)
+
+ROLE_STM32 = "stm32"
+ROLE_ARDUINO = "arduino"
+ROLES = (ROLE_STM32, ROLE_ARDUINO)
+
+# Rol başına port ayarları (eski init_uart_connections ile aynı)
+SERIAL_SETTINGS: Dict[str, Dict[str, Any]] = {
+    ROLE_STM32: dict(baudrate=230400, timeout=0.1, write_timeout=0.1, inter_byte_timeout=0.01,
+                     parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE, bytesize=serial.EIGHTBITS),
+    ROLE_ARDUINO: dict(baudrate=115200, timeout=0.1, write_timeout=0.1, inter_byte_timeout=0.01),
+}
+
+# (VID, PID) -> rol; PID None ise üreticinin tüm ürünleri
+USB_IDS: Dict[tuple, str] = {
+    (0x0483, 0x374B): ROLE_STM32,    # ST-LINK/V2-1 sanal COM (Nucleo-F767ZI)
+    (0x0483, 0x374E): ROLE_STM32,    # ST-LINK/V3
+    (0x0483, 0x5740): ROLE_STM32,    # STM32 USB CDC
+    (0x2341, None): ROLE_ARDUINO,    # Arduino SA
+    (0x2A03, None): ROLE_ARDUINO,    # Arduino SRL
+    (0x1A86, 0x7523): ROLE_ARDUINO,  # CH340 (klon Uno)
+}
+
+STM32_PROBE_TIMEOUT = 0.3    # STM32 sürekli telemetri yollar; ilk satır hemen gelir (sn)
+ARDUINO_PROBE_TIMEOUT = 2.5  # Arduino port açılınca reset olur, banner ~1.6 sn sonra gelir (sn)
+PROBE_WORKERS = 8
+
+
+@dataclass
+class DeviceMatch:
+    role: str
+    device: str
+    vid: Optional[int] = None
+    pid: Optional[int] = None
+    serial_number: Optional[str] = None
+    method: str = ""   # cache / usb_id / name / probe
+
+
+def _match(role: str, port, method: str) -> DeviceMatch:
+    return DeviceMatch(role, port.device, port.vid, port.pid, port.serial_number, method)
+
+
+def identify_by_usb(port) -> Optional[str]:
+    if port.vid is None:
+        return None
+    return USB_IDS.get((port.vid, port.pid)) or USB_IDS.get((port.vid, None))
+
+
+def identify_by_name(port) -> Optional[str]:
+    description = (port.description or "").upper()
+    if "ttyACM" in port.device or "STM" in description:
+        return ROLE_STM32
+    if "ttyUSB" in port.device or "CH340" in description or "ARDUINO" in description:
+        return ROLE_ARDUINO
+    return None
+
+
+def _read_lines(device: str, baudrate: int, timeout: float, want: int) -> List[str]:
+    """`want` tam satır gelene ya da zaman aşımına kadar okur"""
+    with serial.Serial(device, baudrate, timeout=0.05) as ser:
+        deadline = time.monotonic() + timeout
+        data = b""
+        while time.monotonic() < deadline:
+            data += ser.read(max(1, ser.in_waiting))
+            if data.count(b"\n") >= want:
+                break
+    return [line.decode(errors="ignore").strip() for line in data.split(b"\n")[:-1]]
+
+
+def probe_port(device: str) -> Optional[str]:
+    """Portu açıp ilk satıra bakar: STM32 telemetrisi mi, Arduino banner'ı mı"""
+    try:
+        # Akışın ortasından başlanabilir: ilk satır yarım olabilir, iki satır bekle
+        lines = _read_lines(device, SERIAL_SETTINGS[ROLE_STM32]["baudrate"], STM32_PROBE_TIMEOUT, 2)
+        if any("P1:" in line or "STM" in line.upper() for line in lines):
+            return ROLE_STM32
+        lines = _read_lines(device, SERIAL_SETTINGS[ROLE_ARDUINO]["baudrate"], ARDUINO_PROBE_TIMEOUT, 1)
+        if any("ARDUINO" in line.upper() or "Başladı" in line for line in lines):
+            return ROLE_ARDUINO
+    except Exception as e:
+        logger.info(f"{device} portu yoklanamadı: {e}")
+    return None
+
+
+class DeviceCache:
+    """Rol -> son bilinen USB kimliği; JSON dosyasında"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Cihaz önbelleği okunamadı ({path}): {e}")
+
+    def find(self, role: str, ports: Iterable) -> Optional[DeviceMatch]:
+        entry = self.entries.get(role)
+        if not entry:
+            return None
+        for port in ports:
+            if entry.get("serial_number") and port.serial_number == entry["serial_number"] \
+                    and port.vid == entry.get("vid"):
+                return _match(role, port, "cache")
+        # Seri numarası olmayan klonlar (CH340): aynı yol ve aynı VID:PID
+        for port in ports:
+            if port.device == entry.get("device") and port.vid == entry.get("vid") and port.pid == entry.get("pid"):
+                return _match(role, port, "cache")
+        return None
+
+    def update(self, matches: Dict[str, DeviceMatch]):
+        changed = False
+        for role, match in matches.items():
+            entry = {k: v for k, v in asdict(match).items() if k not in ("role", "method")}
+            if self.entries.get(role) != entry:
+                self.entries[role] = entry
+                changed = True
+        if changed:
+            try:
+                tmp = self.path + ".tmp"
+                with open(tmp, "w") as f:
+                    json.dump(self.entries, f, indent=2)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                logger.warning(f"Cihaz önbelleği yazılamadı ({self.path}): {e}")
+
+
+def discover_devices(cache: Optional[DeviceCache], roles: Iterable[str] = ROLES,
+                     exclude: Iterable[str] = (), ports: Optional[List] = None,
+                     probe: bool = True) -> Dict[str, DeviceMatch]:
+    """İstenen rollerin portlarını bulur; `exclude` zaten açık olan portlardır"""
+    wanted = list(roles)
+    excluded = set(exclude)
+    if ports is None:
+        ports = serial.tools.list_ports.comports()
+    ports = [p for p in ports if p.device not in excluded]
+    found: Dict[str, DeviceMatch] = {}
+
+    def claim(match: Optional[DeviceMatch]):
+        if match and match.role in wanted and match.role not in found \
+                and all(m.device != match.device for m in found.values()):
+            found[match.role] = match
+
+    if cache is not None:
+        for role in wanted:
+            claim(cache.find(role, ports))
+    for method, identify in (("usb_id", identify_by_usb), ("name", identify_by_name)):
+        for port in ports:
+            role = identify(port)
+            if role:
+                claim(_match(role, port, method))
+    missing = [r for r in wanted if r not in found]
+    claimed = {m.device for m in found.values()}
+    candidates = [p for p in ports if p.device not in claimed]
+    if probe and missing and candidates:
+        with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(candidates))) as pool:
+            for port, role in zip(candidates, pool.map(lambda p: probe_port(p.device), candidates)):
+                if role:
+                    claim(_match(role, port, "probe"))
+    if cache is not None and found:
+        cache.update(found)
+    return found
+
+
+def open_device(match: DeviceMatch) -> serial.Serial:
+    """Cihazı rolünün ayarlarıyla tek seferde açar"""
+    return serial.Serial(match.device, **SERIAL_SETTINGS[match.role])
@@ -0,0 +1,162 @@
+"""
+Cihaz başına tek uçuşlu (single-flight) yeniden bağlanma durum makinesi.
+
+Eskiden watchdog ve okuma hatası dalları her seferinde yeni bir
+`async_init_uart_connections_with_retry()` görevi başlatıyordu; üst üste
+binen taramalar portları birbirinin elinden alabiliyordu. `DeviceLink`
+cihaz başına en fazla bir yeniden bağlanma görevi çalıştırır; aradaki
+istekler çalışan göreve katılır.
+
+Durumlar:
+- disconnected: henüz denenmedi
+- probing: `connect()` çalışıyor
+- backoff: başarısız deneme sonrası üstel, jitter'lı bekleme
+- failed: `max_attempts` deneme tükendi; `failed_interval` aralıkla denemeye devam eder
+- connected: bağlı
+
+İlk deneme beklemeden yapılır; kopmadan yeniden bağlanmaya kadar geçen
+süre histograma yazılır.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+LINK_DISCONNECTED = "disconnected"
+LINK_PROBING = "probing"
+LINK_BACKOFF = "backoff"
+LINK_FAILED = "failed"
+LINK_CONNECTED = "connected"
+
+RECONNECT_BASE_DELAY = 0.1      # İlk başarısız denemeden sonraki bekleme (sn)
+RECONNECT_MAX_DELAY = 5.0       # Üstel beklemenin tavanı (sn)
+RECONNECT_JITTER = 0.2          # Bekleme ±%20 rastgele; iki cihaz aynı anda taramasın
+RECONNECT_MAX_ATTEMPTS = 12     # Bu kadar başarısız denemeden sonra failed durumuna geçilir
+RECONNECT_FAILED_INTERVAL = 10.0  # failed durumunda deneme aralığı (sn)
+
+
+class DeviceLink:
+    """Tek cihazın bağlantı durumu; `connect` bağlanınca True döndüren coroutine'dir"""
+
+    def __init__(self, name: str, connect: Callable[[], Awaitable[bool]],
+                 base_delay: float = RECONNECT_BASE_DELAY, max_delay: float = RECONNECT_MAX_DELAY,
+                 jitter: float = RECONNECT_JITTER, max_attempts: Optional[int] = RECONNECT_MAX_ATTEMPTS,
+                 failed_interval: float = RECONNECT_FAILED_INTERVAL, rng: Optional[random.Random] = None):
+        self.name = name
+        self.connect = connect
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+        self.failed_interval = failed_interval
+        self.rng = rng or random.Random()
+        self.state = LINK_DISCONNECTED
+        self.state_since = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+        self.lost_at: Optional[float] = None
+        self.last_reason = ""
+        self.next_attempt_in = 0.0
+        self.attempts = 0
+        self.failures = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.joined = 0
+        self.reconnect_time = Histogram()
+
+    @property
+    def connected(self) -> bool:
+        return self.state == LINK_CONNECTED
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.info(f"{self.name} bağlantısı: {self.state} -> {state}")
+            self.state = state
+            self.state_since = time.monotonic()
+
+    def backoff_delay(self, failures: int) -> float:
+        """`failures` ardışık başarısızlıktan sonraki bekleme"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def ensure(self, reason: str = "") -> Optional[asyncio.Task]:
+        """Bağlı değilse yeniden bağlanma görevini başlatır; çalışıyorsa ona katılır"""
+        if self.task is not None and not self.task.done():
+            self.joined += 1
+            return self.task
+        if self.state == LINK_CONNECTED:
+            return None
+        if reason:
+            self.last_reason = reason
+        self.task = asyncio.create_task(self._run())
+        return self.task
+
+    def lost(self, reason: str) -> Optional[asyncio.Task]:
+        """Bağlantı koptu: süre ölçümünü başlatır ve yeniden bağlanmayı tetikler"""
+        if self.state == LINK_CONNECTED:
+            self.disconnects += 1
+            self.lost_at = time.monotonic()
+            self.last_reason = reason
+            logger.warning(f"{self.name} bağlantısı koptu: {reason}")
+            self._set_state(LINK_DISCONNECTED)
+        return self.ensure(reason)
+
+    async def _run(self) -> bool:
+        failures = 0
+        while True:
+            self._set_state(LINK_PROBING)
+            self.attempts += 1
+            try:
+                ok = await self.connect()
+            except Exception as e:
+                logger.warning(f"{self.name} bağlanma denemesi hatası: {e}")
+                ok = False
+            if ok:
+                if self.lost_at is not None:
+                    elapsed = time.monotonic() - self.lost_at
+                    self.reconnect_time.observe(elapsed)
+                    logger.info(f"{self.name} {elapsed * 1000:.0f} ms sonra yeniden bağlandı ({failures} başarısız deneme)")
+                    self.lost_at = None
+                self.connects += 1
+                self.next_attempt_in = 0.0
+                self._set_state(LINK_CONNECTED)
+                return True
+            failures += 1
+            self.failures += 1
+            if self.max_attempts is not None and failures >= self.max_attempts:
+                self._set_state(LINK_FAILED)
+                delay = self.failed_interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+            else:
+                self._set_state(LINK_BACKOFF)
+                delay = self.backoff_delay(failures)
+            self.next_attempt_in = delay
+            await asyncio.sleep(delay)
+
+    async def wait_connected(self, timeout: float) -> bool:
+        """Bağlanana ya da süre dolana kadar bekler (görevi iptal etmeden)"""
+        task = self.ensure()
+        if task is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.connected
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "state_for_s": round(time.monotonic() - self.state_since, 3),
+            "last_reason": self.last_reason,
+            "next_attempt_in_s": round(self.next_attempt_in, 3) if self.state in (LINK_BACKOFF, LINK_FAILED) else 0.0,
+            "attempts": self.attempts,
+            "failures": self.failures,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "joined_requests": self.joined,
+            "reconnect_ms": self.reconnect_time.summary(),
+        }
@@ -0,0 +1,185 @@
+"""
+WebSocket fan-out worker.
+
+Ingest süreci (raspberry_pi_backend.py, ROCKET_SHARED_TELEMETRY=1) telemetriyi
+paylaşılan belleğe yazar; bu süreç(ler) oradan okuyup izleyicilere `/ws`
+ve salt okunur API'leri sunar. Böylece 20 izleyici seri port okuyucusunun
+CPU'sunu paylaşmaz. Komutlar (vana, step motor, senaryo) yalnızca ingest
+sürecinin portundan (5001) kabul edilir.
+
+Kullanım:
+    ROCKET_SHARED_TELEMETRY=1 python raspberry_pi_backend.py
+    python fanout_worker.py --port 5002 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+
+from connection_manager import PRIORITY_CRITICAL, QUEUE_POLICY_DROP_OLDEST, ConnectionManager, TelemetryFanout
+from shared_telemetry import DEFAULT_SHARED_NAME, SharedTelemetry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SHARED_TELEMETRY_NAME = os.environ.get("ROCKET_SHARED_TELEMETRY_NAME", DEFAULT_SHARED_NAME)
+DISPLAY_RATE_HZ = 30          # Ingest sürecindeki yayın hızıyla aynı
+DELTA_KEYFRAME_INTERVAL = 30
+HISTORY_BACKFILL_SECONDS = 10.0
+HISTORY_BACKFILL_RATE = 50.0
+ATTACH_RETRY_INTERVAL = 1.0   # Ingest süreci bloğu oluşturana kadar bekleme (sn)
+INGEST_STALE_AFTER = 2.0      # Bu kadar süre yayın gelmezse ingest "bayat" sayılır (sn)
+
+app = FastAPI(title="Roket Kontrol Sistemi - Fan-out Worker", version="1.0.0")
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+manager = ConnectionManager(max_queue=64, policy=QUEUE_POLICY_DROP_OLDEST,
+                            slow_client_timeout=5.0, send_timeout=2.0)
+shared: Optional[SharedTelemetry] = None
+fanout: Optional[TelemetryFanout] = None
+
+
+async def attach_shared_telemetry():
+    """Paylaşılan bloğa bağlanır; ingest süreci henüz başlamadıysa bekler"""
+    global shared, fanout
+    while shared is None:
+        try:
+            shared = SharedTelemetry(SHARED_TELEMETRY_NAME)
+        except (FileNotFoundError, RuntimeError):
+            await asyncio.sleep(ATTACH_RETRY_INTERVAL)
+    # Geçmiş paylaşılan halkadan gelir (kapasite kadar, 10 kHz'de ~6.5 sn)
+    fanout = TelemetryFanout(manager, shared.channels, DELTA_KEYFRAME_INTERVAL,
+                             history_source=shared.history, history_seconds=HISTORY_BACKFILL_SECONDS,
+                             history_rate=HISTORY_BACKFILL_RATE)
+    logger.info(f"🧩 Paylaşılan telemetriye bağlanıldı: {SHARED_TELEMETRY_NAME} "
+                f"({len(shared.channels)} kanal, pid {os.getpid()})")
+
+
+async def fanout_task():
+    """Paylaşılan halkadan DISPLAY_RATE_HZ hızında okuyup abonelik gruplarına yayınlar"""
+    await attach_shared_telemetry()
+    interval = 1.0 / DISPLAY_RATE_HZ
+    next_tick = time.monotonic()
+    last_valves = None
+    while True:
+        next_tick += interval
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            next_tick = time.monotonic()
+            await asyncio.sleep(0)
+        try:
+            seq, timestamps, rows = shared.take()
+            valves = shared.status().get("valve_states")
+            if valves is not None and valves != last_valves:
+                if last_valves is not None:
+                    await manager.broadcast(json.dumps({"type": "valve_state", "valves": valves}),
+                                            priority=PRIORITY_CRITICAL)
+                last_valves = valves
+            if len(timestamps) or manager.pending_backfills() or fanout.idle_flush_due(time.monotonic()):
+                await fanout.publish(seq, timestamps, rows, shared.latest_snapshot, shared.dropped,
+                                     new_data=bool(len(timestamps)))
+        except Exception:
+            logger.exception("Fan-out yayın hatası")
+
+
+@app.on_event("startup")
+async def startup_event():
+    asyncio.create_task(fanout_task())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if shared is not None:
+        shared.close()
+
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await manager.connect(websocket)
+    try:
+        while True:
+            message = json.loads(await websocket.receive_text())
+            if fanout is not None and await fanout.handle_message(websocket, message):
+                continue
+            if message.get("type") == "get_sensors":
+                await manager.send_personal_data(
+                    {"type": "sensor_data", "data": _status().get("sensor_data", {})}, websocket)
+            else:
+                await manager.send_personal_data(
+                    {"type": "error", "data": "Bu port salt okunur; komutlar ingest sürecine (5001) gönderilmeli"},
+                    websocket)
+    except WebSocketDisconnect:
+        manager.disconnect(websocket)
+    except Exception:
+        logger.exception("WebSocket hatası")
+        manager.disconnect(websocket)
+
+
+def _status():
+    if shared is None:
+        raise HTTPException(status_code=503, detail="Ingest süreci henüz yayın yapmıyor")
+    return shared.status()
+
+
+@app.get("/api/sensors")
+async def get_sensors():
+    return _status().get("sensor_data", {})
+
+
+@app.get("/api/status")
+async def get_system_status():
+    status = _status()
+    stm32_connected = status.get("stm32_connected", False)
+    arduino_connected = status.get("arduino_connected", False)
+    return {
+        "system_mode": status.get("system_mode", "idle"),
+        "stm32_connected": stm32_connected,
+        "arduino_connected": arduino_connected,
+        "websocket_connections": len(manager.active_connections),
+        "simulation_active": not stm32_connected,
+        "status": "operational" if (stm32_connected or arduino_connected) else "error",
+        "ingest_stale": shared.published_age() > INGEST_STALE_AFTER,
+    }
+
+
+@app.get("/api/buffer_status")
+async def buffer_status():
+    status = _status()
+    return {"buffer_index": status.get("buffer_index", 0), "buffer_size": status.get("buffer_size", 0)}
+
+
+@app.get("/api/websocket_clients")
+async def websocket_clients():
+    stats = manager.stats()
+    stats["pid"] = os.getpid()
+    stats["shared_telemetry"] = shared.stats() if shared is not None else None
+    return stats
+
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Roket telemetri fan-out worker")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5002)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    uvicorn.run("fanout_worker:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,33 @@
+import asyncio
 import serial
 import serial.tools.list_ports
 import logging
+import threading
 import time
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from arduino_channel import BOOT_PATTERN, TERMINAL_ERROR, TERMINAL_OK
 
 logger = logging.getLogger(__name__)
 
+READ_SLICE = 0.05      # Tek readline çağrısının en uzun süresi (sn); komut süresi bundan bağımsız
+BOOT_TIMEOUT = 3.0     # Port açılınca (Arduino reset) açılış banner'ını bekleme sınırı (sn)
+# Buton kontrolü komutlarının cevabı da komutu bitirir
+TERMINAL_MARKERS = TERMINAL_OK + ("Mekanik buton kontrolü", "Buton kontrolü durumu")
+# Bitiş satırı gelmeden zaman aşımı olursa komutun alındığını gösteren satırlar
+ACCEPTED_MARKERS = ("Gelen komut", "Dönüyor")
+
+
 class ArduinoController:
     def __init__(self, baudrate=115200, timeout=5):
         self.baudrate = baudrate
-        self.timeout = timeout
+        self.timeout = timeout  # Komut başına en uzun cevap bekleme süresi (sn)
         self.connection: Optional[serial.Serial] = None
         self.port = None
+        self.ready = False
+        self.last_latency: Optional[float] = None
+        self._lock = threading.Lock()  # Senkron ve async çağrılar portu sırayla kullanır
+        self._partial = b""
 
     def find_port(self):
         ports = list(serial.tools.list_ports.comports())
@@ -22,7 +38,7 @@ class ArduinoController:
         for i in range(3, 9):
             test_port = f'COM{i}'
             try:
-                ser = serial.Serial(test_port, self.baudrate, timeout=self.timeout)
+                ser = serial.Serial(test_port, self.baudrate, timeout=READ_SLICE)
                 ser.close()
                 return test_port
             except Exception:
@@ -36,18 +52,54 @@ class ArduinoController:
             self.connection = None
             return False
         try:
-            self.connection = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
-            logger.info(f"Arduino bağlantısı başarılı: {self.port}")
-            time.sleep(2)  # Arduino'nun başlamasını bekle
-            # Başlangıç mesajlarını temizle
-            while self.connection.in_waiting > 0:
-                self.connection.readline()
+            with self._lock:
+                self.connection = serial.Serial(self.port, self.baudrate, timeout=READ_SLICE)
+                self._partial = b""
+                logger.info(f"Arduino bağlantısı başarılı: {self.port}")
+                # Sabit 2 sn yerine açılış banner'ı (veya ilk satır) gelene kadar bekle
+                self.ready = self._wait_for_banner(BOOT_TIMEOUT)
             return True
         except Exception as e:
             logger.exception("Arduino bağlantı hatası")
             self.connection = None
             return False
 
+    def _read_line(self) -> Optional[str]:
+        """En fazla READ_SLICE bekler; yarım satırı bir sonraki çağrıya saklar"""
+        assert self.connection is not None
+        raw = self.connection.readline()
+        if not raw:
+            return None
+        if not raw.endswith(b"\n"):
+            self._partial += raw
+            return None
+        raw, self._partial = self._partial + raw, b""
+        return raw.decode(errors="ignore").strip() or None
+
+    def _wait_for_banner(self, timeout: float) -> bool:
+        start = time.monotonic()
+        while time.monotonic() - start < timeout:
+            line = self._read_line()
+            if line is None:
+                continue
+            # Sketch'in ilk satırı banner'dır; reset olmayan kartta ilk gelen satır da çalıştığını gösterir
+            source = "banner" if BOOT_PATTERN.search(line) else f"ilk satır: '{line}'"
+            logger.info(f"Arduino hazır ({source}, {(time.monotonic() - start) * 1000:.0f} ms)")
+            self._drain()
+            return True
+        logger.warning(f"Arduino açılış banner'ı {timeout} sn içinde gelmedi, devam ediliyor")
+        return False
+
+    def _drain(self) -> List[str]:
+        """Porttaki bekleyen satırları (buton olayları vb.) komuttan önce tüketir"""
+        lines = []
+        while self.connection.in_waiting > 0:
+            line = self._read_line()
+            if line:
+                lines.append(line)
+                logger.info(f"Arduino mesajı: '{line}'")
+        return lines
+
     def is_connected(self):
         return self.connection is not None and self.connection.is_open
 
@@ -56,37 +108,58 @@ class ArduinoController:
             self.connection.close()
             logger.info("Arduino bağlantısı kapatıldı.")
         self.connection = None
+        self.ready = False
 
-    def send_command(self, command):
+    def send_command(self, command) -> Tuple[bool, str]:
         if not self.is_connected():
             logger.error("Arduino bağlantısı yok.")
             return False, "Arduino bağlantısı yok"
         assert self.connection is not None, "Bağlantı kontrolü geçtiyse connection None olamaz."
         try:
-            if not command.endswith('\n'):
-                command += '\n'
-            logger.info(f"Arduino'ya komut gönderiliyor: '{command.strip()}'")
-            self.connection.write(command.encode())
-            self.connection.flush()
-            time.sleep(1)
-            response = ""
-            while self.connection.in_waiting > 0:
-                line = self.connection.readline().decode().strip()
-                if line:
-                    response += line + " "
-                    logger.info(f"Arduino yanıtı: '{line}'")
-            
-            # Hem step motor hem de solenoid komutları için başarı kontrolü
-            success = (
-                "Yeni Pozisyon" in response or 
-                "Dönüyor" in response or 
-                "Motor dönüş tamamlandı" in response or
-                "Solenoid durumu güncellendi" in response or
-                "Mekanik buton kontrolü" in response or
-                "Buton kontrolü durumu" in response or
-                "Gelen komut" in response  # Arduino'nun komutu aldığını gösterir
-            )
-            return success, response.strip()
+            with self._lock:
+                return self._send_locked(command)
         except Exception as e:
             logger.exception("Arduino komut hatası")
             return False, str(e)
+
+    def _send_locked(self, command) -> Tuple[bool, str]:
+        if not command.endswith('\n'):
+            command += '\n'
+        self._drain()
+        logger.info(f"Arduino'ya komut gönderiliyor: '{command.strip()}'")
+        start = time.monotonic()
+        self.connection.write(command.encode())
+        self.connection.flush()
+        # Bitiş satırı gelene ya da zaman aşımına kadar oku
+        lines = []
+        terminal = None
+        while time.monotonic() - start < self.timeout:
+            line = self._read_line()
+            if line is None:
+                continue
+            lines.append(line)
+            logger.info(f"Arduino yanıtı: '{line}'")
+            if any(marker in line for marker in TERMINAL_MARKERS):
+                terminal = True
+                break
+            if any(marker in line for marker in TERMINAL_ERROR):
+                terminal = False
+                break
+        self.last_latency = time.monotonic() - start
+        response = " ".join(lines)
+        if terminal is None:
+            logger.warning(f"Arduino bitiş satırı {self.timeout} sn içinde gelmedi: '{response}'")
+            # Komut alındıysa (hareket sürüyor) eskisi gibi başarılı say
+            success = any(marker in response for marker in ACCEPTED_MARKERS)
+        else:
+            success = terminal
+        logger.info(f"Arduino komut süresi: {self.last_latency * 1000:.1f} ms")
+        return success, response
+
+    # --- Async API: port işlemleri thread'de, event loop bloklanmaz ---
+
+    async def connect_async(self) -> bool:
+        return await asyncio.to_thread(self.connect)
+
+    async def send_command_async(self, command) -> Tuple[bool, str]:
+        return await asyncio.to_thread(self.send_command, command)
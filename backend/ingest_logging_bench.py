@@ -0,0 +1,103 @@
+"""
+Ingest hızının log yapılandırmasına göre ölçümü.
+
+Aynı STM32 satırları `ingest_stm32_line` (ayrıştırma + buffer yazımı +
+hot path log çağrıları) üzerinden farklı log yapılandırmalarıyla işlenir:
+
+- disabled: logging kapalı (üst sınır)
+- sync: eski `basicConfig(level=DEBUG)` davranışı, her kayıt çağıran thread'de yazılır
+- queue: kuyruk + listener thread, hız sınırı yok
+- queue_limited: kuyruk + anahtar/çağrı yeri başına hız sınırı ve DEBUG örnekleme (varsayılan)
+
+Her mod birkaç kez çalıştırılır, en iyi sonuç raporlanır.
+
+Çıktı hedefi varsayılan olarak geçici bir dosyadır; konsol (terminal) daha
+yavaştır, `--stderr` ile konsola yazılarak da ölçülebilir.
+
+Kullanım:
+    python ingest_logging_bench.py [satır_sayısı] [--stderr]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Arka plan görevleri ve dosya yazımı tetiklenmesin
+os.environ.setdefault("ROCKET_DEVICE_CACHE", os.path.join(tempfile.gettempdir(), "bench_device_cache.json"))
+
+import raspberry_pi_backend as backend  # noqa: E402
+from log_pipeline import LOG_FORMAT, setup_logging  # noqa: E402
+
+REPEATS = 3
+
+TELEMETRY_LINE = (
+    "P1: 1.01 | P2: 2.02 | P3: 3.03 | P4: 4.04 | P5: 5.05 | P6: 6.06 | P7: 7.07 | P8: 8.08 | "
+    "T1: 21.1 | T2: 22.2 | T3: 23.3 | T4: 24.4 | T5: 25.5 | T6: 26.6 | Tbogaz1: 301.5 | THRUST: 1520.0 | "
+    "ISP: 210.4 | Tbogaz2: 305.2 | D1: 0.41 | D2: 0.22 | IMPULSE: 830.1 | VELOCITY: 2010.7"
+)
+
+
+def _reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    logging.disable(logging.NOTSET)
+
+
+def _configure(mode: str, stream):
+    backend.log_pipeline.stop()
+    _reset_root()
+    backend.hot_log.rate = backend.LOG_RATE_LIMIT if mode == "queue_limited" else float("inf")
+    if mode == "disabled":
+        logging.disable(logging.CRITICAL)
+        return None
+    if mode == "sync":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.DEBUG)
+        return None
+    return setup_logging(logging.DEBUG, rate=None if mode == "queue" else backend.LOG_RATE_LIMIT,
+                         handlers=[logging.StreamHandler(stream)])
+
+
+def run(mode: str, lines: int, stream) -> float:
+    pipeline = _configure(mode, stream)
+    backend.buffer_index = 0
+    backend.backup_counter = backend.auto_save_counter = 0
+    started = time.perf_counter()
+    for _ in range(lines):
+        backend.ingest_stm32_line(TELEMETRY_LINE)
+    elapsed = time.perf_counter() - started
+    if pipeline is not None:
+        # Kuyruğun boşaltılması ingest'e dahil değil ama süresi raporlanır
+        drain = time.perf_counter()
+        pipeline.stop()
+        drain = time.perf_counter() - drain
+        if drain > 0.05:
+            print(f"    {mode}: kuyruk boşaltma {drain * 1000:.0f} ms", file=sys.__stdout__)
+    _reset_root()
+    return lines / elapsed
+
+
+def main():
+    lines = int(next((a for a in sys.argv[1:] if a.isdigit()), 50_000))
+    use_stderr = "--stderr" in sys.argv
+    # Zamanlı kayıt/yedek bu ölçüme girmesin
+    backend.BACKUP_INTERVAL = backend.AUTO_SAVE_INTERVAL = lines + 1
+    with tempfile.TemporaryFile("w") as tmp:
+        stream = sys.stderr if use_stderr else tmp
+        results = {}
+        for mode in ("disabled", "sync", "queue", "queue_limited"):
+            run(mode, min(lines, 2_000), stream)   # ısınma
+            results[mode] = max(run(mode, lines, stream) for _ in range(REPEATS))
+            print(f"{mode:>14}: {results[mode]:>9.0f} satır/sn", file=sys.__stdout__)
+    base = results["disabled"]
+    for mode in ("sync", "queue", "queue_limited"):
+        print(f"{mode:>14}: logging kapalıya göre %{results[mode] / base * 100:.0f}", file=sys.__stdout__)
+
+
+if __name__ == "__main__":
+    main()
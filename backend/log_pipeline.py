@@ -0,0 +1,194 @@
+"""
+Ingest yolunu bloklamayan, hız sınırlı log hattı.
+
+`logging.basicConfig` ile her log satırı, çağıran thread'de (event loop)
+biçimlendirilip konsola senkron yazılıyordu; 10 kHz örnekte konsol G/Ç'si
+ayrıştırmadan pahalıya geliyordu. Burada:
+
+- `RateLimitFilter`: çağrı yeri (logger + dosya + satır) başına token
+  bucket; saniyede `rate` kayıt, `burst` kadar ani artış. Bastırılan kayıt
+  sayısı, o yerden geçen bir sonraki kayda "(+N bastırıldı)" olarak eklenir.
+  DEBUG kayıtları ayrıca `debug_sample` kayıtta bir örneklenir.
+- `Throttle`: sıcak yol için anahtar başına aynı token bucket, ama kontrol
+  `LogRecord` oluşturulmadan önce yapılır (kayıt oluşturmak çağrı yeri
+  araması + zaman damgası ile tek başına birkaç µs sürer).
+- `LazyQueueHandler`: filtreden geçen kaydı biçimlendirmeden kuyruğa koyar;
+  `%s` argümanları listener thread'inde biçimlendirilir.
+- `QueueListener`: kuyruğu ayrı bir thread'de asıl handler'lara (konsol) yazar.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+LOG_RATE = 20.0        # Çağrı yeri başına saniyede izin verilen kayıt
+LOG_BURST = 50         # Çağrı yeri başına ani artış payı
+LOG_DEBUG_SAMPLE = 100  # DEBUG kayıtlarından her N'de biri (1 = hepsi)
+LOG_FORMAT = "%(levelname)s:%(name)s:%(message)s"   # basicConfig ile aynı görünüm
+
+# Argümanları listener thread'ine bırakmak için değişmez sayılan tipler
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+
+
+class RateLimitFilter(logging.Filter):
+    """Çağrı yeri başına token bucket + DEBUG örnekleme; `exempt_level` (varsayılan ERROR) ve üstü
+    hiç bastırılmaz, sıcak yoldaki WARNING'ler de sınırlanır"""
+
+    def __init__(self, rate: float = LOG_RATE, burst: int = LOG_BURST, debug_sample: int = LOG_DEBUG_SAMPLE,
+                 exempt_level: int = logging.ERROR):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.debug_sample = max(1, debug_sample)
+        self.exempt_level = exempt_level
+        # çağrı yeri -> [token, son dolum zamanı, bastırılan, DEBUG sayacı]
+        self._buckets: Dict[Tuple[str, str, int], List[float]] = {}
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        bucket = self._buckets.get(key)
+        now = time.monotonic()
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now, 0, 0]
+        if record.levelno <= logging.DEBUG and self.debug_sample > 1:
+            bucket[3] += 1
+            if bucket[3] % self.debug_sample != 1:
+                bucket[2] += 1
+                self.suppressed_total += 1
+                return False
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            bucket[2] += 1
+            self.suppressed_total += 1
+            return False
+        bucket[0] = tokens - 1.0
+        if bucket[2]:
+            record.suppressed = int(bucket[2])
+            bucket[2] = 0
+        return True
+
+
+class Throttle:
+    """Sıcak yol logları: anahtar başına token bucket, bastırılan kayıt hiç oluşturulmaz"""
+
+    def __init__(self, logger: logging.Logger, rate: float = LOG_RATE, burst: int = LOG_BURST):
+        self.logger = logger
+        self.rate = rate
+        self.burst = burst
+        # anahtar -> [token, son dolum zamanı, bastırılan]
+        self._buckets: Dict[str, List[float]] = {}
+        self.suppressed_total = 0
+
+    def log(self, level: int, key: str, msg: str, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        bucket = self._buckets.get(key)
+        now = time.monotonic()
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now, 0]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            bucket[2] += 1
+            self.suppressed_total += 1
+            return
+        bucket[0] = tokens - 1.0
+        suppressed, bucket[2] = int(bucket[2]), 0
+        # stacklevel=2: kayıttaki dosya/satır bu sınıf değil çağıran olsun
+        self.logger.log(level, msg, *args, extra={"suppressed": suppressed} if suppressed else None, stacklevel=2)
+
+    def debug(self, key: str, msg: str, *args):
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def info(self, key: str, msg: str, *args):
+        self.log(logging.INFO, key, msg, *args)
+
+    def warning(self, key: str, msg: str, *args):
+        self.log(logging.WARNING, key, msg, *args)
+
+
+class SuppressedFormatter(logging.Formatter):
+    """Bastırılan kayıt sayısını mesajın sonuna ekler"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" (+{suppressed} bastırıldı)"
+        return text
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Kaydı biçimlendirmeden kuyruğa koyar; değişebilir argümanlar varsa hemen biçimlendirir"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE_ARGS) for a in args)):
+            # Sözlük/liste argümanı sonradan değişebilir: değerini şimdi sabitle
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class LogPipeline:
+    """Kök logger'a kurulan kuyruk hattı; `stop` kuyruğu boşaltıp thread'i durdurur"""
+
+    def __init__(self, listener: logging.handlers.QueueListener, handler: LazyQueueHandler,
+                 rate_filter: Optional[RateLimitFilter]):
+        self.listener = listener
+        self.handler = handler
+        self.rate_filter = rate_filter
+        self.queue = handler.queue
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        logging.getLogger().removeHandler(self.handler)
+
+    def stats(self, *throttles: Throttle) -> Dict[str, int]:
+        return {
+            "queued": self.queue.qsize(),
+            "suppressed": (self.rate_filter.suppressed_total if self.rate_filter else 0)
+            + sum(t.suppressed_total for t in throttles),
+        }
+
+
+def setup_logging(level: int = logging.INFO, rate: Optional[float] = LOG_RATE, burst: int = LOG_BURST,
+                  debug_sample: int = LOG_DEBUG_SAMPLE, handlers: Optional[List[logging.Handler]] = None,
+                  fmt: str = LOG_FORMAT) -> LogPipeline:
+    """Kök logger'ı kuyruk hattına bağlar; `rate=None` hız sınırını kapatır"""
+    # Biçimde kullanılmayan süreç/thread alanları her kayıtta doldurulmasın
+    logging.logProcesses = "%(process" in fmt
+    logging.logMultiprocessing = "%(processName" in fmt
+    logging.logThreads = "%(thread" in fmt
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.setLevel(level)
+    if handlers is None:
+        handlers = [logging.StreamHandler(sys.stderr)]
+    formatter = SuppressedFormatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    rate_filter = RateLimitFilter(rate, burst, debug_sample) if rate is not None else None
+    if rate_filter is not None:
+        # Filtre kuyruğa girmeden önce, çağıran thread'de çalışır: bastırılan kayıt hiç biçimlendirilmez
+        queue_handler.addFilter(rate_filter)
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    pipeline = LogPipeline(listener, queue_handler, rate_filter)
+    atexit.register(pipeline.stop)
+    return pipeline
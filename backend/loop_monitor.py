@@ -0,0 +1,159 @@
+"""
+Event loop gecikme izleyicisi ve yavaş çağrı yakalayıcı.
+
+Loop üzerinde çalışan senkron bir iş (parquet kaydı, bloklayan okuma,
+`time.sleep`) tüm görevleri durdurur. `LoopMonitor`:
+
+- Loop'ta kısa aralıklarla uyuyan bir görev çalıştırır; her uyanışta
+  planlanandan ne kadar geç uyandığını (gecikme) histograma yazar.
+- Ayrı bir izleyici thread, bu görevin son kalp atışı eşiği aştığı halde
+  gelmediyse loop thread'inin o anki yığınını (`sys._current_frames`)
+  yakalar; yani takılmaya neden olan kod, takılma sürerken görülür.
+- Eşiği aşan her takılma, süresi ve yığınıyla son takılmalar halkasına,
+  en kötü takılmalar listesine ve yer (uygulama kodundaki en içteki
+  çerçeve) başına özete eklenir.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = 0.02     # Ölçüm görevinin uyku aralığı (sn)
+LOOP_STALL_THRESHOLD = 0.05  # Bu gecikmenin üstü takılma sayılır ve yığını yakalanır (sn)
+LOOP_STALL_KEEP = 20         # Tutulan son / en kötü takılma sayısı
+STACK_LIMIT = 25             # Yakalanan en içteki çerçeve sayısı
+
+# Takılma yeri için uygulama kodu sayılan dizin (backend/)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _where(stack: traceback.StackSummary) -> str:
+    """Uygulama kodundaki en içteki çerçeve; yoksa en içteki çerçeve"""
+    for frame in reversed(stack):
+        if os.path.abspath(frame.filename).startswith(APP_DIR) and not frame.filename.endswith("loop_monitor.py"):
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    return "bilinmiyor"
+
+
+class LoopMonitor:
+    """Loop gecikmesini sürekli ölçer, eşiği aşan takılmaların yığınını tutar"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_STALL_THRESHOLD,
+                 keep: int = LOOP_STALL_KEEP, stack_limit: int = STACK_LIMIT):
+        self.interval = interval
+        self.threshold = threshold
+        self.keep = keep
+        self.stack_limit = stack_limit
+        self.histogram = Histogram()
+        self.stalls = 0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.worst: List[Dict[str, Any]] = []
+        self.sites: Dict[str, Dict[str, Any]] = {}
+        self.started = time.time()
+        self._beat: Optional[float] = None
+        self._loop_thread: Optional[int] = None
+        self._captured: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    async def run(self):
+        """Loop üzerinde çalışan ölçüm görevi; izleyici thread'i de başlatır"""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        logger.info(f"⏱️ Event loop izleyici başlatıldı (eşik {self.threshold * 1000:.0f} ms)")
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(0.0, now - expected)
+                self._beat = now
+                self.histogram.observe(lag)
+                with self._lock:
+                    captured, self._captured = self._captured, None
+                if lag >= self.threshold:
+                    self._record(lag, captured)
+        finally:
+            self._stop.set()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        """İzleyici thread: kalp atışı gecikince loop thread'inin yığınını alır"""
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            if beat is None:
+                continue
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold:
+                continue
+            with self._lock:
+                if self._captured is not None and self._captured["beat"] == beat:
+                    continue  # bu takılmanın yığını zaten alındı
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is None:
+                    continue
+                stack = traceback.extract_stack(frame, limit=self.stack_limit)
+                del frame
+                self._captured = {"beat": beat, "after_ms": round(overdue * 1000, 1), "stack": stack}
+
+    def _record(self, lag: float, captured: Optional[Dict[str, Any]]):
+        self.stalls += 1
+        stack = captured["stack"] if captured else None
+        where = _where(stack) if stack else "yakalanamadı"
+        entry = {
+            "at": time.time(),
+            "lag_ms": round(lag * 1000, 1),
+            "where": where,
+            "captured_after_ms": captured["after_ms"] if captured else None,
+            "stack": [f"{f.filename}:{f.lineno} in {f.name}" + (f"\n    {f.line}" if f.line else "")
+                      for f in stack] if stack else [],
+        }
+        self.recent.append(entry)
+        if len(self.worst) < self.keep or lag * 1000 > self.worst[-1]["lag_ms"]:
+            self.worst.append(entry)
+            self.worst.sort(key=lambda e: e["lag_ms"], reverse=True)
+            del self.worst[self.keep:]
+        site = self.sites.setdefault(where, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        site["count"] += 1
+        site["total_ms"] = round(site["total_ms"] + entry["lag_ms"], 1)
+        site["max_ms"] = max(site["max_ms"], entry["lag_ms"])
+        logger.warning(f"Event loop {entry['lag_ms']:.0f} ms takıldı: {where}")
+
+    def reset(self):
+        self.histogram = Histogram()
+        self.stalls = 0
+        self.recent.clear()
+        self.worst.clear()
+        self.sites.clear()
+        self.started = time.time()
+
+    def snapshot(self, stacks: bool = True) -> Dict[str, Any]:
+        def strip(entry):
+            return entry if stacks else {k: v for k, v in entry.items() if k != "stack"}
+
+        return {
+            "since": self.started,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": self.histogram.summary(),
+            "stalls": self.stalls,
+            "sites": dict(sorted(self.sites.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)),
+            "worst": [strip(e) for e in self.worst],
+            "recent": [strip(e) for e in reversed(self.recent)],
+        }
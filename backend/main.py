@@ -117,10 +117,10 @@ async def simulation_callback():
 async def handle_step_motor_command(motor_id: int, angle: float):
     if not state.arduino.is_connected():
         logger.info("Arduino bağlı değil, yeniden bağlanmayı deniyor...")
-        if not state.arduino.connect():
+        if not await state.arduino.connect_async():
             return False, "Arduino bağlantısı yok"
     command = f"{motor_id}:{angle}"
-    success, response = state.arduino.send_command(command)
+    success, response = await state.arduino.send_command_async(command)
     return success, response
 
 # API endpointleri
@@ -176,7 +176,7 @@ async def serve_static(path: str):
 @app.on_event("startup")
 async def startup_event():
     logger.info("Roket kontrol sistemi başlatılıyor...")
-    if state.arduino.connect():
+    if await state.arduino.connect_async():
         logger.info("Arduino bağlantısı başarılı")
     else:
         logger.warning("Arduino bağlantısı başarısız - step motor kontrolü devre dışı")
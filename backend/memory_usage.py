@@ -0,0 +1,189 @@
+"""
+Bellek muhasebesi ve tracemalloc anlık görüntü farkları.
+
+`BUFFER_SIZE` 1 GB RAM'e göre elle ayarlanmıştır; pandas kayıtları, .npy
+yedekleri ve istemci kuyrukları bunun üstüne bellek ayırır. Burada:
+
+- `process_memory`: /proc'tan sürecin RSS / tepe RSS / swap değerleri ve
+  sistemin kullanılabilir belleği (Pi'nin swap'a ne zaman girdiği görülsün).
+- `array_memory`: önceden ayrılmış NumPy buffer'larının ayrılan ve dolu
+  kısmı (dokunulmamış sayfalar RSS'e girmez).
+- `TracemallocSnapshots`: tracemalloc açıkken adlandırılmış anlık görüntüler
+  alır ve iki an arasındaki farkı (satır / dosya / yığın başına) döndürür.
+  tracemalloc kendisi ek bellek ve CPU harcar; yalnızca ölçüm sırasında açılmalı.
+"""
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+TRACE_FRAMES = 10        # tracemalloc'un ayırma başına tuttuğu çerçeve sayısı
+SNAPSHOT_KEEP = 4        # Saklanan anlık görüntü (her biri onlarca MB olabilir)
+DIFF_LIMIT = 20          # Farkta döndürülen en büyük değişiklik sayısı
+DIFF_GROUPS = ("lineno", "filename", "traceback")
+
+MB = 1024 * 1024
+
+# tracemalloc'un ve import sisteminin kendi ayırmaları farka karışmasın
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _read_kb_fields(path: str) -> Dict[str, int]:
+    fields = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                parts = rest.split()
+                if parts and parts[0].isdigit():
+                    fields[name] = int(parts[0])
+    except OSError:
+        pass
+    return fields
+
+
+def process_memory() -> Dict[str, Any]:
+    """Süreç ve sistem belleği (MB); /proc yoksa (Windows) boş alanlar 0"""
+    status = _read_kb_fields("/proc/self/status")
+    meminfo = _read_kb_fields("/proc/meminfo")
+    swap_total = meminfo.get("SwapTotal", 0)
+    return {
+        "rss_mb": round(status.get("VmRSS", 0) / 1024, 1),
+        "rss_peak_mb": round(status.get("VmHWM", 0) / 1024, 1),
+        "rss_anon_mb": round(status.get("RssAnon", 0) / 1024, 1),
+        "rss_file_mb": round(status.get("RssFile", 0) / 1024, 1),
+        "swap_mb": round(status.get("VmSwap", 0) / 1024, 1),
+        "virtual_mb": round(status.get("VmSize", 0) / 1024, 1),
+        "system": {
+            "total_mb": round(meminfo.get("MemTotal", 0) / 1024, 1),
+            "available_mb": round(meminfo.get("MemAvailable", 0) / 1024, 1),
+            "swap_used_mb": round((swap_total - meminfo.get("SwapFree", swap_total)) / 1024, 1),
+        },
+    }
+
+
+def array_memory(array: np.ndarray, used_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Ayrılan ve (`used_rows` verilirse) dolu kısım, MB"""
+    out = {"allocated_mb": round(array.nbytes / MB, 2)}
+    if used_rows is not None:
+        row_bytes = array.nbytes // max(1, len(array))
+        out["used_mb"] = round(used_rows * row_bytes / MB, 2)
+    return out
+
+
+def arrow_pool_memory() -> Optional[float]:
+    """pyarrow bellek havuzundaki ayrılmış bayt (parquet okuma/yazma), MB"""
+    if not PYARROW_AVAILABLE:
+        return None
+    return round(pyarrow.total_allocated_bytes() / MB, 2)
+
+
+class TracemallocSnapshots:
+    """Adlandırılmış tracemalloc anlık görüntüleri ve aralarındaki farklar"""
+
+    def __init__(self, keep: int = SNAPSHOT_KEEP):
+        self.keep = keep
+        self.snapshots: "OrderedDict[str, Tuple[Dict[str, Any], tracemalloc.Snapshot]]" = OrderedDict()
+        self._seq = 0
+
+    def start(self, frames: int = TRACE_FRAMES) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        tracemalloc.stop()
+        self.snapshots.clear()
+        return self.status()
+
+    def _take(self, label: str) -> Tuple[Dict[str, Any], tracemalloc.Snapshot]:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc çalışmıyor")
+        started = time.perf_counter()
+        _, peak = tracemalloc.get_traced_memory()
+        # Tepe değer her görüntüde sıfırlanır: iki görüntü arasındaki geçici ayırmalar (pandas kaydı) görünsün
+        tracemalloc.reset_peak()
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        self._seq += 1
+        info = {
+            "id": f"s{self._seq}",
+            "label": label,
+            "taken_at": time.time(),
+            "traced_mb": round(sum(t.size for t in snapshot.traces) / MB, 2),
+            "traced_peak_mb": round(peak / MB, 2),   # önceki görüntüden bu yana tepe
+            "rss_mb": process_memory()["rss_mb"],
+            "took_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        return info, snapshot
+
+    def take(self, label: str = "") -> Dict[str, Any]:
+        """Anlık görüntü alıp saklar (en eskisi atılır); tracemalloc kapalıysa RuntimeError"""
+        info, snapshot = self._take(label)
+        self.snapshots[info["id"]] = (info, snapshot)
+        while len(self.snapshots) > self.keep:
+            self.snapshots.popitem(last=False)
+        return info
+
+    def diff(self, base: str, target: Optional[str] = None, group: str = "lineno",
+             limit: int = DIFF_LIMIT) -> Dict[str, Any]:
+        """`base`'den `target`'a (verilmezse şu ana) en çok değişen ayırmalar.
+
+        Bilinmeyen görüntüde KeyError, hatalı gruplamada ValueError fırlatır.
+        """
+        if group not in DIFF_GROUPS:
+            raise ValueError(f"Geçersiz gruplama: {group}")
+        if base not in self.snapshots:
+            raise KeyError(base)
+        base_info, base_snapshot = self.snapshots[base]
+        if target is None:
+            target_info, target_snapshot = self._take("şimdi")
+        elif target in self.snapshots:
+            target_info, target_snapshot = self.snapshots[target]
+        else:
+            raise KeyError(target)
+        stats = target_snapshot.compare_to(base_snapshot, group)
+        top = []
+        for stat in stats[:limit]:
+            frames = stat.traceback.format() if group == "traceback" else None
+            frame = stat.traceback[0]
+            top.append({
+                "where": f"{frame.filename}:{frame.lineno}" if group != "filename" else frame.filename,
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "size_kb": round(stat.size / 1024, 1),
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+                **({"traceback": frames} if frames is not None else {}),
+            })
+        return {
+            "base": base_info,
+            "target": target_info,
+            "group": group,
+            "traced_diff_mb": round(target_info["traced_mb"] - base_info["traced_mb"], 2),
+            "rss_diff_mb": round(target_info["rss_mb"] - base_info["rss_mb"], 1),
+            "top": top,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_mb": round(current / MB, 2),
+            "traced_peak_mb": round(peak / MB, 2),
+            "overhead_mb": round(tracemalloc.get_tracemalloc_memory() / MB, 2),
+            "snapshots": [info for info, _ in self.snapshots.values()],
+        }
@@ -0,0 +1,247 @@
+"""
+Düşük maliyetli ölçüm yardımcıları.
+
+`Histogram` sabit, logaritmik aralıklı kovalar kullanır: gözlem bir
+`bisect` + iki toplama, bellek sabit; yüzdelikler kova sınırlarından
+yaklaşık hesaplanır. `CommandLatency`, API çağrısından cihaz
+onayına kadar geçen süreyi komut türü başına tutar.
+
+`MetricsRegistry`, Prometheus metin formatında (`/api/metrics`) çıktı
+üretir. Sıcak yollar yalnızca `Counter.inc()` / `Histogram.observe()`
+çağırır (kilit yok; her sayacın tek yazıcısı event loop'tur); başka
+nesnelerde zaten tutulan sayaçlar ve anlık değerler (kuyruk gecikmesi,
+buffer doluluğu) kayıt sırasında verilen fonksiyonlarla yalnızca
+okunurken toplanır.
+"""
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Saniye; 100 µs .. 10 s, her onlukta 1-2-5 adımları
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.0002, 0.0005,
+    0.001, 0.002, 0.005,
+    0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5,
+    1.0, 2.0, 5.0, 10.0,
+)
+
+OUTCOME_OK = "ok"
+OUTCOME_NACK = "nack"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+OUTCOME_CANCELLED = "cancelled"
+OUTCOMES = (OUTCOME_OK, OUTCOME_NACK, OUTCOME_TIMEOUT, OUTCOME_ERROR, OUTCOME_CANCELLED)
+
+
+class Histogram:
+    """Sabit kovalı histogram; son kova (+Inf) en büyük sınırı aşanları tutar"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Kova içinde doğrusal aradeğerleme ile yaklaşık yüzdelik"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i - 1] if i > 0 else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(low + (high - low) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def cumulative(self):
+        """(üst sınır, kümülatif sayı) çiftleri; Prometheus `le` kovaları"""
+        total = 0
+        out = []
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+    def summary(self) -> Dict[str, Any]:
+        """ms cinsinden özet (connection_manager gecikme özetleriyle aynı birim)"""
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50": round(self.quantile(0.50) * 1000, 3),
+            "p90": round(self.quantile(0.90) * 1000, 3),
+            "p99": round(self.quantile(0.99) * 1000, 3),
+            "max": round(self.max * 1000, 3),
+        }
+
+
+class CommandLatency:
+    """Komut türü başına gidiş-dönüş süresi histogramı ve sonuç sayaçları"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.bucket_bounds = tuple(buckets)
+        self.histograms: Dict[str, Histogram] = {}
+        self.outcomes: Dict[str, Dict[str, int]] = {}
+        self.started = time.time()
+
+    def record(self, kind: str, seconds: float, outcome: str = OUTCOME_OK):
+        """Başarılı/NACK komutların süresi histograma girer; diğer sonuçlar yalnızca sayılır"""
+        counts = self.outcomes.get(kind)
+        if counts is None:
+            counts = self.outcomes[kind] = dict.fromkeys(OUTCOMES, 0)
+            self.histograms[kind] = Histogram(self.bucket_bounds)
+        counts[outcome] += 1
+        if outcome in (OUTCOME_OK, OUTCOME_NACK):
+            self.histograms[kind].observe(seconds)
+
+    def reset(self):
+        self.histograms.clear()
+        self.outcomes.clear()
+        self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "since": self.started,
+            "commands": {
+                kind: {
+                    "latency_ms": self.histograms[kind].summary(),
+                    "outcomes": dict(counts),
+                    # JSON'da Infinity yok; son kova Prometheus'taki gibi "+Inf"
+                    "buckets": [["+Inf" if bound == float("inf") else bound, n]
+                                for bound, n in self.histograms[kind].cumulative()],
+                }
+                for kind, counts in self.outcomes.items()
+            },
+        }
+
+
+class Counter:
+    """Artan sayaç; `inc` tek bir toplama"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class RateMeter:
+    """Bir sayacın okumalar arasındaki ortalama hızı (1/sn); en az `min_window` sn'lik pencere"""
+
+    def __init__(self, source: Callable[[], float], min_window: float = 1.0):
+        self.source = source
+        self.min_window = min_window
+        self._last_value = source()
+        self._last_time = time.monotonic()
+        self.rate = 0.0
+
+    def __call__(self) -> float:
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        if elapsed >= self.min_window:
+            value = self.source()
+            self.rate = max(0.0, value - self._last_value) / elapsed
+            self._last_value = value
+            self._last_time = now
+        return self.rate
+
+
+# Örnek: sayı, Histogram veya etiketli seri listesi [(etiketler, sayı|Histogram), ...]
+Sample = Union[float, Histogram, List[Tuple[Dict[str, str], Union[float, Histogram]]]]
+
+METRIC_COUNTER = "counter"
+METRIC_GAUGE = "gauge"
+METRIC_HISTOGRAM = "histogram"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Ad -> (tür, açıklama, kaynak); `render` Prometheus metin formatı (0.0.4) üretir"""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._metrics: Dict[str, Tuple[str, str, Any]] = {}
+
+    def _add(self, name: str, kind: str, help_text: str, source: Any):
+        name = self.prefix + name
+        if name in self._metrics:
+            raise ValueError(f"Metrik zaten kayıtlı: {name}")
+        self._metrics[name] = (kind, help_text, source)
+        return source
+
+    def counter(self, name: str, help_text: str, source: Optional[Callable[[], Sample]] = None):
+        """`source` verilmezse yeni bir `Counter` döndürür; verilirse okunurken çağrılır.
+        Prometheus kuralı gereği ad `_total` ile biter."""
+        return self._add(name, METRIC_COUNTER, help_text, source or Counter())
+
+    def gauge(self, name: str, help_text: str, source: Callable[[], Sample]):
+        return self._add(name, METRIC_GAUGE, help_text, source)
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  source: Optional[Callable[[], Sample]] = None):
+        return self._add(name, METRIC_HISTOGRAM, help_text, source or Histogram(buckets))
+
+    def _samples(self, source: Any) -> Iterable[Tuple[Dict[str, str], Any]]:
+        if isinstance(source, Counter):
+            return [({}, source.value)]
+        if isinstance(source, Histogram):
+            return [({}, source)]
+        value = source()
+        if isinstance(value, list):
+            return value
+        return [({}, value)]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, (kind, help_text, source) in self._metrics.items():
+            try:
+                samples = self._samples(source)
+            except Exception as e:
+                lines.append(f"# {name} okunamadı: {e}")
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if isinstance(value, Histogram):
+                    for bound, count in value.cumulative():
+                        le = "+Inf" if math.isinf(bound) else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,200 @@
+"""
+Çalışan backend için isteğe bağlı profil alma (sahada, sürece bağlanmadan).
+
+İki yöntem:
+- cprofile: event loop thread'inde `cProfile`. Her çağrı sayılır; ek yük
+  yüksektir (Python ağırlıklı kodda %30+), süre kısa tutulmalı. Sonuç pstats
+  dosyası (`python -m pstats`, snakeviz).
+- sampler: ayrı bir thread `interval` aralıkla `sys._current_frames()` ile
+  yığınları örnekler; ek yük örnek başına bir yığın yürüyüşüdür. Sonuç
+  collapsed-stack metni (flamegraph.pl, speedscope).
+
+Oturum yokken hiçbir profil kancası veya thread çalışmaz. Aynı anda tek
+oturum açılabilir; süre dolunca loop üzerinde kendiliğinden durur ve sonuç
+son `keep` sonuç arasında indirilmek üzere saklanır.
+"""
+import asyncio
+import cProfile
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CPROFILE = "cprofile"
+PROFILE_SAMPLER = "sampler"
+PROFILE_MODES = (PROFILE_CPROFILE, PROFILE_SAMPLER)
+
+PROFILE_MAX_SECONDS = 300.0     # Tek oturumun en uzun süresi (sn)
+SAMPLER_INTERVAL = 0.005        # Örnekleme aralığı (sn); 200 Hz
+SAMPLER_MIN_INTERVAL = 0.001
+SAMPLER_STACK_LIMIT = 64        # Yığın başına en fazla çerçeve
+PROFILE_KEEP = 5                # Saklanan son sonuç sayısı
+
+
+class ProfileBusy(RuntimeError):
+    """Zaten çalışan bir profil oturumu var"""
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Thread yığınlarını örnekler; collapsed-stack sayaçları tutar"""
+
+    def __init__(self, interval: float = SAMPLER_INTERVAL, thread_ids: Optional[Set[int]] = None,
+                 stack_limit: int = SAMPLER_STACK_LIMIT):
+        self.interval = interval
+        self.thread_ids = thread_ids     # None = kendisi dışındaki tüm thread'ler
+        self.stack_limit = stack_limit
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.counts
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.thread_ids is not None and ident not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.stack_limit:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+            frame = None   # çerçeve referansı thread'de tutulmasın
+            self.samples += 1
+
+    def collapsed(self) -> bytes:
+        """`çerçeve;çerçeve;... sayı` satırları (kök solda)"""
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(self.counts.items())).encode()
+
+
+@dataclass
+class ProfileResult:
+    id: str
+    mode: str
+    started: float
+    duration: float
+    samples: int          # sampler: örnek sayısı, cprofile: profillenen fonksiyon sayısı
+    data: bytes
+    filename: str
+    media_type: str
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "started": self.started,
+            "duration_s": round(self.duration, 3),
+            "samples": self.samples,
+            "bytes": len(self.data),
+            "filename": self.filename,
+        }
+
+
+class Profiler:
+    """Tek seferde bir profil oturumu; `start` event loop thread'inde çağrılmalı"""
+
+    def __init__(self, max_seconds: float = PROFILE_MAX_SECONDS, keep: int = PROFILE_KEEP):
+        self.max_seconds = max_seconds
+        self.results: Deque[ProfileResult] = deque(maxlen=keep)
+        self.active: Optional[Dict[str, Any]] = None
+        self._seq = 0
+
+    def start(self, mode: str, seconds: float, interval: float = SAMPLER_INTERVAL,
+              all_threads: bool = False) -> Dict[str, Any]:
+        """Hatalı parametrede ValueError, çalışan oturum varsa ProfileBusy fırlatır"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Geçersiz profil yöntemi: {mode}")
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"Süre 0 ile {self.max_seconds:.0f} sn arasında olmalı")
+        if interval < SAMPLER_MIN_INTERVAL:
+            raise ValueError(f"Örnekleme aralığı en az {SAMPLER_MIN_INTERVAL} sn olmalı")
+        if self.active is not None:
+            raise ProfileBusy(f"Profil oturumu zaten çalışıyor: {self.active['id']}")
+        loop = asyncio.get_running_loop()
+        self._seq += 1
+        session: Dict[str, Any] = {
+            "id": f"{time.strftime('%Y%m%d_%H%M%S')}_{self._seq}",
+            "mode": mode,
+            "started": time.time(),
+            "t0": time.perf_counter(),
+            "seconds": seconds,
+        }
+        if mode == PROFILE_CPROFILE:
+            # cProfile yalnızca çağıran thread'i (event loop) izler
+            session["profile"] = cProfile.Profile()
+            session["profile"].enable()
+        else:
+            session["interval"] = interval
+            session["sampler"] = StackSampler(interval, None if all_threads else {threading.get_ident()})
+            session["sampler"].start()
+        session["timer"] = loop.call_later(seconds, self.stop)
+        self.active = session
+        logger.info(f"🔬 Profil oturumu başladı: {session['id']} ({mode}, {seconds:.0f} sn)")
+        return self.status()["active"]
+
+    def stop(self) -> Optional[ProfileResult]:
+        session, self.active = self.active, None
+        if session is None:
+            return None
+        session["timer"].cancel()
+        duration = time.perf_counter() - session["t0"]
+        if session["mode"] == PROFILE_CPROFILE:
+            profile = session["profile"]
+            profile.disable()
+            profile.create_stats()
+            # pstats.Stats(dosya) ile okunan biçim (Profile.dump_stats ile aynı)
+            data = marshal.dumps(profile.stats)
+            result = ProfileResult(session["id"], PROFILE_CPROFILE, session["started"], duration,
+                                   len(profile.stats), data, f"profile_{session['id']}.pstats",
+                                   "application/octet-stream")
+        else:
+            sampler = session["sampler"]
+            sampler.stop()
+            result = ProfileResult(session["id"], PROFILE_SAMPLER, session["started"], duration,
+                                   sampler.samples, sampler.collapsed(), f"profile_{session['id']}.collapsed",
+                                   "text/plain; charset=utf-8")
+        self.results.append(result)
+        logger.info(f"🔬 Profil oturumu bitti: {result.id} ({duration:.1f} sn, {len(result.data)} bayt)")
+        return result
+
+    def get(self, profile_id: str) -> Optional[ProfileResult]:
+        for result in self.results:
+            if result.id == profile_id:
+                return result
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        active = None
+        if self.active is not None:
+            elapsed = time.perf_counter() - self.active["t0"]
+            active = {
+                "id": self.active["id"],
+                "mode": self.active["mode"],
+                "started": self.active["started"],
+                "elapsed_s": round(elapsed, 3),
+                "remaining_s": round(max(0.0, self.active["seconds"] - elapsed), 3),
+            }
+        return {"active": active, "results": [r.info() for r in reversed(self.results)]}
@@ -1,5 +1,4 @@
 import asyncio
-import serial
 import json
 try:
     import msgpack
@@ -10,23 +9,72 @@ except ImportError:
 import logging
 import re
 import os
+import hmac
+import sys
 from datetime import datetime
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Body
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Body, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 import time
-import serial.tools.list_ports
 import numpy as np
 import threading
 import pandas as pd
-import queue
+from data_export import (
+    EXPORT_CHUNK_ROWS,
+    EXPORT_FORMATS,
+    build_export_schema,
+    iter_buffer_batches,
+    iter_export_bytes,
+    iter_parquet_batches,
+    iter_saved_rows,
+    skip_rows,
+)
+from connection_manager import (
+    PRIORITY_CRITICAL,
+    QUEUE_POLICY_DROP_OLDEST,
+    ConnectionManager,
+    TelemetryFanout,
+)
+from arduino_channel import ArduinoChannel
+from command_scheduler import CommandCancelled, CommandScheduler
+from device_discovery import (
+    ROLE_ARDUINO,
+    ROLE_STM32,
+    DeviceCache,
+    DeviceMatch,
+    discover_devices,
+    open_device,
+)
+from device_link import DeviceLink
+from log_pipeline import LOG_RATE, Throttle, setup_logging
+from loop_monitor import LoopMonitor
+from metrics import (
+    OUTCOME_CANCELLED,
+    OUTCOME_ERROR,
+    OUTCOME_NACK,
+    OUTCOME_OK,
+    OUTCOME_TIMEOUT,
+    CommandLatency,
+    MetricsRegistry,
+    RateMeter,
+)
+from memory_usage import MB, TRACE_FRAMES, TracemallocSnapshots, array_memory, arrow_pool_memory, process_memory
+from profiling import PROFILE_SAMPLER, SAMPLER_INTERVAL, ProfileBusy, Profiler
+from shared_telemetry import DEFAULT_SHARED_NAME, SharedTelemetry
+from stm32_channel import STM32Channel
+from telemetry import SampleRing, SnapshotEncoder
 
-# Logging konfigürasyonu
-logging.basicConfig(level=logging.DEBUG)
+# Logging konfigürasyonu: kayıtlar kuyruğa girer, konsola ayrı thread yazar; çağrı yeri başına hız sınırı
+LOG_LEVEL = os.environ.get("ROCKET_LOG_LEVEL", "DEBUG").upper()
+LOG_RATE_LIMIT = float(os.environ.get("ROCKET_LOG_RATE", LOG_RATE))  # 0 = sınırsız
+log_pipeline = setup_logging(getattr(logging, LOG_LEVEL, logging.DEBUG),
+                             rate=LOG_RATE_LIMIT or None)
 logger = logging.getLogger(__name__)
+# Örnek başına çalışan log çağrıları: hız sınırı kayıt oluşturulmadan önce uygulanır
+hot_log = Throttle(logger, rate=LOG_RATE_LIMIT or float("inf"))
 
 app = FastAPI(title="Roket Kontrol Sistemi API - Raspberry Pi", version="1.0.0")
 
@@ -57,14 +105,30 @@ timestamp_buffer = np.zeros(BUFFER_SIZE, dtype=np.float64)  # Timestamp için fl
 sensor_buffer = np.zeros((BUFFER_SIZE, len(SENSOR_COLUMNS) - 1), dtype=np.float32)  # Diğer veriler için float32
 buffer_index = 0
 buffer_lock = threading.Lock()
+# Buffer her kaydedilip temizlendiğinde nesil artar; temizlenen neslin satırları
+# hangi dosyaya yazıldıysa burada tutulur (dışa aktarma arada kaydedilen satırları oradan okur)
+buffer_generation = 0
+saved_buffer_files: Dict[int, str] = {}
+# Buffer'ın ilk satırının canlı sıra no'su ve kaydedilen her neslin ilk satırınınki (geçmiş bunlardan okunur)
+buffer_start_seq = 0
+saved_buffer_seqs: Dict[int, int] = {}
+SAVED_BUFFER_FILES_KEEP = 3600  # 10 kHz'de ~1 saatlik kayıt
+
+# Son yayından beri gelen örnekler (sensor_batch kareleri için)
+TELEMETRY_CHANNELS = SENSOR_COLUMNS[1:]
+live_samples = SampleRing(len(TELEMETRY_CHANNELS))
+# Delta kareleri için keyframe aralığı
+DELTA_KEYFRAME_INTERVAL = 30  # Kare sayısı (30 Hz'de ~1 sn'de bir keyframe)
 
 # Buffer'a veri ekle (sadece 14 kritik veri)
 def append_sensor_to_buffer(sensor_data: Dict[str, Any]):
     global buffer_index
     with buffer_lock:
+        # Timestamp epoch, ondalıklı saniye
+        timestamp = float(time.time())
         if buffer_index < BUFFER_SIZE:
-            # Timestamp'i ayrı float64 buffer'a kaydet (epoch, ondalıklı saniye)
-            timestamp_buffer[buffer_index] = float(time.time())
+            # Timestamp'i ayrı float64 buffer'a kaydet
+            timestamp_buffer[buffer_index] = timestamp
             # Diğer sensör verilerini float32 buffer'a kaydet
             pressures = sensor_data.get("pressures", [0.0]*8)
             temperatures = sensor_data.get("temperatures", [0.0]*8)  # 6 + 2 yeni sıcaklık sensörü
@@ -97,14 +161,52 @@ def append_sensor_to_buffer(sensor_data: Dict[str, Any]):
             ], dtype=np.float32)
             sensor_buffer[buffer_index, :] = sensor_row
             buffer_index += 1
+            # Canlı yayın halkasına da ekle (tüm örnekler dashboard'a ulaşsın)
+            live_samples.append(timestamp, sensor_row)
             if buffer_index >= BUFFER_SIZE * 0.9:
-                logger.warning(f"Buffer %90 doldu! ({buffer_index}/{BUFFER_SIZE})")
+                logger.warning("Buffer %%90 doldu! (%d/%d)", buffer_index, BUFFER_SIZE)
         else:
+            buffer_overflow_samples.inc()
             logger.error("Sensor buffer tamamen doldu! Veri kaybı oluyor.")
 
+# Buffer'ı dışa aktarma için parça parça kopyala
+def export_buffer_view():
+    """Parquet dosya listesi, buffer sınırı ve nesli aynı kilit altında alır (kayıt da bu kilidi tutar)"""
+    import glob
+    with buffer_lock:
+        return sorted(glob.glob("sensor_log_*.parquet")), buffer_index, buffer_generation
+
+def iter_sensor_buffer_chunks(chunk_rows: int, end: Optional[int] = None, generation: Optional[int] = None):
+    """RAM buffer'ın ilk `end` satırını kilidi her parça için kısa süre tutarak kopyalar.
+
+    Bu arada buffer kaydedilip temizlendiyse kalan satırlar kaydedildikleri parquet
+    dosyasından okunur; sonradan gelen yeni satırlar bu okumaya karışmaz.
+    """
+    if end is None:
+        with buffer_lock:
+            end, generation = buffer_index, buffer_generation
+    start = 0
+    while start < end:
+        with buffer_lock:
+            saved = buffer_generation != generation
+            if not saved:
+                stop = min(start + chunk_rows, end)
+                timestamps = timestamp_buffer[start:stop].copy()
+                sensors = sensor_buffer[start:stop, :].copy()
+        if saved:
+            filename = saved_buffer_files.get(generation)
+            if filename is None:
+                logger.warning(f"Dışa aktarma: kaydedilen buffer dosyası bulunamadı, {end - start} satır atlandı")
+                return
+            yield from iter_saved_rows(filename, start, end, chunk_rows)
+            return
+        yield timestamps, sensors
+        start = stop
+
 # Buffer'ı Parquet olarak kaydet (optimize edilmiş)
 def save_sensor_buffer(filename: Optional[str] = None, clear_after_save: bool = True):
-    global buffer_index
+    global buffer_index, buffer_generation, buffer_start_seq
+    started = time.perf_counter()
     with buffer_lock:
         n = buffer_index
         if n == 0:
@@ -136,70 +238,98 @@ def save_sensor_buffer(filename: Optional[str] = None, clear_after_save: bool =
             # Clear buffer after successful save
             if clear_after_save:
                 buffer_index = 0
+                saved_buffer_files[buffer_generation] = filename
+                saved_buffer_files.pop(buffer_generation - SAVED_BUFFER_FILES_KEEP, None)
+                saved_buffer_seqs[buffer_generation] = buffer_start_seq
+                saved_buffer_seqs.pop(buffer_generation - SAVED_BUFFER_FILES_KEEP, None)
+                # Buffer ve canlı halka aynı kilit altında yazılır: sıradaki satır halkanın sıradaki örneği
+                buffer_start_seq = live_samples.write_seq
+                buffer_generation += 1
+                buffer_clears.inc()
                 logger.info("Buffer temizlendi.")
+            buffer_save_seconds.observe(time.perf_counter() - started)
                 
         except Exception as e:
             logger.exception("Buffer kaydetme hatası")
             raise
 
-# WebSocket bağlantıları için manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+# WebSocket istemci kuyruk ayarları
+WS_SEND_QUEUE_SIZE = 64            # İstemci başına bekleyebilecek maksimum mesaj
+WS_QUEUE_POLICY = QUEUE_POLICY_DROP_OLDEST  # veya "latest" (son snapshot'a birleştir)
+WS_SLOW_CLIENT_TIMEOUT = 5.0       # Kuyruk doluyken bu kadar gerideki istemci düşürülür (sn)
+WS_SEND_TIMEOUT = 2.0              # Tek bir gönderim bu süreyi aşarsa istemci düşürülür (sn)
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket bağlantısı eklendi. Toplam: {len(self.active_connections)}")
+manager = ConnectionManager(
+    max_queue=WS_SEND_QUEUE_SIZE,
+    policy=WS_QUEUE_POLICY,
+    slow_client_timeout=WS_SLOW_CLIENT_TIMEOUT,
+    send_timeout=WS_SEND_TIMEOUT,
+)
+# Yeni bağlanan istemciye canlı akıştan önce gönderilen seyreltilmiş geçmiş
+HISTORY_BACKFILL_SECONDS = 10.0  # Varsayılan geçmiş süresi (subscribe ile "backfill": sn)
+HISTORY_BACKFILL_RATE = 50.0     # Tam hızlı abonelikler için geçmiş örnek hızı (örnek/sn)
 
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"WebSocket bağlantısı kaldırıldı. Toplam: {len(self.active_connections)}")
+def read_buffer_history(end_seq: int, seconds: float):
+    """Canlı sıra no'su `end_seq`'ten önceki son `seconds` saniyeyi kopyalar.
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    Buffer ve canlı halka aynı kilit altında yazıldığından, canlı sıra no'su
+    buffer indeksine doğrudan çevrilebilir. Buffer istenen süreyi kapsamıyorsa
+    (her otomatik kayıtta temizlenir) baştaki eksik kısım önceki neslin
+    kaydedildiği parquet dosyalarından, yeniden eskiye doğru tamamlanır.
+    """
+    parts = []
+    cutoff = None
+    start_seq = end_seq
+    with buffer_lock:
+        generation, segment_start = buffer_generation, buffer_start_seq
+        end = min(end_seq - segment_start, buffer_index)
+        if end > 0:
+            cutoff = timestamp_buffer[end - 1] - seconds
+            start = int(np.searchsorted(timestamp_buffer[:end], cutoff, side="left"))
+            parts.append((timestamp_buffer[start:end].copy(), sensor_buffer[start:end].copy()))
+            start_seq = segment_start + start
+            if start > 0:
+                return (start_seq,) + parts[0]
+    for gen in range(generation - 1, generation - SAVED_BUFFER_FILES_KEEP - 1, -1):
+        filename, gen_start = saved_buffer_files.get(gen), saved_buffer_seqs.get(gen)
+        if filename is None or gen_start is None:
+            break
+        stop = min(end_seq, segment_start) - gen_start
+        segment_start = gen_start
+        if stop <= 0:
+            continue
+        try:
+            chunks = list(iter_saved_rows(filename, 0, stop))
+        except Exception as e:
+            logger.warning(f"Geçmiş: kaydedilen buffer dosyası okunamadı ({filename}): {e}")
+            break
+        if not chunks:
+            break
+        timestamps = np.concatenate([ts for ts, _ in chunks])
+        rows = np.concatenate([r for _, r in chunks])
+        if cutoff is None:
+            cutoff = timestamps[-1] - seconds
+        start = int(np.searchsorted(timestamps, cutoff, side="left"))
+        parts.append((timestamps[start:], rows[start:]))
+        start_seq = gen_start + start
+        if start > 0:
+            break
+    if not parts:
+        return end_seq, timestamp_buffer[:0].copy(), sensor_buffer[:0].copy()
+    parts.reverse()
+    return (start_seq, np.concatenate([ts for ts, _ in parts]), np.concatenate([r for _, r in parts]))
 
-    async def broadcast(self, message: str):
-        if self.active_connections:
-            await asyncio.gather(
-                *[connection.send_text(message) for connection in self.active_connections]
-            )
-    
-    def to_native(self, obj):
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if isinstance(obj, (np.floating,)):
-            return float(obj)
-        if isinstance(obj, (np.integer,)):
-            return int(obj)
-        if isinstance(obj, dict):
-            return {k: self.to_native(v) for k, v in obj.items()}
-        if isinstance(obj, list):
-            return [self.to_native(x) for x in obj]
-        return obj
-
-    async def broadcast_binary(self, data: Dict[str, Any]):
-        """msgpack ile binary format kullanarak veri gönderir"""
-        if self.active_connections:
-            if MSGPACK_AVAILABLE:
-                try:
-                    native_data = self.to_native(data)
-                    packed_data = msgpack.packb(native_data, use_bin_type=True)
-                    if packed_data is not None:
-                        await asyncio.gather(*[connection.send_bytes(packed_data) for connection in self.active_connections])
-                    else:
-                        # Fallback: JSON kullan
-                        await self.broadcast(json.dumps(data))
-                except Exception as e:
-                    logger.exception(f"msgpack paketleme hatası: {e}, veri: {data}")
-                    # Fallback: JSON kullan
-                    await self.broadcast(json.dumps(self.to_native(data)))
-            else:
-                # msgpack yoksa direkt JSON kullan
-                await self.broadcast(json.dumps(self.to_native(data)))
+# Abonelik grupları: aynı görünümü isteyen istemciler için kare bir kez üretilir
+telemetry_fanout = TelemetryFanout(manager, TELEMETRY_CHANNELS, DELTA_KEYFRAME_INTERVAL,
+                                   history_source=read_buffer_history,
+                                   history_seconds=HISTORY_BACKFILL_SECONDS,
+                                   history_rate=HISTORY_BACKFILL_RATE)
 
-manager = ConnectionManager()
+# Çok süreçli dağıtım: ingest süreci telemetriyi paylaşılan belleğe yazar,
+# fan-out worker'lar (fanout_worker.py) /ws ve salt okunur API'leri sunar.
+SHARED_TELEMETRY_ENABLED = os.environ.get("ROCKET_SHARED_TELEMETRY", "0") == "1"
+SHARED_TELEMETRY_NAME = os.environ.get("ROCKET_SHARED_TELEMETRY_NAME", DEFAULT_SHARED_NAME)
+shared_telemetry: Optional[SharedTelemetry] = None
 
 # Sensör verileri
 sensor_data = {
@@ -230,47 +360,53 @@ system_mode = 'idle'
 # UART bağlantıları
 stm32_uart = None
 arduino_uart = None
-stm32_lock = threading.Lock()
+# Son bulunan cihazların USB kimliği; yeniden başlatmada port doğrudan bulunur
+DEVICE_CACHE_PATH = os.environ.get("ROCKET_DEVICE_CACHE", "device_cache.json")
+device_cache = DeviceCache(DEVICE_CACHE_PATH)
+# Sabit port (ör. soak testindeki sanal STM32 pty'si); verilen rol için keşif yapılmaz
+FIXED_PORTS = {ROLE_STM32: os.environ.get("ROCKET_STM32_PORT"), ROLE_ARDUINO: os.environ.get("ROCKET_ARDUINO_PORT")}
+STARTUP_CONNECT_TIMEOUT = 3.0  # Başlangıçta cihazlar için beklenen en uzun süre (sn)
+# Komut gidiş-dönüş süreleri: API çağrısından cihaz yazımı/onayına, komut türü başına
+command_latency = CommandLatency()
 
-# Arduino komut kuyruğu ve thread'i
-arduino_cmd_queue = queue.Queue()
-arduino_resp_queue = queue.Queue()
+def record_command(kind: str, started: float, ok: Optional[bool] = True, error: Optional[BaseException] = None,
+                   cancelled: bool = False):
+    """`ok` None: cihaz cevap vermedi (zaman aşımı); `error`: iptal, zaman aşımı veya hata;
+    `cancelled`: cevap emergency ile iptal edildiğini söylüyor (NACK sayılmaz)"""
+    if cancelled:
+        outcome = OUTCOME_CANCELLED
+    elif error is not None:
+        if isinstance(error, CommandCancelled):
+            outcome = OUTCOME_CANCELLED
+        elif isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            outcome = OUTCOME_TIMEOUT
+        else:
+            outcome = OUTCOME_ERROR
+    else:
+        outcome = OUTCOME_TIMEOUT if ok is None else OUTCOME_OK if ok else OUTCOME_NACK
+    command_latency.record(kind, time.perf_counter() - started, outcome)
 
-# Arduino worker thread
+def on_stm32_reply(name: str, rtt: float, ok: bool):
+    # Yazımdan ACK/NACK'e cihaz süresi (firmware ACK gönderiyorsa)
+    command_latency.record(f"stm32_ack:{name}", rtt, OUTCOME_OK if ok else OUTCOME_NACK)
 
-def arduino_worker():
-    while True:
-        item = arduino_cmd_queue.get()
-        if item is None:
-            break
-        cmd, expect_response = item
-        try:
-            if arduino_uart is not None:
-                arduino_uart.write(cmd.encode())
-                arduino_uart.flush()
-                if expect_response:
-                    timeout = time.time() + 0.5
-                    response = ""
-                    while time.time() < timeout:
-                        if arduino_uart.in_waiting > 0:
-                            line = arduino_uart.readline().decode(errors='ignore').strip()
-                            if line:
-                                response += line + " "
-                                break
-                        time.sleep(0.01)
-                    arduino_resp_queue.put(response.strip())
-                else:
-                    arduino_resp_queue.put(None)
-            else:
-                arduino_resp_queue.put(None)
-        except Exception as e:
-            logger.warning(f"Arduino worker hata: {e}")
-            arduino_resp_queue.put(None)
-        finally:
-            arduino_cmd_queue.task_done()
+# STM32 portunun tek sahibi: komutlar ve telemetri okuması yalnızca bu nesneden geçer
+stm32_channel = STM32Channel(lambda: stm32_uart, on_reply=on_stm32_reply)
+
+# Arduino portunun tek sahibi: komut future'ları ve kendiliğinden gelen satırların okuyucusu
+arduino_channel = ArduinoChannel(lambda: arduino_uart, on_port_error=lambda e: on_arduino_port_error(e))
 
-# Thread başlatıcı (startup event'te çağrılacak)
-arduino_thread = threading.Thread(target=arduino_worker, daemon=True)
+# Komut zamanlayıcı: vana/motor komutları latest-wins birleşir, senaryo/mod komutları sırayla gider
+STM32_COMMAND_INTERVAL = 0.02   # Firmware'in UART komut işleme hızı (~50 komut/sn)
+ARDUINO_MOTOR_INTERVAL = 0.0    # Motor komutu zaten bitiş satırını bekler
+command_scheduler = CommandScheduler()
+command_scheduler.add_target("stm32", lambda cmd: stm32_channel.send(cmd, wait_ack=False), STM32_COMMAND_INTERVAL)
+# v2a.ino yalnızca bu motorları tanır; motor başına ayrı hedef: birikmiş hareketlerden yalnızca sonuncusu gider
+STEP_MOTOR_IDS = (1, 2)
+for _motor_id in STEP_MOTOR_IDS:
+    command_scheduler.add_target(f"arduino:motor{_motor_id}",
+                                 lambda cmd, key=_motor_id: arduino_channel.send(cmd, key=key),
+                                 ARDUINO_MOTOR_INTERVAL)
 
 # Remove the continuous feedback thread (stm32_feedback_reader and feedback_thread)
 # Restore the emergency endpoint to read the first feedback line after sending the command
@@ -293,10 +429,11 @@ def parse_stm32_data(data_string: str) -> Optional[Dict[str, Any]]:
     # Sadece sensör verisi satırlarını filtrele
     if data_string.strip().startswith("P1:"):
         if not ("P1:" in data_string and "VELOCITY:" in data_string):
-            logger.warning(f"Geçersiz veya eksik STM32 sensör verisi atlandı: {data_string}")
+            parse_failures.inc()
+            hot_log.warning("stm32_invalid", "Geçersiz veya eksik STM32 sensör verisi atlandı: %s", data_string)
             return None
         try:
-            logger.debug(f"Parsing STM32 data: {data_string}")
+            hot_log.debug("stm32_parse", "Parsing STM32 data: %s", data_string)
             # Önce tam pattern ile dene
             pattern = (
                 r'P1:\s*"?([-+]?\d*\.?\d+)"?\s*\|\s*P2:\s*"?([-+]?\d*\.?\d+)"?\s*\|\s*P3:\s*"?([-+]?\d*\.?\d+)"?\s*\|\s*P4:\s*"?([-+]?\d*\.?\d+)"?\s*\|\s*'
@@ -311,16 +448,18 @@ def parse_stm32_data(data_string: str) -> Optional[Dict[str, Any]]:
                 values = list(map(float, match.groups()))
                 return {
                     "pressures": values[0:8],
-                    "temperatures": values[8:14] + [values[15], values[18]],  # T1-T6 + Tbogaz1 + Tbogaz2
+                    # Grup sırası: P1-P8 (0-7), T1-T6 (8-13), Tbogaz1 (14), THRUST (15), ISP (16),
+                    # Tbogaz2 (17), D1 (18), D2 (19), IMPULSE (20), VELOCITY (21)
+                    "temperatures": values[8:14] + [values[14], values[17]],  # T1-T6 + Tbogaz1 + Tbogaz2
                     "debis": [],  # D1 ve D2 artık yok
                     "adiabatic_temperature": 0.0,  # Artık yok
-                    "thrust": values[16],
-                    "isp": values[17],
+                    "thrust": values[15],
+                    "isp": values[16],
                     "p_chamber": 0.0,  # Artık yok
-                    "oxygen_consumption": values[19],  # D1 verisi oksijen tüketimi olarak
-                    "fuel_consumption": values[20],    # D2 verisi yakıt tüketimi olarak
-                    "total_impulse": values[21],
-                    "exhaust_velocity": values[22],
+                    "oxygen_consumption": values[18],  # D1 verisi oksijen tüketimi olarak
+                    "fuel_consumption": values[19],    # D2 verisi yakıt tüketimi olarak
+                    "total_impulse": values[20],
+                    "exhaust_velocity": values[21],
                     "deltap2": 0.0,
                     "kutlesel_debi": 0.0,
                     "timestamp": datetime.utcnow().isoformat(),
@@ -363,129 +502,92 @@ def parse_stm32_data(data_string: str) -> Optional[Dict[str, Any]]:
                 "errors": []
             }
         except Exception as e:
+            parse_failures.inc()
             logger.exception("Veri parsing hatası")
-            logger.error(f"Hatalı veri: {data_string}")
+            logger.error("Hatalı veri: %s", data_string)
             return None
     else:
         # Diğer log/mesaj satırlarını sadece bilgi olarak logla, uyarı verme
-        logger.info(f"STM32 mesaj/log: {data_string}")
+        hot_log.info("stm32_message", "STM32 mesaj/log: %s", data_string)
         return None
 
 # UART bağlantılarını başlat
-def init_uart_connections():
+def _discover_uart_devices(roles):
+    """İstenen rollerden açık olmayanları bulur ve açar (thread içinde çağrılır); {rol: (eşleşme, port)}"""
+    current = {ROLE_STM32: stm32_uart, ROLE_ARDUINO: arduino_uart}
+    roles = [role for role in roles if current[role] is None or not current[role].is_open]
+    if not roles:
+        return {}
+    # Açık portlar yoklanmaz: yoklama açık portu reset eder/akışını bozar
+    open_ports = [p.port for p in current.values() if p is not None and p.is_open]
+    started = time.perf_counter()
+    opened = {}
+    matches = {role: DeviceMatch(role, FIXED_PORTS[role], method="env") for role in roles if FIXED_PORTS[role]}
+    searched = [role for role in roles if role not in matches]
+    if searched:
+        # Başka role sabitlenmiş port da yoklanmaz
+        matches.update(discover_devices(device_cache, searched,
+                                        exclude=open_ports + [p for p in FIXED_PORTS.values() if p]))
+    for role, match in matches.items():
+        try:
+            opened[role] = (match, open_device(match))
+        except Exception as e:
+            logger.info(f"{match.device} portu açılamadı ({role}): {e}")
+    logger.info(f"Cihaz keşfi ({', '.join(roles)}) {(time.perf_counter() - started) * 1000:.0f} ms sürdü")
+    return opened
+
+def _assign_uart_devices(opened):
     global stm32_uart, arduino_uart
-    try:
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            try:
-                # Önce cihazı tespit etmek için düşük hızda aç
-                ser = serial.Serial(port.device,115200,timeout=0.1,write_timeout=0.1,inter_byte_timeout=0.01)
-                time.sleep(0.5)
-                # Öncelikli olarak port.device'a bak
-                if 'ttyUSB' in port.device:
-                    # Arduino için 115200 baud ile yeniden aç
-                    ser.close()
-                    ser = serial.Serial(port.device,115200,timeout=0.1,write_timeout=0.1,inter_byte_timeout=0.01)
-                    arduino_uart = ser
-                    logger.info(f"Arduino bulundu: {port.device} (115200 baud)")
-                elif 'ttyACM' in port.device:
-                    # STM32 için 230400 baud ile yeniden aç
-                    ser.close()
-                    ser = serial.Serial(
-                        port.device,
-                        230400,
-                        timeout=0.1,
-                        write_timeout=0.1,
-                        inter_byte_timeout=0.01,
-                        parity=serial.PARITY_NONE,
-                        stopbits=serial.STOPBITS_ONE,
-                        bytesize=serial.EIGHTBITS
-                    )
-                    stm32_uart = ser
-                    logger.info(f"STM32 bulundu: {port.device} (230400 baud)")
-                else:
-                    # Eski kontrolleri de yedek olarak bırak
-                    if ser.in_waiting > 0:
-                        first_line = ser.readline().decode(errors='ignore').strip()
-                        if 'STM' in first_line.upper():
-                            ser.close()
-                            ser = serial.Serial(
-                                port.device,
-                                230400,
-                                timeout=0.1,
-                                write_timeout=0.1,
-                                inter_byte_timeout=0.01,
-                                parity=serial.PARITY_NONE,
-                                stopbits=serial.STOPBITS_ONE,
-                                bytesize=serial.EIGHTBITS
-                            )
-                            stm32_uart = ser
-                            logger.info(f"STM32 bulundu: {port.device} (ilk veri: {first_line}, 230400 baud)")
-                        elif 'ARDUINO' in first_line.upper() or 'CH340' in port.description.upper():
-                            ser.close()
-                            ser = serial.Serial(
-                                port.device,
-                                115200,
-                                timeout=0.1,
-                                write_timeout=0.1,
-                                inter_byte_timeout=0.01
-                            )
-                            arduino_uart = ser
-                            logger.info(f"Arduino bulundu: {port.device} (ilk veri: {first_line}, 115200 baud)")
-                    else:
-                        if 'CH340' in port.description.upper():
-                            ser.close()
-                            ser = serial.Serial(
-                                port.device,
-                                115200,
-                                timeout=0.1,
-                                write_timeout=0.1,
-                                inter_byte_timeout=0.01
-                            )
-                            arduino_uart = ser
-                            logger.info(f"Arduino bulundu: {port.device} (CH340, 115200 baud)")
-                        elif 'STM' in port.description.upper():
-                            ser.close()
-                            ser = serial.Serial(
-                                port.device,
-                                230400,
-                                timeout=0.1,
-                                write_timeout=0.1,
-                                inter_byte_timeout=0.01,
-                                parity=serial.PARITY_NONE,
-                                stopbits=serial.STOPBITS_ONE,
-                                bytesize=serial.EIGHTBITS
-                            )
-                            stm32_uart = ser
-                            logger.info(f"STM32 bulundu: {port.device} (desc, 230400 baud)")
-            except Exception as e:
-                logger.info(f"{port.device} portunda cihaz bulunamadı: {e}")
-    except Exception as e:
-        logger.exception("UART bağlantı hatası")
+    for role, (match, ser) in opened.items():
+        if role == ROLE_STM32:
+            stm32_uart = ser
+            logger.info(f"STM32 bulundu: {match.device} ({match.method}, {ser.baudrate} baud)")
+        else:
+            arduino_uart = ser
+            logger.info(f"Arduino bulundu: {match.device} ({match.method}, {ser.baudrate} baud)")
 
-async def async_init_uart_connections_with_retry(retries=5, delay=2):
-    for attempt in range(retries):
-        init_uart_connections()
-        if stm32_uart or arduino_uart:
-            logger.info("UART bağlantısı başarılı.")
-            return
-        logger.warning(f"UART cihazı bulunamadı, {delay} sn sonra tekrar denenecek... (Deneme {attempt+1}/{retries})")
-        await asyncio.sleep(delay)
-    logger.error("UART cihazı bulunamadı, tüm denemeler başarısız.")
-
-def init_uart_connections_with_retry(retries=5, delay=2):
-    for attempt in range(retries):
-        init_uart_connections()
-        if stm32_uart or arduino_uart:
-            logger.info("UART bağlantısı başarılı.")
-            return
-        logger.warning(f"UART cihazı bulunamadı, {delay} sn sonra tekrar denenecek... (Deneme {attempt+1}/{retries})")
-        time.sleep(delay)
-    logger.error("UART cihazı bulunamadı, tüm denemeler başarısız.")
+# Aynı anda tek keşif: iki cihazın bağlantısı aynı portu birlikte yoklamasın
+discovery_lock = asyncio.Lock()
+
+async def connect_uart(role: str) -> bool:
+    """Tek rolü bulup açar; yalnızca o rolün global portu değişir"""
+    async with discovery_lock:
+        # Yoklama portları bloklayarak okur; event loop'u tutmamak için thread'de
+        opened = await asyncio.to_thread(_discover_uart_devices, [role])
+    _assign_uart_devices(opened)
+    port = stm32_uart if role == ROLE_STM32 else arduino_uart
+    return port is not None and port.is_open
 
-# WebSocket throttling için sayaç
-websocket_counter = 0
-WEBSOCKET_THROTTLE = 3  # Her 3 veride bir WebSocket'e gönder (daha hızlı güncelleme)
+def close_stm32_uart(reason: str):
+    """STM32 portunu kapatır, bekleyen komutları düşürür ve yeniden bağlanmayı tetikler"""
+    global stm32_uart
+    if stm32_uart:
+        try:
+            stm32_uart.close()
+        except Exception:
+            pass
+        stm32_uart = None
+    stm32_channel.reset()
+    stm32_link.lost(reason)
+
+def on_arduino_port_error(error: Exception):
+    global arduino_uart
+    if arduino_uart:
+        try:
+            arduino_uart.close()
+        except Exception:
+            pass
+        arduino_uart = None
+    arduino_link.lost(f"Arduino port hatası: {error}")
+
+# Cihaz başına tek yeniden bağlanma görevi (connected/probing/backoff/failed)
+stm32_link = DeviceLink("STM32", lambda: connect_uart(ROLE_STM32))
+arduino_link = DeviceLink("Arduino", lambda: connect_uart(ROLE_ARDUINO))
+
+# WebSocket yayın hızı (sensör hızından bağımsız, saniyede kare)
+DISPLAY_RATE_HZ = 30
+# Her parse edilen örnekte artar; yayıncı son tick'ten beri yeni veri var mı diye bakar
+sensor_sample_seq = 0
 
 # Otomatik buffer kaydetme için sayaç
 auto_save_counter = 0
@@ -495,6 +597,65 @@ AUTO_SAVE_INTERVAL = 10000  # Her 10,000 veride bir otomatik kaydet
 last_received_time = time.monotonic()
 WATCHDOG_TIMEOUT = 5.0  # 5 saniye timeout
 
+# --- Prometheus metrikleri (/api/metrics) ---
+# Sıcak yollar yalnızca Counter.inc / Histogram.observe çağırır; diğer değerler okunurken toplanır
+metrics_registry = MetricsRegistry(prefix="rocket_")
+# Event loop gecikmesi ve eşiği aşan takılmaların yığınları (/api/loop_lag)
+loop_monitor = LoopMonitor()
+# Sahada profil alma (/api/profiling); anahtar tanımlı değilse uç noktalar kapalı
+PROFILING_TOKEN = os.environ.get("ROCKET_PROFILING_TOKEN")
+profiler = Profiler()
+# tracemalloc anlık görüntüleri (/api/memory/snapshots); profil anahtarıyla korunur
+memory_snapshots = TracemallocSnapshots()
+
+def _per_client(value):
+    return lambda: [({"client": c.address}, value(c)) for c in manager.clients.values()]
+
+def _per_link(value):
+    return lambda: [({"device": name}, value(link)) for name, link in (("stm32", stm32_link), ("arduino", arduino_link))]
+
+metrics_registry.counter("stm32_bytes_read_total", "STM32 portundan okunan bayt", lambda: stm32_channel.bytes_read)
+metrics_registry.counter("stm32_lines_read_total", "STM32 portundan okunan satır", lambda: stm32_channel.lines_read)
+metrics_registry.counter("stm32_rx_overflows_total", "Satır sonu gelmeden taşan okuma tamponu",
+                         lambda: stm32_channel.rx_overflows)
+parse_failures = metrics_registry.counter("stm32_parse_failures_total", "Ayrıştırılamayan veya eksik sensör satırı")
+metrics_registry.counter("samples_total", "Ayrıştırılıp buffer'a yazılan örnek", lambda: sensor_sample_seq)
+metrics_registry.gauge("samples_per_second", "Son okumadan bu yana örnek hızı",
+                       RateMeter(lambda: sensor_sample_seq))
+metrics_registry.gauge("buffer_rows", "RAM buffer'daki satır", lambda: buffer_index)
+metrics_registry.gauge("buffer_fill_ratio", "RAM buffer doluluğu (0-1)", lambda: buffer_index / BUFFER_SIZE)
+buffer_overflow_samples = metrics_registry.counter("buffer_overflow_samples_total",
+                                                   "Buffer dolu olduğu için kaybedilen örnek")
+buffer_clears = metrics_registry.counter("buffer_clears_total", "Kayıt sonrası buffer'ın başa dönmesi")
+metrics_registry.counter("live_ring_dropped_total", "Yayın halkası taştığı için yayınlanmayan örnek",
+                         lambda: live_samples.dropped)
+buffer_save_seconds = metrics_registry.histogram("buffer_save_seconds", "Parquet kayıt süresi")
+buffer_backup_seconds = metrics_registry.histogram("buffer_backup_seconds", ".npy yedekleme süresi")
+broadcast_encode_seconds = metrics_registry.histogram("broadcast_encode_seconds", "Snapshot karesi kodlama süresi")
+broadcast_publish_seconds = metrics_registry.histogram("broadcast_publish_seconds",
+                                                       "Yayın tick'i süresi (tüm abonelik grupları)")
+metrics_registry.gauge("websocket_clients", "Bağlı WebSocket istemcisi", lambda: len(manager.clients))
+metrics_registry.gauge("websocket_client_lag_seconds", "İstemci kuyruğundaki en eski mesajın beklemesi",
+                       _per_client(lambda c: c.lag()))
+metrics_registry.gauge("websocket_client_queue_length", "İstemci gönderim kuyruğu uzunluğu",
+                       _per_client(lambda c: c.queue_length()))
+metrics_registry.counter("websocket_client_dropped_total", "İstemci kuyruğundan atılan mesaj",
+                         _per_client(lambda c: c.dropped))
+metrics_registry.counter("log_suppressed_total", "Hız sınırı/örnekleme ile atılan log kaydı",
+                         lambda: log_pipeline.stats(hot_log)["suppressed"])
+metrics_registry.gauge("log_queue_length", "Konsola yazılmayı bekleyen log kaydı", lambda: log_pipeline.stats()["queued"])
+metrics_registry.counter("websocket_slow_disconnects_total", "Yavaş olduğu için düşürülen istemci",
+                         lambda: manager.disconnected_slow)
+metrics_registry.histogram("event_loop_lag_seconds", "Event loop'ta kısa uykunun planlanandan geç uyanması",
+                           source=lambda: loop_monitor.histogram)
+metrics_registry.counter("event_loop_stalls_total", "Eşiği aşan event loop takılması", lambda: loop_monitor.stalls)
+metrics_registry.histogram("command_latency_seconds", "Komut gidiş-dönüş süresi (komut türü başına)",
+                           source=lambda: [({"kind": kind}, hist) for kind, hist in command_latency.histograms.items()])
+metrics_registry.gauge("device_connected", "Cihaz bağlı mı (1/0)", _per_link(lambda link: link.connected))
+metrics_registry.counter("device_disconnects_total", "Cihaz bağlantı kopması", _per_link(lambda link: link.disconnects))
+metrics_registry.histogram("device_reconnect_seconds", "Kopmadan yeniden bağlanmaya süre",
+                           source=_per_link(lambda link: link.reconnect_time))
+
 # Parquet dosya yönetimi
 MAX_PARQUET_FILES = 100
 BACKUP_INTERVAL = 1000  # Her 1000 veride bir backup
@@ -502,96 +663,186 @@ BACKUP_INTERVAL = 1000  # Her 1000 veride bir backup
 # Buffer yedekleme için sayaç
 backup_counter = 0
 
+# Tek STM32 satırını işler: ayrıştır, buffer'a yaz, kayıt/yedek zamanlamasını ilerlet
+def ingest_stm32_line(data: str) -> bool:
+    global sensor_sample_seq, auto_save_counter, backup_counter
+    parsed_data = parse_stm32_data(data)
+    if not parsed_data:
+        hot_log.info("stm32_feedback", "STM32 feedback: %s", data)
+        return False
+    hot_log.info("stm32_data", "STM32 veri: %s", data)
+    sensor_data.update(parsed_data)
+    append_sensor_to_buffer(sensor_data)
+    # Yayın, ingest'ten bağımsız telemetry_broadcast_task tarafından yapılır
+    sensor_sample_seq += 1
+    backup_counter += 1
+    if backup_counter >= BACKUP_INTERVAL:
+        asyncio.create_task(backup_buffer())
+        backup_counter = 0
+    auto_save_counter += 1
+    if auto_save_counter >= AUTO_SAVE_INTERVAL:
+        logger.info("Otomatik buffer kaydetme başlatılıyor... (%d veri)", auto_save_counter)
+        asyncio.create_task(auto_save_buffer())
+        auto_save_counter = 0
+    return True
+
 # STM32'den veri okuma görevi
 async def read_stm32_data():
     """STM32'den sürekli veri okur ve buffer'a kaydeder"""
-    global sensor_data, stm32_uart, websocket_counter, auto_save_counter, last_received_time, backup_counter
+    global stm32_uart, last_received_time
     logger.info("🔄 STM32 veri okuma görevi başlatıldı - bağlantı bekleniyor...")
     while True:
         try:
             if stm32_uart is None:
-                logger.debug("STM32 bağlantısı yok, 10 saniye bekleniyor...")
-                await asyncio.sleep(10)
-                if time.monotonic() - last_received_time > 10:
-                    logger.info("STM32 yeniden bağlanma denemesi...")
-                    asyncio.create_task(async_init_uart_connections_with_retry())
-                    last_received_time = time.monotonic()
+                # Yeniden bağlanmayı stm32_link yürütür: görev yoksa bir kez başlatılır, varsa
+                # bitmesi (bağlanma) beklenir; ensure her turda çağrılıp katılım sayacı şişmez
+                task = stm32_link.task
+                if task is None or task.done():
+                    task = stm32_link.ensure("STM32 bağlantısı yok")
+                if task is not None:
+                    await asyncio.wait({task})
+                else:
+                    await asyncio.sleep(0.05)
+                last_received_time = time.monotonic()
                 continue
-            # STM32 bağlı ve veri var mı kontrol et
-            with stm32_lock:
-                in_waiting = stm32_uart.in_waiting if stm32_uart else 0
-            if in_waiting > 0:
-                with stm32_lock:
-                    data = stm32_uart.readline().decode(errors='ignore').strip()
-                if data:
-                    last_received_time = time.monotonic()
-                    parsed_data = parse_stm32_data(data)
-                    if parsed_data:
-                        logger.info(f"STM32 veri: {data}")
-
-                        sensor_data.update(parsed_data)
-                        append_sensor_to_buffer(sensor_data)
-                        websocket_counter += 1
-                        if websocket_counter >= WEBSOCKET_THROTTLE:
-                            frontend_data = {
-                                "type": "sensor_data",
-                                "data": {
-                                    "pressures": sensor_data["pressures"],
-                                    "temperatures": sensor_data["temperatures"],
-                                    "debis": sensor_data["debis"],
-                                    "adiabatic_temperature": sensor_data["adiabatic_temperature"],
-                                    "thrust": sensor_data["thrust"],
-                                    "isp": sensor_data["isp"],
-                                    "p_chamber": sensor_data["p_chamber"],
-                                    "oxygen_consumption": sensor_data["oxygen_consumption"],
-                                    "fuel_consumption": sensor_data["fuel_consumption"],
-                                    "total_impulse": sensor_data["total_impulse"],
-                                    "exhaust_velocity": sensor_data["exhaust_velocity"],
-                                    "deltap2": sensor_data["deltap2"],
-                                    "kutlesel_debi": sensor_data["kutlesel_debi"],
-                                    "timestamp": sensor_data["timestamp"],
-                                    "errors": sensor_data["errors"]
-                                }
-                            }
-                            await manager.broadcast_binary(frontend_data)
-                            websocket_counter = 0
-                        backup_counter += 1
-                        if backup_counter >= BACKUP_INTERVAL:
-                            asyncio.create_task(backup_buffer())
-                            backup_counter = 0
-                        auto_save_counter += 1
-                        if auto_save_counter >= AUTO_SAVE_INTERVAL:
-                            logger.info(f"Otomatik buffer kaydetme başlatılıyor... ({auto_save_counter} veri)")
-                            asyncio.create_task(auto_save_buffer())
-                            auto_save_counter = 0
-                    else:
-                        logger.info(f"STM32 feedback: {data}")
+            # Hazır satırları al; ACK/NACK cevapları kanal tarafından komutlara eşlenir
+            lines = stm32_channel.read_lines()
+            if lines:
+                last_received_time = time.monotonic()
+                for data in lines:
+                    ingest_stm32_line(data)
+                # Diğer görevlere (yayın, API, WebSocket) sıra ver
+                await asyncio.sleep(0)
             else:
                 if time.monotonic() - last_received_time > WATCHDOG_TIMEOUT:
                     logger.warning("STM32 watchdog timeout - bağlantı koptu!")
-                    if stm32_uart:
-                        with stm32_lock:
-                            stm32_uart.close()
-                        stm32_uart = None
-                    asyncio.create_task(async_init_uart_connections_with_retry())
+                    close_stm32_uart("watchdog zaman aşımı")
                     last_received_time = time.monotonic()
                 else:
                     await asyncio.sleep(0.005)  # 5ms bekle
         except Exception as e:
             logger.exception("STM32 veri okuma hatası")
-            if stm32_uart:
-                with stm32_lock:
-                    stm32_uart.close()
-                stm32_uart = None
-            logger.info("STM32 bağlantısı koptu, yeniden bağlanmayı deniyor...")
-            asyncio.create_task(async_init_uart_connections_with_retry())
+            close_stm32_uart(f"okuma hatası: {e}")
             last_received_time = time.monotonic()
-            await asyncio.sleep(1)
+            # Yeniden bağlanma stm32_link'te; hata döngüsünde CPU'yu yakmamak için kısa bekleme
+            await asyncio.sleep(0.05)
+
+# sensor_data karesinin şeması: bir kez derlenir, her yayında doğrudan msgpack'e yazılır
+SNAPSHOT_ARRAY_FIELDS = {"pressures": 8, "temperatures": 8}
+SNAPSHOT_SCALAR_FIELDS = [
+    "adiabatic_temperature", "thrust", "isp", "p_chamber",
+    "oxygen_consumption", "fuel_consumption", "total_impulse", "exhaust_velocity",
+    "deltap2", "kutlesel_debi",
+]
+SNAPSHOT_VARIABLE_FIELDS = ["debis", "timestamp", "errors"]
+snapshot_encoder = (
+    SnapshotEncoder(SNAPSHOT_ARRAY_FIELDS, SNAPSHOT_SCALAR_FIELDS, SNAPSHOT_VARIABLE_FIELDS)
+    if MSGPACK_AVAILABLE else None
+)
+
+def encode_snapshot_frame():
+    """sensor_data karesini döner: msgpack baytları veya (msgpack yoksa/hata olursa) sözlük"""
+    started = time.perf_counter()
+    if snapshot_encoder is not None:
+        try:
+            frame = snapshot_encoder.encode(sensor_data)
+            broadcast_encode_seconds.observe(time.perf_counter() - started)
+            return frame
+        except Exception:
+            logger.exception("Snapshot kodlama hatası, sözlük yoluna dönülüyor")
+    frame = build_frontend_data()
+    broadcast_encode_seconds.observe(time.perf_counter() - started)
+    return frame
+
+def build_frontend_data() -> Dict[str, Any]:
+    """Frontend'e gönderilecek güncel sensör snapshot'ını hazırlar"""
+    return {
+        "type": "sensor_data",
+        "data": {
+            "pressures": sensor_data["pressures"],
+            "temperatures": sensor_data["temperatures"],
+            "debis": sensor_data["debis"],
+            "adiabatic_temperature": sensor_data["adiabatic_temperature"],
+            "thrust": sensor_data["thrust"],
+            "isp": sensor_data["isp"],
+            "p_chamber": sensor_data["p_chamber"],
+            "oxygen_consumption": sensor_data["oxygen_consumption"],
+            "fuel_consumption": sensor_data["fuel_consumption"],
+            "total_impulse": sensor_data["total_impulse"],
+            "exhaust_velocity": sensor_data["exhaust_velocity"],
+            "deltap2": sensor_data["deltap2"],
+            "kutlesel_debi": sensor_data["kutlesel_debi"],
+            "timestamp": sensor_data["timestamp"],
+            "errors": sensor_data["errors"]
+        }
+    }
+
+# Sabit hızlı WebSocket yayın görevi
+async def telemetry_broadcast_task():
+    """DISPLAY_RATE_HZ hızında, son tick'ten beri gelen veriyi yayınlar.
+
+    Ingest döngüsü hiçbir zaman ağ gönderimi beklemez; istemci yükü
+    sensör hızına değil ekran yenileme hızına bağlıdır.
+    """
+    interval = 1.0 / DISPLAY_RATE_HZ
+    last_seq = sensor_sample_seq
+    next_tick = time.monotonic()
+    logger.info(f"📡 Telemetri yayın görevi başlatıldı ({DISPLAY_RATE_HZ} Hz)")
+    while True:
+        next_tick += interval
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            # Geride kaldıysak kaçırılan tick'leri telafi etmeye çalışma
+            next_tick = time.monotonic()
+            await asyncio.sleep(0)
+        new_data = sensor_sample_seq != last_seq
+        if (not new_data and shared_telemetry is None and not manager.pending_backfills()
+                and not telemetry_fanout.idle_flush_due(time.monotonic())):
+            continue
+        last_seq = sensor_sample_seq
+        # Halka her tick'te boşaltılır, istemci yoksa örnekler atılır
+        seq, timestamps, rows = live_samples.take()
+        started = time.perf_counter()
+        try:
+            if shared_telemetry is not None:
+                # Durum (vana, mod, bağlantılar) veri gelmese de worker'lara yayınlanır
+                publish_shared_telemetry(timestamps, rows, new_data)
+            await telemetry_fanout.publish(seq, timestamps, rows, encode_snapshot_frame,
+                                           live_samples.dropped, new_data=new_data)
+            broadcast_publish_seconds.observe(time.perf_counter() - started)
+        except Exception:
+            logger.exception("Telemetri yayın hatası")
+
+def shared_status() -> Dict[str, Any]:
+    """Fan-out worker'ların salt okunur API'leri için durum özeti"""
+    return {
+        "sensor_data": sensor_data,
+        "valve_states": valve_states,
+        "system_mode": system_mode,
+        "stm32_connected": stm32_uart is not None and stm32_uart.is_open,
+        "arduino_connected": arduino_uart is not None and arduino_uart.is_open,
+        "buffer_index": buffer_index,
+        "buffer_size": BUFFER_SIZE,
+        "ingest_websocket_connections": len(manager.active_connections),
+    }
+
+def publish_shared_telemetry(timestamps: np.ndarray, rows: np.ndarray, new_data: bool):
+    snapshot = None
+    if new_data:
+        frame = encode_snapshot_frame()
+        snapshot = frame if isinstance(frame, (bytes, bytearray)) else manager.pack(frame)[0]
+        if isinstance(snapshot, str):
+            snapshot = snapshot.encode()
+    status = json.dumps(manager.to_native(shared_status())).encode()
+    shared_telemetry.publish(timestamps, rows, snapshot=snapshot, status=status)
 
 # Buffer yedekleme fonksiyonu
 async def backup_buffer():
     """Buffer'ı .npy formatında yedekler"""
     global buffer_index
+    started = time.perf_counter()
     try:
         with buffer_lock:
             if buffer_index > 0:
@@ -602,6 +853,7 @@ async def backup_buffer():
                     sensor_buffer[:buffer_index, :]         # diğer sensör verileri (float32)
                 ], axis=1)
                 np.save(backup_filename, combined_data)
+                buffer_backup_seconds.observe(time.perf_counter() - started)
                 logger.debug(f"Buffer yedeklendi: {backup_filename} ({buffer_index} satır)")
     except Exception as e:
         logger.exception("Buffer yedekleme hatası")
@@ -689,40 +941,48 @@ async def periodic_buffer_save_task():
 
 # STM32'ye vana komutu gönder
 async def send_valve_command_to_stm32(valves: List[int]) -> bool:
-    global stm32_uart
-    if stm32_uart is None:
+    if not stm32_channel.connected:
         logger.error("STM32 UART bağlantısı yok")
         return False
+    started = time.perf_counter()
     try:
         # Vana dizisini 9 karaktere tamamla veya kes
         v = (valves + [0]*9)[:9]
-        cmd_str = "Valves:" + "".join(map(str, v)) + "\n"  # Capital V
-        with stm32_lock:
-            stm32_uart.write(cmd_str.encode())
-            stm32_uart.flush()
-        logger.info(f"STM32'ye vana komutu gönderildi: {cmd_str.strip()}")
+        cmd_str = "Valves:" + "".join(map(str, v))  # Capital V
+        # Hızlı tıklamalarda yalnızca son vana durumu gönderilir; ACK isteğe bağlı, yazımda dön.
+        # Bu yüzden süre çağrı -> seri port yazımıdır; cihaz ACK süresi `stm32_ack:valves` altında
+        reply = await command_scheduler.submit("stm32", cmd_str, key="valves")
+        record_command("valves_write", started, reply.ok is not False, cancelled=reply.cancelled)
+        if reply.ok is False:
+            return False
+        logger.info(f"STM32'ye vana komutu gönderildi: {reply.command}")
         return True
     except Exception as e:
+        record_command("valves_write", started, error=e)
         logger.warning(f"STM32 vana komut hatası: {e}")
         return False
 
 # Arduino'ya step motor komutu gönder
 async def send_step_motor_command_to_arduino(motor_id: int, angle: float) -> tuple[bool, str]:
-    global arduino_uart
-    if arduino_uart is None:
+    # İstemciden gelen id doğrulanmadan hedef/görev oluşturulmasın
+    if isinstance(motor_id, bool) or motor_id not in STEP_MOTOR_IDS:
+        logger.warning(f"Geçersiz step motor id: {motor_id!r}")
+        return False, f"Geçersiz motor id: {motor_id!r} (geçerli: {', '.join(map(str, STEP_MOTOR_IDS))})"
+    if not arduino_channel.connected:
         logger.error("Arduino UART bağlantısı yok")
         return False, "Arduino bağlantısı yok"
+    started = time.perf_counter()
     try:
-        # Motor ID'yi de komuta dahil et
-        command = f"{motor_id}:{angle}\n"
-        arduino_cmd_queue.put((command, True))
-        await asyncio.sleep(0.1)
-        response = arduino_resp_queue.get()
-        arduino_resp_queue.task_done()
-        logger.info(f"Arduino'ya step motor komutu gönderildi: {command.strip()} | Cevap: {response}")
-        success = "Yeni Pozisyon" in (response or "") or "Motor dönüş tamamlandı" in (response or "")
-        return success, (response or "")
+        # Motor ID'yi de komuta dahil et; farklı motorların komutları birbirini beklemez
+        command = f"{motor_id}:{angle}"
+        reply = await command_scheduler.submit(f"arduino:motor{motor_id}", command, key="move")
+        # rtt None: bitiş satırı gelmedi (zaman aşımı)
+        record_command("step_motor", started, reply.ok if reply.rtt is not None else None)
+        rtt = f" ({reply.rtt * 1000:.1f} ms)" if reply.rtt is not None else ""
+        logger.info(f"Arduino'ya step motor komutu gönderildi: {command} | Cevap: {reply.text}{rtt}")
+        return reply.ok, reply.text
     except Exception as e:
+        record_command("step_motor", started, error=e)
         logger.warning(f"Arduino step motor komut hatası: {e}")
         return False, str(e)
 
@@ -757,21 +1017,13 @@ async def websocket_endpoint(websocket: WebSocket):
                     "success": success,
                     "valves": valve_states
                 }
-                try:
-                    packed_data = msgpack.packb(response_data, use_bin_type=True)
-                    if packed_data is not None:
-                        await websocket.send_bytes(packed_data)
-                    else:
-                        await websocket.send_text(json.dumps(response_data))
-                except Exception as e:
-                    logger.exception("msgpack paketleme hatası")
-                    await websocket.send_text(json.dumps(response_data))
+                await manager.send_personal_data(response_data, websocket)
                 # Broadcast the new valve state to all WebSocket clients
                 try:
                     await manager.broadcast(json.dumps({
                         "type": "valve_state",
                         "valves": valve_states
-                    }))
+                    }), priority=PRIORITY_CRITICAL)
                 except Exception as e:
                     logger.error(f"Valve state broadcast error: {e}")
                 
@@ -787,16 +1039,12 @@ async def websocket_endpoint(websocket: WebSocket):
                     "angle": angle,
                     "response": response
                 }
-                try:
-                    packed_data = msgpack.packb(response_data, use_bin_type=True)
-                    if packed_data is not None:
-                        await websocket.send_bytes(packed_data)
-                    else:
-                        await websocket.send_text(json.dumps(response_data))
-                except Exception as e:
-                    logger.exception("msgpack paketleme hatası")
-                    await websocket.send_text(json.dumps(response_data))
+                await manager.send_personal_data(response_data, websocket)
                 
+            elif await telemetry_fanout.handle_message(websocket, message):
+                # telemetry_format / subscribe / request_keyframe
+                pass
+
             elif message.get("type") == "system_mode":
                 # Sistem modu değişikliği
                 global system_mode
@@ -809,15 +1057,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     "type": "sensor_data",
                     "data": sensor_data
                 }
-                try:
-                    packed_data = msgpack.packb(response_data, use_bin_type=True)
-                    if packed_data is not None:
-                        await websocket.send_bytes(packed_data)
-                    else:
-                        await websocket.send_text(json.dumps(response_data))
-                except Exception as e:
-                    logger.exception("msgpack paketleme hatası")
-                    await websocket.send_text(json.dumps(response_data))
+                await manager.send_personal_data(response_data, websocket)
                 
                 
     except WebSocketDisconnect:
@@ -855,6 +1095,8 @@ async def set_valves(command: ValveCommand):
 
 @app.post("/api/step_motor")
 async def set_step_motor(command: StepMotorCommand):
+    if command.motor_id not in STEP_MOTOR_IDS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz motor id: {command.motor_id}")
     success, response = await send_step_motor_command_to_arduino(command.motor_id, command.angle)
     if success:
         return {
@@ -878,15 +1120,197 @@ async def get_system_status():
         "arduino_connected": arduino_connected,
         "websocket_connections": len(manager.active_connections),
         "simulation_active": not stm32_connected,  # STM32 bağlı değilse simülasyon
-        "status": "operational" if (stm32_connected or arduino_connected) else "error"
+        "status": "operational" if (stm32_connected or arduino_connected) else "error",
+        "links": {"stm32": stm32_link.state, "arduino": arduino_link.state},
+        # Kanal sayaçları (/api/commands zamanlayıcıyla birlikte de verir)
+        "stm32_commands": stm32_channel.stats(),
+        "arduino_commands": arduino_channel.stats(),
+    }
+
+@app.get("/api/links")
+async def link_stats():
+    """Cihaz bağlantı durum makineleri: durum, deneme sayıları, yeniden bağlanma süreleri"""
+    return {"stm32": stm32_link.stats(), "arduino": arduino_link.stats()}
+
+@app.get("/api/commands")
+async def command_stats():
+    """Komut zamanlayıcı (istenen/gönderilen/birleşen) ve cihaz kanalı sayaçları"""
+    return {
+        "scheduler": command_scheduler.stats(),
+        "stm32": stm32_channel.stats(),
+        "arduino": arduino_channel.stats(),
     }
 
+@app.get("/api/command_latency")
+async def get_command_latency(reset: bool = Query(False)):
+    """Komut türü başına gidiş-dönüş histogramı (ms özet + kovalar) ve zaman aşımı/hata sayıları.
+
+    `reset=true` okuduktan sonra sıfırlar (ör. hot-fire öncesi temiz ölçüm için).
+    """
+    snapshot = command_latency.snapshot()
+    if reset:
+        command_latency.reset()
+    return snapshot
+
 @app.post("/api/save_sensor_buffer")
 async def api_save_sensor_buffer():
     """RAM'deki sensor buffer'ı Parquet dosyasına kaydeder."""
     save_sensor_buffer()
     return {"status": "ok", "message": f"Buffer kaydedildi (parquet)"}
 
+@app.get("/api/metrics")
+async def prometheus_metrics():
+    """Ingest'ten istemciye tüm hat için Prometheus metin formatında metrikler"""
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/loop_lag")
+async def loop_lag(reset: bool = Query(False), stacks: bool = Query(True)):
+    """Event loop gecikme özeti ve takılmalar: yer başına özet, en kötüler, son takılmalar.
+
+    Yığınlar takılma sürerken loop thread'inden alınır; `stacks=false` yalnızca
+    yerleri döndürür, `reset=true` okuduktan sonra sıfırlar.
+    """
+    snapshot = loop_monitor.snapshot(stacks=stacks)
+    if reset:
+        loop_monitor.reset()
+    return snapshot
+
+def require_profiling_token(token: Optional[str]):
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profil alma kapalı (ROCKET_PROFILING_TOKEN tanımlı değil)")
+    if not token or not hmac.compare_digest(token.encode(), PROFILING_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Geçersiz profil anahtarı")
+
+@app.post("/api/profiling/start")
+async def start_profiling(
+    mode: str = Query(PROFILE_SAMPLER),
+    seconds: float = Query(30.0),
+    interval: float = Query(SAMPLER_INTERVAL),
+    all_threads: bool = Query(False),
+    x_profiling_token: Optional[str] = Header(None),
+):
+    """`seconds` süreyle cProfile (`mode=cprofile`) veya yığın örnekleyici (`mode=sampler`) başlatır.
+
+    Örnekleyici varsayılan olarak yalnızca event loop thread'ini örnekler; `all_threads=true`
+    kayıt/dışa aktarma thread'lerini de ekler. Süre dolunca oturum kendiliğinden biter.
+    """
+    require_profiling_token(x_profiling_token)
+    try:
+        return profiler.start(mode, seconds, interval, all_threads)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ProfileBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/api/profiling/stop")
+async def stop_profiling(x_profiling_token: Optional[str] = Header(None)):
+    """Çalışan oturumu süresinden önce bitirir"""
+    require_profiling_token(x_profiling_token)
+    result = profiler.stop()
+    if result is None:
+        raise HTTPException(status_code=404, detail="Çalışan profil oturumu yok")
+    return result.info()
+
+@app.get("/api/profiling")
+async def profiling_status(x_profiling_token: Optional[str] = Header(None)):
+    require_profiling_token(x_profiling_token)
+    return profiler.status()
+
+@app.get("/api/profiling/{profile_id}")
+async def download_profile(profile_id: str, x_profiling_token: Optional[str] = Header(None)):
+    """pstats (cprofile) veya collapsed-stack (sampler) dosyasını indirir"""
+    require_profiling_token(x_profiling_token)
+    result = profiler.get(profile_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Profil sonucu bulunamadı")
+    return Response(result.data, media_type=result.media_type,
+                    headers={"Content-Disposition": f'attachment; filename="{result.filename}"'})
+
+def memory_breakdown() -> Dict[str, Any]:
+    """Alt sistem başına bellek (MB) ve süreç/sistem özeti"""
+    used = buffer_index
+    clients = list(manager.clients.values())
+    groups = list(telemetry_fanout.groups.values())
+    pending = sum(g.pending_ts.nbytes + g.pending_rows.nbytes
+                  + (g.delta.state.nbytes if g.delta is not None and g.delta.state is not None else 0)
+                  for g in groups)
+    return {
+        "process": process_memory(),
+        "buffers": {
+            "timestamp_buffer": array_memory(timestamp_buffer, used),
+            "sensor_buffer": array_memory(sensor_buffer, used),
+            "live_samples": {"allocated_mb": round((live_samples.timestamps.nbytes + live_samples.rows.nbytes) / MB, 2)},
+            "shared_telemetry": {"allocated_mb": round(shared_telemetry.shm.size / MB, 2) if shared_telemetry else 0.0},
+        },
+        "client_queues": {
+            "clients": len(clients),
+            "messages": sum(c.queue_length() for c in clients),
+            "queued_mb": round(sum(c.queued_bytes() for c in clients) / MB, 3),
+        },
+        "caches": {
+            "subscription_groups": len(groups),
+            "group_pending_mb": round(pending / MB, 3),
+            "profile_results_mb": round(sum(len(r.data) for r in profiler.results) / MB, 3),
+            "log_queue_records": log_pipeline.queue.qsize(),
+        },
+        # pandas/parquet kayıtlarının arrow tarafı (Python heap'inde ve tracemalloc'ta görünmez)
+        "arrow_pool_mb": arrow_pool_memory(),
+        "python_allocated_blocks": sys.getallocatedblocks(),
+        "tracemalloc": memory_snapshots.status(),
+    }
+
+@app.get("/api/memory")
+async def memory_usage():
+    """Buffer'lar, istemci kuyrukları, önbellekler ve süreç RSS/swap"""
+    return memory_breakdown()
+
+@app.post("/api/memory/tracemalloc/start")
+async def start_tracemalloc(frames: int = Query(TRACE_FRAMES), x_profiling_token: Optional[str] = Header(None)):
+    """tracemalloc'u başlatır (ek bellek ve CPU harcar; ölçüm bitince durdurun)"""
+    require_profiling_token(x_profiling_token)
+    if not 1 <= frames <= 100:
+        raise HTTPException(status_code=400, detail="frames 1 ile 100 arasında olmalı")
+    return memory_snapshots.start(frames)
+
+@app.post("/api/memory/tracemalloc/stop")
+async def stop_tracemalloc(x_profiling_token: Optional[str] = Header(None)):
+    require_profiling_token(x_profiling_token)
+    return memory_snapshots.stop()
+
+@app.post("/api/memory/snapshots")
+async def take_memory_snapshot(label: str = Query(""), x_profiling_token: Optional[str] = Header(None)):
+    """Adlandırılmış tracemalloc anlık görüntüsü alır (ör. `label=kayit_oncesi`)"""
+    require_profiling_token(x_profiling_token)
+    try:
+        # Görüntü almak büyük heap'te yüzlerce ms sürebilir; loop diğer işleri sürdürsün
+        return await asyncio.to_thread(memory_snapshots.take, label)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/api/memory/diff")
+async def memory_diff(
+    base: str,
+    target: Optional[str] = None,
+    group: str = Query("lineno"),
+    limit: int = Query(20),
+    x_profiling_token: Optional[str] = Header(None),
+):
+    """`base` görüntüsünden `target`'a (verilmezse şu ana) en çok büyüyen/küçülen ayırmalar"""
+    require_profiling_token(x_profiling_token)
+    try:
+        return await asyncio.to_thread(memory_snapshots.diff, base, target, group, max(1, min(limit, 200)))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Anlık görüntü bulunamadı: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/api/websocket_clients")
+async def websocket_clients():
+    """İstemci başına kuyruk gecikmesi ve düşürülen mesaj sayaçları"""
+    return manager.stats()
+
 @app.get("/api/buffer_status")
 async def buffer_status():
     return {
@@ -948,6 +1372,69 @@ async def get_parquet_data(filename: str):
         logger.exception(f"Parquet dosya okuma hatası: {filename}")
         raise HTTPException(status_code=500, detail="Dosya okunamadı")
 
+# Seçili zaman aralığını ve kanalları parça parça dışa aktar
+@app.get("/api/export")
+async def export_sensor_data(
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    channels: Optional[str] = None,
+    export_format: str = Query("csv", alias="format"),
+    row_offset: int = 0,
+    byte_offset: int = 0,
+    include_buffer: bool = True,
+):
+    """Parquet logları + RAM buffer'ı CSV/Parquet/Arrow olarak stream eder.
+
+    `start`/`end` epoch saniye, `channels` virgülle ayrılmış kanal listesidir.
+    Yarıda kalan indirmeler `row_offset` veya `byte_offset` ile devam ettirilebilir.
+    """
+    fmt = export_format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz format: {export_format}")
+    if row_offset < 0 or byte_offset < 0:
+        raise HTTPException(status_code=400, detail="Ofset negatif olamaz")
+    available = SENSOR_COLUMNS[1:]
+    if channels:
+        selected = [c.strip() for c in channels.split(",") if c.strip()]
+        unknown = [c for c in selected if c not in available]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen kanal: {', '.join(unknown)}")
+    else:
+        selected = list(available)
+    schema = build_export_schema(selected)
+    column_indices = [available.index(c) for c in selected]
+    # Dosya listesi ve buffer sınırı aynı anda alınır: arada yapılan kayıt satır atlatmaz / çiftlemez
+    parquet_files, buffer_end, generation = export_buffer_view()
+
+    def buffer_chunks(chunk_rows):
+        return iter_sensor_buffer_chunks(chunk_rows, buffer_end, generation)
+
+    def batches():
+        for filename in parquet_files:
+            try:
+                yield from iter_parquet_batches(filename, schema, start, end, EXPORT_CHUNK_ROWS)
+            except Exception:
+                logger.exception(f"Dışa aktarma sırasında dosya okunamadı: {filename}")
+        if include_buffer:
+            yield from iter_buffer_batches(buffer_chunks, column_indices, schema, start, end, EXPORT_CHUNK_ROWS)
+
+    def content():
+        yield from iter_export_bytes(skip_rows(batches(), row_offset), schema, fmt, byte_offset)
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    export_name = f"sensor_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}{extension}"
+    logger.info(f"Dışa aktarma başlatıldı: {export_name} ({len(parquet_files)} dosya, {len(selected)} kanal)")
+    # Senkron generator StreamingResponse tarafından threadpool'da tüketilir, event loop bloklanmaz
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_name}"',
+            "X-Export-Row-Offset": str(row_offset),
+            "X-Export-Byte-Offset": str(byte_offset),
+        },
+    )
+
 SCENARIO_COMMANDS = {
     "o2cleaning": "o2cleaning\n",
     "fuelcleaning": "fuelcleaning\n",
@@ -959,45 +1446,30 @@ SCENARIO_COMMANDS = {
 
 # --- Emergency komutu için özel fonksiyon ---
 async def send_emergency_command_to_stm32():
-    global stm32_uart
-    if stm32_uart is None or not stm32_uart.is_open:
+    if not stm32_channel.connected:
         logger.error("STM32 UART bağlantısı yok (emergency)")
         return False, "STM32 bağlantısı yok"
+    started = time.perf_counter()
     try:
-        # Komut göndermeden önce 200ms bekle
-        await asyncio.sleep(0.2)
-        cmd = "emergency\n"
-        logger.info(f"Gönderilecek komut: '{cmd}' (bytes: {cmd.encode()})")
-        with stm32_lock:
-            stm32_uart.write(cmd.encode())
-            stm32_uart.flush()
-            time.sleep(0.1)  # 100ms bekle
-            logger.info("Komut gönderildi.")
-        # Komut cevabını bekle
-        feedback = ""
-        timeout = time.time() + 2.0  # 2 saniye bekle
-        while time.time() < timeout:
-            if stm32_uart.in_waiting > 0:
-                line = stm32_uart.readline().decode(errors='ignore').strip()
-                logger.info(f"STM32 komut sonrası gelen: {line}")
-                # Sadece komut cevabını al
-                if line and (line.lower().startswith("ack:") or line.lower().startswith("nack:") or "gelen komut" in line.lower() or "emergency" in line.lower() or "acil" in line.lower()):
-                    feedback += line + "\n"
-                    break
-            else:
-                time.sleep(0.01)
-        logger.info(f"STM32 emergency feedback: {feedback.strip()}")
-        return True, feedback.strip() or "No feedback"
+        # Zamanlayıcıyı atlar: bekleyen vana/senaryo komutlarını iptal edip kuyruğun önüne geçer;
+        # cevap okuma görevinin eşlediği ACK/NACK ile gelir (en fazla 2 sn)
+        command_scheduler.cancel("stm32", "emergency nedeniyle iptal edildi")
+        reply = await stm32_channel.send("emergency", emergency=True, timeout=2.0)
+        record_command("emergency", started, reply.ok)
+        logger.info(f"STM32 emergency feedback: {reply.reply}")
+        return reply.ok is not False, reply.reply or "No feedback"
     except Exception as e:
+        record_command("emergency", started, error=e)
         logger.warning(f"STM32 emergency komut hatası: {e}")
         return False, str(e)
 
 @app.post("/api/scenario/{scenario_name}")
 async def run_scenario(scenario_name: str):
     """STM32'ye senaryo komutu gönderir"""
-    global stm32_uart
     if scenario_name.lower() == "emergency":
         success, feedback = await send_emergency_command_to_stm32()
+        # Acil durum geri bildirimi tüm izleyicilere bekleyen telemetrinin önünde gider
+        await manager.broadcast_data({"type": "emergency", "success": success, "feedback": feedback})
         if success:
             return {"status": "ok", "message": f"emergency senaryosu çalıştırıldı", "feedback": feedback}
         else:
@@ -1005,55 +1477,82 @@ async def run_scenario(scenario_name: str):
     cmd = SCENARIO_COMMANDS.get(scenario_name.lower())
     if not cmd:
         return {"status": "error", "message": f"Geçersiz senaryo: {scenario_name}"}
-    if stm32_uart is None or not stm32_uart.is_open:
+    if not stm32_channel.connected:
         return {"status": "error", "message": "STM32 bağlantısı yok"}
+    kind = f"scenario:{scenario_name.lower()}"
+    started = time.perf_counter()
     try:
-        with stm32_lock:
-            stm32_uart.write(cmd.encode())
-            stm32_uart.flush()
+        reply = await command_scheduler.submit("stm32", cmd.strip())
+        record_command(kind, started, reply.ok is not False, cancelled=reply.cancelled)
+        if reply.ok is False:
+            return {"status": "error", "message": f"{scenario_name} komutu iptal edildi: {reply.reply}"}
         logger.info(f"Sent to STM32: {cmd.strip()}")
         return {"status": "ok", "message": f"{scenario_name} senaryosu çalıştırıldı"}
     except Exception as e:
+        record_command(kind, started, error=e)
         return {"status": "error", "message": f"Hata: {str(e)}"}
 
 @app.post("/api/system_mode/{mode}")
 async def set_system_mode(mode: str):
     """STM32'ye sadece mod ismi (örn: 'burning') gönderir"""
-    global stm32_uart, system_mode
-    if stm32_uart is None or not stm32_uart.is_open:
+    global system_mode
+    if not stm32_channel.connected:
         return {"status": "error", "message": "STM32 bağlantısı yok"}
+    started = time.perf_counter()
     try:
-        cmd = f"{mode}\n"
-        with stm32_lock:
-            stm32_uart.write(cmd.encode())
-            stm32_uart.flush()
+        reply = await command_scheduler.submit("stm32", mode)
+        record_command("system_mode", started, reply.ok is not False, cancelled=reply.cancelled)
+        if reply.ok is False:
+            return {"status": "error", "message": f"Mod komutu iptal edildi: {reply.reply}"}
         system_mode = mode
         return {"status": "ok", "message": f"Mod değiştirildi: {mode}"}
     except Exception as e:
+        record_command("system_mode", started, error=e)
         return {"status": "error", "message": f"Hata: {str(e)}"}
 
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Raspberry Pi Backend başlatılıyor...")
+    # İlk iş: başlangıçtaki senkron adımlar dahil takılmalar izlensin
+    asyncio.create_task(loop_monitor.run())
+    global shared_telemetry
+    if SHARED_TELEMETRY_ENABLED and shared_telemetry is None:
+        shared_telemetry = SharedTelemetry(SHARED_TELEMETRY_NAME, create=True, channels=TELEMETRY_CHANNELS)
+        logger.info(f"🧩 Paylaşılan telemetri bloğu oluşturuldu: {SHARED_TELEMETRY_NAME}")
     merge_backup_files()
+    asyncio.create_task(stm32_channel.run())
     asyncio.create_task(read_stm32_data())
     logger.info("✅ STM32 veri okuma görevi başlatıldı (bağlantı bekleniyor)")
-    await async_init_uart_connections_with_retry()
-    # Arduino worker thread başlat
-    if not arduino_thread.is_alive():
-        arduino_thread.start()
+    stm32_link.ensure("başlangıç")
+    arduino_link.ensure("başlangıç")
+    asyncio.create_task(arduino_channel.run())
+    # İlk bağlantı beklenir ama başlatmayı bloklamaz; bağlanmayan cihaz arka planda denenir
+    await asyncio.gather(stm32_link.wait_connected(STARTUP_CONNECT_TIMEOUT),
+                         arduino_link.wait_connected(STARTUP_CONNECT_TIMEOUT))
     # Feedback thread kaldırıldı
     logger.info("✅ Backend başlatma tamamlandı")
     # --- 60 sn aralıklı buffer kaydetme görevini başlat ---
     asyncio.create_task(periodic_buffer_save_task())
+    asyncio.create_task(telemetry_broadcast_task())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    global shared_telemetry
+    loop_monitor.stop()
+    profiler.stop()
+    if shared_telemetry is not None:
+        shared_telemetry.close()
+        shared_telemetry = None
+        logger.info("🧩 Paylaşılan telemetri bloğu kaldırıldı")
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5001)
 
 # Static dosyaları serve et (frontend için) - EN SONA ALINDI
-app.mount("/", StaticFiles(directory="frontend/dist", html=True), name="static")
+# check_dir=False: frontend derlenmeden de modül içe aktarılabilsin (ölçüm betikleri)
+app.mount("/", StaticFiles(directory="frontend/dist", html=True, check_dir=False), name="static")
 
 @app.get("/")
 async def index():
@@ -0,0 +1,280 @@
+"""
+Ingest süreci ile fan-out worker süreçleri arasında paylaşılan telemetri.
+
+Ingest süreci (raspberry_pi_backend.py) her yayın tick'inde son örnekleri,
+önceden kodlanmış snapshot karesini ve küçük bir durum JSON'unu
+`multiprocessing.shared_memory` bloğuna yazar. Worker süreçleri
+(fanout_worker.py) aynı bloğu salt okunur açar.
+
+Tek yazar vardır; tutarlılık bir seqlock ile sağlanır: yazar sayacı tek
+sayıya çıkarır, veriyi yazar, tekrar çift sayıya getirir. Okuyucu sayacı
+okumadan önce ve sonra karşılaştırır, farklıysa (veya tek sayıysa) tekrar dener.
+
+Bellek düzeni:
+    [başlık: 16 x uint64][kanal adları JSON][timestamp float64 x kapasite]
+    [satırlar float32 x kapasite x kanal][snapshot baytları][durum baytları]
+"""
+import json
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_SHARED_NAME = "rocket_telemetry"
+SHARED_MAGIC = 0x524B54544C4D3031  # "RKTTLM01"
+SHARED_CAPACITY = 65536           # Örnek; 10 kHz'de ~6.5 sn
+CHANNELS_REGION = 1024
+SNAPSHOT_REGION = 4096
+STATUS_REGION = 16384
+READ_RETRIES = 100
+
+# Başlık alanları (uint64 indeksleri)
+_H_MAGIC = 0
+_H_SEQLOCK = 1
+_H_WRITE_SEQ = 2
+_H_CAPACITY = 3
+_H_CHANNELS = 4
+_H_SNAPSHOT_LEN = 5
+_H_SNAPSHOT_VERSION = 6
+_H_STATUS_LEN = 7
+_H_STATUS_VERSION = 8
+_H_PUBLISHED_AT = 9   # time.time() * 1e6
+_HEADER_FIELDS = 16
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Var olan bloğa bağlanır; worker çıkınca bloğun silinmemesi için resource_tracker'a kaydetmez"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # 3.13 öncesinde bağlanan süreç de kaydediliyor; kaydı atla (unregister,
+    # aynı tracker'ı paylaşan yazarın kaydını da silerdi)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _bump(header: np.ndarray, field: int):
+    # uint64 + int numpy 1.x'te float'a yükselir; Python int ile artır
+    header[field] = int(header[field]) + 1
+
+
+class SharedTelemetry:
+    """Paylaşılan telemetri bloğu; `create=True` yazar (ingest), aksi halde okuyucu (worker)"""
+
+    def __init__(self, name: str = DEFAULT_SHARED_NAME, create: bool = False,
+                 channels: Optional[Sequence[str]] = None, capacity: int = SHARED_CAPACITY):
+        self.name = name
+        self.create = create
+        if create:
+            if not channels:
+                raise ValueError("Paylaşılan blok oluşturmak için kanal listesi gerekli")
+            channels_json = json.dumps(list(channels)).encode()
+            if len(channels_json) > CHANNELS_REGION:
+                raise ValueError("Kanal listesi paylaşılan başlığa sığmıyor")
+            size = self._layout(capacity, len(channels))
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Önceki ingest süreci düzgün kapanmadıysa bloğu yeniden oluştur
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._map(capacity, len(channels))
+            self.header[:] = 0
+            self.header[_H_CAPACITY] = capacity
+            self.header[_H_CHANNELS] = len(channels)
+            self.shm.buf[self._channels_offset:self._channels_offset + CHANNELS_REGION] = \
+                channels_json.ljust(CHANNELS_REGION, b" ")
+            self.header[_H_MAGIC] = SHARED_MAGIC
+            self.channels = list(channels)
+        else:
+            self.shm = _attach(name)
+            header = np.ndarray((_HEADER_FIELDS,), dtype=np.uint64, buffer=self.shm.buf)
+            if int(header[_H_MAGIC]) != SHARED_MAGIC:
+                del header
+                self.shm.close()
+                raise RuntimeError(f"Paylaşılan telemetri bloğu hazır değil: {name}")
+            capacity, num_channels = int(header[_H_CAPACITY]), int(header[_H_CHANNELS])
+            del header
+            self._map(capacity, num_channels)
+            raw = bytes(self.shm.buf[self._channels_offset:self._channels_offset + CHANNELS_REGION])
+            self.channels = json.loads(raw.decode().strip())
+        self.capacity = capacity
+        # Okuyucu durumu
+        self.read_seq = int(self.header[_H_WRITE_SEQ])
+        self.dropped = 0
+        self.retries = 0
+        self._snapshot_version = -1
+        self._snapshot: Optional[bytes] = None
+        self._status_version = -1
+        self._status: Dict[str, Any] = {}
+
+    @staticmethod
+    def _layout(capacity: int, num_channels: int) -> int:
+        return (_HEADER_FIELDS * 8 + CHANNELS_REGION + capacity * 8 + capacity * num_channels * 4
+                + SNAPSHOT_REGION + STATUS_REGION)
+
+    def _map(self, capacity: int, num_channels: int):
+        buf = self.shm.buf
+        offset = 0
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype=np.uint64, buffer=buf, offset=offset)
+        offset += _HEADER_FIELDS * 8
+        self._channels_offset = offset
+        offset += CHANNELS_REGION
+        self.timestamps = np.ndarray((capacity,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += capacity * 8
+        self.rows = np.ndarray((capacity, num_channels), dtype=np.float32, buffer=buf, offset=offset)
+        offset += capacity * num_channels * 4
+        self._snapshot_offset = offset
+        offset += SNAPSHOT_REGION
+        self._status_offset = offset
+
+    # --- Yazar (ingest süreci) ---
+
+    def publish(self, timestamps: np.ndarray, rows: np.ndarray,
+                snapshot: Optional[bytes] = None, status: Optional[bytes] = None):
+        """Bir tick'lik veriyi tek seqlock bölümünde yazar"""
+        n = len(timestamps)
+        if n > self.capacity:
+            timestamps, rows = timestamps[-self.capacity:], rows[-self.capacity:]
+            n = self.capacity
+        if snapshot is not None and len(snapshot) > SNAPSHOT_REGION:
+            snapshot = None
+        if status is not None and len(status) > STATUS_REGION:
+            status = None
+        header = self.header
+        _bump(header, _H_SEQLOCK)  # tek: yazım sürüyor
+        try:
+            if n:
+                start = int(header[_H_WRITE_SEQ])
+                first = start % self.capacity
+                head = min(n, self.capacity - first)
+                self.timestamps[first:first + head] = timestamps[:head]
+                self.rows[first:first + head] = rows[:head]
+                if head < n:
+                    self.timestamps[:n - head] = timestamps[head:]
+                    self.rows[:n - head] = rows[head:]
+                header[_H_WRITE_SEQ] = start + n
+            if snapshot is not None:
+                self.shm.buf[self._snapshot_offset:self._snapshot_offset + len(snapshot)] = snapshot
+                header[_H_SNAPSHOT_LEN] = len(snapshot)
+                _bump(header, _H_SNAPSHOT_VERSION)
+            if status is not None:
+                self.shm.buf[self._status_offset:self._status_offset + len(status)] = status
+                header[_H_STATUS_LEN] = len(status)
+                _bump(header, _H_STATUS_VERSION)
+            header[_H_PUBLISHED_AT] = int(time.time() * 1_000_000)
+        finally:
+            _bump(header, _H_SEQLOCK)  # çift: tutarlı
+
+    # --- Okuyucu (fan-out worker) ---
+
+    def take(self) -> Tuple[int, np.ndarray, np.ndarray]:
+        """SampleRing.take ile aynı imza: son okumadan beri yazılan örneklerin kopyası.
+
+        Snapshot ve durum da aynı tutarlı okumada güncellenir.
+        """
+        header = self.header
+        for _ in range(READ_RETRIES):
+            before = int(header[_H_SEQLOCK])
+            if before & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            end = int(header[_H_WRITE_SEQ])
+            start = self.read_seq
+            dropped = 0
+            if end - start > self.capacity:
+                dropped = end - start - self.capacity
+                start = end - self.capacity
+            n = end - start
+            if n:
+                first = start % self.capacity
+                idx = (np.arange(n) + first) % self.capacity if first + n > self.capacity else slice(first, first + n)
+                timestamps, rows = self.timestamps[idx].copy(), self.rows[idx].copy()
+            else:
+                timestamps, rows = self.timestamps[:0].copy(), self.rows[:0].copy()
+            snapshot_version = int(header[_H_SNAPSHOT_VERSION])
+            snapshot = None
+            if snapshot_version != self._snapshot_version:
+                length = int(header[_H_SNAPSHOT_LEN])
+                snapshot = bytes(self.shm.buf[self._snapshot_offset:self._snapshot_offset + length])
+            status_version = int(header[_H_STATUS_VERSION])
+            status = None
+            if status_version != self._status_version:
+                length = int(header[_H_STATUS_LEN])
+                status = bytes(self.shm.buf[self._status_offset:self._status_offset + length])
+            if int(header[_H_SEQLOCK]) != before:
+                self.retries += 1
+                continue
+            self.read_seq = end
+            self.dropped += dropped
+            if snapshot is not None:
+                self._snapshot_version, self._snapshot = snapshot_version, snapshot or None
+            if status is not None:
+                self._status_version = status_version
+                self._status = json.loads(status) if status else {}
+            return start, timestamps, rows
+        # Yazar sürekli meşgulse bu tick'i atla
+        return self.read_seq, self.timestamps[:0].copy(), self.rows[:0].copy()
+
+    def history(self, end_seq: int, seconds: float) -> Tuple[int, np.ndarray, np.ndarray]:
+        """Halkada hâlâ duran, `end_seq`'ten önceki son `seconds` saniye (yeni istemci geçmişi için)"""
+        header = self.header
+        for _ in range(READ_RETRIES):
+            before = int(header[_H_SEQLOCK])
+            if before & 1:
+                time.sleep(0)
+                continue
+            write_seq = int(header[_H_WRITE_SEQ])
+            end = min(end_seq, write_seq)
+            low = max(0, write_seq - self.capacity)
+            if end <= low:
+                return end_seq, self.timestamps[:0].copy(), self.rows[:0].copy()
+            idx = np.arange(low, end) % self.capacity
+            timestamps, rows = self.timestamps[idx], self.rows[idx]
+            if int(header[_H_SEQLOCK]) != before:
+                continue
+            start = int(np.searchsorted(timestamps, timestamps[-1] - seconds, side="left"))
+            return low + start, timestamps[start:], rows[start:]
+        return end_seq, self.timestamps[:0].copy(), self.rows[:0].copy()
+
+    def latest_snapshot(self) -> Optional[bytes]:
+        return self._snapshot
+
+    def status(self) -> Dict[str, Any]:
+        return self._status
+
+    def published_age(self) -> float:
+        """Son yayından beri geçen süre (saniye); ingest sürecinin canlılığı için"""
+        published = int(self.header[_H_PUBLISHED_AT])
+        return time.time() - published / 1_000_000 if published else float("inf")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "role": "writer" if self.create else "reader",
+            "capacity": self.capacity,
+            "channels": len(self.channels),
+            "write_seq": int(self.header[_H_WRITE_SEQ]),
+            "read_seq": self.read_seq,
+            "dropped": self.dropped,
+            "seqlock_retries": self.retries,
+            "published_age": round(self.published_age(), 3),
+        }
+
+    def close(self):
+        # numpy görünümleri bırakılmadan shm kapatılamaz
+        self.header = self.timestamps = self.rows = None
+        self.shm.close()
+        if self.create:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
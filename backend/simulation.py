@@ -5,10 +5,39 @@ import asyncio
 from typing import Dict, Any, List, Optional, Callable
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# STM32 satırındaki alan sırası (generate_block matrisinin sütunları)
+STM32_FIELDS = (
+    "P1", "P2", "P3", "P4", "P5", "P6", "P7", "P8",
+    "T1", "T2", "T3", "T4", "T5", "T6",
+    "Tbogaz1", "THRUST", "ISP", "Tbogaz2", "D1", "D2", "IMPULSE", "VELOCITY",
+)
+# Alan başına ondalık basamak (generate_sensor_data'daki round() ile aynı)
+STM32_DECIMALS = (3,) * 8 + (1,) * 6 + (2, 2, 2, 2, 3, 3, 2, 2)
+STM32_LINE_FORMAT = " | ".join(f"{name}: %.{d}f" for name, d in zip(STM32_FIELDS, STM32_DECIMALS)) + "\n"
+# Tbogaz1..VELOCITY: düzgün dağılımlı alanların alt / üst sınırları
+UNIFORM_LOW = np.array([100.0, 0.0, 200.0, 10.0, 0.5, 0.3, 1000.0, 2000.0])
+UNIFORM_HIGH = np.array([200.0, 1000.0, 400.0, 30.0, 2.0, 1.5, 5000.0, 3000.0])
+_ROUND_SCALE = 10.0 ** np.array(STM32_DECIMALS)
+
+BLOCK_RATE = 10_000.0     # generate_block varsayılan örnekleme hızı (Hz)
+ENCODE_CHUNK = 4096       # encode_block'ta tek % işlemine giren satır (geçici bellek sınırı)
+
+
+def encode_block(block: np.ndarray) -> bytes:
+    """generate_block matrisini STM32 satırlarına çevirir (satır başına Python döngüsü yok)"""
+    parts = []
+    for start in range(0, len(block), ENCODE_CHUNK):
+        chunk = block[start:start + ENCODE_CHUNK]
+        parts.append(((STM32_LINE_FORMAT * len(chunk)) % tuple(chunk.ravel().tolist())).encode())
+    return b"".join(parts)
+
+
 class STM32Simulator:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
         self.base_pressures = [12.0, 15.0, 18.0, 22.0]  # Bar
         self.base_temperature = 25.0  # °C
         self.base_voltage = 28.5  # V
@@ -26,6 +55,9 @@ class STM32Simulator:
         # Callback fonksiyonu
         self.data_callback: Optional[Callable] = None
         
+        # generate_block için gürültü üreteci (seed verilirse tekrarlanabilir)
+        self.rng = np.random.default_rng(seed)
+        
     def set_data_callback(self, callback: Callable[[Dict[str, Any]], None]):
         """Veri callback fonksiyonunu ayarlar"""
         self.data_callback = callback
@@ -120,9 +152,11 @@ class STM32Simulator:
         """Tüm sensör verilerini üretir"""
         # 8 basınç, 6 sıcaklık, 2 debi, adiabatic, thrust, isp, pchamber + 4 kritik veri
         # Basınçlar
-        pressures = [round(self.generate_realistic_pressures()[i % 4] + random.uniform(-0.5, 0.5), 3) for i in range(8)]
+        base_pressures = self.generate_realistic_pressures()
+        pressures = [round(base_pressures[i % 4] + random.uniform(-0.5, 0.5), 3) for i in range(8)]
         # Sıcaklıklar
-        temperatures = [round(self.generate_realistic_temperature() + random.uniform(-1, 1), 1) for _ in range(6)]
+        base_temperature = self.generate_realistic_temperature()
+        temperatures = [round(base_temperature + random.uniform(-1, 1), 1) for _ in range(6)]
         # Debi
         debis = [round(random.uniform(0.1, 1.0), 3) for _ in range(2)]
         # Diğer alanlar
@@ -165,6 +199,50 @@ class STM32Simulator:
             "valve_states": self.valve_states.copy()
         }
     
+    def generate_block(self, n: int, rate: float = BLOCK_RATE, t0: Optional[float] = None,
+                       encoded: bool = False):
+        """`n` örneği NumPy ile tek seferde üretir (`rate` Hz aralıklı).
+
+        Sütunları STM32_FIELDS sırasında float32 matris döndürür; `encoded=True` ise
+        STM32 satırları (bytes). `t0` verilmezse simülasyon saatinden devam eder.
+        """
+        rng = self.rng
+        if t0 is None:
+            t0 = time.monotonic() - self.time_start
+        t = t0 + np.arange(n) / rate
+        block = np.empty((n, len(STM32_FIELDS)))
+        
+        # Basınçlar: generate_realistic_pressures ile aynı sinüs, gürültü, vana ve mod etkileri
+        pressures = (np.array(self.base_pressures) + np.sin(t[:, None] * 0.1 + np.arange(4) * 0.5) * 0.3
+                     + rng.uniform(-0.2, 0.2, (n, 4)))
+        open_valves = [i for i in range(4) if i < len(self.valve_states) and self.valve_states[i] == 1]
+        if open_valves:
+            pressures[:, open_valves] += rng.uniform(2.0, 5.0, (n, len(open_valves)))
+        if self.system_mode == 'fuel_feed':
+            pressures += rng.uniform(3.0, 8.0, (n, 4))
+        elif self.system_mode == 'emergency':
+            pressures -= rng.uniform(5.0, 10.0, (n, 4))
+        elif self.system_mode == 'leak_test':
+            pressures[:, 0] += rng.uniform(-3.0, -1.0, n)
+        np.clip(pressures, 0.0, 25.0, out=pressures)
+        # P5-P8 aynı dört kanal + ek gürültü
+        block[:, 0:8] = np.tile(pressures, 2) + rng.uniform(-0.5, 0.5, (n, 8))
+        
+        # Sıcaklık: generate_realistic_temperature ile aynı, altı sensöre ayrı gürültü
+        temperature = self.base_temperature + np.sin(t * 0.05) * 1.5 + rng.uniform(-0.5, 0.5, n)
+        if self.system_mode == 'fuel_feed':
+            temperature += rng.uniform(10.0, 20.0, n)
+        elif self.system_mode == 'emergency':
+            temperature += rng.uniform(-15.0, -8.0, n)
+        np.clip(temperature, 0.0, 50.0, out=temperature)
+        block[:, 8:14] = temperature[:, None] + rng.uniform(-1.0, 1.0, (n, 6))
+        
+        # Tbogaz1, THRUST, ISP, Tbogaz2, D1, D2, IMPULSE, VELOCITY
+        block[:, 14:] = rng.uniform(UNIFORM_LOW, UNIFORM_HIGH, (n, len(UNIFORM_LOW)))
+        
+        block = (np.round(block * _ROUND_SCALE) / _ROUND_SCALE).astype(np.float32)
+        return encode_block(block) if encoded else block
+    
     async def start_simulation(self, callback_func):
         """Simülasyon döngüsünü başlatır"""
         logger.info("STM32 simülasyonu başlatıldı")
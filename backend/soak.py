@@ -0,0 +1,475 @@
+"""
+Uçtan uca soak testi: sanal STM32 + N WebSocket istemcisi.
+
+Backend ayrı süreçte (uvicorn) gerçek haliyle çalışır; STM32 yerine bir
+pty'ye sabit hızda telemetri satırı yazan thread kullanılır
+(`ROCKET_STM32_PORT`). Her satırın VELOCITY alanı örnek sıra numarasını
+taşır; istemciler `sensor_batch` karelerinden bu numarayı okuyup satırın
+üretildiği ana göre sensörden tarayıcıya gecikmeyi ölçer (aynı makine,
+aynı saat). Yavaş istemciler her mesajdan sonra `--slow-delay` kadar uyur.
+
+Rapor:
+- üretilen / pty'ye yazılabilen / backend'in ayrıştırdığı örnek sayısı
+- istemci başına alınan ve kaçırılan örnek, yeniden bağlanma, gecikme yüzdelikleri
+- backend RSS büyümesi (ısınma sonrası, MB/dk eğimi), CPU kullanımı
+- yazılan parquet / .npy dosyaları
+- event loop takılmaları ve backend sayaçları (/api/metrics)
+
+Kullanım:
+    python soak.py                                   # 60 sn, 2 kHz, 4 istemci
+    python soak.py --duration 3600 --rate 10000 --clients 12 --slow 3 --slow-delay 0.05
+    python soak.py --duration 120 --json soak_report.json --keep
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tty
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from metrics import Histogram
+from telemetry import decode_batch_frame
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SEQ_RING = 1 << 20                # Üretim zamanı halkası; float32 VELOCITY içinde tam sayı olarak kalır
+SEQ_CHANNEL = "exhaust_velocity"  # VELOCITY alanı sıra numarasını taşır
+SIM_TICK = 0.005                  # Simülatörün yazma aralığı (sn)
+SIM_MAX_PENDING = 1.0             # pty'ye yazılamayan en fazla bu kadar saniyelik veri bekletilir
+SAMPLE_INTERVAL = 5.0             # Süreç/dosya örnekleme aralığı (sn)
+READY_TIMEOUT = 30.0              # Backend'in açılıp STM32'ye bağlanması için süre (sn)
+RECONNECT_DELAY = 1.0             # Düşürülen istemcinin yeniden bağlanma beklemesi (sn)
+
+# Sabit alanlar; yalnızca P1 (testere dişi) ve VELOCITY (sıra numarası) değişir
+LINE_SUFFIX = (
+    " | P2: 2.02 | P3: 3.03 | P4: 4.04 | P5: 5.05 | P6: 6.06 | P7: 7.07 | P8: 8.08 | "
+    "T1: 21.1 | T2: 22.2 | T3: 23.3 | T4: 24.4 | T5: 25.5 | T6: 26.6 | Tbogaz1: 301.5 | THRUST: 1500.0 | "
+    "ISP: 210.4 | Tbogaz2: 305.2 | D1: 0.41 | D2: 0.22 | IMPULSE: 830.1 | VELOCITY: "
+)
+
+
+class SimulatedSTM32:
+    """pty'ye sabit hızda telemetri yazan thread; her sıra numarasının üretim zamanı tutulur"""
+
+    def __init__(self, rate: float, tick: float = SIM_TICK, max_pending: float = SIM_MAX_PENDING):
+        self.rate = rate
+        self.tick = tick
+        self.master, self._slave = os.openpty()
+        self.device = os.ttyname(self._slave)
+        # Ham mod: satır düzenleme/yankı yok, UART gibi (pyserial açınca da aynısını yapar)
+        tty.setraw(self._slave)
+        os.set_blocking(self.master, False)
+        self.produced_at = np.zeros(SEQ_RING, dtype=np.float64)
+        self.max_pending = max(1, int(rate * max_pending)) * (len(LINE_SUFFIX) + 20)
+        self.produced = 0
+        self.written = 0           # pty'ye tamamen yazılan satır
+        self.overflow = 0          # backend okumadığı için hiç yazılamayan satır
+        self._pending = bytearray()
+        self._pending_lines: List[int] = []   # bekleyen parçaların satır sayısı ve bayt sonu
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def line(self, seq: int) -> bytes:
+        return f"P1: {seq % 1000 * 0.01:.2f}{LINE_SUFFIX}{seq % SEQ_RING}\n".encode()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stm32-sim", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def step(self, now: float, due: int):
+        """`due` yeni satır üretir ve yazabildiği kadarını pty'ye yazar"""
+        if due > 0:
+            if len(self._pending) > self.max_pending:
+                # Backend okumuyor: gerçek UART'ta olduğu gibi satırlar kaybolur
+                self.produced += due
+                self.overflow += due
+            else:
+                first = self.produced
+                seqs = np.arange(first, first + due) % SEQ_RING
+                self.produced_at[seqs] = now
+                self._pending += b"".join(self.line(seq) for seq in range(first, first + due))
+                self._pending_lines.append(due)
+                self._pending_lines.append(len(self._pending))
+                self.produced += due
+        if self._pending:
+            try:
+                sent = os.write(self.master, self._pending)
+            except BlockingIOError:
+                sent = 0
+            if sent:
+                del self._pending[:sent]
+                # Tamamen gönderilen parçaların satırları yazılmış sayılır
+                ends = self._pending_lines
+                for i in range(1, len(ends), 2):
+                    ends[i] -= sent
+                while ends and ends[1] <= 0:
+                    self.written += ends[0]
+                    del ends[:2]
+        try:
+            # Backend'in yazdıkları (komutlar) okunup atılır; pty tamponu dolmasın
+            os.read(self.master, 65536)
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self):
+        started = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            due = int((now - started) * self.rate) - self.produced
+            self.step(time.time(), due)
+            time.sleep(self.tick)
+
+
+def observe_array(histogram: Histogram, values: np.ndarray):
+    """Histogram.observe'un dizi hali (istemci başına saniyede binlerce örnek)"""
+    if not len(values):
+        return
+    idx = np.searchsorted(histogram.buckets, values, side="left")
+    for i, n in zip(*np.unique(idx, return_counts=True)):
+        histogram.counts[i] += int(n)
+    histogram.count += len(values)
+    histogram.sum += float(values.sum())
+    histogram.max = max(histogram.max, float(values.max()))
+
+
+def merge_histograms(histograms: List[Histogram]) -> Histogram:
+    merged = Histogram()
+    for h in histograms:
+        merged.counts = [a + b for a, b in zip(merged.counts, h.counts)]
+        merged.count += h.count
+        merged.sum += h.sum
+        merged.max = max(merged.max, h.max)
+    return merged
+
+
+@dataclass
+class ClientStats:
+    index: int
+    delay: float
+    frames: int = 0
+    samples: int = 0
+    missed: int = 0        # sensor_batch sıra boşlukları (kuyruktan atılan kareler)
+    connects: int = 0
+    errors: List[str] = field(default_factory=list)
+    latency: Histogram = field(default_factory=Histogram)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "client": self.index,
+            "slow_delay_ms": round(self.delay * 1000, 1),
+            "frames": self.frames,
+            "samples": self.samples,
+            "missed": self.missed,
+            "reconnects": max(0, self.connects - 1),
+            "errors": self.errors[-5:],
+            "latency_ms": self.latency.summary(),
+        }
+
+
+async def run_client(url: str, stats: ClientStats, sim: SimulatedSTM32, stop: asyncio.Event):
+    """Tam hız batch aboneliği; düşürülürse yeniden bağlanır"""
+    while not stop.is_set():
+        try:
+            async with websockets.connect(url, max_size=None, close_timeout=1.0) as ws:
+                stats.connects += 1
+                await ws.send(json.dumps({"type": "subscribe", "format": "batch"}))
+                expected = None
+                while not stop.is_set():
+                    try:
+                        message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    received = time.time()
+                    if not isinstance(message, bytes):
+                        continue
+                    frame = msgpack.unpackb(message)
+                    if not isinstance(frame, dict) or frame.get("type") != "sensor_batch" or not frame["n"]:
+                        continue
+                    if expected is not None and frame["seq"] > expected:
+                        stats.missed += frame["seq"] - expected
+                    expected = frame["seq"] + frame["n"]
+                    _, values = decode_batch_frame(frame)
+                    seqs = values[SEQ_CHANNEL].astype(np.int64) % SEQ_RING
+                    observe_array(stats.latency, np.maximum(received - sim.produced_at[seqs], 0.0))
+                    stats.frames += 1
+                    stats.samples += frame["n"]
+                    if stats.delay:
+                        await asyncio.sleep(stats.delay)
+        except Exception as e:
+            if stop.is_set():
+                break
+            stats.errors.append(f"{type(e).__name__}: {e}")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+def process_sample(pid: int) -> Dict[str, float]:
+    """/proc'tan RSS (MB) ve toplam CPU zamanı (sn)"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    rss = 0.0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1]) / 1024
+                break
+    return {"rss_mb": rss, "cpu_s": cpu}
+
+
+def output_files(workdir: str) -> Dict[str, Any]:
+    parquet = glob.glob(os.path.join(workdir, "sensor_log_*.parquet"))
+    backups = glob.glob(os.path.join(workdir, "buffer_backup_*.npy"))
+    return {
+        "parquet_files": len(parquet),
+        "backup_files": len(backups),
+        "bytes": sum(os.path.getsize(p) for p in parquet + backups if os.path.exists(p)),
+    }
+
+
+def scrape_metrics(text: str) -> Dict[str, float]:
+    """Prometheus metnini ad -> değer sözlüğüne çevirir (etiketli seriler toplanır)"""
+    values: Dict[str, float] = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = re.match(r"([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$", line)
+        if match:
+            name, _, value = match.groups()
+            values[name] = values.get(name, 0.0) + float(value)
+    return values
+
+
+def _get(base: str, path: str, timeout: float = 5.0) -> bytes:
+    with urllib.request.urlopen(base + path, timeout=timeout) as response:
+        return response.read()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(base: str, proc: subprocess.Popen, timeout: float = READY_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Backend başlatılamadı (çıkış kodu {proc.returncode})")
+        try:
+            links = json.loads(_get(base, "/api/links", timeout=1.0))
+            if links.get("stm32", {}).get("state") == "connected":
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Backend zamanında hazır olmadı")
+
+
+async def _run_clients(base_ws: str, clients: List[ClientStats], sim: SimulatedSTM32, duration: float,
+                       on_tick):
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(run_client(base_ws, c, sim, stop)) for c in clients]
+    end = time.monotonic() + duration
+    next_sample = time.monotonic()
+    while time.monotonic() < end:
+        if time.monotonic() >= next_sample:
+            # /proc ve dosya taraması kısa sürer; loop'ta çalışması istemci ölçümünü bozmaz
+            on_tick()
+            next_sample += SAMPLE_INTERVAL
+        await asyncio.sleep(min(0.2, max(0.0, end - time.monotonic())))
+    # Üretim süre dolunca durur; istemcilerin kapanması (yavaş istemcinin birikmiş kuyruğu) sayılmaz
+    sim.stop()
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run_soak(duration: float = 60.0, rate: float = 2000.0, clients: int = 4, slow: int = 0,
+             slow_delay: float = 0.05, warmup: float = 5.0, workdir: Optional[str] = None,
+             log_level: str = "INFO") -> Dict[str, Any]:
+    if not (MSGPACK_AVAILABLE and WEBSOCKETS_AVAILABLE):
+        raise RuntimeError("soak testi için msgpack ve websockets gerekli")
+    workdir = workdir or tempfile.mkdtemp(prefix="rocket_soak_")
+    sim = SimulatedSTM32(rate)
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ,
+               PYTHONPATH=BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+               ROCKET_STM32_PORT=sim.device,
+               ROCKET_DEVICE_CACHE=os.path.join(workdir, "device_cache.json"),
+               ROCKET_LOG_LEVEL=log_level)
+    log_file = open(os.path.join(workdir, "backend.log"), "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "raspberry_pi_backend:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    timeline: List[Dict[str, Any]] = []
+    stats = [ClientStats(i, slow_delay if i < slow else 0.0) for i in range(clients)]
+    try:
+        _wait_ready(base, proc)
+        # Akış bağlantıdan sonra başlar: üretilen her satır backend'in okuyabileceği satırdır
+        sim.start()
+        started = time.monotonic()
+        last = {"t": started, **process_sample(proc.pid)}
+
+        def on_tick():
+            now = time.monotonic()
+            sample = process_sample(proc.pid)
+            cpu_pct = (sample["cpu_s"] - last["cpu_s"]) / max(now - last["t"], 1e-6) * 100
+            last.update(t=now, **sample)
+            timeline.append({"t": round(now - started, 1), "rss_mb": round(sample["rss_mb"], 1),
+                             "cpu_pct": round(cpu_pct, 1), "produced": sim.produced, **output_files(workdir)})
+
+        asyncio.run(_run_clients(f"ws://127.0.0.1:{port}/ws", stats, sim, duration, on_tick))
+        on_tick()
+        time.sleep(1.0)   # pty'de kalan satırlar ayrıştırılsın
+        metrics = scrape_metrics(_get(base, "/api/metrics").decode())
+        loop_lag = json.loads(_get(base, "/api/loop_lag?stacks=false"))
+    finally:
+        sim.close()
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        log_file.close()
+
+    steady = [s for s in timeline if s["t"] >= warmup] or timeline
+    rss = [s["rss_mb"] for s in steady]
+    minutes = (steady[-1]["t"] - steady[0]["t"]) / 60 if len(steady) > 1 else 0.0
+    slope = float(np.polyfit([s["t"] / 60 for s in steady], rss, 1)[0]) if len(steady) > 2 else 0.0
+    cpu = [s["cpu_pct"] for s in timeline[1:]] or [0.0]
+    files = output_files(workdir)
+    ingested = int(metrics.get("rocket_samples_total", 0))
+    fast = [c.latency for c in stats if not c.delay]
+    slow_h = [c.latency for c in stats if c.delay]
+    return {
+        "config": {"duration_s": duration, "rate_hz": rate, "clients": clients, "slow_clients": slow,
+                   "slow_delay_ms": slow_delay * 1000, "workdir": workdir},
+        "samples": {
+            "produced": sim.produced,
+            "written": sim.written,
+            "source_overflow": sim.overflow,
+            "ingested": ingested,
+            "lost": sim.produced - ingested,
+            "loss_pct": round((sim.produced - ingested) / sim.produced * 100, 3) if sim.produced else 0.0,
+            "parse_failures": int(metrics.get("rocket_stm32_parse_failures_total", 0)),
+            "buffer_overflow": int(metrics.get("rocket_buffer_overflow_samples_total", 0)),
+            "live_ring_dropped": int(metrics.get("rocket_live_ring_dropped_total", 0)),
+        },
+        "latency_ms": {
+            "clients": merge_histograms(fast).summary(),
+            "slow_clients": merge_histograms(slow_h).summary() if slow_h else None,
+        },
+        "clients": [c.report() for c in stats],
+        "process": {
+            "rss_start_mb": rss[0] if rss else 0.0,
+            "rss_end_mb": rss[-1] if rss else 0.0,
+            "rss_growth_mb": round(rss[-1] - rss[0], 1) if rss else 0.0,
+            "rss_slope_mb_per_min": round(slope, 2),
+            "cpu_pct_mean": round(float(np.mean(cpu)), 1),
+            "cpu_pct_max": round(float(np.max(cpu)), 1),
+        },
+        "files": dict(files, mb_per_min=round(files["bytes"] / 2**20 / minutes, 2) if minutes else 0.0),
+        "backend": {
+            "loop_stalls": loop_lag.get("stalls", 0),
+            "loop_lag_ms": loop_lag.get("lag_ms"),
+            "loop_stall_sites": list(loop_lag.get("sites", {}))[:5],
+            "websocket_dropped": int(metrics.get("rocket_websocket_client_dropped_total", 0)),
+            "websocket_slow_disconnects": int(metrics.get("rocket_websocket_slow_disconnects_total", 0)),
+        },
+        "timeline": timeline,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    cfg, samples, proc, files = report["config"], report["samples"], report["process"], report["files"]
+    print(f"\nSoak: {cfg['duration_s']:.0f} sn, {cfg['rate_hz']:.0f} Hz, {cfg['clients']} istemci "
+          f"({cfg['slow_clients']} yavaş, {cfg['slow_delay_ms']:.0f} ms)")
+    print(f"Örnek: üretilen {samples['produced']}, yazılan {samples['written']}, "
+          f"ayrıştırılan {samples['ingested']} (kayıp %{samples['loss_pct']}, "
+          f"kaynakta taşan {samples['source_overflow']}, ayrıştırılamayan {samples['parse_failures']})")
+    for name, summary in report["latency_ms"].items():
+        if summary:
+            print(f"Gecikme ({name}): p50 {summary['p50']} ms, p90 {summary['p90']} ms, "
+                  f"p99 {summary['p99']} ms, max {summary['max']} ms")
+    for c in report["clients"]:
+        print(f"  istemci {c['client']:>2} ({c['slow_delay_ms']:>5.0f} ms): {c['samples']} örnek, "
+              f"{c['missed']} kaçırılan, {c['reconnects']} yeniden bağlanma, p99 {c['latency_ms']['p99']} ms")
+    print(f"Bellek: {proc['rss_start_mb']:.0f} -> {proc['rss_end_mb']:.0f} MB "
+          f"({proc['rss_growth_mb']:+.1f} MB, {proc['rss_slope_mb_per_min']:+.2f} MB/dk); "
+          f"CPU ort. %{proc['cpu_pct_mean']}, en yüksek %{proc['cpu_pct_max']}")
+    print(f"Dosyalar: {files['parquet_files']} parquet, {files['backup_files']} yedek, "
+          f"{files['bytes'] / 2**20:.1f} MB ({files['mb_per_min']} MB/dk) -> {cfg['workdir']}")
+    backend = report["backend"]
+    print(f"Event loop: {backend['loop_stalls']} takılma, gecikme p99 {backend['loop_lag_ms']['p99']} ms; "
+          f"WebSocket atılan mesaj {backend['websocket_dropped']}, "
+          f"yavaş diye düşürülen {backend['websocket_slow_disconnects']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sanal STM32 ve çoklu WebSocket istemcisiyle soak testi")
+    parser.add_argument("--duration", type=float, default=60.0, help="ölçüm süresi (sn)")
+    parser.add_argument("--rate", type=float, default=2000.0, help="STM32 örnek hızı (Hz)")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--slow", type=int, default=0, help="yavaş istemci sayısı")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="yavaş istemcinin mesaj başına beklemesi (sn)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="bellek büyümesine katılmayan ilk süre (sn)")
+    parser.add_argument("--workdir", help="backend çalışma dizini (varsayılan: geçici dizin)")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--json", help="raporu JSON olarak yaz")
+    parser.add_argument("--keep", action="store_true", help="geçici çalışma dizinini silme")
+    args = parser.parse_args(argv)
+
+    report = run_soak(args.duration, args.rate, args.clients, args.slow, args.slow_delay, args.warmup,
+                      args.workdir, args.log_level)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if not args.workdir and not args.keep:
+        import shutil
+        shutil.rmtree(report["config"]["workdir"], ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
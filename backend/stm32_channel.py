@@ -0,0 +1,284 @@
+"""
+STM32 seri portunun tek sahibi.
+
+Giden komutlar (vana, senaryo, mod, emergency) ve gelen telemetri aynı port
+üzerinden bu sınıf aracılığıyla akar; başka hiçbir kod porta doğrudan
+yazmaz veya porttan okumaz. Böylece komut cevabını bekleyen bir fonksiyon
+ile telemetri okuyucusu aynı baytlar için yarışmaz.
+
+- Yazımlar tek bir yazıcı görevinden (`run`) COMMAND_GAP aralıkla yapılır.
+- `emergency=True` komutlar kuyruğun önüne geçer ve henüz yazılmamış
+  normal komutları iptal eder (acil durumdan sonra "burning" gitmemeli).
+- `ACK: <komut>` / `NACK: <mesaj>` satırları yazılmış komutlara eşlenir:
+  önce metinde adı geçen komuta, yoksa en eski bekleyene (FIFO).
+- Okuma `read_lines` ile yapılır: yalnızca `in_waiting` kadar bayt okunur,
+  event loop hiçbir zaman seri port için beklemez.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ACK_TIMEOUT = 2.0           # Firmware ACK'i isteğe bağlı; bu süre sonra cevapsız sayılır (sn)
+COMMAND_GAP = 0.005         # Ardışık yazımlar arası en az süre; firmware UART RX işleme payı (sn)
+RX_BUFFER_LIMIT = 65536     # Satır sonu gelmeyen çöp veri için üst sınır (bayt)
+# Eski firmware sürümleri ACK yerine bu ifadeleri içeren satırlarla cevap veriyor
+LEGACY_FEEDBACK_MARKERS = ("gelen komut", "emergency", "acil")
+
+
+@dataclass
+class CommandReply:
+    """Komut sonucu; `ok` None ise cihaz cevap vermedi (ACK isteğe bağlı).
+
+    `cancelled`: komut hiç yazılmadan emergency tarafından iptal edildi (NACK değil).
+    """
+    command: str
+    ok: Optional[bool]
+    reply: str = ""
+    rtt: Optional[float] = None
+    cancelled: bool = False
+
+
+class _PendingCommand:
+    __slots__ = ("command", "name", "payload", "emergency", "wait_ack", "future", "queued_at", "sent_at")
+
+    def __init__(self, command: str, emergency: bool, wait_ack: bool, future: asyncio.Future):
+        self.command = command
+        # "Valves:010010110" -> "valves", "emergency" -> "emergency"
+        self.name = command.split(":", 1)[0].strip().lower()
+        self.payload = (command + "\n").encode()
+        self.emergency = emergency
+        self.wait_ack = wait_ack
+        self.future = future
+        self.queued_at = time.monotonic()
+        self.sent_at: Optional[float] = None
+
+
+class STM32Channel:
+    """STM32 portunu sahiplenen komut/telemetri çoklayıcısı"""
+
+    def __init__(self, port_getter: Callable[[], Any], ack_timeout: float = ACK_TIMEOUT,
+                 command_gap: float = COMMAND_GAP,
+                 on_reply: Optional[Callable[[str, float, bool], None]] = None):
+        self.port_getter = port_getter
+        # (komut adı, yazımdan cevaba süre, ACK mi) — wait_ack=False komutların da cihaz süresi ölçülür
+        self.on_reply = on_reply
+        self.ack_timeout = ack_timeout
+        self.command_gap = command_gap
+        self._queue: Deque[_PendingCommand] = deque()
+        self._emergency: Deque[_PendingCommand] = deque()
+        # Yazılmış, ACK/NACK bekleyen (veya süresi dolana kadar eşleşme için tutulan) komutlar
+        self._inflight: Deque[_PendingCommand] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._rx = bytearray()
+        self._last_write = 0.0
+        self.sent = 0
+        self.acked = 0
+        self.nacked = 0
+        self.timeouts = 0
+        self.preempted = 0
+        self.errors = 0
+        # Gelen veri sayaçları (yalnızca okuyucu görev yazar)
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.rx_overflows = 0
+
+    def _port(self):
+        port = self.port_getter()
+        if port is None or not getattr(port, "is_open", True):
+            return None
+        return port
+
+    @property
+    def connected(self) -> bool:
+        return self._port() is not None
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    # --- Giden komutlar ---
+
+    async def send(self, command: str, emergency: bool = False, wait_ack: bool = True,
+                   timeout: Optional[float] = None) -> CommandReply:
+        """Komutu kuyruğa koyar; `wait_ack` ise ACK/NACK veya zaman aşımına, değilse yazıma kadar bekler.
+
+        Bağlantı yoksa ConnectionError fırlatır.
+        """
+        if self._port() is None:
+            raise ConnectionError("STM32 bağlantısı yok")
+        item = _PendingCommand(command.strip(), emergency, wait_ack, asyncio.get_running_loop().create_future())
+        if emergency:
+            self._preempt_queued()
+            self._emergency.append(item)
+        else:
+            self._queue.append(item)
+        self._event().set()
+        timeout = self.ack_timeout if timeout is None else timeout
+        try:
+            # Yazım + cevap süresi; yazıcı kuyruğu da bu süreye dahil
+            return await asyncio.wait_for(asyncio.shield(item.future), timeout)
+        except asyncio.TimeoutError:
+            item.future.cancel()
+            if item.sent_at is None:
+                # Hiç yazılmadı; kuyrukta kalıp geç gönderilmesin
+                self._discard(item)
+                raise TimeoutError(f"STM32 komutu gönderilemedi: {item.command}")
+            self.timeouts += 1
+            return CommandReply(item.command, None, "", None)
+
+    def _preempt_queued(self):
+        cancelled = 0
+        while self._queue:
+            item = self._queue.popleft()
+            if not item.future.done():
+                item.future.set_result(CommandReply(item.command, False, "emergency nedeniyle iptal edildi",
+                                                    cancelled=True))
+                cancelled += 1
+        if cancelled:
+            self.preempted += cancelled
+            logger.warning(f"Emergency: {cancelled} bekleyen STM32 komutu iptal edildi")
+
+    def _discard(self, item: _PendingCommand):
+        for lane in (self._queue, self._emergency):
+            try:
+                lane.remove(item)
+            except ValueError:
+                pass
+
+    async def run(self):
+        """Yazıcı görevi: kuyrukları COMMAND_GAP aralıkla porta yazar (emergency beklemez)"""
+        wakeup = self._event()
+        while True:
+            wakeup.clear()
+            if not self._emergency and not self._queue:
+                await wakeup.wait()
+                continue
+            if not self._emergency:
+                wait = self._last_write + self.command_gap - time.monotonic()
+                if wait > 0:
+                    # Bu arada emergency gelirse hemen uyan
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+            item = (self._emergency or self._queue).popleft()
+            if not item.future.done():
+                self._write(item)
+
+    def _write(self, item: _PendingCommand):
+        port = self._port()
+        if port is None:
+            item.future.set_exception(ConnectionError("STM32 bağlantısı yok"))
+            return
+        try:
+            # flush (tcdrain) yok: bayt OS tamponuna gider, loop iletimi beklemez
+            port.write(item.payload)
+        except Exception as e:
+            self.errors += 1
+            item.future.set_exception(e)
+            return
+        item.sent_at = self._last_write = time.monotonic()
+        self.sent += 1
+        self._inflight.append(item)
+        if not item.wait_ack:
+            item.future.set_result(CommandReply(item.command, None, "", None))
+        logger.info(f"STM32'ye komut gönderildi: {item.command}"
+                    f"{' (emergency)' if item.emergency else ''}")
+
+    # --- Gelen veri ---
+
+    def read_lines(self) -> List[str]:
+        """Porttaki hazır baytları okur; ACK/NACK satırlarını tüketir, kalan satırları döndürür"""
+        port = self._port()
+        if port is None:
+            return []
+        waiting = port.in_waiting
+        if not waiting:
+            self._expire()
+            return []
+        data = port.read(waiting)
+        self.bytes_read += len(data)
+        self._rx += data
+        if b"\n" not in self._rx:
+            if len(self._rx) > RX_BUFFER_LIMIT:
+                self._rx.clear()
+                self.rx_overflows += 1
+            return []
+        *chunks, rest = self._rx.split(b"\n")
+        self._rx = bytearray(rest)
+        self.lines_read += len(chunks)
+        lines = []
+        for chunk in chunks:
+            line = chunk.decode(errors="ignore").strip()
+            if line and not self._handle_reply(line):
+                lines.append(line)
+        return lines
+
+    def _handle_reply(self, line: str) -> bool:
+        head = line[:5].upper()
+        if head.startswith("ACK:"):
+            ok = True
+        elif head.startswith("NACK:"):
+            ok = False
+        elif self._inflight and not line.startswith("P1:") and \
+                any(marker in line.lower() for marker in LEGACY_FEEDBACK_MARKERS):
+            ok = True
+        else:
+            return False
+        self._expire()
+        if not self._inflight:
+            logger.info(f"STM32 eşleşmeyen cevap: {line}")
+            return True
+        text = line.lower()
+        item = next((p for p in self._inflight if p.name and p.name in text), self._inflight[0])
+        self._inflight.remove(item)
+        if ok:
+            self.acked += 1
+        else:
+            self.nacked += 1
+        rtt = time.monotonic() - item.sent_at
+        if self.on_reply is not None:
+            self.on_reply(item.name, rtt, ok)
+        if not item.future.done():
+            item.future.set_result(CommandReply(item.command, ok, line, rtt))
+        logger.info(f"STM32 cevap ({item.command}): {line}")
+        return True
+
+    def _expire(self):
+        """ACK süresi dolmuş komutları eşleşme listesinden çıkarır"""
+        deadline = time.monotonic() - self.ack_timeout
+        while self._inflight and self._inflight[0].sent_at < deadline:
+            self._inflight.popleft()
+
+    def reset(self, reason: str = "STM32 bağlantısı koptu"):
+        """Port kapandığında bekleyen tüm komutları hatayla sonlandırır"""
+        for lane in (self._emergency, self._queue, self._inflight):
+            while lane:
+                item = lane.popleft()
+                if not item.future.done():
+                    item.future.set_exception(ConnectionError(reason))
+        self._rx.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "queued": len(self._queue),
+            "queued_emergency": len(self._emergency),
+            "awaiting_ack": len(self._inflight),
+            "sent": self.sent,
+            "acked": self.acked,
+            "nacked": self.nacked,
+            "timeouts": self.timeouts,
+            "preempted": self.preempted,
+            "errors": self.errors,
+            "bytes_read": self.bytes_read,
+            "lines_read": self.lines_read,
+            "rx_overflows": self.rx_overflows,
+        }
@@ -0,0 +1,620 @@
+"""
+WebSocket telemetri kareleri.
+
+`sensor_batch` karesi son kareden beri gelen tüm örnekleri taşır:
+kanallar float32 sütunlar halinde paketlenir (msgpack bin), zaman
+damgaları tek bir taban zaman (t0) + mikrosaniye ofsetleri olarak gönderilir.
+`sensor_data` (snapshot) karesi ise şeması önceden derlenmiş
+`SnapshotEncoder` ile doğrudan msgpack baytlarına yazılır.
+`sensor_delta` karesi düşük bant genişlikli izleyiciler içindir: değerler
+kanal başına sabit noktalı sayılara çevrilip bir önceki örnekten farkı
+(delta) gönderilir, periyodik keyframe'ler ve CRC32 ile senkron korunur.
+"""
+import struct
+import threading
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+FRAME_SNAPSHOT = "snapshot"  # Eski format: tek örnekli sensor_data sözlüğü
+FRAME_BATCH = "batch"        # Yeni format: sütunlu sensor_batch karesi
+FRAME_DELTA = "delta"        # Düşük bant: quantize + delta sensor_delta karesi
+TELEMETRY_FORMATS = (FRAME_SNAPSHOT, FRAME_BATCH, FRAME_DELTA)
+# telemetry_format / subscribe mesajında format verilmezse (eski istemcilerle uyumlu)
+DEFAULT_TELEMETRY_FORMAT = FRAME_SNAPSHOT
+
+BATCH_FRAME_VERSION = 1
+# sensor_batch `dt` ofsetlerinin üst sınırı (µs, ~71 dk)
+UINT32_MAX = 2**32 - 1
+DELTA_FRAME_VERSION = 1
+# Quantize değerlerinin sınırı: iki örnek arasındaki delta her zaman int32'ye sığar
+DELTA_Q_LIMIT = 2**30 - 1
+
+# Abonelik seyreltme (decimation) yöntemleri
+DECIMATION_LAST = "last"      # Her aralığın son örneği
+DECIMATION_MEAN = "mean"      # Her aralığın ortalaması
+DECIMATION_MINMAX = "minmax"  # Her aralık için min ve max (zarf korunur, 2 örnek)
+DECIMATION_METHODS = (DECIMATION_LAST, DECIMATION_MEAN, DECIMATION_MINMAX)
+MIN_SUBSCRIPTION_RATE = 1.0   # örnek/sn; bekleyen aralık belleğini sınırlar
+
+# Kanal başına quantize adımı (fiziksel birim). Listede olmayan kanallar DEFAULT_QUANTUM kullanır.
+DEFAULT_QUANTUM = 0.01
+CHANNEL_QUANTUM = {
+    **{f"P{i}": 0.001 for i in range(1, 9)},   # bar
+    **{f"T{i}": 0.1 for i in range(1, 7)},     # °C
+    "Tbogaz1": 0.1,
+    "Tbogaz2": 0.1,
+    "thrust": 0.1,
+    "isp": 0.1,
+    "total_impulse": 0.1,
+    "exhaust_velocity": 0.1,
+}
+
+
+class SampleRing:
+    """Ingest ile yayıncı arasındaki sabit kapasiteli örnek halkası.
+
+    Ingest her örneği `append` ile ekler, yayıncı her tick'te `take` ile
+    o ana kadar biriken örnekleri alır. Yayıncı geride kalırsa en eski
+    örnekler üzerine yazılır ve `dropped` sayacı artar.
+    """
+
+    def __init__(self, num_channels: int, capacity: int = 16384):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.rows = np.zeros((capacity, num_channels), dtype=np.float32)
+        self.write_seq = 0   # Toplam eklenen örnek sayısı
+        self.read_seq = 0    # Yayıncının en son aldığı örnek
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def append(self, timestamp: float, row: np.ndarray):
+        with self.lock:
+            i = self.write_seq % self.capacity
+            self.timestamps[i] = timestamp
+            self.rows[i, :] = row
+            self.write_seq += 1
+
+    def take(self) -> Tuple[int, np.ndarray, np.ndarray]:
+        """(ilk örneğin sıra no'su, timestamp'ler, satırlar) kopyalarını döner"""
+        with self.lock:
+            end = self.write_seq
+            start = self.read_seq
+            if end - start > self.capacity:
+                self.dropped += end - start - self.capacity
+                start = end - self.capacity
+            self.read_seq = end
+            n = end - start
+            if n == 0:
+                return start, self.timestamps[:0].copy(), self.rows[:0].copy()
+            first = start % self.capacity
+            idx = (np.arange(n) + first) % self.capacity if first + n > self.capacity else slice(first, first + n)
+            return start, self.timestamps[idx].copy(), self.rows[idx].copy()
+
+
+def encode_batch_frame(seq: int, timestamps: np.ndarray, rows: np.ndarray, channels: Sequence[str],
+                       channel_indices: Optional[Sequence[int]] = None, dropped: int = 0) -> Dict[str, Any]:
+    """Örnekleri `sensor_batch` karesine çevirir (msgpack ile paketlenmeye hazır).
+
+    - `dt`: t0'a göre uint32 little-endian mikrosaniye ofsetleri
+    - `values`: kanal-öncelikli (channel-major) float32 little-endian sütunlar
+
+    Saat kare içinde geri atlarsa (NTP adımı) ofsetler negatife düşüp uint32'de
+    ~4295 sn'ye sarmasın diye zaman, önceki en büyük değerde tutulur.
+    """
+    n = len(timestamps)
+    if channel_indices is not None:
+        rows = rows[:, channel_indices]
+    t0 = float(timestamps[0]) if n else 0.0
+    offsets = np.maximum.accumulate(np.round((timestamps - t0) * 1_000_000)) if n else np.zeros(0)
+    dt = np.clip(offsets, 0, UINT32_MAX).astype("<u4")
+    values = np.ascontiguousarray(rows.T, dtype="<f4")
+    return {
+        "type": "sensor_batch",
+        "v": BATCH_FRAME_VERSION,
+        "seq": seq,
+        "n": n,
+        "t0": t0,
+        "dt": dt.tobytes(),
+        "channels": list(channels),
+        "values": values.tobytes(),
+        "dropped": dropped,
+    }
+
+
+def _msgpack_str(value: str) -> bytes:
+    raw = value.encode()
+    if len(raw) < 32:
+        return bytes([0xa0 | len(raw)]) + raw
+    if len(raw) < 256:
+        return bytes([0xd9, len(raw)]) + raw
+    return struct.pack(">BH", 0xda, len(raw)) + raw
+
+
+def _msgpack_map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes([0x80 | size])
+    return struct.pack(">BH", 0xde, size)
+
+
+def _msgpack_array_header(size: int) -> bytes:
+    if size < 16:
+        return bytes([0x90 | size])
+    return struct.pack(">BH", 0xdc, size)
+
+
+class SnapshotEncoder:
+    """`sensor_data` karesi için şeması önceden derlenmiş msgpack kodlayıcı.
+
+    Sabit boyutlu alanlar (float dizileri ve skalerler) tek bir `struct.Struct`
+    ile yeniden kullanılan buffer'a yazılır; her yayında sözlük yeniden
+    kurulmaz ve `to_native` ile dolaşılmaz. Değişken boyutlu alanlar
+    (timestamp, errors, debis) sona msgpack ile eklenir. Çıktı,
+    `msgpack.packb(build_frontend_data())` ile aynı şekilde çözülür.
+    """
+
+    def __init__(self, array_fields: Dict[str, int], scalar_fields: Sequence[str],
+                 variable_fields: Sequence[str], frame_type: str = "sensor_data"):
+        if not MSGPACK_AVAILABLE:
+            raise RuntimeError("SnapshotEncoder için msgpack gerekli")
+        self.array_fields = list(array_fields.items())
+        self.scalar_fields = list(scalar_fields)
+        self.variable_fields = list(variable_fields)
+        field_count = len(self.array_fields) + len(self.scalar_fields) + len(self.variable_fields)
+
+        # Dış sözlük {"type": ..., "data": {...}} ve sabit alanların başlıkları
+        fmt = [">"]
+        static: List[bytes] = []
+        pending = (_msgpack_map_header(2) + _msgpack_str("type") + _msgpack_str(frame_type)
+                   + _msgpack_str("data") + _msgpack_map_header(field_count))
+        self.float_count = 0
+
+        def add_float(prefix: bytes):
+            nonlocal pending
+            pending += prefix + b"\xcb"  # float 64 işaretçisi
+            fmt.append(f"{len(pending)}s")
+            static.append(pending)
+            fmt.append("d")
+            pending = b""
+            self.float_count += 1
+
+        for name, length in self.array_fields:
+            header = _msgpack_str(name) + _msgpack_array_header(length)
+            for i in range(length):
+                add_float(header if i == 0 else b"")
+        for name in self.scalar_fields:
+            add_float(_msgpack_str(name))
+
+        self._struct = struct.Struct("".join(fmt))
+        self._args: List[Any] = []
+        for chunk in static:
+            self._args.append(chunk)
+            self._args.append(0.0)
+        self._variable_keys = [_msgpack_str(name) for name in self.variable_fields]
+        self._buffer = bytearray(self._struct.size + 1024)
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        args = self._args
+        slot = 1
+        for name, length in self.array_fields:
+            values = data.get(name) or ()
+            n = min(len(values), length)
+            for i in range(n):
+                args[slot] = values[i]
+                slot += 2
+            for _ in range(length - n):
+                args[slot] = 0.0
+                slot += 2
+        for name in self.scalar_fields:
+            args[slot] = data.get(name, 0.0)
+            slot += 2
+        buf = self._buffer
+        self._struct.pack_into(buf, 0, *args)
+        size = self._struct.size
+        for key, name in zip(self._variable_keys, self.variable_fields):
+            value = data.get(name)
+            # Sık görülen durumlar (boş liste, kısa string) msgpack çağrısı olmadan yazılır
+            if isinstance(value, str):
+                packed = key + _msgpack_str(value)
+            elif isinstance(value, list) and not value:
+                packed = key + b"\x90"
+            else:
+                packed = key + msgpack.packb(value, use_bin_type=True, default=_to_builtin)
+            end = size + len(packed)
+            if end > len(buf):
+                buf.extend(bytes(end - len(buf)))
+            buf[size:end] = packed
+            size = end
+        return bytes(buf[:size])
+
+
+def _to_builtin(obj):
+    # Değişken alanlarda numpy tipleri gelirse düz Python tiplerine çevir
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Paketlenemeyen tip: {type(obj)}")
+
+
+def _delta_width(values: np.ndarray) -> int:
+    """Delta dizisini taşıyan en küçük işaretli tamsayı genişliği (bayt, 0 = hepsi sıfır)"""
+    if values.size == 0:
+        return 0
+    lo, hi = int(values.min()), int(values.max())
+    if lo == 0 and hi == 0:
+        return 0
+    if -128 <= lo and hi <= 127:
+        return 1
+    if -32768 <= lo and hi <= 32767:
+        return 2
+    return 4
+
+
+def _pack_deltas(deltas: np.ndarray) -> Tuple[int, bytes]:
+    width = _delta_width(deltas)
+    if width == 0:
+        return 0, b""
+    return width, deltas.astype(f"<i{width}").tobytes()
+
+
+def _unpack_deltas(data: bytes, offset: int, width: int, n: int) -> Tuple[np.ndarray, int]:
+    if width == 0:
+        return np.zeros(n, dtype=np.int64), offset
+    end = offset + width * n
+    return np.frombuffer(data[offset:end], dtype=f"<i{width}").astype(np.int64), end
+
+
+def _quantize(rows: np.ndarray, scales: np.ndarray, previous: Optional[np.ndarray]) -> Tuple[np.ndarray, bool]:
+    """Örnekleri quantize eder; (int64 değerler, hepsi temsil edilebildi mi) döner.
+
+    Aralık dışı ve ±inf değerler ±DELTA_Q_LIMIT'e kırpılır, NaN önceki değeri
+    (karede yoksa `previous`, o da yoksa 0) tutar; böylece deltalar int32'ye
+    sığar ve CRC bozuk değerleri onaylamaz.
+    """
+    scaled = rows.astype(np.float64) / scales
+    finite = np.isfinite(scaled)
+    if finite.all() and np.abs(scaled).max(initial=0.0) <= DELTA_Q_LIMIT:
+        return np.round(scaled).astype(np.int64), True
+    scaled = np.clip(scaled, -DELTA_Q_LIMIT, DELTA_Q_LIMIT)
+    missing = np.isnan(scaled)
+    if missing.any():
+        start = np.zeros(scaled.shape[1]) if previous is None else previous.astype(np.float64)
+        scaled = np.vstack([start[None, :], scaled])
+        source = np.where(np.isnan(scaled), 0, np.arange(len(scaled))[:, None])
+        np.maximum.accumulate(source, axis=0, out=source)
+        scaled = scaled[source, np.arange(scaled.shape[1])][1:]
+    return np.round(scaled).astype(np.int64), False
+
+
+def delta_checksum(state: np.ndarray) -> int:
+    """Son örneğin quantize değerlerinin (int32 LE) CRC32'si"""
+    return zlib.crc32(state.astype("<i4").tobytes())
+
+
+class DeltaEncoder:
+    """Kanal başına sabit noktalı quantize + önceki örnekten delta kodlayıcı.
+
+    Keyframe'lerde ilk örnek mutlak değer olarak (0'dan delta) gönderilir,
+    kanal listesi ve quantize adımları da eklenir; sonraki karelerde yalnızca
+    deltalar gider. Her kanal için delta genişliği (0/1/2/4 bayt) karede
+    ayrı seçilir, hiç değişmeyen kanallar hiç yer kaplamaz.
+    """
+
+    def __init__(self, channels: Sequence[str], keyframe_interval: int = 30,
+                 quantum: Optional[Dict[str, float]] = None):
+        quantum = {**CHANNEL_QUANTUM, **(quantum or {})}
+        self.channels = list(channels)
+        self.scales = np.array([quantum.get(name, DEFAULT_QUANTUM) for name in self.channels], dtype=np.float64)
+        self.keyframe_interval = keyframe_interval
+        self.state: Optional[np.ndarray] = None
+        self.frames_since_key = 0
+        self.sanitized_frames = 0   # NaN/inf veya aralık dışı değer yüzünden keyframe'e dönen kareler
+
+    def request_keyframe(self):
+        """Bir sonraki kare keyframe olur (ör. yeni istemci bağlandığında)"""
+        self.state = None
+
+    def encode(self, seq: int, timestamps: np.ndarray, rows: np.ndarray) -> Dict[str, Any]:
+        # keyframe_interval karede bir (0, N, 2N, ...) keyframe gönderilir
+        key = self.state is None or self.frames_since_key + 1 >= self.keyframe_interval
+        frame, self.state = self._encode(seq, timestamps, rows, None if key else self.state)
+        self.frames_since_key = 0 if frame["key"] else self.frames_since_key + 1
+        return frame
+
+    def encode_keyframe(self, seq: int, timestamps: np.ndarray, rows: np.ndarray) -> Dict[str, Any]:
+        """Aynı örnekleri keyframe olarak kodlar; kodlayıcı durumu değişmez.
+
+        Son durumu `encode` ile aynı olduğundan, senkronu kaybolan istemci bu
+        kareden sonra grubun ortak deltalarına doğrudan devam eder.
+        """
+        return self._encode(seq, timestamps, rows, None)[0]
+
+    def _encode(self, seq: int, timestamps: np.ndarray, rows: np.ndarray,
+                base: Optional[np.ndarray]) -> Tuple[Dict[str, Any], np.ndarray]:
+        """`base` None ise keyframe; (kare, son örneğin quantize değerleri) döner.
+
+        Temsil edilemeyen değer içeren kare keyframe olarak gönderilir.
+        """
+        n = len(timestamps)
+        q, clean = _quantize(rows, self.scales, self.state)
+        if not clean:
+            self.sanitized_frames += 1
+            base = None
+        key = base is None
+        if key:
+            base = np.zeros(len(self.channels), dtype=np.int64)
+        deltas = np.diff(q, axis=0, prepend=base[None, :])
+
+        t0 = float(timestamps[0])
+        offsets = np.round((timestamps - t0) * 1_000_000).astype(np.int64)
+        dt_width, dt_bytes = _pack_deltas(np.clip(np.diff(offsets, prepend=0), -2**31, 2**31 - 1))
+
+        widths = bytearray(len(self.channels))
+        parts = []
+        for c in range(len(self.channels)):
+            widths[c], packed = _pack_deltas(deltas[:, c])
+            parts.append(packed)
+
+        state = q[-1].copy()
+        frame = {
+            "type": "sensor_delta",
+            "v": DELTA_FRAME_VERSION,
+            "seq": seq,
+            "key": key,
+            "n": n,
+            "t0": t0,
+            "dt_w": dt_width,
+            "dt": dt_bytes,
+            "w": bytes(widths),
+            "d": b"".join(parts),
+            "crc": delta_checksum(state),
+        }
+        if key:
+            frame["channels"] = self.channels
+            frame["scales"] = self.scales.tolist()
+        return frame, state
+
+
+class DeltaDecoder:
+    """`sensor_delta` karelerini çözer (Python istemcileri ve testler için).
+
+    Keyframe gelene kadar veya CRC uyuşmazlığında None döner.
+    """
+
+    def __init__(self):
+        self.channels: Optional[List[str]] = None
+        self.scales: Optional[np.ndarray] = None
+        self.state: Optional[np.ndarray] = None
+        self.crc_errors = 0
+
+    def decode(self, frame: Dict[str, Any]) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        if frame["key"]:
+            self.channels = list(frame["channels"])
+            self.scales = np.asarray(frame["scales"], dtype=np.float64)
+            self.state = np.zeros(len(self.channels), dtype=np.int64)
+        elif self.state is None:
+            return None
+        n = frame["n"]
+        dt, _ = _unpack_deltas(frame["dt"], 0, frame["dt_w"], n)
+        timestamps = frame["t0"] + np.cumsum(dt) / 1_000_000
+        columns = {}
+        offset = 0
+        state = self.state.copy()
+        for c, name in enumerate(self.channels):
+            deltas, offset = _unpack_deltas(frame["d"], offset, frame["w"][c], n)
+            q = state[c] + np.cumsum(deltas)
+            state[c] = q[-1]
+            columns[name] = (q * self.scales[c]).astype(np.float32)
+        if delta_checksum(state) != frame["crc"]:
+            self.crc_errors += 1
+            self.state = None
+            return None
+        self.state = state
+        return timestamps, columns
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """İstemcinin telemetri aboneliği; aynı aboneliğe sahip istemciler tek grup olur"""
+    format: str = DEFAULT_TELEMETRY_FORMAT
+    channels: Optional[Tuple[str, ...]] = None  # None = tüm kanallar
+    rate: Optional[float] = None                # batch/delta: örnek/sn, snapshot: kare/sn; None = tam hız
+    decimation: str = DECIMATION_LAST
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["channels"] = list(self.channels) if self.channels is not None else None
+        return data
+
+
+def parse_subscription(message: Dict[str, Any], all_channels: Sequence[str]) -> Subscription:
+    """`subscribe` mesajını doğrular; hatalı alanlarda ValueError fırlatır"""
+    fmt = message.get("format", DEFAULT_TELEMETRY_FORMAT)
+    if fmt not in TELEMETRY_FORMATS:
+        raise ValueError(f"Geçersiz telemetri formatı: {fmt}")
+    channels = message.get("channels")
+    if channels is not None:
+        if not isinstance(channels, list) or not channels:
+            raise ValueError("channels boş olmayan bir liste olmalı")
+        unknown = [c for c in channels if c not in all_channels]
+        if unknown:
+            raise ValueError(f"Bilinmeyen kanal: {', '.join(map(str, unknown))}")
+        # Kanal sırası tam listedeki sıraya göre normalize edilir (aynı görünüm = aynı grup)
+        channels = tuple(c for c in all_channels if c in set(channels))
+        if len(channels) == len(all_channels):
+            channels = None
+    rate = message.get("rate")
+    if rate is not None:
+        rate = float(rate)
+        if rate < MIN_SUBSCRIPTION_RATE:
+            raise ValueError(f"rate en az {MIN_SUBSCRIPTION_RATE} olmalı")
+    decimation = message.get("decimation", DECIMATION_LAST)
+    if decimation not in DECIMATION_METHODS:
+        raise ValueError(f"Geçersiz decimation: {decimation}")
+    return Subscription(format=fmt, channels=channels, rate=rate, decimation=decimation)
+
+
+def decimate(timestamps: np.ndarray, rows: np.ndarray, rate: float, method: str, flush: bool = False):
+    """Örnekleri 1/rate saniyelik mutlak zaman aralıklarına indirger.
+
+    Son aralık henüz tamamlanmamış olabileceğinden geri döndürülür:
+    (çıktı timestamp'leri, çıktı satırları, kalan timestamp'ler, kalan satırlar).
+    `flush=True` ise son aralık da tamamlanmış sayılır.
+    """
+    if len(timestamps) == 0:
+        return timestamps, rows, timestamps, rows
+    ids = np.floor(timestamps * rate).astype(np.int64)
+    changes = np.flatnonzero(ids[1:] != ids[:-1])
+    if flush:
+        changes = np.append(changes, len(timestamps) - 1)
+    if changes.size == 0:
+        return timestamps[:0], rows[:0], timestamps, rows
+    complete = int(changes[-1]) + 1
+    ts, block = timestamps[:complete], rows[:complete]
+    # Tamamlanan aralıklar: [0, c0+1), [c0+1, c1+1), ... , [.., complete)
+    ends = changes + 1
+    starts = np.concatenate([[0], ends[:-1]])
+    if method == DECIMATION_MEAN:
+        counts = (ends - starts)[:, None]
+        out_rows = (np.add.reduceat(block.astype(np.float64), starts, axis=0) / counts).astype(np.float32)
+        out_ts = ts[ends - 1]
+    elif method == DECIMATION_MINMAX:
+        out_ts = np.empty(2 * len(starts), dtype=np.float64)
+        out_ts[0::2] = ts[starts]
+        out_ts[1::2] = ts[ends - 1]
+        out_rows = np.empty((2 * len(starts), block.shape[1]), dtype=np.float32)
+        out_rows[0::2] = np.minimum.reduceat(block, starts, axis=0)
+        out_rows[1::2] = np.maximum.reduceat(block, starts, axis=0)
+    else:
+        out_ts = ts[ends - 1]
+        out_rows = block[ends - 1]
+    return out_ts, out_rows, timestamps[complete:], rows[complete:]
+
+
+class SubscriptionGroup:
+    """Aynı aboneliğe sahip istemciler için ortak durum: bekleyen örnekler ve kodlayıcı.
+
+    Kare grup başına bir kez üretilir; maliyet izleyici sayısıyla değil,
+    farklı görünüm sayısıyla ölçeklenir.
+    """
+
+    def __init__(self, subscription: Subscription, all_channels: Sequence[str], keyframe_interval: int = 30):
+        self.subscription = subscription
+        if subscription.channels is None:
+            self.channels = list(all_channels)
+            self.indices = None
+        else:
+            self.channels = list(subscription.channels)
+            self.indices = channel_indices_for(list(all_channels), self.channels)
+        self.pending_seq = 0
+        self.pending_ts = np.zeros(0, dtype=np.float64)
+        self.pending_rows = np.zeros((0, len(self.channels)), dtype=np.float32)
+        self.delta = DeltaEncoder(self.channels, keyframe_interval) if subscription.format == FRAME_DELTA else None
+        self.next_emit = 0.0
+        self.frames = 0
+        # Son delta karesi ve örnekleri: senkronu kaybolan istemciye aynı örneklerden keyframe
+        self._last_delta: Optional[Tuple[int, np.ndarray, np.ndarray, Dict[str, Any]]] = None
+        self._keyframe: Optional[Dict[str, Any]] = None
+
+    def feed(self, seq: int, timestamps: np.ndarray, rows: np.ndarray):
+        """Son tick'te gelen örnekleri (grubun kanallarıyla) bekleyenlere ekler"""
+        if self.subscription.format == FRAME_SNAPSHOT or len(timestamps) == 0:
+            return
+        if self.indices is not None:
+            rows = rows[:, self.indices]
+        if len(self.pending_ts) == 0:
+            self.pending_seq = seq
+            self.pending_ts, self.pending_rows = timestamps, rows
+        else:
+            self.pending_ts = np.concatenate([self.pending_ts, timestamps])
+            self.pending_rows = np.concatenate([self.pending_rows, rows])
+
+    def idle_flush_due(self, idle: float) -> bool:
+        """Veri `idle` sn'dir gelmiyor: yarım kalan son seyreltme aralığı bir aralık süresi sonra gönderilir"""
+        rate = self.subscription.rate
+        return bool(rate) and len(self.pending_ts) > 0 and idle >= 1.0 / rate
+
+    def build_frame(self, now: float, snapshot_frame, dropped: int = 0, flush: bool = False):
+        """Gönderilecek kare yoksa None döner. `snapshot_frame` tick başına önbellekli bir çağrılabilirdir.
+
+        `flush=True` ise (veri kesildi) tamamlanmamış son aralık da kareye katılır.
+        """
+        sub = self.subscription
+        if sub.format == FRAME_SNAPSHOT:
+            if sub.rate:
+                if now < self.next_emit:
+                    return None
+                self.next_emit = now + 1.0 / sub.rate
+            self.frames += 1
+            return snapshot_frame()
+
+        seq = self.pending_seq
+        if sub.rate:
+            pending = len(self.pending_ts)
+            ts, rows, self.pending_ts, self.pending_rows = decimate(
+                self.pending_ts, self.pending_rows, sub.rate, sub.decimation, flush=flush)
+            # Tamamlanmamış aralık bir sonraki kareye kalır; seq tüketilen ham örnek kadar ilerler
+            self.pending_seq += pending - len(self.pending_ts)
+        else:
+            ts, rows = self.pending_ts, self.pending_rows
+            self.pending_ts, self.pending_rows = ts[:0], rows[:0]
+        if len(ts) == 0:
+            return None
+        self.frames += 1
+        if self.delta is not None:
+            frame = self.delta.encode(seq, ts, rows)
+            self._last_delta = (seq, ts, rows, frame)
+            self._keyframe = frame if frame["key"] else None
+            return frame
+        return encode_batch_frame(seq, ts, rows, self.channels, dropped=dropped)
+
+    def keyframe(self) -> Optional[Dict[str, Any]]:
+        """Son delta karesinin keyframe hali (kare zaten keyframe ise kendisi); tick başına bir kez kodlanır"""
+        if self._last_delta is None:
+            return None
+        if self._keyframe is None:
+            seq, ts, rows, _ = self._last_delta
+            self._keyframe = self.delta.encode_keyframe(seq, ts, rows)
+        return self._keyframe
+
+
+def encode_history_frame(seq_start: int, seq_end: int, timestamps: np.ndarray, rows: np.ndarray,
+                         channels: Sequence[str], rate: float, method: str,
+                         channel_indices: Optional[Sequence[int]] = None,
+                         requested_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Bağlanan istemci için seyreltilmiş geçmiş (`sensor_history`) karesi.
+
+    Düzen `sensor_batch` ile aynıdır; `seq_start`..`seq_end` ham örnek aralığını
+    kapsar ve canlı akışın ilk karesi `seq_end` ile başlar (boşluk / tekrar yok).
+    `seconds` gerçekte dönen süredir (kayıt yeni başladıysa istenenden kısa olabilir).
+    """
+    if channel_indices is not None:
+        rows = rows[:, channel_indices]
+    out_ts, out_rows, _, _ = decimate(timestamps, rows, rate, method, flush=True)
+    frame = encode_batch_frame(seq_start, out_ts, out_rows, channels)
+    span = float(timestamps[-1] - timestamps[0]) if len(timestamps) else 0.0
+    frame.update({"type": "sensor_history", "seq_end": seq_end, "rate": rate, "decimation": method,
+                  "seconds": round(span, 3), "requested_seconds": requested_seconds})
+    return frame
+
+
+def decode_batch_frame(frame: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """`sensor_batch` karesini (timestamp'ler, kanal -> değerler) olarak çözer"""
+    n = frame["n"]
+    timestamps = frame["t0"] + np.frombuffer(frame["dt"], dtype="<u4").astype(np.float64) / 1_000_000
+    values = np.frombuffer(frame["values"], dtype="<f4").reshape(len(frame["channels"]), n)
+    return timestamps, {name: values[i] for i, name in enumerate(frame["channels"])}
+
+
+def channel_indices_for(all_channels: List[str], selected: Sequence[str]) -> List[int]:
+    """Seçili kanal isimlerini tam kanal listesindeki indekslere çevirir"""
+    return [all_channels.index(name) for name in selected]
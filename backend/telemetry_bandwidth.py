@@ -0,0 +1,108 @@
+"""
+Kaydedilmiş bir test (sensor_log_*.parquet) üzerinde WebSocket telemetri
+formatlarının bant genişliğini ölçer.
+
+Kayıt, dosyadaki timestamp'lere göre DISPLAY_RATE_HZ karelerine bölünür ve
+her kare snapshot / batch / delta formatlarında msgpack ile paketlenir.
+
+Kullanım:
+    python telemetry_bandwidth.py [sensor_log_XXX.parquet] [display_rate_hz]
+"""
+import glob
+import sys
+
+import msgpack
+import numpy as np
+import pandas as pd
+
+from telemetry import DeltaEncoder, SnapshotEncoder, encode_batch_frame
+
+CHANNELS = [
+    'P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7', 'P8',
+    'T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'Tbogaz1', 'Tbogaz2',
+    'Debi1', 'Debi2',
+    'thrust', 'isp',
+    'oxygen_consumption', 'fuel_consumption', 'total_impulse', 'exhaust_velocity'
+]
+
+
+def _snapshot_encoder():
+    return SnapshotEncoder(
+        {"pressures": 8, "temperatures": 8},
+        ["adiabatic_temperature", "thrust", "isp", "p_chamber", "oxygen_consumption",
+         "fuel_consumption", "total_impulse", "exhaust_velocity", "deltap2", "kutlesel_debi"],
+        ["debis", "timestamp", "errors"],
+    )
+
+
+def _snapshot_dict(row, columns):
+    values = dict(zip(columns, row.tolist()))
+    return {
+        "pressures": [values.get(f"P{i}", 0.0) for i in range(1, 9)],
+        "temperatures": [values.get(f"T{i}", 0.0) for i in range(1, 7)] + [values.get("Tbogaz1", 0.0), values.get("Tbogaz2", 0.0)],
+        "debis": [],
+        "thrust": values.get("thrust", 0.0),
+        "isp": values.get("isp", 0.0),
+        "oxygen_consumption": values.get("oxygen_consumption", 0.0),
+        "fuel_consumption": values.get("fuel_consumption", 0.0),
+        "total_impulse": values.get("total_impulse", 0.0),
+        "exhaust_velocity": values.get("exhaust_velocity", 0.0),
+        "timestamp": "2024-01-01T12:00:00.000000",
+        "errors": [],
+    }
+
+
+def load_recording(filename: str):
+    """Parquet kaydını (timestamp epoch saniye, float32 kanal matrisi) olarak okur"""
+    df = pd.read_parquet(filename)
+    ts = df["timestamp"]
+    if np.issubdtype(ts.dtype, np.datetime64):
+        timestamps = ts.astype("datetime64[us]").astype(np.int64).to_numpy() / 1_000_000
+    else:
+        timestamps = ts.to_numpy(dtype=np.float64)
+    columns = [c for c in CHANNELS if c in df.columns]
+    rows = df[columns].to_numpy(dtype=np.float32)
+    return timestamps, rows, columns
+
+
+def measure(timestamps: np.ndarray, rows: np.ndarray, columns, display_rate_hz: float = 30.0):
+    """Her format için toplam bayt ve bayt/saniye döner"""
+    tick = np.floor((timestamps - timestamps[0]) * display_rate_hz).astype(np.int64)
+    boundaries = np.flatnonzero(np.diff(tick)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(timestamps)]])
+
+    snapshot = _snapshot_encoder()
+    delta = DeltaEncoder(columns)
+    totals = {"snapshot": 0, "batch": 0, "delta": 0}
+    for start, end in zip(starts, ends):
+        ts, block = timestamps[start:end], rows[start:end]
+        totals["snapshot"] += len(snapshot.encode(_snapshot_dict(block[-1], columns)))
+        totals["batch"] += len(msgpack.packb(encode_batch_frame(int(start), ts, block, columns), use_bin_type=True))
+        totals["delta"] += len(msgpack.packb(delta.encode(int(start), ts, block), use_bin_type=True))
+    duration = max(timestamps[-1] - timestamps[0], 1e-9)
+    return {name: (total, total / duration) for name, total in totals.items()}, len(starts), duration
+
+
+def main():
+    args = sys.argv[1:]
+    if args:
+        filename = args[0]
+    else:
+        files = sorted(glob.glob("sensor_log_*.parquet"))
+        if not files:
+            print("❌ sensor_log_*.parquet dosyası bulunamadı")
+            return
+        filename = files[-1]
+    display_rate_hz = float(args[1]) if len(args) > 1 else 30.0
+
+    timestamps, rows, columns = load_recording(filename)
+    results, frames, duration = measure(timestamps, rows, columns, display_rate_hz)
+    print(f"📁 {filename}: {len(timestamps)} örnek, {len(columns)} kanal, {duration:.1f} sn, {frames} kare @ {display_rate_hz:g} Hz")
+    base = results["batch"][1]
+    for name, (total, rate) in results.items():
+        print(f"  {name:9s} {total / 1024:10.1f} KB  {rate / 1024:8.1f} KB/s  (batch'e göre %{rate / base * 100:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,188 @@ import { encode, decode } from '@msgpack/msgpack'
 export const RPI_IP = import.meta.env.VITE_RPI_IP || 'localhost'
 export const API_URL = `http://${RPI_IP}:5001/api`
 export const WS_URL = `ws://${RPI_IP}:5001/ws`
+// Telemetri kare formatı: 'batch' (tüm örnekler) veya 'delta' (düşük bant genişlikli bağlantılar)
+export const TELEMETRY_FORMAT = import.meta.env.VITE_TELEMETRY_FORMAT || 'batch'
 
 export const DataContext = createContext()
 
+// sensor_batch karesindeki kanal isimleri -> sensör nesnesi alanları
+const PRESSURE_CHANNELS = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7', 'P8']
+const TEMPERATURE_CHANNELS = ['T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'Tbogaz1', 'Tbogaz2']
+const SCALAR_CHANNELS = ['thrust', 'isp', 'oxygen_consumption', 'fuel_consumption', 'total_impulse', 'exhaust_velocity']
+
+// Kanal sütunlarının (isim -> typed array) k. örneğini sensör nesnesine çevir (gösterge değerleri için)
+export function columnsToSample(block, k = block.n - 1) {
+  const { columns } = block
+  const valueAt = name => (columns[name] ? columns[name][k] : 0.0)
+  const sample = {
+    pressures: PRESSURE_CHANNELS.map(valueAt),
+    temperatures: TEMPERATURE_CHANNELS.map(valueAt),
+    debis: [],
+    timestamp: new Date(block.t[k] * 1000).toISOString(),
+    errors: []
+  }
+  SCALAR_CHANNELS.forEach(name => { sample[name] = valueAt(name) })
+  return sample
+}
+
+// Sütunlu sensor_batch karesini (float32 sütunlar + t0/dt) { n, t, columns } bloğuna çevir
+export function decodeSensorBatch(frame) {
+  const n = frame.n || 0
+  const t = new Float64Array(n)
+  const columns = {}
+  if (!n) return { n, t, columns }
+  // msgpack bin alanları hizasız olabilir, typed array için kopyala
+  const dt = new Uint32Array(frame.dt.slice().buffer)
+  const values = new Float32Array(frame.values.slice().buffer)
+  for (let k = 0; k < n; k++) t[k] = frame.t0 + dt[k] / 1e6
+  frame.channels.forEach((name, i) => {
+    columns[name] = values.subarray(i * n, (i + 1) * n)
+  })
+  return { n, t, columns }
+}
+
+// Tam hızlı örnekler için sabit kapasiteli sütunlu halka; grafikler buradan okur
+const SAMPLE_RING_CAPACITY = 1 << 17  // ~13 sn @ 10 kHz
+
+export function createSampleRing(capacity = SAMPLE_RING_CAPACITY) {
+  const timestamps = new Float64Array(capacity)
+  const columns = {}
+  let written = 0
+
+  // Mantıksal [start, start + n) aralığını halkaya (gerekirse iki parça) yaz / halkadan oku
+  const store = (dst, src, start, n) => {
+    const at = start % capacity
+    const first = Math.min(n, capacity - at)
+    dst.set(src.subarray(0, first), at)
+    if (first < n) dst.set(src.subarray(first, n), 0)
+  }
+  const load = (src, start, n, out) => {
+    const at = start % capacity
+    const first = Math.min(n, capacity - at)
+    out.set(src.subarray(at, at + first), 0)
+    if (first < n) out.set(src.subarray(0, n - first), first)
+    return out
+  }
+
+  return {
+    get written() { return written },
+    clear() { written = 0 },
+    // block: { n, t, columns } - karede olmayan kanallar NaN (boşluk) olarak yazılır
+    push(block) {
+      let { n, t } = block
+      let skip = 0
+      if (n > capacity) { skip = n - capacity; n = capacity }
+      written += skip
+      store(timestamps, t.subarray(skip), written, n)
+      Object.keys(block.columns).forEach(name => {
+        if (!columns[name]) columns[name] = new Float32Array(capacity).fill(NaN)
+      })
+      Object.entries(columns).forEach(([name, column]) => {
+        const src = block.columns[name]
+        if (src) store(column, src.subarray(skip), written, n)
+        else store(column, new Float32Array(n).fill(NaN), written, n)
+      })
+      written += n
+    },
+    // Kanalın son `seconds` saniyelik örnekleri, eskiden yeniye: { t, v }
+    read(name, seconds) {
+      const count = Math.min(written, capacity)
+      const column = columns[name]
+      if (!column || count === 0) return { t: new Float64Array(0), v: new Float32Array(0) }
+      const first = written - count
+      const since = timestamps[(written - 1) % capacity] - seconds
+      // Zaman damgaları artan sırada: pencerenin başını ikili arama ile bul
+      let lo = first, hi = written - 1
+      while (lo < hi) {
+        const mid = (lo + hi) >> 1
+        if (timestamps[mid % capacity] < since) lo = mid + 1
+        else hi = mid
+      }
+      const n = written - lo
+      return {
+        t: load(timestamps, lo, n, new Float64Array(n)),
+        v: load(column, lo, n, new Float32Array(n))
+      }
+    }
+  }
+}
+
+// CRC32 (zlib ile aynı polinom) - sensor_delta senkron kontrolü için
+const CRC32_TABLE = (() => {
+  const table = new Uint32Array(256)
+  for (let i = 0; i < 256; i++) {
+    let c = i
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1
+    table[i] = c >>> 0
+  }
+  return table
+})()
+
+function crc32(bytes) {
+  let crc = 0xffffffff
+  for (let i = 0; i < bytes.length; i++) crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8)
+  return (crc ^ 0xffffffff) >>> 0
+}
+
+// Genişliği (0/1/2/4 bayt) verilen işaretli little-endian deltaları oku
+function readDeltas(view, offset, width, n) {
+  const out = new Array(n).fill(0)
+  if (width === 1) for (let k = 0; k < n; k++) out[k] = view.getInt8(offset + k)
+  else if (width === 2) for (let k = 0; k < n; k++) out[k] = view.getInt16(offset + 2 * k, true)
+  else if (width === 4) for (let k = 0; k < n; k++) out[k] = view.getInt32(offset + 4 * k, true)
+  return [out, offset + width * n]
+}
+
+// Senkron kaybında keyframe isteği en fazla bu aralıkla gönderilir (sunucu da istemci başına sınırlar)
+const KEYFRAME_REQUEST_INTERVAL_MS = 1000
+
+// sensor_delta (quantize + delta) kareleri için durumlu çözücü; { n, t, columns } bloğu döner.
+// Keyframe gelene kadar veya CRC uyuşmazlığında null döner.
+export function createDeltaDecoder() {
+  let channels = null
+  let scales = null
+  let state = null
+  return (frame) => {
+    if (frame.key) {
+      channels = frame.channels
+      scales = frame.scales
+      state = new Array(channels.length).fill(0)
+    } else if (state === null) {
+      return null
+    }
+    const n = frame.n
+    const dtBytes = frame.dt.slice()
+    const [dt] = readDeltas(new DataView(dtBytes.buffer), 0, frame.dt_w, n)
+    const offsets = new Array(n)
+    let acc = 0
+    for (let k = 0; k < n; k++) { acc += dt[k]; offsets[k] = acc }
+
+    const data = frame.d.slice()
+    const view = new DataView(data.buffer)
+    const next = state.slice()
+    const columns = {}
+    let offset = 0
+    channels.forEach((name, c) => {
+      const [deltas, end] = readDeltas(view, offset, frame.w[c], n)
+      offset = end
+      const column = new Float32Array(n)
+      let q = next[c]
+      for (let k = 0; k < n; k++) { q += deltas[k]; column[k] = q * scales[c] }
+      next[c] = q
+      columns[name] = column
+    })
+    if (crc32(new Uint8Array(new Int32Array(next).buffer)) !== frame.crc) {
+      state = null
+      return null
+    }
+    state = next
+    const t = new Float64Array(n)
+    for (let k = 0; k < n; k++) t[k] = frame.t0 + offsets[k] / 1e6
+    return { n, t, columns }
+  }
+}
+
 function DataProvider({ children }) {
   // Place this at the very top
   const [isEmergencyAnimating, setIsEmergencyAnimating] = useState(false);
@@ -50,6 +229,10 @@ function DataProvider({ children }) {
   
   
   const wsRef = useRef(null)
+  const deltaDecoderRef = useRef(null)
+  const keyframeRequestRef = useRef(0)
+  // Bağlanınca gelen geçmiş ve canlı akışın tüm örnekleri (grafikler buradan okur)
+  const sampleRingRef = useRef(createSampleRing())
 
   // Timeout id'lerini saklamak için bir ref
   const modTimeoutsRef = useRef([])
@@ -151,6 +334,9 @@ function DataProvider({ children }) {
           
           // İlk sensör verilerini iste
           ws.send(JSON.stringify({ type: 'get_sensors' }))
+          // Her örneği içeren sütunlu batch (veya delta) karelerini iste
+          deltaDecoderRef.current = createDeltaDecoder()
+          ws.send(JSON.stringify({ type: 'telemetry_format', format: TELEMETRY_FORMAT }))
         }
 
         ws.onmessage = async (event) => {
@@ -185,6 +371,34 @@ function DataProvider({ children }) {
                 fixedData.pressures = [...pArr, ...Array(10 - pArr.length).fill(0.0)];
               }
               setSensors(fixedData)
+            } else if (data.type === 'sensor_history') {
+              // Bağlantı anında son N saniyenin seyreltilmiş geçmişi; canlı akış seq_end'den devam eder
+              const block = decodeSensorBatch(data)
+              if (block.n > 0) {
+                sampleRingRef.current.clear()
+                sampleRingRef.current.push(block)
+                setSensors(columnsToSample(block))
+              }
+            } else if (data.type === 'sensor_batch') {
+              // Son kareden beri gelen tüm örnekler: hepsi grafik halkasına, sonuncusu göstergelere
+              const block = decodeSensorBatch(data)
+              if (block.n > 0) {
+                sampleRingRef.current.push(block)
+                setSensors(columnsToSample(block))
+              }
+            } else if (data.type === 'sensor_delta') {
+              const block = deltaDecoderRef.current ? deltaDecoderRef.current(data) : null
+              if (block === null) {
+                // Senkron yok (keyframe bekleniyor) veya CRC hatası: keyframe iste (en fazla saniyede bir)
+                const now = Date.now()
+                if (!data.key && ws.readyState === WebSocket.OPEN && now - keyframeRequestRef.current >= KEYFRAME_REQUEST_INTERVAL_MS) {
+                  keyframeRequestRef.current = now
+                  ws.send(JSON.stringify({ type: 'request_keyframe' }))
+                }
+              } else if (block.n > 0) {
+                sampleRingRef.current.push(block)
+                setSensors(columnsToSample(block))
+              }
             } else if (data.type === 'valve_response') {
               if (data.success) {
                 setLog(l => ['✅ Vana komutu başarılı', ...l.slice(0, 19)])
@@ -643,6 +857,7 @@ function DataProvider({ children }) {
     enforceEmergency,
     oxygenFeed,
     fuelFeed,
+    sampleRingRef,
   };
 
   return (
@@ -21,8 +21,48 @@ function getSensorLabel(index) {
   return '';
 }
 
+// Panel indeksine karşılık gelen telemetri kanalı (sensor_batch/sensor_delta kanal isimleri)
+function channelName(index) {
+  if (index < 6) return `T${index + 1}`;
+  if (index < 14) return `P${index - 5}`;
+  return {
+    14: 'Tbogaz1',
+    15: 'Tbogaz2',
+    16: 'oxygen_consumption',
+    17: 'fuel_consumption',
+    18: 'isp',
+    19: 'thrust',
+    20: 'exhaust_velocity',
+    21: 'total_impulse',
+  }[index];
+}
+
+// Grafik penceresi ve yenileme aralığı; örnekler min/max kovalarıyla seyreltilir (tepe değerler kaybolmaz)
+const CHART_WINDOW_SECONDS = 5;
+const CHART_MAX_POINTS = 500;
+const CHART_REFRESH_MS = 100;
+
+function bucketMinMax(t, v, maxPoints) {
+  const points = [];
+  const bucket = Math.max(1, Math.ceil(v.length / (maxPoints / 2)));
+  for (let start = 0; start < v.length; start += bucket) {
+    const end = Math.min(start + bucket, v.length);
+    let lo = -1, hi = -1;
+    for (let k = start; k < end; k++) {
+      if (isNaN(v[k])) continue;
+      if (lo < 0 || v[k] < v[lo]) lo = k;
+      if (hi < 0 || v[k] > v[hi]) hi = k;
+    }
+    if (lo < 0) continue;
+    const first = Math.min(lo, hi), second = Math.max(lo, hi);
+    points.push({ t: new Date(t[first] * 1000), v: v[first] });
+    if (second !== first) points.push({ t: new Date(t[second] * 1000), v: v[second] });
+  }
+  return points;
+}
+
 const StatusPanel = forwardRef(function StatusPanel({ sensorIndex, onClose, sensors, style }, ref) {
-  const { sensors: realTimeSensors } = useContext(DataContext);
+  const { sensors: realTimeSensors, sampleRingRef } = useContext(DataContext);
   
   // Gerçek zamanlı sensör verilerini kullan
   const currentSensors = realTimeSensors || sensors;
@@ -73,8 +113,25 @@ const StatusPanel = forwardRef(function StatusPanel({ sensorIndex, onClose, sens
   // Gerçek zamanlı history state'i
   const [timeSeries, setTimeSeries] = useState([]);
 
+  // Tam hızlı akış (sensor_batch/sensor_delta) ve bağlanma geçmişi halkadan okunur
+  useEffect(() => {
+    const ring = sampleRingRef.current;
+    let seen = -1;
+    const refresh = () => {
+      if (ring.written === seen) return;
+      seen = ring.written;
+      const { t, v } = ring.read(channelName(sensorIndex), CHART_WINDOW_SECONDS);
+      if (v.length > 0) setTimeSeries(bucketMinMax(t, v, CHART_MAX_POINTS));
+    };
+    refresh();
+    const interval = setInterval(refresh, CHART_REFRESH_MS);
+    return () => clearInterval(interval);
+  }, [sampleRingRef, sensorIndex]);
+
   // Gerçek zamanlı veri güncellemesi
   useEffect(() => {
+    // Örnekler halkaya geliyorsa grafik oradan beslenir; bu yol yalnızca eski sensor_data akışı içindir
+    if (sampleRingRef.current.written > 0) return;
     let currentValue = null;
     if (sensorIndex < 6) {
       currentValue = Array.isArray(currentSensors.temperatures) && currentSensors.temperatures[sensorIndex] !== undefined
@@ -120,6 +177,8 @@ const StatusPanel = forwardRef(function StatusPanel({ sensorIndex, onClose, sens
 
   // Gerçek zamanlı veri güncellemesi
   useEffect(() => {
+    // Örnekler halkaya geliyorsa grafik oradan beslenir; bu yol yalnızca eski sensor_data akışı içindir
+    if (sampleRingRef.current.written > 0) return;
     let currentValue = null;
     if (sensorIndex < 6) {
       currentValue = Array.isArray(currentSensors.temperatures) && currentSensors.temperatures[sensorIndex] !== undefined
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Arduino komut kanalı testi
+Eşzamanlı çağıranlar kendi cevaplarını alır, gecikme cihazın cevap süresiyle
+sınırlıdır (sabit uyku yok), farklı motorlar üst üste gönderilebilir,
+kendiliğinden gelen satırlar (buton, banner) komutlara karışmaz ve zaman
+aşımından sonra gelen geç cevap sıradaki komutun cevabı sanılmaz.
+ArduinoController (main.py) da sabit uykular yerine banner'ı ve bitiş
+satırını bekler
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import serial
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from arduino_channel import (  # noqa: E402
+    ARDUINO_COMMAND_TIMEOUT,
+    LINE_BOOT,
+    LINE_BUTTON,
+    ArduinoChannel,
+    move_timeout,
+)
+from hardware.arduino import READ_SLICE, ArduinoController  # noqa: E402
+
+
+class FakeArduino:
+    """Her komuta `delay` saniye sonra cevap veren sahte Arduino portu"""
+
+    def __init__(self, delay=0.02, silent=()):
+        self.is_open = True
+        self.delay = delay
+        self.silent = set(silent)
+        self.rx = bytearray()
+        self.written = []
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def read(self, n):
+        data, self.rx = bytes(self.rx[:n]), self.rx[n:]
+        return data
+
+    def feed(self, text):
+        self.rx += text.encode()
+
+    def write(self, data):
+        command = data.decode().strip()
+        self.written.append(command)
+        motor, angle = command.split(":")
+        self.feed(f"Gelen komut: {command}\n")
+        if motor not in self.silent:
+            asyncio.get_running_loop().call_later(
+                self.delay, self.feed, f"Motor {motor} Yeni Pozisyon: {angle}\n")
+
+
+def test_concurrent_callers_get_own_replies():
+    """Eşzamanlı komutlar karışmaz, RTT cihaz gecikmesine yakındır"""
+    async def scenario():
+        port = FakeArduino(delay=0.02)
+        events = []
+        channel = ArduinoChannel(lambda: port, on_unsolicited=lambda kind, line: events.append(kind))
+        runner = asyncio.create_task(channel.run())
+        port.feed("=== Arduino Step + Röle + Buton Kontrol Sistemi Başladı ===\n")
+        replies = await asyncio.gather(*(channel.send(f"{m}:{m * 10}.0", key=m) for m in (1, 2, 1)))
+        port.feed("Buton 3 basıldı - Solenoid 3 AÇILDI\n")
+        await asyncio.sleep(0.03)
+        runner.cancel()
+        return replies, events, channel.stats()
+
+    replies, events, stats = asyncio.run(scenario())
+    for reply, motor in zip(replies, (1, 2, 1)):
+        assert reply.ok and f"Motor {motor} Yeni Pozisyon: {motor * 10}.0" in reply.text
+        assert reply.rtt < 0.06, reply.rtt
+    assert events == [LINE_BOOT, LINE_BUTTON]
+    assert stats["completed"] == 3 and stats["inflight"] == 0
+    print(f"✅ Eşzamanlı komutlar doğru eşlendi (RTT {max(r.rtt for r in replies) * 1000:.1f} ms)")
+
+
+def test_pipelining_and_timeout():
+    """Farklı motorlar üst üste gider; cevapsız komut zaman aşımına uğrar, geç cevabı beklenip bırakılır"""
+    async def scenario():
+        port = FakeArduino(delay=0.05, silent={"3"})
+        channel = ArduinoChannel(lambda: port, timeout=0.2, max_inflight=2, stale_margin=0.1)
+        runner = asyncio.create_task(channel.run())
+        start = time.monotonic()
+        first = await asyncio.gather(channel.send("1:90.0", key=1), channel.send("2:45.0", key=2))
+        pipelined = time.monotonic() - start
+        lost = await channel.send("3:10.0", key=3)
+        after = await channel.send("1:0.0", key=1)
+        runner.cancel()
+        return first, pipelined, lost, after, channel.stats()
+
+    first, pipelined, lost, after, stats = asyncio.run(scenario())
+    assert all(r.ok for r in first) and pipelined < 0.09, pipelined
+    assert not lost.ok and lost.lines == ["Gelen komut: 3:10.0"]
+    assert after.ok and stats["timeouts"] == 1 and stats["stale_discarded"] == 1 and stats["stale"] == 0
+    print(f"✅ İki motor {pipelined * 1000:.0f} ms'de tamamlandı, zaman aşımı sonrası kanal çalışıyor")
+
+
+def test_late_reply_after_timeout_is_not_misattributed():
+    """Zaman aşımından sonra gelen bitiş satırı bayat komutu kapatır; sıradaki komut o gelene kadar yazılmaz"""
+    async def scenario():
+        port = FakeArduino(silent={"1", "2"})
+        channel = ArduinoChannel(lambda: port)
+        runner = asyncio.create_task(channel.run())
+        first = await channel.send("1:90.0", key=1, timeout=0.05)
+        second_task = asyncio.create_task(channel.send("2:45.0", key=2, timeout=1.0))
+        await asyncio.sleep(0.05)
+        written_while_stale = list(port.written)
+        port.feed("Yeni Pozisyon: 90.0\n")   # motor 1 hareketini geç bitirdi
+        await asyncio.sleep(0.05)
+        written_after_late = list(port.written)
+        pending = not second_task.done()
+        port.feed("Yeni Pozisyon: 45.0\n")
+        second = await second_task
+        runner.cancel()
+        return first, second, written_while_stale, written_after_late, pending, channel.stats()
+
+    first, second, stale_written, late_written, pending, stats = asyncio.run(scenario())
+    assert not first.ok and first.rtt is None
+    assert stale_written == ["1:90.0"], stale_written
+    assert late_written == ["1:90.0", "2:45.0"] and pending
+    assert second.ok and second.text.endswith("Yeni Pozisyon: 45.0") and "90.0" not in second.text, second.text
+    assert stats["late_replies"] == 1 and stats["completed"] == 1 and stats["stale"] == 0
+    print(f"✅ Geç cevap bayat komuta eşlendi, motor 2 kendi cevabını aldı: {second.lines[-1]}")
+
+
+def test_stale_hold_follows_move_timeout():
+    """Kısa hareketin kaybolan bitiş satırı kanalı yalnızca kendi süresi + pay kadar bekletir"""
+    async def scenario():
+        port = FakeArduino(delay=0.01, silent={"1"})
+        channel = ArduinoChannel(lambda: port, timeout=0.1)
+        runner = asyncio.create_task(channel.run())
+        lost = await channel.send("1:5.0", key=1)
+        start = time.monotonic()
+        other = await channel.send("2:5.0", key=2, timeout=2.0)
+        held = time.monotonic() - start
+        runner.cancel()
+        return lost, other, held, channel.stats()
+
+    lost, other, held, stats = asyncio.run(scenario())
+    assert not lost.ok and other.ok and stats["stale_discarded"] == 1
+    # ~0.1 sn zaman aşımı + ARDUINO_STALE_MARGIN (0.5 sn); eskiden 30 sn
+    assert 0.3 < held < 1.0, held
+    print(f"✅ Kısa hareketin geç cevabı {held * 1000:.0f} ms beklendi, sonra diğer motor çalıştı")
+
+
+def test_move_timeout_scales_with_angle():
+    """Zaman aşımı hareket açısıyla büyür (2 sn tam tur hareket için yetmez)"""
+    assert move_timeout("Valves:000000000") == ARDUINO_COMMAND_TIMEOUT
+    assert move_timeout("1:-90.0") == move_timeout("1:90.0") > ARDUINO_COMMAND_TIMEOUT
+    # 3455° ~ 1946 adım x 10 ms ~ 19.5 sn
+    assert move_timeout("2:3455") > ARDUINO_COMMAND_TIMEOUT + 19.5
+    assert move_timeout("2:99999") == move_timeout("2:3455")
+    print(f"✅ 90°: {move_timeout('1:90.0'):.1f} sn, tam hareket: {move_timeout('2:3455'):.1f} sn")
+
+
+def _pty_arduino(master, delay):
+    """pty'nin öbür ucunda çalışan sahte Arduino sketch'i"""
+    time.sleep(0.2)  # bootloader
+    os.write(master, "=== Arduino Step + Röle + Buton Kontrol Sistemi Başladı ===\r\n".encode())
+    command = os.read(master, 64).decode().strip()
+    os.write(master, f"Gelen komut: {command}\r\nDönüyor...\r\n".encode())
+    time.sleep(delay)
+    os.write(master, f"Yeni Pozisyon: {command.split(':')[1]}\r\n".encode())
+
+
+def test_controller_waits_for_banner_and_terminal_line():
+    """Bağlanma banner kadar, komut bitiş satırı kadar sürer (eskiden 2 sn + 1 sn)"""
+    master, slave = os.openpty()
+    sketch = threading.Thread(target=_pty_arduino, args=(master, 0.03), daemon=True)
+    sketch.start()
+    controller = ArduinoController(timeout=2)
+    controller.connection = serial.Serial(os.ttyname(slave), 115200, timeout=READ_SLICE)
+    start = time.monotonic()
+    assert controller._wait_for_banner(3.0)
+    boot = time.monotonic() - start
+    success, response = asyncio.run(controller.send_command_async("1:90.0"))
+    sketch.join(2)
+    controller.disconnect()
+    os.close(master)
+    os.close(slave)
+    assert success and response.endswith("Yeni Pozisyon: 90.0"), response
+    assert boot < 0.5 and controller.last_latency < 0.2, (boot, controller.last_latency)
+    print(f"✅ ArduinoController: hazır {boot * 1000:.0f} ms, komut {controller.last_latency * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_concurrent_callers_get_own_replies()
+    test_pipelining_and_timeout()
+    test_late_reply_after_timeout_is_not_misattributed()
+    test_stale_hold_follows_move_timeout()
+    test_move_timeout_scales_with_angle()
+    test_controller_waits_for_banner_and_terminal_line()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark paketi testi
+Baseline karşılaştırması hız ve bellek gerilemelerini yakalar; baseline
+makine ve mod başına saklanır
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from benchmarks import Benchmark, compare, load_baselines, machine_tag, run_benchmark, save_baseline  # noqa: E402
+
+
+def result(ops, peak, size=1000):
+    return {"size": size, "unit": "satır", "seconds": size / ops, "ops_per_s": ops, "peak_mb": peak}
+
+
+def test_compare_flags_regressions():
+    """%25'ten fazla yavaşlama ve %20 + 1 MB'tan fazla bellek artışı gerileme sayılır"""
+    baseline = {"parse": result(1000, 10.0), "save": result(1000, 10.0), "old": result(1000, 1.0)}
+    ok = {"parse": result(800, 12.9), "save": result(1000, 10.0)}
+    assert compare(ok, baseline) == []
+    bad = {"parse": result(700, 10.0), "save": result(1000, 13.5)}
+    regressions = compare(bad, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("parse:") and "%30 yavaş" in regressions[0]
+    assert regressions[1].startswith("save: bellek")
+    # Boyutu değişmiş ya da baseline'ı olmayan benchmark karşılaştırılmaz
+    assert compare({"parse": result(10, 99.0, size=5), "new": result(1, 99.0)}, baseline) == []
+    print("✅ Gerilemeler yakalandı")
+
+
+def test_baseline_per_machine_and_mode():
+    """--only ile güncelleme diğer sonuçları, kayıt zamanlarını ve diğer makineleri korur"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "baseline.json")
+        save_baseline({"a": result(1, 1.0), "b": result(2, 2.0)}, "full", "m1", path)
+        save_baseline({"a": result(3, 3.0)}, "quick", "m1", path)
+        save_baseline({"a": result(5, 5.0)}, "full", "m2", path)
+        data = load_baselines(path)
+        data["machines"]["m1"]["full"]["results"]["a"]["recorded_at"] = "2000-01-01T00:00:00"
+        with open(path, "w") as f:
+            json.dump(data, f)
+        save_baseline({"b": result(4, 4.0)}, "full", "m1", path)
+        machines = load_baselines(path)["machines"]
+        # Yalnızca yeniden ölçülen sonucun kayıt zamanı değişir
+        assert machines["m1"]["full"]["results"]["a"]["ops_per_s"] == 1
+        assert machines["m1"]["full"]["results"]["a"]["recorded_at"] == "2000-01-01T00:00:00"
+        assert machines["m1"]["full"]["results"]["b"]["ops_per_s"] == 4
+        assert machines["m1"]["full"]["results"]["b"]["recorded_at"] > "2000-01-01T00:00:00"
+        assert machines["m1"]["quick"]["results"]["a"]["ops_per_s"] == 3
+        assert machines["m2"]["full"]["results"]["a"]["ops_per_s"] == 5
+        with open(path) as f:
+            assert "satır" in f.read()  # Türkçe birimler okunur kalır
+        json.loads(open(path).read())
+    assert load_baselines(os.path.join(tempfile.gettempdir(), "yok.json")) == {"machines": {}}
+    print("✅ Baseline makine ve mod başına saklanıyor")
+
+
+def test_run_benchmark_measures_time_and_memory():
+    """Kurulum ölçülmez, en iyi süre ve tracemalloc tepe değeri raporlanır"""
+    calls = {"setup": 0, "teardown": 0}
+
+    def setup(n):
+        calls["setup"] += 1
+        return n
+
+    def teardown(_):
+        calls["teardown"] += 1
+
+    bench = Benchmark("alloc", "eleman", 200_000, 1000, setup, lambda n: [0.0] * n, teardown)
+    out = run_benchmark(bench, 200_000, repeats=2)
+    assert calls == {"setup": 3, "teardown": 3}
+    assert out["size"] == 200_000 and out["ops_per_s"] > 0
+    assert 1.3 < out["peak_mb"] < 3.0, out["peak_mb"]   # 200k işaretçi ~1.5 MB
+    os.environ["ROCKET_BENCH_MACHINE"] = "ci-runner"
+    try:
+        assert machine_tag() == "ci-runner"
+    finally:
+        del os.environ["ROCKET_BENCH_MACHINE"]
+    assert "cpu-py" in machine_tag()
+    print(f"✅ {out['ops_per_s']:.0f} eleman/sn, tepe {out['peak_mb']} MB")
+
+
+if __name__ == "__main__":
+    test_compare_flags_regressions()
+    test_baseline_per_machine_and_mode()
+    test_run_benchmark_measures_time_and_memory()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Bağlanma geçmişi (backfill) testi
+Buffer her otomatik kayıtta temizlense de istenen süre, önceki neslin
+kaydedildiği parquet dosyalarından tamamlanır; sıra numaraları canlı akışla
+aynı kalır, dönen gerçek süre karede raporlanır
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from telemetry import encode_history_frame  # noqa: E402
+
+RATE = 1000          # örnek/sn (timestamp'ler testte sabitlenir)
+GENERATION_ROWS = 800
+# Önceki testlerin gerçek zamanla kaydettiği satırlardan ayrı kalsın
+T0 = time.time() + 3600
+
+
+def import_backend():
+    os.environ.setdefault("ROCKET_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ROCKET_DEVICE_CACHE", os.path.join(tempfile.gettempdir(), "rocket_test_device_cache.json"))
+    import raspberry_pi_backend as backend
+    return backend
+
+
+def append_rows(backend, first, n):
+    """`thrust` kanalı canlı sıra no'sunu taşır; timestamp'ler RATE hızına sabitlenir"""
+    for i in range(first, first + n):
+        backend.append_sensor_to_buffer({"thrust": float(i)})
+    with backend.buffer_lock:
+        end = backend.buffer_index
+        backend.timestamp_buffer[end - n:end] = T0 + np.arange(first, first + n) / RATE
+
+
+def test_history_spans_saved_buffers():
+    """Buffer'daki 300 satır + önceki iki kaydın sonu, sıra no'ları ve timestamp'ler kesintisiz"""
+    backend = import_backend()
+    thrust = backend.TELEMETRY_CHANNELS.index("thrust")
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.save_sensor_buffer(os.path.join(tmp, "onceki.parquet"))
+        base = backend.live_samples.write_seq
+        for gen in range(3):
+            append_rows(backend, base + gen * GENERATION_ROWS, GENERATION_ROWS)
+            backend.save_sensor_buffer(os.path.join(tmp, f"sensor_log_gen{gen}.parquet"))
+        append_rows(backend, base + 3 * GENERATION_ROWS, 300)
+        end_seq = backend.live_samples.write_seq
+        assert backend.buffer_index == 300
+
+        # 2 sn @ 1 kHz: buffer'daki 300 satır + önceki iki dosyanın sonu
+        start_seq, timestamps, rows = backend.read_buffer_history(end_seq, 2.0)
+        assert start_seq == end_seq - 2001 and len(timestamps) == 2001
+        assert np.array_equal(rows[:, thrust], np.arange(start_seq, end_seq, dtype=np.float32))
+        assert np.all(np.diff(timestamps) > 0)
+
+        # Kaydedilenden uzun süre istenirse eldeki kadarı döner; karede gerçek süre raporlanır
+        start_seq, timestamps, rows = backend.read_buffer_history(end_seq, 30.0)
+        assert start_seq == base and len(timestamps) == end_seq - base
+        frame = encode_history_frame(start_seq, end_seq, timestamps, rows, backend.TELEMETRY_CHANNELS,
+                                     50.0, "last", requested_seconds=30.0)
+        assert frame["requested_seconds"] == 30.0
+        assert abs(frame["seconds"] - (end_seq - base - 1) / RATE) < 0.05
+
+        # Canlı halkadan son alınan örnekten sonra kayıt yapıldıysa (end_seq artık dosyada)
+        backend.save_sensor_buffer(os.path.join(tmp, "sensor_log_gen3.parquet"))
+        start_seq, _, rows = backend.read_buffer_history(end_seq - 100, 0.5)
+        assert start_seq == end_seq - 601 and rows[-1, thrust] == end_seq - 101
+        print(f"✅ geçmiş {len(timestamps)} örnek, 3 kayıt boyunca; rapor edilen süre {frame['seconds']} sn")
+
+
+if __name__ == "__main__":
+    test_history_spans_saved_buffers()
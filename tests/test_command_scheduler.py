@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Komut zamanlayıcı testi
+Hızlı vana tıklamaları latest-wins birleşir, gönderim hızı sınırlanır,
+senaryo/mod gibi sıra komutları birleştirmeyle yer değiştirmez ve
+emergency bekleyen komutları iptal eder; tanımsız motor id'leri hedef oluşturmaz
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from command_scheduler import CommandCancelled, CommandScheduler  # noqa: E402
+
+
+def test_valve_burst_coalesces_to_latest():
+    """50 hızlı vana komutundan yalnızca birkaçı cihaza gider, son durum kaybolmaz"""
+    async def scenario():
+        sent = []
+
+        async def send(command):
+            sent.append(command)
+            return command
+
+        scheduler = CommandScheduler()
+        scheduler.add_target("stm32", send, min_interval=0.02)
+        results = []
+        for i in range(50):
+            results.append(asyncio.create_task(scheduler.submit("stm32", f"Valves:{i:09b}", key="valves")))
+            await asyncio.sleep(0.001)
+        results = await asyncio.gather(*results)
+        return sent, results, scheduler.stats()["stm32"]
+
+    sent, results, stats = asyncio.run(scenario())
+    assert sent[-1] == f"Valves:{49:09b}" and results[-1] == sent[-1]
+    assert stats["submitted"] == 50 and stats["issued"] == len(sent) <= 10
+    assert stats["issued"] + stats["coalesced"] == 50
+    print(f"✅ 50 vana komutu -> {stats['issued']} gönderim, {stats['coalesced']} birleşti")
+
+
+def test_sequence_order_and_emergency_cancel():
+    """Sıra komutu birleştirmeyle atlanmaz; iptal bekleyenleri sonlandırır"""
+    async def scenario():
+        sent = []
+
+        async def send(command):
+            sent.append(command)
+            return command
+
+        scheduler = CommandScheduler()
+        scheduler.add_target("stm32", send, min_interval=0.05)
+        first = asyncio.create_task(scheduler.submit("stm32", "Valves:100000000", key="valves"))
+        await asyncio.sleep(0.001)
+        ordered = [asyncio.create_task(scheduler.submit("stm32", cmd, key=key)) for cmd, key in (
+            ("Valves:110000000", "valves"), ("preburning", None), ("Valves:111000000", "valves"))]
+        await asyncio.gather(first, *ordered)
+        pending = [asyncio.create_task(scheduler.submit("stm32", cmd)) for cmd in ("burningstart", "burning")]
+        await asyncio.sleep(0.001)
+        cancelled = scheduler.cancel("stm32", "emergency")
+        outcomes = await asyncio.gather(*pending, return_exceptions=True)
+        return sent, cancelled, outcomes
+
+    sent, cancelled, outcomes = asyncio.run(scenario())
+    assert sent == ["Valves:100000000", "Valves:110000000", "preburning", "Valves:111000000"]
+    assert cancelled == 2 and all(isinstance(o, CommandCancelled) for o in outcomes)
+    print("✅ Sıra komutları korundu, emergency bekleyen komutu iptal etti")
+
+
+def test_unknown_motor_id_creates_no_target():
+    """Motor hedefleri açılışta bir kez tanımlanır; istemciden gelen geçersiz id reddedilir"""
+    os.environ.setdefault("ROCKET_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ROCKET_DEVICE_CACHE", os.path.join(tempfile.gettempdir(), "rocket_test_device_cache.json"))
+    import raspberry_pi_backend as backend
+
+    targets = set(backend.command_scheduler.targets)
+    assert {"arduino:motor1", "arduino:motor2"} <= targets
+
+    async def scenario():
+        return [await backend.send_step_motor_command_to_arduino(motor_id, 90.0)
+                for motor_id in (0, 3, 10**6, -1, "1", 1.5, True, None)]
+
+    results = asyncio.run(scenario())
+    assert all(not ok and "Geçersiz motor id" in text for ok, text in results), results
+    assert set(backend.command_scheduler.targets) == targets
+    print(f"✅ {len(results)} geçersiz motor id reddedildi, hedef sayısı {len(targets)}")
+
+
+if __name__ == "__main__":
+    test_valve_burst_coalesces_to_latest()
+    test_sequence_order_and_emergency_cancel()
+    test_unknown_motor_id_creates_no_target()
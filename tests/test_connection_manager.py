@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+ConnectionManager istemci kuyruğu testi
+Yavaş bir istemcinin diğerlerini ve yayın yapan görevi bekletmediği,
+drop-oldest / latest politikaları, yavaş istemci düşürme,
+abonelik grubu başına tek paketleme, kritik mesaj önceliği ve
+bağlanınca gönderilen geçmişin canlı akışla boşluksuz birleşmesi ve delta
+zincirinin yavaş istemcide kopmadan (istemci başına keyframe ile) sürmesi doğrulanır
+"""
+import asyncio
+import os
+import sys
+import time
+
+import msgpack
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from connection_manager import (  # noqa: E402
+    PRIORITY_CRITICAL,
+    ConnectionManager,
+    TelemetryFanout,
+    QUEUE_POLICY_DROP_OLDEST,
+    QUEUE_POLICY_LATEST,
+)
+from telemetry import DeltaDecoder, Subscription  # noqa: E402
+
+
+class FakeWebSocket:
+    """Gönderim gecikmesi ayarlanabilen sahte WebSocket"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.received = []
+        self.closed_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_bytes(self, data):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(msgpack.unpackb(data, raw=False))
+
+    async def send_text(self, data):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(data)
+
+    async def close(self, code=1000):
+        self.closed_code = code
+
+
+def test_slow_client_does_not_block_broadcast():
+    """Yayın çağrısı ağ beklemez, hızlı istemci tüm mesajları alır"""
+    async def scenario():
+        manager = ConnectionManager(max_queue=8, policy=QUEUE_POLICY_DROP_OLDEST,
+                                    slow_client_timeout=10.0, send_timeout=10.0)
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=0.5)
+        await manager.connect(fast)
+        await manager.connect(slow)
+        start = time.perf_counter()
+        for i in range(100):
+            await manager.broadcast_binary({"type": "sensor_data", "seq": i})
+            await asyncio.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.05)
+        assert elapsed < 1.0, elapsed
+        assert [m["seq"] for m in fast.received] == list(range(100))
+        assert manager.clients[slow].dropped > 0
+        print(f"✅ 100 yayın {elapsed * 1000:.1f} ms, yavaş istemci düşen: {manager.clients[slow].dropped}")
+        manager.disconnect(fast)
+        manager.disconnect(slow)
+
+    asyncio.run(scenario())
+
+
+def test_latest_policy_coalesces_telemetry():
+    """latest politikasında bekleyen telemetri son snapshot ile değiştirilir"""
+    async def scenario():
+        manager = ConnectionManager(max_queue=8, policy=QUEUE_POLICY_LATEST)
+        ws = FakeWebSocket(delay=0.05)
+        await manager.connect(ws)
+        for i in range(20):
+            await manager.broadcast_binary({"type": "sensor_data", "seq": i})
+        await manager.broadcast('{"type": "valve_state"}')
+        await asyncio.sleep(0.2)
+        client = manager.clients[ws]
+        assert client.coalesced >= 18
+        # Kontrol mesajı bekleyen telemetrinin önüne geçer
+        assert ws.received[0] == '{"type": "valve_state"}'
+        assert ws.received[-1]["seq"] == 19
+        manager.disconnect(ws)
+        print(f"✅ latest politikası: {client.coalesced} mesaj birleştirildi")
+
+    asyncio.run(scenario())
+
+
+def test_stuck_client_is_disconnected():
+    """Gönderimi zaman aşımına uğrayan istemci kapatılır"""
+    async def scenario():
+        manager = ConnectionManager(max_queue=4, send_timeout=0.05)
+        ws = FakeWebSocket(delay=1.0)
+        await manager.connect(ws)
+        await manager.broadcast_binary({"type": "sensor_data"})
+        await asyncio.sleep(0.2)
+        assert ws not in manager.clients
+        assert ws.closed_code == 1013
+        assert manager.disconnected_slow == 1
+        print("✅ takılan istemci düşürüldü")
+
+    asyncio.run(scenario())
+
+
+def test_telemetry_packed_once_per_group():
+    """Kareler grup başına bir kez paketlenir ve yalnızca o gruptaki istemcilere gider"""
+    async def scenario():
+        manager = ConnectionManager()
+        packs = []
+        original_pack = manager.pack
+        manager.pack = lambda data: packs.append(data) or original_pack(data)
+        clients = [FakeWebSocket() for _ in range(6)]
+        for ws in clients:
+            await manager.connect(ws)
+        phone = Subscription(format="batch", channels=("P1", "P2"), rate=10.0, decimation="mean")
+        for ws in clients[:4]:
+            manager.set_subscription(ws, phone)
+        assert manager.subscription_groups() == {phone: 4, Subscription(): 2}
+        await manager.broadcast_telemetry({phone: {"type": "sensor_batch", "n": 1}})
+        await asyncio.sleep(0.01)
+        assert len(packs) == 1
+        assert [len(ws.received) for ws in clients] == [1, 1, 1, 1, 0, 0]
+        for ws in clients:
+            manager.disconnect(ws)
+        print("✅ 4 istemcili grup için tek paketleme")
+
+    asyncio.run(scenario())
+
+
+def test_critical_messages_jump_telemetry_backlog():
+    """Dolu telemetri kuyruğunda vana durumu bir sonraki gönderimdir ve atılmaz"""
+    async def scenario():
+        manager = ConnectionManager(max_queue=16, slow_client_timeout=10.0, send_timeout=10.0)
+        ws = FakeWebSocket(delay=0.01)
+        await manager.connect(ws)
+        for i in range(64):
+            await manager.broadcast_binary({"type": "sensor_data", "seq": i})
+        for i in range(5):
+            await manager.broadcast('{"type": "valve_state"}', priority=PRIORITY_CRITICAL)
+        await manager.send_personal_data({"type": "valve_response", "success": True}, ws)
+        await asyncio.sleep(0.6)
+        client = manager.clients[ws]
+        critical = [m for m in ws.received[:6] if not isinstance(m, dict) or m.get("type") != "sensor_data"]
+        assert len(critical) == 6, ws.received[:6]
+        latency = client.latency_stats()
+        assert latency["critical"]["count"] == 6 and latency["telemetry"]["count"] == 10
+        assert latency["critical"]["p50"] < latency["telemetry"]["p50"]
+        print(f"✅ kritik p50 {latency['critical']['p50']} ms, telemetri p50 {latency['telemetry']['p50']} ms")
+        manager.disconnect(ws)
+
+    asyncio.run(scenario())
+
+
+def test_history_backfill_joins_live_stream():
+    """Geçmiş karesi canlı akışın ilk örneğinde biter: boşluk ve tekrar yok"""
+    channels = ["P1", "P2"]
+    rate = 1000
+    all_ts = 1_700_000_000.0 + np.arange(20_000) / rate
+    all_rows = np.repeat(np.arange(20_000, dtype=np.float32)[:, None], 2, axis=1)
+    written = [0]
+
+    def history(end_seq, seconds):
+        end = min(end_seq, written[0])
+        start = int(np.searchsorted(all_ts[:end], all_ts[end - 1] - seconds)) if end else 0
+        return start, all_ts[start:end], all_rows[start:end]
+
+    async def scenario():
+        manager = ConnectionManager()
+        fanout = TelemetryFanout(manager, channels, history_source=history, history_seconds=2.0, history_rate=100.0)
+        full, decimated, early, legacy = FakeWebSocket(), FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(early)
+        manager.set_telemetry_format(early, "batch")
+        seq = 0
+        for tick in range(40):
+            if tick == 15:
+                await manager.connect(legacy)   # format / abonelik göndermeyen eski istemci
+                await manager.connect(full)
+                await fanout.handle_message(full, {"type": "telemetry_format", "format": "batch"})
+                await manager.connect(decimated)
+                await fanout.handle_message(decimated, {"type": "subscribe", "format": "batch",
+                                                       "channels": ["P1"], "rate": 10})
+            n = 33 + tick % 3
+            written[0] = seq + n
+            await fanout.publish(seq, all_ts[seq:seq + n], all_rows[seq:seq + n], lambda: b"", 0)
+            seq += n
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.05)
+
+        frames = [m for m in full.received if m["type"] in ("sensor_history", "sensor_batch")]
+        assert frames[0]["type"] == "sensor_history" and frames[1]["type"] == "sensor_batch"
+        assert frames[1]["seq"] == frames[0]["seq_end"]
+        # 15 tick ~ 0.5 sn veri (< 2 sn), 100 Hz -> ~50 örnek
+        assert abs(frames[0]["n"] - frames[0]["seq_end"] / 10) <= 2
+        # İstenen 2 sn yerine eldeki ~0.5 sn döner ve karede raporlanır
+        assert frames[0]["requested_seconds"] == 2.0
+        assert abs(frames[0]["seconds"] - (frames[0]["seq_end"] - frames[0]["seq"] - 1) / rate) < 0.011
+        live = [m for m in frames[1:]]
+        for prev, cur in zip(live, live[1:]):
+            assert cur["seq"] == prev["seq"] + prev["n"]
+        assert live[-1]["seq"] + live[-1]["n"] == seq
+
+        frames = [m for m in decimated.received if m["type"] in ("sensor_history", "sensor_batch")]
+        assert frames[0]["type"] == "sensor_history" and frames[0]["channels"] == ["P1"]
+        assert frames[1]["seq"] == frames[0]["seq_end"]
+        assert not any(m["type"] == "sensor_history" for m in early.received)
+        assert not any(m["type"] == "sensor_history" for m in legacy.received)
+        print(f"✅ geçmiş {frames[0]['n']} örnek, canlı akış seq {frames[1]['seq']}'ten boşluksuz devam")
+        for ws in (full, decimated, early, legacy):
+            manager.disconnect(ws)
+
+    asyncio.run(scenario())
+
+
+def decode_all(received):
+    """sensor_delta karelerini sırayla çözer; (çözücü, çözülen seq listesi) döner"""
+    decoder = DeltaDecoder()
+    decoded = []
+    for frame in received:
+        if isinstance(frame, dict) and frame.get("type") == "sensor_delta":
+            if decoder.decode(frame) is not None:
+                decoded.append((frame["seq"], frame["n"]))
+    return decoder, decoded
+
+
+def publish_delta_ticks(fanout, channels, ticks, start=0):
+    async def run():
+        for tick in range(start, start + ticks):
+            rows = np.full((10, len(channels)), tick, dtype=np.float32)
+            timestamps = 1_700_000_000.0 + (tick * 10 + np.arange(10)) / 1000
+            await fanout.publish(tick * 10, timestamps, rows, lambda: b"", 0)
+            await asyncio.sleep(0.001)
+    return run()
+
+
+def test_delta_chain_survives_slow_client():
+    """Yavaş istemcide delta tek tek atılmaz: CRC hatası yok, hızlı istemci ek keyframe almaz"""
+    channels = ["P1", "P2"]
+
+    async def scenario():
+        manager = ConnectionManager(max_queue=4, policy=QUEUE_POLICY_LATEST,
+                                    slow_client_timeout=10.0, send_timeout=10.0)
+        fanout = TelemetryFanout(manager, channels, keyframe_interval=30)
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=0.02)
+        delta = Subscription(format="delta")
+        for ws in (fast, slow):
+            await manager.connect(ws)
+            manager.set_subscription(ws, delta)
+        await publish_delta_ticks(fanout, channels, 120)
+        await asyncio.sleep(0.2)
+
+        decoder, decoded = decode_all(fast.received)
+        assert decoder.crc_errors == 0 and len(decoded) == 120
+        # Grubun deltası ortak; hızlı istemci yalnızca planlı keyframe'leri (0, 30, 60, 90) alır
+        assert sum(frame["key"] for frame in fast.received) == 4
+        assert manager.clients[fast].resyncs == 0
+
+        client = manager.clients[slow]
+        decoder, decoded = decode_all(slow.received)
+        assert client.dropped > 0
+        assert decoder.crc_errors == 0, "delta zinciri bozuldu"
+        assert len(decoded) == len(slow.received)   # gelen her kare çözülür
+        assert client.resyncs <= 1   # istemci başına en fazla saniyede bir keyframe
+        print(f"✅ yavaş istemci: {client.dropped} kare atıldı, {len(decoded)} kare CRC hatasız çözüldü, "
+              f"{client.resyncs} kişisel keyframe")
+        for ws in (fast, slow):
+            manager.disconnect(ws)
+
+    asyncio.run(scenario())
+
+
+def test_keyframe_request_is_per_client_and_rate_limited():
+    """request_keyframe yalnızca isteyen istemciye keyframe yollar, sık istekler birleşir"""
+    channels = ["P1", "P2"]
+
+    async def scenario():
+        manager = ConnectionManager()
+        fanout = TelemetryFanout(manager, channels, keyframe_interval=1000)
+        other, lost = FakeWebSocket(), FakeWebSocket()
+        delta = Subscription(format="delta")
+        for ws in (other, lost):
+            await manager.connect(ws)
+            manager.set_subscription(ws, delta)
+        await publish_delta_ticks(fanout, channels, 5)
+        for tick in range(5, 15):
+            await fanout.handle_message(lost, {"type": "request_keyframe"})
+            await publish_delta_ticks(fanout, channels, 1, start=tick)
+        await asyncio.sleep(0.05)
+
+        assert sum(frame["key"] for frame in other.received) == 1
+        assert decode_all(other.received)[0].crc_errors == 0
+        keys = [frame["seq"] for frame in lost.received if frame["key"]]
+        # İlk istek hemen karşılanır, sonrakiler KEYFRAME_RESYNC_INTERVAL dolana kadar bekler
+        assert len(keys) == 2 and keys[1] == 50, keys
+        assert manager.clients[lost].resyncs == 1
+        decoder, decoded = decode_all(lost.received)
+        assert decoder.crc_errors == 0 and len(decoded) == len(lost.received)
+        print("✅ 10 keyframe isteği -> 1 kişisel keyframe, diğer istemci etkilenmedi")
+        for ws in (other, lost):
+            manager.disconnect(ws)
+
+    asyncio.run(scenario())
+
+
+def test_idle_tick_flushes_decimated_tail():
+    """Veri kesilince yayın görevi boş tick'te seyreltilmiş grubun son yarım aralığını gönderir"""
+    channels = ["P1", "P2"]
+
+    async def scenario():
+        manager = ConnectionManager()
+        fanout = TelemetryFanout(manager, channels)
+        ws = FakeWebSocket()
+        await manager.connect(ws)
+        manager.set_subscription(ws, Subscription(format="batch", rate=20.0), backfill_seconds=0)
+        ts = 1_700_000_000.0 + np.arange(120) / 1000
+        rows = np.ones((120, 2), dtype=np.float32)
+        await fanout.publish(0, ts, rows, lambda: b"", 0)
+        assert not fanout.idle_flush_due(time.monotonic())
+        await asyncio.sleep(0.06)
+        assert fanout.idle_flush_due(time.monotonic())
+        await fanout.publish(120, ts[:0], rows[:0], lambda: b"", 0, new_data=False)
+        await asyncio.sleep(0.01)
+        frames = [m for m in ws.received if isinstance(m, dict) and m.get("type") == "sensor_batch"]
+        assert sum(m["n"] for m in frames) == 3   # 120 ms @ 20 Hz: iki tam + bir yarım aralık
+        assert frames[-1]["seq"] == 100   # ham örnek sırası: son aralık 100. örnekte başlar
+        assert not fanout.idle_flush_due(time.monotonic())
+        print("✅ boş tick: son yarım aralık gönderildi")
+        manager.disconnect(ws)
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_slow_client_does_not_block_broadcast()
+    test_latest_policy_coalesces_telemetry()
+    test_stuck_client_is_disconnected()
+    test_telemetry_packed_once_per_group()
+    test_critical_messages_jump_telemetry_backlog()
+    test_history_backfill_joins_live_stream()
+    test_delta_chain_survives_slow_client()
+    test_keyframe_request_is_per_client_and_rate_limited()
+    test_idle_tick_flushes_decimated_tail()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Parça parça (chunked) dışa aktarma testi
+Parquet + RAM buffer verisi csv/parquet/arrow olarak üretilir,
+byte ve satır ofseti ile devam ettirme doğrulanır
+"""
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from data_export import (  # noqa: E402
+    build_export_schema,
+    iter_buffer_batches,
+    iter_export_bytes,
+    iter_parquet_batches,
+    iter_saved_rows,
+    skip_rows,
+)
+
+CHANNELS = ["P1", "T1"]
+BUFFER_COLUMNS = ["P1", "P2", "T1"]
+
+
+def _make_parquet(directory, n_rows=12_000):
+    filename = os.path.join(directory, "sensor_log_test.parquet")
+    df = pd.DataFrame({
+        "timestamp": 1000.0 + np.arange(n_rows) * 0.001,
+        "P1": np.linspace(0, 1, n_rows),
+        "P2": np.linspace(1, 2, n_rows),
+        "T1": np.linspace(2, 3, n_rows),
+    })
+    df.to_parquet(filename, index=False, row_group_size=3000)
+    return filename
+
+
+def _buffer_chunks(chunk_rows, n_rows=5000):
+    for start in range(0, n_rows, chunk_rows):
+        ts = 2000.0 + np.arange(start, min(start + chunk_rows, n_rows)) * 0.001
+        yield ts, np.repeat(ts[:, None], len(BUFFER_COLUMNS), axis=1).astype(np.float32)
+
+
+def _batches(filename, schema, start=None, end=None):
+    yield from iter_parquet_batches(filename, schema, start, end, chunk_rows=1000)
+    yield from iter_buffer_batches(_buffer_chunks, [0, 2], schema, start, end, chunk_rows=1000)
+
+
+def test_export_formats_roundtrip():
+    """Her format okunabilir ve tüm satırları içerir"""
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = _make_parquet(tmp)
+        schema = build_export_schema(CHANNELS)
+
+        parquet_bytes = b"".join(iter_export_bytes(_batches(filename, schema), schema, "parquet"))
+        assert pq.read_table(io.BytesIO(parquet_bytes)).num_rows == 17_000
+
+        arrow_bytes = b"".join(iter_export_bytes(_batches(filename, schema), schema, "arrow"))
+        assert pa_ipc.open_stream(arrow_bytes).read_all().num_rows == 17_000
+
+        csv_bytes = b"".join(iter_export_bytes(_batches(filename, schema), schema, "csv"))
+        df = pd.read_csv(io.BytesIO(csv_bytes))
+        assert list(df.columns) == ["timestamp"] + CHANNELS
+        assert len(df) == 17_000
+        print("✅ csv/parquet/arrow dışa aktarma doğrulandı")
+
+
+def test_export_resume_by_byte_and_row_offset():
+    """Byte ofseti ile devam eden çıktı tam çıktının kuyruğuyla aynıdır"""
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = _make_parquet(tmp)
+        schema = build_export_schema(CHANNELS)
+        for fmt in ("csv", "parquet", "arrow"):
+            full = b"".join(iter_export_bytes(_batches(filename, schema), schema, fmt))
+            tail = b"".join(iter_export_bytes(_batches(filename, schema), schema, fmt, byte_offset=4096))
+            assert full[4096:] == tail, fmt
+
+        resumed = pq.read_table(io.BytesIO(b"".join(iter_export_bytes(
+            skip_rows(_batches(filename, schema, start=1005.0, end=1010.0), 100), schema, "parquet"))))
+        assert resumed.num_rows == 5001 - 100
+        assert abs(resumed.column("timestamp")[0].as_py() - 1005.1) < 1e-6
+        print("✅ byte/satır ofseti ile devam ettirme doğrulandı")
+
+
+def test_saved_rows_match_buffer_chunks():
+    """Dışa aktarma sırasında kaydedilen buffer satırları parquet'ten aynı sırayla okunur"""
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = _make_parquet(tmp)
+        chunks = list(iter_saved_rows(filename, 2500, 7300, chunk_rows=1000))
+        timestamps = np.concatenate([ts for ts, _ in chunks])
+        sensors = np.concatenate([rows for _, rows in chunks])
+        assert max(len(ts) for ts, _ in chunks) <= 1000
+        assert timestamps.dtype == np.float64 and sensors.dtype == np.float32
+        assert np.allclose(timestamps, 1000.0 + np.arange(2500, 7300) * 0.001)
+        assert sensors.shape == (4800, len(BUFFER_COLUMNS))
+        assert np.allclose(sensors[:, 0], np.linspace(0, 1, 12_000)[2500:7300])
+        assert list(iter_saved_rows(filename, 12_000, 12_000)) == []
+        print("✅ kaydedilen buffer satırları parquet'ten okundu")
+
+
+if __name__ == "__main__":
+    test_export_formats_roundtrip()
+    test_export_resume_by_byte_and_row_offset()
+    test_saved_rows_match_buffer_chunks()
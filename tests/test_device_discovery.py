@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cihaz keşfi testi
+USB kimliği ve ad kurallarıyla tanıma, port adı değişince önbellekten bulma
+ve sessiz portların eşzamanlı yoklanması (pty ile)
+"""
+import os
+import pty
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import device_discovery  # noqa: E402
+from device_discovery import ROLE_ARDUINO, ROLE_STM32, DeviceCache, discover_devices  # noqa: E402
+
+
+def make_port(device, vid=None, pid=None, serial_number=None, description="n/a"):
+    """serial.tools.list_ports ListPortInfo yerine geçen sade nesne"""
+    return SimpleNamespace(device=device, vid=vid, pid=pid, serial_number=serial_number, description=description)
+
+
+def test_usb_id_and_name_rules():
+    """VID:PID portu açmadan tanır; kimliksiz portlarda eski ad kuralları geçerli"""
+    ports = [
+        make_port("/dev/ttyACM0", 0x0483, 0x374B, "0670FF48"),
+        make_port("/dev/ttyUSB3", 0x1A86, 0x7523, description="USB Serial"),
+    ]
+    found = discover_devices(None, ports=ports, probe=False)
+    assert found[ROLE_STM32].device == "/dev/ttyACM0" and found[ROLE_STM32].method == "usb_id"
+    assert found[ROLE_ARDUINO].device == "/dev/ttyUSB3" and found[ROLE_ARDUINO].method == "usb_id"
+
+    found = discover_devices(None, ports=[make_port("/dev/ttyACM1"), make_port("/dev/ttyUSB0")], probe=False)
+    assert found[ROLE_STM32].method == "name" and found[ROLE_ARDUINO].device == "/dev/ttyUSB0"
+    # Zaten açık port yeniden eşleştirilmez
+    found = discover_devices(None, roles=[ROLE_STM32], exclude=["/dev/ttyACM1"],
+                             ports=[make_port("/dev/ttyACM1"), make_port("/dev/ttyUSB0")], probe=False)
+    assert found == {}
+    print("✅ USB kimliği ve ad kuralları doğrulandı")
+
+
+def test_cache_follows_renamed_port():
+    """Önbellekteki seri numarası, port adı ve sırası değişse de aynı cihazı bulur"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "device_cache.json")
+        # Tanınmayan bir USB-seri dönüştürücüde Arduino (ör. FTDI), ilk seferde yoklamayla bulunmuş gibi
+        cache = DeviceCache(path)
+        cache.update({ROLE_ARDUINO: device_discovery.DeviceMatch(
+            ROLE_ARDUINO, "/dev/ttyAMA5", 0x0403, 0x6001, "A50285BI", "probe")})
+        assert os.path.exists(path)
+
+        ports = [make_port("/dev/ttyAMA2", 0x0403, 0x6001, "OTHER"), make_port("/dev/ttyAMA7", 0x0403, 0x6001, "A50285BI")]
+        found = discover_devices(DeviceCache(path), roles=[ROLE_ARDUINO], ports=ports, probe=False)
+        assert found[ROLE_ARDUINO].device == "/dev/ttyAMA7" and found[ROLE_ARDUINO].method == "cache"
+        assert DeviceCache(path).entries[ROLE_ARDUINO]["device"] == "/dev/ttyAMA7"
+    print("✅ Önbellek yeniden adlandırılan portu buldu")
+
+
+def test_concurrent_probe_with_pty():
+    """Sessiz portlar ve telemetri akan port aynı anda yoklanır"""
+    stop = threading.Event()
+    masters, slaves, names = [], [], []
+    for _ in range(3):
+        master, slave = pty.openpty()
+        masters.append(master)
+        slaves.append(slave)
+        names.append(os.ttyname(slave))
+
+    def stm32_firmware(fd):
+        line = b"P1:1.00,P2:2.00,T1:25.0\r\n"
+        while not stop.is_set():
+            os.write(fd, line)
+            time.sleep(0.01)
+
+    threading.Thread(target=stm32_firmware, args=(masters[2],), daemon=True).start()
+    saved = device_discovery.STM32_PROBE_TIMEOUT, device_discovery.ARDUINO_PROBE_TIMEOUT
+    device_discovery.STM32_PROBE_TIMEOUT, device_discovery.ARDUINO_PROBE_TIMEOUT = 0.3, 0.5
+    try:
+        started = time.perf_counter()
+        found = discover_devices(None, ports=[make_port(name) for name in names])
+        elapsed = time.perf_counter() - started
+    finally:
+        device_discovery.STM32_PROBE_TIMEOUT, device_discovery.ARDUINO_PROBE_TIMEOUT = saved
+        stop.set()
+        time.sleep(0.02)
+        for fd in masters + slaves:
+            os.close(fd)
+    assert found[ROLE_STM32].device == names[2] and found[ROLE_STM32].method == "probe"
+    assert ROLE_ARDUINO not in found
+    # Sıralı yoklama 2 sessiz port x 0.8 sn sürerdi; eşzamanlıda en yavaş port kadar
+    assert elapsed < 1.3, elapsed
+    print(f"✅ 3 port eşzamanlı yoklandı: {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_usb_id_and_name_rules()
+    test_cache_follows_renamed_port()
+    test_concurrent_probe_with_pty()
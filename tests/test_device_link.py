@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Cihaz bağlantı durum makinesi testi
+Üst üste gelen kopma bildirimleri tek yeniden bağlanma görevinde birleşir,
+bekleme üstel + jitter'lı artar ve deneme tükenince failed durumuna geçilir.
+STM32 okuma görevi port yokken yeniden bağlanma görevini yoklamaz, bitmesini bekler
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from device_link import (  # noqa: E402
+    LINK_BACKOFF,
+    LINK_CONNECTED,
+    LINK_FAILED,
+    LINK_PROBING,
+    DeviceLink,
+)
+
+
+def test_single_flight_reconnect():
+    """Watchdog ve okuma hatası aynı anda tetiklese de tek görev çalışır"""
+    async def scenario():
+        calls = {"active": 0, "max_active": 0, "count": 0, "fail": 0}
+        states = []
+
+        async def connect():
+            calls["count"] += 1
+            calls["active"] += 1
+            calls["max_active"] = max(calls["max_active"], calls["active"])
+            await asyncio.sleep(0.01)
+            calls["active"] -= 1
+            if calls["fail"]:
+                calls["fail"] -= 1
+                return False
+            return True
+
+        link = DeviceLink("STM32", connect, base_delay=0.01, rng=random.Random(1))
+        assert await link.wait_connected(1.0)
+        calls["fail"] = 3   # USB yeniden sayımı: ilk 3 deneme başarısız
+        link.lost("watchdog")
+        tasks = {link.task}
+        for _ in range(10):
+            tasks.add(link.lost("okuma hatası"))
+            states.append(link.state)
+            await asyncio.sleep(0.005)
+        await asyncio.gather(*tasks)
+        return link, calls, tasks, states
+
+    link, calls, tasks, states = asyncio.run(scenario())
+    assert len(tasks) == 1 and calls["max_active"] == 1 and calls["count"] == 5
+    assert link.state == LINK_CONNECTED and link.disconnects == 1 and link.joined >= 9
+    assert LINK_PROBING in states and LINK_BACKOFF in states
+    assert link.stats()["reconnect_ms"]["count"] == 1 and link.failures == 3
+    print(f"✅ 11 kopma bildirimi -> 1 görev, {calls['count'] - 1} deneme, "
+          f"{link.stats()['reconnect_ms']['max']:.0f} ms'de yeniden bağlandı")
+
+
+def test_backoff_and_failed_state():
+    """Bekleme tavanı ve jitter sınırları; deneme tükenince failed ama denemeye devam"""
+    link = DeviceLink("Arduino", None, base_delay=0.1, max_delay=1.0, jitter=0.2, rng=random.Random(2))
+    for failures, nominal in ((1, 0.1), (2, 0.2), (4, 0.8), (5, 1.0), (20, 1.0)):
+        delay = link.backoff_delay(failures)
+        assert nominal * 0.8 <= delay <= nominal * 1.2, (failures, delay)
+
+    async def scenario():
+        attempts = []
+
+        async def connect():
+            attempts.append(link.state)
+            return False
+
+        link.connect = connect
+        link.base_delay, link.max_attempts, link.failed_interval = 0.001, 3, 0.02
+        link.ensure("başlangıç")
+        await asyncio.sleep(0.1)
+        state = link.state
+        link.task.cancel()
+        return attempts, state
+
+    attempts, state = asyncio.run(scenario())
+    assert state == LINK_FAILED and len(attempts) > 3
+    print(f"✅ {len(attempts)} başarısız deneme sonrası durum: {state}")
+
+
+class IdleChannel:
+    """Bağlandıktan sonra okunan ama veri vermeyen sahte STM32 kanalı"""
+
+    def __init__(self):
+        self.reads = 0
+
+    def read_lines(self):
+        self.reads += 1
+        return []
+
+    def reset(self, reason=""):
+        pass
+
+
+def test_reader_waits_on_link_instead_of_polling():
+    """Port yokken read_stm32_data bağlanma görevine bir kez katılır, 50 ms'de bir ensure çağırmaz"""
+    os.environ.setdefault("ROCKET_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ROCKET_DEVICE_CACHE", os.path.join(tempfile.gettempdir(), "rocket_test_device_cache.json"))
+    import raspberry_pi_backend as backend
+
+    async def connect():
+        await asyncio.sleep(0.01)
+        if link.attempts < 4:
+            return False
+        backend.stm32_uart = object()
+        return True
+
+    link = DeviceLink("STM32", connect, base_delay=0.1, jitter=0.0)
+    channel = IdleChannel()
+
+    async def scenario():
+        reader = asyncio.create_task(backend.read_stm32_data())
+        await asyncio.sleep(0.9)
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+    saved = backend.stm32_uart, backend.stm32_link, backend.stm32_channel
+    backend.stm32_uart, backend.stm32_link, backend.stm32_channel = None, link, channel
+    try:
+        asyncio.run(scenario())
+    finally:
+        backend.stm32_uart, backend.stm32_link, backend.stm32_channel = saved
+    # 0.1 + 0.2 + 0.4 sn bekleme; eskiden bu sürede ~15 kez ensure çağrılıyordu
+    assert link.state == LINK_CONNECTED and link.attempts == 4
+    assert link.joined == 0, link.joined
+    assert channel.reads > 0
+    print(f"✅ {link.attempts} denemede bağlandı, katılım sayacı {link.joined}, ardından {channel.reads} okuma")
+
+
+if __name__ == "__main__":
+    test_single_flight_reconnect()
+    test_backoff_and_failed_state()
+    test_reader_waits_on_link_instead_of_polling()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Log hattı testi
+Sıcak yol logları anahtar başına hız sınırlanır ve bastırılan sayı sonraki
+kayda eklenir; kayıtlar kuyruk üzerinden ayrı thread'de yazılır ve
+değişebilir argümanlar kuyruğa girerken sabitlenir; WARNING sınırlanır, ERROR bastırılmaz
+"""
+import io
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from log_pipeline import RateLimitFilter, Throttle, setup_logging  # noqa: E402
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.threads.add(threading.get_ident())
+        self.lines.append(self.format(record))
+
+
+def test_throttle_limits_per_key():
+    """1000 hızlı kayıttan yalnızca burst kadarı yazılır; diğer anahtar etkilenmez"""
+    handler = ListHandler()
+    pipeline = setup_logging(logging.DEBUG, rate=None, handlers=[handler])
+    try:
+        log = logging.getLogger("test_throttle")
+        throttle = Throttle(log, rate=10, burst=5)
+        for i in range(1000):
+            throttle.info("stm32_data", "STM32 veri: %s", f"P1: {i}")
+        throttle.info("stm32_feedback", "STM32 feedback: %s", "ACK")
+        time.sleep(0.15)   # ~1 token
+        throttle.info("stm32_data", "STM32 veri: %s", "son")
+    finally:
+        pipeline.stop()
+    data = [line for line in handler.lines if "STM32 veri" in line]
+    assert len(data) == 6 and throttle.suppressed_total == 995
+    assert data[-1].endswith("son (+995 bastırıldı)"), data[-1]
+    assert any("feedback" in line for line in handler.lines)
+    assert threading.get_ident() not in handler.threads   # konsola listener thread'i yazar
+    print(f"✅ 1001 kayıttan {len(data)} yazıldı, son kayıt: {data[-1]}")
+
+
+def test_filter_samples_debug_and_freezes_mutable_args():
+    """Kök filtre DEBUG'u örnekler; sözlük argümanı kuyruğa girerken biçimlendirilir"""
+    stream = io.StringIO()
+    pipeline = setup_logging(logging.DEBUG, rate=1000, burst=1000, debug_sample=10,
+                             handlers=[logging.StreamHandler(stream)])
+    try:
+        log = logging.getLogger("test_filter")
+        for i in range(100):
+            log.debug("parse %d", i)
+        state = {"mode": "idle"}
+        log.info("durum %s", state)
+        state["mode"] = "burning"
+        log.error("hata her zaman yazılır")
+    finally:
+        pipeline.stop()
+    lines = stream.getvalue().splitlines()
+    assert sum("parse" in line for line in lines) == 10
+    assert "INFO:test_filter:durum {'mode': 'idle'}" in lines
+    assert any("hata her zaman" in line for line in lines)
+    assert isinstance(pipeline.rate_filter, RateLimitFilter) and pipeline.rate_filter.suppressed_total == 90
+    print("✅ DEBUG örnekleme ve argüman sabitleme doğrulandı")
+
+
+def test_filter_limits_warnings_not_errors():
+    """Varsayılan `exempt_level` ERROR: aynı yerden WARNING seli sınırlanır, ERROR hiç bastırılmaz"""
+    rate_filter = RateLimitFilter(rate=0.001, burst=2)
+
+    def passed(level):
+        record = logging.LogRecord("test_levels", level, __file__, 1, "mesaj", None, None)
+        return sum(rate_filter.filter(record) for _ in range(10))
+
+    assert passed(logging.WARNING) == 2
+    assert passed(logging.ERROR) == 10 and passed(logging.CRITICAL) == 10
+    print("✅ WARNING sınırlandı, ERROR/CRITICAL bastırılmadı")
+
+
+if __name__ == "__main__":
+    test_throttle_limits_per_key()
+    test_filter_samples_debug_and_freezes_mutable_args()
+    test_filter_limits_warnings_not_errors()
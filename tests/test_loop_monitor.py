@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Event loop izleyici testi
+Loop'u bloklayan senkron bir çağrı takılma olarak kaydedilir ve yığınında
+takılmaya neden olan fonksiyon görünür; kısa işler takılma sayılmaz
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from loop_monitor import LoopMonitor  # noqa: E402
+
+
+def blocking_parquet_save(seconds):
+    """Loop üzerinde çalışan senkron kayıt gibi davranır"""
+    time.sleep(seconds)
+
+
+def test_stall_is_captured_with_stack():
+    """150 ms'lik bloklama yakalanır; yığında bloklayan fonksiyon var"""
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        for _ in range(5):
+            time.sleep(0.002)      # eşiğin altında: takılma değil
+            await asyncio.sleep(0.01)
+        blocking_parquet_save(0.15)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return monitor.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["stalls"] == 1, snapshot["stalls"]
+    stall = snapshot["worst"][0]
+    assert 140 <= stall["lag_ms"] < 400, stall["lag_ms"]
+    assert any("blocking_parquet_save" in frame for frame in stall["stack"])
+    assert list(snapshot["sites"].values())[0]["count"] == 1
+    print(f"✅ {stall['lag_ms']:.0f} ms takılma yakalandı: {stall['where']}")
+
+
+def test_worst_ring_is_bounded():
+    """En kötüler listesi sınırlı ve süreye göre sıralı"""
+    monitor = LoopMonitor(keep=3)
+    for lag in (0.06, 0.3, 0.1, 0.2, 0.08):
+        monitor._record(lag, None)
+    worst = [e["lag_ms"] for e in monitor.worst]
+    assert worst == [300.0, 200.0, 100.0] and len(monitor.recent) == 3 and monitor.stalls == 5
+    assert monitor.snapshot(stacks=False)["recent"][0]["lag_ms"] == 80.0
+    print("✅ En kötü takılmalar listesi sınırlı")
+
+
+if __name__ == "__main__":
+    test_stall_is_captured_with_stack()
+    test_worst_ring_is_bounded()
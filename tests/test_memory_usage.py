@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bellek muhasebesi testi
+tracemalloc farkı büyüyen ayırmanın satırını gösterir, iki görüntü arasındaki
+geçici tepe görünür; buffer ve istemci kuyruğu boyutları doğru hesaplanır
+"""
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from connection_manager import QUEUE_POLICY_DROP_OLDEST, ClientConnection  # noqa: E402
+from memory_usage import TracemallocSnapshots, array_memory, process_memory  # noqa: E402
+
+
+def grow_cache(store):
+    store.extend(bytearray(1024) for _ in range(2000))
+
+
+def transient_save():
+    """pandas kaydı gibi: büyük geçici kopya, sonra serbest"""
+    data = np.ones(4 * 1024 * 1024 // 8)
+    return float(data.sum())
+
+
+def test_snapshot_diff_points_at_growth():
+    """Fark en çok büyüyen satırı gösterir; tepe, aradaki geçici ayırmayı yakalar"""
+    snapshots = TracemallocSnapshots(keep=2)
+    try:
+        snapshots.take("önce")
+        raise AssertionError("tracemalloc kapalıyken görüntü alınmamalı")
+    except RuntimeError:
+        pass
+    snapshots.start(frames=5)
+    try:
+        store = []
+        first = snapshots.take("önce")
+        grow_cache(store)
+        transient_save()
+        second = snapshots.take("sonra")
+        assert second["traced_peak_mb"] >= 4.0 > second["traced_mb"] - first["traced_mb"]
+        diff = snapshots.diff(first["id"], second["id"], limit=3)
+        top = diff["top"][0]
+        assert top["where"].endswith(f"test_memory_usage.py:{grow_cache.__code__.co_firstlineno + 1}"), top
+        assert top["size_diff_kb"] >= 2000 and top["count_diff"] >= 2000
+        tb = snapshots.diff(first["id"], group="traceback", limit=1)["top"][0]["traceback"]
+        assert any("grow_cache(store)" in line for line in tb)
+        snapshots.take("üçüncü")
+        assert [s["label"] for s in snapshots.status()["snapshots"]] == ["sonra", "üçüncü"]
+        for bad, error in (((first["id"],), KeyError), ((second["id"], "yok"), KeyError)):
+            try:
+                snapshots.diff(*bad)
+                raise AssertionError(f"{bad} kabul edildi")
+            except error:
+                pass
+        try:
+            snapshots.diff(second["id"], group="module")
+            raise AssertionError("geçersiz gruplama kabul edildi")
+        except ValueError:
+            pass
+        del store
+    finally:
+        status = snapshots.stop()
+    assert not tracemalloc.is_tracing() and status["snapshots"] == []
+    print(f"✅ Büyüme {top['size_diff_kb']:.0f} KB: {os.path.basename(top['where'])}, "
+          f"geçici tepe {second['traced_peak_mb']} MB")
+
+
+def test_buffers_queues_and_process():
+    buffer = np.zeros((1000, 24), dtype=np.float32)
+    assert array_memory(buffer, 250) == {"allocated_mb": 0.09, "used_mb": 0.02}
+    client = ClientConnection(None, 8, QUEUE_POLICY_DROP_OLDEST, 5.0, 2.0)
+    client.enqueue(b"x" * 1000, True, key="telemetry")
+    client.enqueue('{"type": "valve_state"}', False)
+    assert client.queued_bytes() == 1023 and client.stats()["queued_bytes"] == 1023
+    memory = process_memory()
+    if os.path.exists("/proc/self/status"):
+        assert memory["rss_mb"] > 1 and memory["rss_peak_mb"] >= memory["rss_mb"]
+        assert memory["system"]["total_mb"] > memory["system"]["available_mb"] > 0
+    print(f"✅ RSS {memory['rss_mb']} MB, kuyruk {client.queued_bytes()} bayt")
+
+
+if __name__ == "__main__":
+    test_snapshot_diff_points_at_growth()
+    test_buffers_queues_and_process()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Ölçüm yardımcıları testi
+Sabit kovalı histogramın yüzdelik yaklaşımı, komut gecikmesi sonuç sayaçları
+ve Prometheus metin çıktısı
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from metrics import (  # noqa: E402
+    OUTCOME_NACK,
+    OUTCOME_TIMEOUT,
+    CommandLatency,
+    Histogram,
+    MetricsRegistry,
+    RateMeter,
+)
+
+
+def test_histogram_quantiles():
+    """Yüzdelikler gerçek değerin kova çözünürlüğü içinde kalır"""
+    rng = random.Random(1)
+    values = sorted(rng.lognormvariate(-5, 1) for _ in range(10_000))  # ~7 ms medyan
+    hist = Histogram()
+    for v in values:
+        hist.observe(v)
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        approx = hist.quantile(q)
+        # 1-2-5 kovaları: en kötü durumda komşu sınırın 2.5 katı içinde
+        assert exact / 2.5 <= approx <= exact * 2.5, (q, exact, approx)
+    assert hist.count == len(values) and hist.cumulative()[-1][1] == len(values)
+    print(f"✅ p50={hist.quantile(0.5) * 1000:.2f} ms (gerçek {values[4999] * 1000:.2f} ms)")
+
+
+def test_command_latency_outcomes():
+    """Zaman aşımları sayılır ama histogramı bozmaz"""
+    latency = CommandLatency()
+    for _ in range(9):
+        latency.record("valves", 0.002)
+    latency.record("valves", 0.004, OUTCOME_NACK)
+    latency.record("valves", 2.0, OUTCOME_TIMEOUT)
+    entry = latency.snapshot()["commands"]["valves"]
+    assert entry["outcomes"]["ok"] == 9 and entry["outcomes"]["nack"] == 1 and entry["outcomes"]["timeout"] == 1
+    assert entry["latency_ms"]["count"] == 10 and entry["latency_ms"]["max"] == 4.0
+    assert entry["buckets"][-1] == ["+Inf", 10]
+    print("✅ Komut sonuç sayaçları doğrulandı")
+
+
+def test_prometheus_text_format():
+    """Sayaç, etiketli gauge ve histogram satırları Prometheus formatında"""
+    registry = MetricsRegistry(prefix="rocket_")
+    lines_read = registry.counter("lines_read_total", "Okunan satır")
+    for _ in range(3):
+        lines_read.inc()
+    registry.gauge("client_lag_seconds", "Kuyruk gecikmesi",
+                   lambda: [({"client": 'a"b'}, 0.25), ({"client": "c:1"}, 0)])
+    save = registry.histogram("save_seconds", "Kayıt süresi", buckets=(0.1, 1.0))
+    save.observe(0.05)
+    save.observe(0.5)
+    registry.gauge("broken", "Okunamayan", lambda: 1 / 0)
+    text = registry.render()
+    assert "# TYPE rocket_lines_read_total counter\nrocket_lines_read_total 3\n" in text
+    assert 'rocket_client_lag_seconds{client="a\\"b"} 0.25' in text
+    assert 'rocket_client_lag_seconds{client="c:1"} 0' in text
+    assert 'rocket_save_seconds_bucket{le="0.1"} 1' in text
+    assert 'rocket_save_seconds_bucket{le="+Inf"} 2' in text
+    assert "rocket_save_seconds_count 2" in text and "rocket_save_seconds_sum 0.55" in text
+    # Hatalı kaynak diğer metrikleri bozmaz
+    assert "# TYPE rocket_broken" not in text and text.endswith("\n")
+    print("✅ Prometheus metin çıktısı doğrulandı")
+
+
+def test_rate_meter():
+    """Hız, okumalar arasındaki farktan hesaplanır; kısa pencerede önceki değer korunur"""
+    count = [0]
+    meter = RateMeter(lambda: count[0], min_window=0.05)
+    count[0] = 100
+    time.sleep(0.1)
+    rate = meter()
+    assert 500 < rate <= 1000, rate
+    count[0] = 10_000
+    assert meter() == rate   # pencere dolmadı
+    print(f"✅ Örnek hızı: {rate:.0f}/sn")
+
+
+if __name__ == "__main__":
+    test_histogram_quantiles()
+    test_command_latency_outcomes()
+    test_prometheus_text_format()
+    test_rate_meter()
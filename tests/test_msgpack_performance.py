@@ -3,10 +3,17 @@
 msgpack vs JSON performans testi
 """
 import json
+import os
+import sys
 import msgpack
 import time
 import statistics
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from connection_manager import ConnectionManager  # noqa: E402
+from telemetry import SnapshotEncoder  # noqa: E402
+
 # Test verisi - gerçek sensör verilerine benzer
 test_data = {
     "type": "sensor_data",
@@ -91,6 +98,71 @@ def test_msgpack_performance(iterations=10000):
     
     return msgpack_size, avg_serialize, avg_deserialize
 
+# Backend'deki global sensor_data sözlüğüne benzer veri (parse_stm32_data çıktısı)
+backend_sensor_data = {
+    "pressures": [1.234, 2.345, 3.456, 4.567, 5.678, 6.789, 7.890, 8.901],
+    "temperatures": [25.6, 30.1, 35.2, 40.3, 45.4, 50.5, 55.1, 60.2],
+    "debis": [],
+    "adiabatic_temperature": 0.0,
+    "thrust": 500.2,
+    "isp": 250.1,
+    "p_chamber": 0.0,
+    "oxygen_consumption": 1.2,
+    "fuel_consumption": 0.8,
+    "total_impulse": 5000.0,
+    "exhaust_velocity": 2500.0,
+    "deltap2": 0.0,
+    "kutlesel_debi": 0.0,
+    "timestamp": "2024-01-01T12:00:00.000000",
+    "errors": [],
+    "valves": [0] * 9
+}
+
+SNAPSHOT_FIELDS = [
+    "pressures", "temperatures", "debis", "adiabatic_temperature", "thrust", "isp", "p_chamber",
+    "oxygen_consumption", "fuel_consumption", "total_impulse", "exhaust_velocity",
+    "deltap2", "kutlesel_debi", "timestamp", "errors"
+]
+
+def legacy_snapshot_pack(manager, sensor_data):
+    """Eski yol: her yayında 15 anahtarlı sözlük + to_native + msgpack.packb"""
+    frontend_data = {
+        "type": "sensor_data",
+        "data": {key: sensor_data[key] for key in SNAPSHOT_FIELDS}
+    }
+    return msgpack.packb(manager.to_native(frontend_data), use_bin_type=True)
+
+def test_snapshot_encoder_performance(iterations=10000):
+    """Şeması önceden derlenmiş SnapshotEncoder ile eski yolun karşılaştırması"""
+    print(f"🧩 Snapshot Encoder Performans Testi ({iterations} iterasyon)")
+    manager = ConnectionManager()
+    encoder = SnapshotEncoder(
+        {"pressures": 8, "temperatures": 8},
+        ["adiabatic_temperature", "thrust", "isp", "p_chamber", "oxygen_consumption",
+         "fuel_consumption", "total_impulse", "exhaust_velocity", "deltap2", "kutlesel_debi"],
+        ["debis", "timestamp", "errors"],
+    )
+
+    # Çıktılar aynı şekilde çözülmeli
+    legacy = msgpack.unpackb(legacy_snapshot_pack(manager, backend_sensor_data), raw=False)
+    compiled = msgpack.unpackb(encoder.encode(backend_sensor_data), raw=False)
+    assert legacy == compiled, (legacy, compiled)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        legacy_snapshot_pack(manager, backend_sensor_data)
+    legacy_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encoder.encode(backend_sensor_data)
+    compiled_us = (time.perf_counter() - start) / iterations * 1e6
+
+    print(f"  🐢 Eski yol (dict + to_native + packb): {legacy_us:.2f} µs/kare")
+    print(f"  🚀 SnapshotEncoder: {compiled_us:.2f} µs/kare")
+    print(f"  📊 Hızlanma: {legacy_us / compiled_us:.1f}x")
+    assert compiled_us < legacy_us, (compiled_us, legacy_us)
+
 def main():
     print("🎯 msgpack vs JSON Performans Karşılaştırması")
     print("=" * 50)
@@ -135,6 +207,8 @@ def main():
     deser_improvement = ((json_deser - msgpack_deser) / json_deser) * 100
     print(f"  📦 Deserileştirme: {deser_improvement:.1f}% daha hızlı")
     
+    print()
+    test_snapshot_encoder_performance()
     print()
     print("🎉 Sonuç: msgpack kullanımı ile WebSocket performansı önemli ölçüde artırıldı!")
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Profil alma testi
+Yığın örnekleyici loop'u meşgul eden fonksiyonu collapsed-stack çıktısında
+gösterir; cProfile sonucu pstats ile okunur; aynı anda tek oturum açılır ve
+süre dolunca oturum kendiliğinden biter
+"""
+import asyncio
+import os
+import pstats
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from profiling import PROFILE_CPROFILE, PROFILE_SAMPLER, ProfileBusy, Profiler  # noqa: E402
+
+
+def busy_parse(seconds):
+    """Loop thread'inde CPU harcayan senkron iş"""
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+def hot_function():
+    return sum(i * i for i in range(1000))
+
+
+def test_sampler_finds_busy_function():
+    """Örnekleyici yalnızca loop thread'ini örnekler; süre dolunca kendiliğinden durur"""
+    async def scenario():
+        profiler = Profiler()
+        profiler.start(PROFILE_SAMPLER, 0.4, interval=0.002)
+        assert profiler.status()["active"]["mode"] == PROFILE_SAMPLER
+        busy_parse(0.25)
+        await asyncio.sleep(0.3)
+        return profiler
+
+    profiler = asyncio.run(scenario())
+    assert profiler.active is None
+    result = profiler.results[-1]
+    lines = result.data.decode().splitlines()
+    busy = sum(int(line.rsplit(" ", 1)[1]) for line in lines if "busy_parse (test_profiling.py" in line)
+    assert result.samples > 30 and busy > result.samples * 0.2, (busy, result.samples)
+    assert all(line.startswith("MainThread;") for line in lines)  # yalnızca loop thread'i
+    assert result.filename.endswith(".collapsed")
+    print(f"✅ {result.samples} örnekten {busy} tanesi busy_parse içinde")
+
+
+def test_cprofile_result_loads_with_pstats():
+    """Erken durdurma, tek oturum kuralı ve pstats biçimi"""
+    async def scenario():
+        profiler = Profiler(keep=2)
+        profiler.start(PROFILE_CPROFILE, 10)
+        try:
+            profiler.start(PROFILE_SAMPLER, 1)
+            raise AssertionError("ikinci oturum açılmamalı")
+        except ProfileBusy:
+            pass
+        for _ in range(30):
+            hot_function()
+        await asyncio.sleep(0)
+        return profiler, profiler.stop()
+
+    profiler, result = asyncio.run(scenario())
+    assert result.duration < 5 and profiler.stop() is None
+    with tempfile.NamedTemporaryFile(suffix=".pstats", delete=False) as f:
+        f.write(result.data)
+    try:
+        stats = pstats.Stats(f.name)
+        calls = {func[2]: value[1] for func, value in stats.stats.items()}
+        assert calls["hot_function"] == 30
+    finally:
+        os.remove(f.name)
+    assert profiler.get(result.id) is result and profiler.get("yok") is None
+    print("✅ cProfile sonucu pstats ile okundu")
+
+
+def test_invalid_parameters():
+    async def scenario():
+        profiler = Profiler(max_seconds=60)
+        for args in (("perf", 1), (PROFILE_SAMPLER, 0), (PROFILE_SAMPLER, 61), (PROFILE_SAMPLER, 1, 0.0001)):
+            try:
+                profiler.start(*args)
+                raise AssertionError(f"geçersiz parametre kabul edildi: {args}")
+            except ValueError:
+                pass
+        assert profiler.active is None and profiler.status() == {"active": None, "results": []}
+
+    asyncio.run(scenario())
+    print("✅ Geçersiz parametreler reddedildi")
+
+
+if __name__ == "__main__":
+    test_sampler_finds_busy_function()
+    test_cprofile_result_loads_with_pstats()
+    test_invalid_parameters()
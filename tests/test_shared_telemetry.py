@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Paylaşılan bellek (seqlock) telemetri testi
+Ingest süreci hızla yazarken ayrı bir okuyucu süreç örnekleri boşluksuz,
+yırtılmadan (torn read olmadan) ve sıra numaralarıyla tutarlı okumalı
+"""
+import multiprocessing as mp
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from shared_telemetry import SharedTelemetry  # noqa: E402
+
+CHANNELS = ["P1", "P2", "T1", "thrust"]
+T0 = 1_700_000_000.0
+
+
+def _reader(name, total, result):
+    shared = SharedTelemetry(name)
+    expected = 0
+    torn = 0
+    deadline = time.time() + 20
+    while expected < total and time.time() < deadline:
+        seq, timestamps, rows = shared.take()
+        if not len(timestamps):
+            time.sleep(0.001)
+            continue
+        values = np.arange(seq, seq + len(timestamps), dtype=np.float32)
+        if seq != expected:
+            break
+        # Her satırın tüm kanalları ve timestamp'i aynı örneğe ait olmalı
+        torn += int(np.count_nonzero(rows != values[:, None]))
+        torn += int(np.count_nonzero(np.abs(timestamps - (T0 + values / 1000)) > 1e-6))
+        expected = seq + len(timestamps)
+    status = shared.status()
+    result.update(expected=expected, torn=torn, dropped=shared.dropped,
+                  retries=shared.retries, snapshot=shared.latest_snapshot(), mode=status.get("system_mode"))
+    shared.close()
+
+
+def test_seqlock_reader_process():
+    """Ayrı süreçteki okuyucu 200k örneği tutarlı şekilde alır"""
+    name = f"rocket_test_{uuid.uuid4().hex[:8]}"
+    total, per_tick = 200_000, 500
+    writer = SharedTelemetry(name, create=True, channels=CHANNELS, capacity=65536)
+    ctx = mp.get_context("fork")  # Raspberry Pi / Linux
+    with ctx.Manager() as mgr:
+        result = mgr.dict()
+        reader = ctx.Process(target=_reader, args=(name, total, result))
+        reader.start()
+        time.sleep(0.5)
+        start = time.perf_counter()
+        for seq in range(0, total, per_tick):
+            values = np.arange(seq, seq + per_tick, dtype=np.float32)
+            rows = np.repeat(values[:, None], len(CHANNELS), axis=1)
+            writer.publish(T0 + values / 1000, rows, snapshot=b"\x81\xa4type\xabsensor_data",
+                           status=b'{"system_mode": "burning"}')
+            time.sleep(0.0002)
+        elapsed = time.perf_counter() - start
+        reader.join(30)
+        result = dict(result)
+    writer.close()
+    print(f"📊 {total} örnek {elapsed:.2f} sn'de yazıldı; okuyucu: {result}")
+    assert result["expected"] == total
+    assert result["torn"] == 0
+    assert result["dropped"] == 0
+    assert result["snapshot"].endswith(b"sensor_data") and result["mode"] == "burning"
+    print("✅ seqlock okuyucu: boşluk ve yırtık okuma yok")
+
+
+def test_reader_exit_keeps_block():
+    """Okuyucunun kapanması bloğu silmez; yazar kapanınca blok kalkar"""
+    name = f"rocket_test_{uuid.uuid4().hex[:8]}"
+    writer = SharedTelemetry(name, create=True, channels=CHANNELS, capacity=16)
+    reader = SharedTelemetry(name)
+    assert reader.channels == CHANNELS
+    reader.close()
+    again = SharedTelemetry(name)
+    writer.publish(np.array([T0]), np.zeros((1, len(CHANNELS)), dtype=np.float32))
+    assert again.take()[1].tolist() == [T0]
+    # Yeni istemci geçmişi halkadan okunur
+    start, timestamps, _ = again.history(1, 10.0)
+    assert start == 0 and timestamps.tolist() == [T0]
+    again.close()
+    writer.close()
+    try:
+        SharedTelemetry(name)
+        assert False, "blok silinmemiş"
+    except FileNotFoundError:
+        pass
+    print("✅ paylaşılan blok yaşam döngüsü doğrulandı")
+
+
+if __name__ == "__main__":
+    test_seqlock_reader_process()
+    test_reader_exit_keeps_block()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Blok simülatör testi
+Aynı seed aynı bloğu üretir; kodlanmış satırlar STM32 formatında ve matrisle
+aynı değerleri taşır; vana ve sistem modu etkileri basınca yansır
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from simulation import STM32_FIELDS, STM32Simulator, encode_block  # noqa: E402
+
+
+def decode_lines(data):
+    rows = []
+    for line in data.decode().splitlines():
+        fields = [part.split(": ") for part in line.split(" | ")]
+        assert [name for name, _ in fields] == list(STM32_FIELDS), line
+        rows.append([float(value) for _, value in fields])
+    return np.array(rows)
+
+
+def test_seeded_block_and_encoding():
+    """float32 matris, seed ile tekrarlanabilir; satırlar matrisle aynı değerler"""
+    block = STM32Simulator(seed=7).generate_block(1000, t0=0.0)
+    assert block.shape == (1000, len(STM32_FIELDS)) and block.dtype == np.float32
+    assert np.array_equal(block, STM32Simulator(seed=7).generate_block(1000, t0=0.0))
+    assert not np.array_equal(block, STM32Simulator(seed=8).generate_block(1000, t0=0.0))
+    data = STM32Simulator(seed=7).generate_block(1000, t0=0.0, encoded=True)
+    assert data == encode_block(block) and data.count(b"\n") == 1000
+    assert data.startswith(b"P1: ") and b"| VELOCITY: " in data
+    assert np.allclose(decode_lines(data), block, rtol=0, atol=1e-3)
+    assert encode_block(block[:0]) == b""
+    print(f"✅ {len(block)} satır, {len(data) / len(block):.0f} bayt/satır")
+
+
+def test_drift_valve_and_mode_effects():
+    """Sinüs sürüklenmesi, açık vana ve sistem modu ortalama basınca yansır"""
+    sim = STM32Simulator(seed=1)
+    idle = sim.generate_block(20_000, t0=0.0)
+    # 0.1 rad/sn sinüs: P1 ortalaması ~15 sn sonra +0.3 bar'a yaklaşır
+    drifted = sim.generate_block(20_000, t0=15.0)
+    assert 0.2 < drifted[:, 0].mean() - idle[:, 0].mean() < 0.4
+    sim.set_valve_states([0, 1, 0, 0, 0, 0, 0, 0])
+    valve = sim.generate_block(20_000, t0=0.0)
+    assert 3.0 < valve[:, 1].mean() - idle[:, 1].mean() < 4.0   # U(2, 5)
+    assert abs(valve[:, 0].mean() - idle[:, 0].mean()) < 0.05
+    assert np.allclose(valve[:, 5].mean(), valve[:, 1].mean(), atol=0.05)   # P6 = P2 kanalı
+    sim.set_valve_states([0] * 8)
+    sim.set_system_mode("emergency")
+    emergency = sim.generate_block(20_000, t0=0.0)
+    assert -8.0 < emergency[:, 0].mean() - idle[:, 0].mean() < -7.0   # -U(5, 10)
+    assert emergency[:, 8:14].mean() < idle[:, 8:14].mean() - 10
+    sim.set_system_mode("leak_test")
+    leak = sim.generate_block(20_000, t0=0.0)
+    assert -2.2 < leak[:, 0].mean() - idle[:, 0].mean() < -1.8
+    print("✅ Sürüklenme, vana ve mod etkileri görüldü")
+
+
+def test_block_rate_exceeds_10khz():
+    sim = STM32Simulator(seed=0)
+    started = time.perf_counter()
+    sim.generate_block(20_000, encoded=True)
+    rate = 20_000 / (time.perf_counter() - started)
+    assert rate > 10_000, rate
+    print(f"✅ {rate:.0f} satır/sn")
+
+
+if __name__ == "__main__":
+    test_seeded_block_and_encoding()
+    test_drift_valve_and_mode_effects()
+    test_block_rate_exceeds_10khz()
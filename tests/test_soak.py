@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Soak test yardımcıları testi
+Sanal STM32 pty'ye sıra numaralı satır yazar, okunmayınca satırları kaynakta
+taşmış sayar; dizi histogramı ve Prometheus ayrıştırması doğru sayar
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from metrics import Histogram  # noqa: E402
+from soak import SEQ_RING, SimulatedSTM32, merge_histograms, observe_array, process_sample, scrape_metrics  # noqa: E402
+
+
+def _read_all(fd):
+    os.set_blocking(fd, False)
+    data = b""
+    while True:
+        try:
+            chunk = os.read(fd, 65536)
+        except BlockingIOError:
+            return data
+        if not chunk:
+            return data
+        data += chunk
+
+
+def test_simulator_writes_sequenced_lines():
+    """Satırlar STM32 formatında, VELOCITY sıra numarası; üretim zamanı kaydedilir"""
+    sim = SimulatedSTM32(rate=1000)
+    try:
+        now = time.time()
+        data = b""
+        for t, due in ((now, 50), (now + 0.01, 25)) + ((now, 0),) * 20:
+            sim.step(t, due)
+            data += _read_all(sim._slave)   # pty tamponu küçük: backend gibi sürekli oku
+        lines = data.decode().splitlines()
+        assert len(lines) == 75 and sim.produced == 75 and sim.written == 75 and sim.overflow == 0
+        assert lines[0].startswith("P1: ") and "| Tbogaz2: 305.2 |" in lines[0]
+        assert [int(line.rsplit("VELOCITY: ", 1)[1]) for line in lines] == list(range(75))
+        assert sim.produced_at[49] == now and sim.produced_at[50] == now + 0.01
+        assert sim.line(SEQ_RING + 7).endswith(b"VELOCITY: 7\n")
+    finally:
+        sim.close()
+    print("✅ Sıra numaralı satırlar yazıldı")
+
+
+def test_simulator_counts_source_overflow():
+    """Backend okumazsa tampon sınırı aşılır ve yeni satırlar kaynakta kaybolur"""
+    sim = SimulatedSTM32(rate=100, max_pending=0.5)
+    try:
+        for _ in range(400):
+            sim.step(time.time(), 100)
+        assert sim.produced == 40_000
+        assert sim.overflow > 0 and sim.written + sim.overflow < sim.produced  # kalanı beklemede
+        before = sim.written
+        _read_all(sim._slave)
+        sim.step(time.time(), 0)
+        assert sim.written > before
+    finally:
+        sim.close()
+    print(f"✅ Kaynakta taşan satır sayıldı: {sim.overflow}")
+
+
+def test_observe_array_matches_observe():
+    values = np.array([0.00005, 0.0003, 0.004, 0.004, 0.2, 12.0])
+    one, many = Histogram(), Histogram()
+    for v in values:
+        one.observe(float(v))
+    observe_array(many, values)
+    assert many.counts == one.counts and many.count == one.count and many.max == one.max
+    assert abs(many.sum - one.sum) < 1e-9
+    merged = merge_histograms([one, many])
+    assert merged.count == 12 and merged.summary()["p50"] == one.summary()["p50"]
+    print("✅ Dizi histogramı tek tek gözlemle aynı")
+
+
+def test_scrape_metrics_and_process_sample():
+    text = (
+        "# HELP rocket_samples_total x\n# TYPE rocket_samples_total counter\n"
+        "rocket_samples_total 1234\n"
+        'rocket_websocket_client_dropped_total{client="a"} 2\n'
+        'rocket_websocket_client_dropped_total{client="b"} 3\n'
+    )
+    values = scrape_metrics(text)
+    assert values["rocket_samples_total"] == 1234 and values["rocket_websocket_client_dropped_total"] == 5
+    sample = process_sample(os.getpid())
+    assert sample["rss_mb"] > 1 and sample["cpu_s"] > 0
+    print(f"✅ Metrikler ayrıştırıldı, RSS {sample['rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    test_simulator_writes_sequenced_lines()
+    test_simulator_counts_source_overflow()
+    test_observe_array_matches_observe()
+    test_scrape_metrics_and_process_sample()
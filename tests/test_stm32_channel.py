@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+STM32 komut kanalı testi
+Tek port sahibi: telemetri satırları okuyucuya, ACK/NACK cevapları bekleyen
+komutlara gider; emergency kuyruktaki komutların önüne geçer ve event loop
+cevap beklerken bloklanmaz. Emergency ile iptal edilen komutlar gecikme
+ölçümünde NACK değil iptal sayılır
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from stm32_channel import CommandReply, STM32Channel  # noqa: E402
+
+SENSOR_LINE = "P1: 12.5 | P2: 15.3 | P3: 18.2"
+
+
+class FakeSerial:
+    """Gelen baytları elle beslenen sahte seri port"""
+
+    def __init__(self):
+        self.is_open = True
+        self.rx = bytearray()
+        self.written = []
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def read(self, n):
+        data, self.rx = bytes(self.rx[:n]), self.rx[n:]
+        return data
+
+    def write(self, data):
+        self.written.append(data.decode().strip())
+
+    def feed(self, text):
+        self.rx += text.encode()
+
+
+def test_ack_correlation_and_line_split():
+    """ACK'ler ada göre eşlenir, yarım satırlar bir sonraki okumaya kalır"""
+    async def scenario():
+        port = FakeSerial()
+        channel = STM32Channel(lambda: port, ack_timeout=1.0, command_gap=0.0)
+        writer = asyncio.create_task(channel.run())
+        valves = asyncio.create_task(channel.send("Valves:010010110"))
+        burning = asyncio.create_task(channel.send("burning"))
+        while len(port.written) < 2:
+            await asyncio.sleep(0.001)
+        # Cevaplar ters sırada ve telemetri arasına karışık gelir
+        port.feed(f"{SENSOR_LINE}\nACK: burning\n{SENSOR_LINE}\nNACK: Valves ge")
+        lines = channel.read_lines()
+        assert lines == [SENSOR_LINE, SENSOR_LINE]
+        assert (await burning).ok is True
+        port.feed("cersiz\n")
+        assert channel.read_lines() == []
+        reply = await valves
+        assert reply.ok is False and reply.reply == "NACK: Valves gecersiz"
+        writer.cancel()
+        return channel.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["acked"] == 1 and stats["nacked"] == 1 and stats["awaiting_ack"] == 0
+    print("✅ ACK/NACK eşleşmesi ve satır bölme doğrulandı")
+
+
+def test_emergency_preempts_queue_without_blocking():
+    """Emergency kuyruğu iptal eder, cevap beklerken loop serbest kalır"""
+    async def scenario():
+        port = FakeSerial()
+        channel = STM32Channel(lambda: port, ack_timeout=0.3, command_gap=0.05)
+        writer = asyncio.create_task(channel.run())
+        queued = [asyncio.create_task(channel.send(f"Valves:00000000{i % 2}", wait_ack=False))
+                  for i in range(5)]
+        await asyncio.sleep(0.01)
+        emergency = asyncio.create_task(channel.send("emergency", emergency=True, timeout=0.3))
+        # Cevap gelene kadar loop'un diğer görevleri çalışabilmeli
+        ticks, start = 0, time.monotonic()
+        while not emergency.done():
+            await asyncio.sleep(0.005)
+            ticks += 1
+            if ticks == 10:
+                port.feed("ACK: emergency\n")
+                channel.read_lines()
+        reply = await emergency
+        results = await asyncio.gather(*queued)
+        writer.cancel()
+        return port.written, reply, results, ticks, time.monotonic() - start
+
+    written, reply, results, ticks, elapsed = asyncio.run(scenario())
+    # İlk vana komutu hemen yazıldı, kalanlar emergency ile iptal edildi
+    assert written == ["Valves:000000000", "emergency"]
+    assert reply.ok is True and reply.rtt is not None
+    assert [r.ok for r in results[1:]] == [False] * 4
+    assert not results[0].cancelled and all(r.cancelled for r in results[1:])
+    assert ticks >= 10 and elapsed < 0.3
+    print(f"✅ emergency öncelik aldı ({ticks} loop turu, {elapsed * 1000:.0f} ms)")
+
+
+def test_preempted_commands_recorded_as_cancelled():
+    """Vana, senaryo ve mod komutlarının emergency ile iptali `cancelled` sonucu olarak sayılır"""
+    os.environ.setdefault("ROCKET_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ROCKET_DEVICE_CACHE", os.path.join(tempfile.gettempdir(), "rocket_test_device_cache.json"))
+    import raspberry_pi_backend as backend
+
+    async def preempted(target, command, key=None):
+        return CommandReply(command, False, "emergency nedeniyle iptal edildi", cancelled=True)
+
+    async def scenario():
+        sent = await backend.send_valve_command_to_stm32([1] * 9)
+        burning = await backend.run_scenario("burning")
+        mode = await backend.set_system_mode("leak_test")
+        return sent, burning, mode
+
+    saved = backend.stm32_uart, backend.command_scheduler.submit, backend.system_mode
+    backend.stm32_uart, backend.command_scheduler.submit = FakeSerial(), preempted
+    backend.command_latency.reset()
+    try:
+        sent, burning, mode = asyncio.run(scenario())
+    finally:
+        backend.stm32_uart, backend.command_scheduler.submit, backend.system_mode = saved
+    assert sent is False and burning["status"] == "error" and mode["status"] == "error"
+    commands = backend.command_latency.snapshot()["commands"]
+    for kind in ("valves_write", "scenario:burning", "system_mode"):
+        assert commands[kind]["outcomes"]["cancelled"] == 1 and commands[kind]["outcomes"]["nack"] == 0, kind
+    print("✅ emergency ile iptal edilen komutlar 'cancelled' sayıldı")
+
+
+if __name__ == "__main__":
+    test_ack_correlation_and_line_split()
+    test_emergency_preempts_queue_without_blocking()
+    test_preempted_commands_recorded_as_cancelled()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Sabit hızlı telemetri yayını testi
+10 kHz ingest sürerken kareler DISPLAY_RATE_HZ hızında çıkar ve her kare
+önceki tick'ten beri gelen tüm örnekleri (eksiksiz, tekrarsız) taşır; port
+hiç boşalmasa da ingest loop'a sıra verdiği için yayın aksamaz
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from soak import LINE_SUFFIX  # noqa: E402
+
+INGEST_RATE = 10_000   # satır/sn
+DURATION = 1.5         # sn
+SATURATED_BATCH = 200       # Doymuş portta her okumada hazır satır
+SATURATED_LIMIT = 100_000   # Sonra port susar (ingest loop'a sıra vermezse test askıda kalmasın)
+
+
+class PacedChannel:
+    """Gerçek port gibi: son okumadan beri zamanı gelen satırları döndürür.
+
+    `rate` None ise port SATURATED_LIMIT satıra kadar hiç boşalmaz (ingest kapasitesinin üstünde veri).
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.started = None
+        self.produced = 0
+
+    def read_lines(self):
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        if self.rate is None:
+            due = min(self.produced + SATURATED_BATCH, SATURATED_LIMIT)
+        else:
+            due = int((now - self.started) * self.rate)
+        lines = [f"P1: 1.0{LINE_SUFFIX}{seq}" for seq in range(self.produced, due)]
+        self.produced = due
+        return lines
+
+
+def import_backend():
+    os.environ.setdefault("ROCKET_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ROCKET_DEVICE_CACHE", os.path.join(tempfile.gettempdir(), "rocket_test_device_cache.json"))
+    import raspberry_pi_backend as backend
+    return backend
+
+
+def run_ingest(rate):
+    """read_stm32_data + telemetry_broadcast_task'i sahte portla çalıştırır; yayınlanan kareleri döner"""
+    backend = import_backend()
+    # Kayıt/yedek görevleri teste karışmasın
+    backend.AUTO_SAVE_INTERVAL = backend.BACKUP_INTERVAL = 10**12
+    velocity = backend.TELEMETRY_CHANNELS.index("exhaust_velocity")
+    frames = []
+
+    async def record(seq, timestamps, rows, encode_snapshot, dropped, new_data=True):
+        frames.append((time.monotonic(), seq, rows[:, velocity].astype(np.int64)))
+
+    async def scenario():
+        channel = PacedChannel(rate)
+        saved = backend.stm32_uart, backend.stm32_channel, backend.telemetry_fanout.publish
+        backend.stm32_uart, backend.stm32_channel = object(), channel
+        backend.telemetry_fanout.publish = record
+        backend.live_samples.take()   # önceki örnekler
+        backend.last_received_time = time.monotonic()   # modül daha önce içe aktarıldıysa watchdog tetiklenmesin
+        tasks = [asyncio.create_task(backend.read_stm32_data()),
+                 asyncio.create_task(backend.telemetry_broadcast_task())]
+        try:
+            await asyncio.sleep(DURATION)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            backend.stm32_uart, backend.stm32_channel, backend.telemetry_fanout.publish = saved
+        return channel
+
+    channel = asyncio.run(scenario())
+    assert len(frames) > 2, "yayın görevi çalışamadı (ingest loop'a sıra vermiyor)"
+    return backend, channel, frames
+
+
+def check_frames(backend, frames):
+    """Kare hızı ~DISPLAY_RATE_HZ, aralıklar düzenli, sıra numaraları ardışık"""
+    for (_, seq, values), (_, next_seq, _) in zip(frames, frames[1:]):
+        assert next_seq == seq + len(values)
+    rate = (len(frames) - 1) / (frames[-1][0] - frames[0][0])
+    gaps = np.diff([t for t, _, _ in frames])
+    assert abs(rate - backend.DISPLAY_RATE_HZ) < backend.DISPLAY_RATE_HZ * 0.15, rate
+    # Ingest her satır grubundan sonra loop'a sıra verir; yayın tick'leri aç kalmaz
+    assert gaps.max() < 3 / backend.DISPLAY_RATE_HZ, gaps.max()
+    return rate, gaps.max()
+
+
+def test_frames_at_display_rate_carry_every_sample():
+    backend, channel, frames = run_ingest(INGEST_RATE)
+    received = np.concatenate([values for _, _, values in frames])
+    # Her örnek bir kez ve sırayla; yalnızca son tick'ten sonra gelenler henüz yayınlanmamış olabilir
+    assert np.array_equal(received, np.arange(len(received))), "kayıp veya tekrar eden örnek"
+    assert channel.produced - len(received) < INGEST_RATE / backend.DISPLAY_RATE_HZ * 3
+    rate, gap = check_frames(backend, frames)
+    print(f"✅ {len(frames)} kare ({rate:.1f} Hz), {len(received)} örnek, "
+          f"kare başına ~{len(received) / len(frames):.0f} örnek, en uzun aralık {gap * 1000:.0f} ms")
+
+
+def test_saturated_ingest_does_not_starve_broadcast():
+    """Port hiç boşalmadığında da kareler zamanında çıkar ve örnek kaybolmaz"""
+    backend, channel, frames = run_ingest(None)
+    received = np.concatenate([values for _, _, values in frames])
+    assert np.array_equal(received, np.arange(len(received)))
+    assert len(received) > INGEST_RATE * DURATION * 0.5   # ingest de ilerlemeye devam eder
+    rate, gap = check_frames(backend, frames)
+    print(f"✅ Doymuş ingest: {len(received) / DURATION:.0f} örnek/sn, kareler {rate:.1f} Hz, "
+          f"en uzun aralık {gap * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_frames_at_display_rate_carry_every_sample()
+    test_saturated_ingest_does_not_starve_broadcast()
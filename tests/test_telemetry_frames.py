@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+sensor_batch telemetri karesi testi
+Sütunlu float32 kareler + t0/dt zaman damgaları (saat geri adımı dahil), halka taşması
+ve eski (her 3 örnekte bir sözlük) formata göre bant genişliği karşılaştırması.
+sensor_delta (quantize + delta) kareleri: keyframe senkronu, CRC, NaN/sıçrama ve bant kazancı
+Abonelikler: kanal seçimi, hedef hız, last / mean / minmax seyreltme ve
+veri kesilince yarım kalan son aralığın gönderilmesi
+"""
+import os
+import sys
+
+import msgpack
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from telemetry import (  # noqa: E402
+    DELTA_Q_LIMIT,
+    DeltaDecoder,
+    DeltaEncoder,
+    SampleRing,
+    Subscription,
+    SubscriptionGroup,
+    decimate,
+    decode_batch_frame,
+    encode_batch_frame,
+    parse_subscription,
+)
+
+CHANNELS = [
+    'P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7', 'P8',
+    'T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'Tbogaz1', 'Tbogaz2',
+    'Debi1', 'Debi2',
+    'thrust', 'isp',
+    'oxygen_consumption', 'fuel_consumption', 'total_impulse', 'exhaust_velocity'
+]
+
+# Eski sensor_data karesi (yalnızca her 3. örnek gönderiliyordu)
+LEGACY_FRAME = {
+    "type": "sensor_data",
+    "data": {
+        "pressures": [1.234, 2.345, 3.456, 4.567, 5.678, 6.789, 7.890, 8.901],
+        "temperatures": [25.6, 30.1, 35.2, 40.3, 45.4, 50.5, 55.1, 60.2],
+        "debis": [],
+        "adiabatic_temperature": 0.0,
+        "thrust": 500.2,
+        "isp": 250.1,
+        "p_chamber": 0.0,
+        "oxygen_consumption": 1.2,
+        "fuel_consumption": 0.8,
+        "total_impulse": 5000.0,
+        "exhaust_velocity": 2500.0,
+        "deltap2": 0.0,
+        "kutlesel_debi": 0.0,
+        "timestamp": "2024-01-01T12:00:00.000000",
+        "errors": []
+    }
+}
+
+
+def _fill(ring, n, t0=1_700_000_000.0, rate=10_000):
+    for i in range(n):
+        ring.append(t0 + i / rate, np.full(len(CHANNELS), i, dtype=np.float32))
+
+
+def test_batch_frame_roundtrip():
+    """Tüm örnekler ve zaman damgaları mikrosaniye hassasiyetiyle geri çözülür"""
+    ring = SampleRing(len(CHANNELS), capacity=1024)
+    _fill(ring, 333)
+    seq, timestamps, rows = ring.take()
+    frame = msgpack.unpackb(msgpack.packb(encode_batch_frame(seq, timestamps, rows, CHANNELS), use_bin_type=True), raw=False)
+    decoded_ts, columns = decode_batch_frame(frame)
+    assert frame["n"] == 333 and seq == 0
+    assert np.allclose(decoded_ts, timestamps, atol=1e-6)
+    assert np.array_equal(columns["P1"], np.arange(333, dtype=np.float32))
+    assert ring.take()[1].size == 0
+    print("✅ sensor_batch kodlama/çözme doğrulandı")
+
+
+def test_batch_frame_clock_step_back():
+    """Kare içinde saat geri atlarsa ofsetler uint32'de sarmaz, zaman ekseni geri gitmez"""
+    timestamps = 1_700_000_000.0 + np.array([0.0, 0.001, 0.002, -0.5, -0.499, 0.003])
+    rows = np.arange(6 * len(CHANNELS), dtype=np.float32).reshape(6, len(CHANNELS))
+    decoded_ts, columns = decode_batch_frame(encode_batch_frame(0, timestamps, rows, CHANNELS))
+    assert np.all(np.diff(decoded_ts) >= 0) and decoded_ts[-1] - decoded_ts[0] < 0.01
+    assert np.allclose(decoded_ts, timestamps[0] + np.array([0.0, 0.001, 0.002, 0.002, 0.002, 0.003]), atol=1e-6)
+    assert np.array_equal(columns["P1"], rows[:, 0])
+    print("✅ Saat geri adımı: ofsetler sarmadı")
+
+
+def test_ring_overflow_counts_dropped():
+    """Yayıncı geride kalırsa en eski örnekler atılır ve sayılır"""
+    ring = SampleRing(len(CHANNELS), capacity=100)
+    _fill(ring, 250)
+    seq, timestamps, rows = ring.take()
+    assert seq == 150 and len(timestamps) == 100 and ring.dropped == 150
+    assert rows[0, 0] == 150 and rows[-1, 0] == 249
+    print("✅ halka taşması doğrulandı")
+
+
+def test_batch_bandwidth_vs_legacy_frames():
+    """Tam hızlı batch kareleri, eski seyrek sözlüklerden fazla bant genişliği kullanmaz"""
+    rate, display_hz = 10_000, 30
+    per_frame = rate // display_hz
+    ring = SampleRing(len(CHANNELS), capacity=4096)
+    _fill(ring, per_frame, rate=rate)
+    seq, timestamps, rows = ring.take()
+    batch_bytes = len(msgpack.packb(encode_batch_frame(seq, timestamps, rows, CHANNELS), use_bin_type=True))
+    legacy_bytes = len(msgpack.packb(LEGACY_FRAME, use_bin_type=True))
+    batch_rate = batch_bytes * display_hz
+    legacy_rate = legacy_bytes * rate / 3
+    print(f"📦 batch: {batch_bytes / per_frame:.1f} B/örnek, {batch_rate / 1024:.0f} KB/s (tüm örnekler)")
+    print(f"📦 eski:  {legacy_bytes / 3:.1f} B/örnek, {legacy_rate / 1024:.0f} KB/s (her 3 örnekte bir)")
+    assert batch_rate <= legacy_rate
+
+
+def _recorded_like_frames(frames=30, per_frame=333, rate=10_000, seed=0):
+    """Yavaş değişen + sensör çözünürlüğünde gürültülü kanallar (kayıtlı teste benzer)"""
+    rng = np.random.default_rng(seed)
+    t = 1_700_000_000.0
+    for f in range(frames):
+        k = np.arange(f * per_frame, (f + 1) * per_frame)
+        ts = t + k / rate
+        drift = np.sin(k[:, None] / 5000 + np.arange(len(CHANNELS)))
+        rows = (10 + np.arange(len(CHANNELS)) + 2 * drift + rng.normal(0, 0.005, (per_frame, len(CHANNELS))))
+        yield int(k[0]), ts, rows.astype(np.float32)
+
+
+def test_delta_frame_roundtrip_and_sync():
+    """Delta kareleri quantize hassasiyetinde çözülür, geç katılan keyframe bekler"""
+    encoder = DeltaEncoder(CHANNELS, keyframe_interval=10)
+    decoder, late = DeltaDecoder(), DeltaDecoder()
+    for i, (seq, ts, rows) in enumerate(_recorded_like_frames(frames=25)):
+        frame = msgpack.unpackb(msgpack.packb(encoder.encode(seq, ts, rows), use_bin_type=True), raw=False)
+        decoded_ts, columns = decoder.decode(frame)
+        assert np.allclose(decoded_ts, ts, atol=2e-6)
+        assert np.allclose(columns["P1"], rows[:, 0], atol=0.0005 + 1e-5)
+        assert np.allclose(columns["T1"], rows[:, 8], atol=0.05 + 1e-4)
+        if i >= 5:
+            # 5. kareden sonra katılan istemci ilk keyframe'e (10. kare) kadar veri alamaz
+            result = late.decode(frame)
+            assert (result is None) == (i < 10)
+    assert decoder.crc_errors == 0
+    print("✅ sensor_delta kodlama/çözme ve keyframe senkronu doğrulandı")
+
+
+def test_delta_crc_detects_desync():
+    """Kaybolan bir kare CRC ile yakalanır ve çözücü keyframe beklemeye döner"""
+    encoder = DeltaEncoder(CHANNELS, keyframe_interval=100)
+    decoder = DeltaDecoder()
+    frames = [encoder.encode(seq, ts, rows) for seq, ts, rows in _recorded_like_frames(frames=4)]
+    assert decoder.decode(frames[0]) is not None
+    assert decoder.decode(frames[2]) is None  # 1. kare kayboldu
+    assert decoder.crc_errors == 1 and decoder.decode(frames[3]) is None
+    print("✅ CRC ile senkron kaybı tespit edildi")
+
+
+def test_delta_nan_and_large_jump_fall_back_to_keyframe():
+    """NaN/inf ve int32'yi aşan sıçrama sessizce bozulmaz: kare keyframe olur, değerler kırpılır"""
+    encoder = DeltaEncoder(CHANNELS, keyframe_interval=100)
+    decoder = DeltaDecoder()
+    frames = list(_recorded_like_frames(frames=3))
+    decoder.decode(encoder.encode(*frames[0]))
+    seq, ts, rows = frames[1]
+    rows = rows.copy()
+    p1, thrust, isp = CHANNELS.index("P1"), CHANNELS.index("thrust"), CHANNELS.index("isp")
+    rows[10, p1] = np.nan
+    rows[20, thrust], rows[21, thrust] = -1e12, 1e12   # quantize farkı int32'yi aşar
+    rows[30, isp] = np.inf
+    frame = msgpack.unpackb(msgpack.packb(encoder.encode(seq, ts, rows), use_bin_type=True), raw=False)
+    assert frame["key"] and encoder.sanitized_frames == 1
+    _, columns = decoder.decode(frame)
+    assert columns["P1"][10] == columns["P1"][9]          # NaN önceki değeri tutar
+    limit = DELTA_Q_LIMIT * encoder.scales[thrust]
+    assert np.allclose(columns["thrust"][20:22], [-limit, limit], rtol=1e-6)
+    assert np.isclose(columns["isp"][30], DELTA_Q_LIMIT * encoder.scales[isp], rtol=1e-6)
+    keep = np.ones(len(rows), dtype=bool)
+    keep[[10, 20, 21, 30]] = False
+    assert np.allclose(columns["P1"][keep], rows[keep, p1], atol=0.0005 + 1e-5)
+    # Sonraki kare yeniden delta; zincir kopmaz
+    seq, ts, rows = frames[2]
+    frame = encoder.encode(seq, ts, rows)
+    _, columns = decoder.decode(frame)
+    assert not frame["key"] and decoder.crc_errors == 0
+    assert np.allclose(columns["P1"], rows[:, p1], atol=0.0005 + 1e-5)
+    print("✅ NaN ve büyük sıçrama keyframe ile güvenle kodlandı")
+
+
+def test_delta_bandwidth_vs_batch():
+    """Delta kodlama, tam hızlı batch karelerine göre bant genişliğini belirgin düşürür"""
+    encoder = DeltaEncoder(CHANNELS)
+    batch_bytes = delta_bytes = 0
+    for seq, ts, rows in _recorded_like_frames(frames=60):
+        batch_bytes += len(msgpack.packb(encode_batch_frame(seq, ts, rows, CHANNELS), use_bin_type=True))
+        delta_bytes += len(msgpack.packb(encoder.encode(seq, ts, rows), use_bin_type=True))
+    print(f"📦 batch: {batch_bytes * 30 / 60 / 1024:.0f} KB/s, delta: {delta_bytes * 30 / 60 / 1024:.0f} KB/s "
+          f"(%{delta_bytes / batch_bytes * 100:.0f})")
+    assert delta_bytes < batch_bytes * 0.5
+
+
+def test_decimation_methods():
+    """1 kHz veri 10 Hz'e indirgenir; tamamlanmamış son aralık bir sonraki kareye kalır"""
+    ts = 1_700_000_000.0 + np.arange(250) / 1000
+    rows = np.arange(250, dtype=np.float32)[:, None] * np.ones(2, dtype=np.float32)
+    out_ts, out_rows, rest_ts, rest_rows = decimate(ts, rows, 10.0, "last")
+    assert len(out_ts) == 2 and len(rest_ts) == 50
+    assert out_rows[:, 0].tolist() == [99, 199]
+    _, mean_rows, _, _ = decimate(ts, rows, 10.0, "mean")
+    assert np.allclose(mean_rows[:, 0], [49.5, 149.5])
+    mm_ts, mm_rows, _, _ = decimate(ts, rows, 10.0, "minmax")
+    assert mm_rows[:, 0].tolist() == [0, 99, 100, 199] and len(mm_ts) == 4
+    print("✅ last / mean / minmax seyreltme doğrulandı")
+
+
+def test_subscription_groups_share_frames():
+    """Aynı görünüm farklı sırayla istense de tek gruba düşer; grup seçili kanalları taşır"""
+    a = parse_subscription({"type": "subscribe", "format": "batch", "channels": ["P2", "P1"], "rate": 10,
+                            "decimation": "mean"}, CHANNELS)
+    b = parse_subscription({"type": "subscribe", "format": "batch", "channels": ["P1", "P2"], "rate": 10.0,
+                            "decimation": "mean"}, CHANNELS)
+    assert a == b and hash(a) == hash(b) and a.channels == ("P1", "P2")
+    # Format verilmeyen abonelik, hiç abone olmamış istemciyle aynı grupta
+    assert parse_subscription({"type": "subscribe"}, CHANNELS) == Subscription()
+    for bad in ({"channels": ["X9"]}, {"rate": 0}, {"decimation": "median"}, {"format": "csv"}):
+        try:
+            parse_subscription(bad, CHANNELS)
+            assert False, bad
+        except ValueError:
+            pass
+
+    group = SubscriptionGroup(a, CHANNELS)
+    sent = 0
+    for seq, ts, rows in _recorded_like_frames(frames=30):
+        group.feed(seq, ts, rows)
+        frame = group.build_frame(0.0, lambda: None)
+        if frame is not None:
+            decoded_ts, columns = decode_batch_frame(frame)
+            assert list(columns) == ["P1", "P2"]
+            sent += frame["n"]
+    # 30 kare x 333 örnek @10 kHz ~ 1 sn -> ~10 örnek
+    assert 8 <= sent <= 10, sent
+    print(f"✅ abonelik grubu: {sent} örnek (P1, P2 @ 10 Hz, mean)")
+
+
+def test_idle_flush_sends_last_partial_bucket():
+    """Veri kesildiğinde son yarım aralık bir aralık süresi sonra gönderilir, örnek kalmaz"""
+    group = SubscriptionGroup(Subscription(format="batch", rate=10.0, decimation="mean"), CHANNELS)
+    ts = 1_700_000_000.0 + np.arange(250) / 1000
+    group.feed(0, ts, np.repeat(np.arange(250, dtype=np.float32)[:, None], len(CHANNELS), axis=1))
+    frame = group.build_frame(0.0, lambda: None)
+    assert frame["n"] == 2 and len(group.pending_ts) == 50
+    assert not group.idle_flush_due(0.05)
+    assert group.idle_flush_due(0.1)
+    frame = group.build_frame(0.1, lambda: None, flush=True)
+    _, columns = decode_batch_frame(frame)
+    assert frame["seq"] == 200 and frame["n"] == 1 and np.isclose(columns["P1"][0], 224.5)
+    assert len(group.pending_ts) == 0 and not group.idle_flush_due(1.0)
+    print("✅ boşta: son 50 örneklik aralık tek noktada gönderildi")
+
+
+if __name__ == "__main__":
+    test_batch_frame_roundtrip()
+    test_batch_frame_clock_step_back()
+    test_ring_overflow_counts_dropped()
+    test_batch_bandwidth_vs_legacy_frames()
+    test_delta_frame_roundtrip_and_sync()
+    test_delta_crc_detects_desync()
+    test_delta_nan_and_large_jump_fall_back_to_keyframe()
+    test_delta_bandwidth_vs_batch()
+    test_decimation_methods()
+    test_subscription_groups_share_frames()
+    test_idle_flush_sends_last_partial_bucket()